@@ -0,0 +1,64 @@
+"""
+Acesso ao perfil, papel e motorista do usuário da requisição
+
+O usuário autenticado é carregado com `select_related` do perfil e do motorista
+(ver `PerfilUsuarioMiddleware` e os backends de apps.contas.backends), então os
+decorators de permissão e as views leem tudo do cache do objeto, sem consultas extras.
+As funções abaixo são o único ponto de leitura: funcionam também para usuários
+carregados de outra forma, buscando perfil e motorista juntos em uma consulta.
+"""
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
+
+from .models import Profile
+
+# Relações carregadas junto com o usuário
+RELACOES_USUARIO = ("profile", "profile__motorista")
+
+
+def usuarios_com_perfil():
+    """QuerySet de usuários já trazendo perfil e motorista"""
+    return User.objects.select_related(*RELACOES_USUARIO)
+
+
+def perfil_de(user):
+    """
+    Perfil do usuário (None para anônimos ou usuários sem perfil)
+
+    Se o perfil ainda não estiver no cache do objeto, busca perfil e motorista em uma
+    consulta e guarda o resultado (inclusive a ausência) no usuário.
+    """
+    if user is None or not user.is_authenticated:
+        return None
+    if not User.profile.is_cached(user):
+        perfil = Profile.objects.select_related("motorista").filter(user_id=user.pk).first()
+        User.profile.related.set_cached_value(user, perfil)
+        if perfil is not None:
+            Profile.user.field.set_cached_value(perfil, user)
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        return None
+
+
+def papel_de(user):
+    """Papel (Role) do usuário ou None"""
+    perfil = perfil_de(user)
+    return perfil.role if perfil is not None else None
+
+
+def tem_papel(user, *papeis):
+    """Verifica se o usuário possui algum dos papéis informados"""
+    return papel_de(user) in papeis
+
+
+def motorista_de(user):
+    """Registro de Motorista do usuário ou None"""
+    perfil = perfil_de(user)
+    if perfil is None:
+        return None
+    try:
+        return perfil.motorista
+    except ObjectDoesNotExist:
+        return None
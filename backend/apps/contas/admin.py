@@ -1,8 +1,11 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
+from django.utils import timezone
 
-from .models import Profile, EmailChangeRequest
+from . import busca
+from .models import Profile, EmailChangeRequest, EmailPendente, StatusEmail
 
 
 class ProfileInline(admin.StackedInline):
@@ -12,7 +15,38 @@ class ProfileInline(admin.StackedInline):
     fields = ("role",)
 
 
-class CustomUserAdmin(UserAdmin):
+class ChangeListBusca(ChangeList):
+    """Com uma busca e sem ordenação escolhida na tabela, ordena por relevância."""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if self.query.strip() and ORDER_VAR not in self.params:
+            queryset = queryset.order_by("-relevancia", *queryset.query.order_by)
+        return queryset
+
+
+class BuscaUsuarioAdminMixin:
+    """
+    Busca do admin pelo índice de texto (apps.contas.busca).
+
+    `search_fields` continua definido só para o admin exibir a caixa de busca. O filtro
+    de papel da lateral é repassado à busca, que o aplica antes do limite de resultados.
+    """
+
+    campo_usuario = "pk"
+    campo_papel = "profile__role"
+
+    def get_changelist(self, request, **kwargs):
+        return ChangeListBusca
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        role = request.GET.get(f"{self.campo_papel}__exact") or None
+        return busca.filtrar(queryset, search_term, self.campo_usuario, role=role), False
+
+
+class CustomUserAdmin(BuscaUsuarioAdminMixin, UserAdmin):
     inlines = (ProfileInline,)
     list_display = ("username", "email", "first_name", "last_name", "get_role", "is_staff", "date_joined")
     list_filter = ("is_staff", "is_superuser", "is_active", "profile__role", "date_joined")
@@ -27,10 +61,12 @@ class CustomUserAdmin(UserAdmin):
 
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(BuscaUsuarioAdminMixin, admin.ModelAdmin):
     list_display = ("user", "role", "created_at", "updated_at")
     list_filter = ("role", "created_at")
     search_fields = ("user__username", "user__first_name", "user__last_name", "user__email")
+    campo_usuario = "user_id"
+    campo_papel = "role"
     readonly_fields = ("created_at", "updated_at")
 
 
@@ -52,3 +88,27 @@ class EmailChangeRequestAdmin(admin.ModelAdmin):
 # Reregister UserAdmin
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
+
+
+@admin.register(EmailPendente)
+class EmailPendenteAdmin(admin.ModelAdmin):
+    list_display = (
+        "assunto",
+        "destinatarios",
+        "status",
+        "tentativas",
+        "proxima_tentativa_em",
+        "criado_em",
+        "enviado_em",
+    )
+    list_filter = ("status", "criado_em")
+    search_fields = ("assunto", "destinatarios")
+    readonly_fields = ("criado_em", "enviado_em", "tentativas", "ultimo_erro")
+    actions = ["reenfileirar"]
+
+    @admin.action(description="Reenfileirar emails selecionados")
+    def reenfileirar(self, request, queryset):
+        total = queryset.exclude(status=StatusEmail.ENVIADO).update(
+            status=StatusEmail.PENDENTE, tentativas=0, proxima_tentativa_em=timezone.now()
+        )
+        self.message_user(request, f"{total} email(s) reenfileirado(s).")
@@ -3,7 +3,20 @@ Backends de autenticação customizados para o sistema.
 """
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .cache_usuarios import obter_usuario
+
+
+def usuarios_por(campo, valor):
+    """
+    Usuários cujo `campo` (email ou username) é igual a `valor`, sem diferenciar maiúsculas
+
+    Compara `LOWER(campo) = valor normalizado`, a mesma expressão dos índices criados
+    em contas/0004, então a busca é um acesso ao índice e não uma varredura de auth_user
+    (`__iexact` usa UPPER()/LIKE e não aproveita esses índices).
+    """
+    return User.objects.alias(chave_login=Lower(campo)).filter(chave_login=valor.lower().strip())
 
 
 class EmailBackend(ModelBackend):
@@ -36,8 +49,8 @@ class EmailBackend(ModelBackend):
             # Normaliza o email para lowercase para busca case-insensitive
             email = username.lower().strip()
 
-            # Busca usuário por email
-            user = User.objects.get(email=email)
+            # Busca usuário por email (índice em lower(email))
+            user = usuarios_por("email", email).get()
 
             # Verifica a senha
             if user.check_password(password) and self.user_can_authenticate(user):
@@ -65,10 +78,8 @@ class EmailBackend(ModelBackend):
         Returns:
             User object ou None
         """
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+        # Usuário e perfil do cache; no banco, perfil e motorista vêm na mesma consulta
+        return obter_usuario(user_id)
 
 
 class EmailOrUsernameBackend(ModelBackend):
@@ -95,21 +106,24 @@ class EmailOrUsernameBackend(ModelBackend):
         if username is None or password is None:
             return None
 
-        try:
-            # Normaliza entrada
-            login_field = username.lower().strip()
-
-            # Tenta encontrar usuário por email OU username
-            user = User.objects.filter(Q(email__iexact=login_field) | Q(username__iexact=login_field)).first()
+        # Normaliza entrada
+        login_field = username.lower().strip()
 
-            if user and user.check_password(password) and self.user_can_authenticate(user):
-                return user
+        # Duas buscas pelos índices funcionais (email primeiro, depois username) em vez
+        # de um OR de comparações sem índice
+        user = usuarios_por("email", login_field).order_by("pk").first()
+        if user is None:
+            user = usuarios_por("username", login_field).order_by("pk").first()
 
-        except Exception:
-            # Em caso de erro, executa hash da senha para evitar timing attacks
+        if user is None:
+            # Executa hash da senha mesmo quando usuário não existe
+            # para evitar timing attacks
             User().set_password(password)
             return None
 
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+
         return None
 
     def get_user(self, user_id):
@@ -122,7 +136,5 @@ class EmailOrUsernameBackend(ModelBackend):
         Returns:
             User object ou None
         """
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+        # Usuário e perfil do cache; no banco, perfil e motorista vêm na mesma consulta
+        return obter_usuario(user_id)
@@ -0,0 +1,173 @@
+"""
+Busca de usuários por índice de texto
+
+`icontains` em username, nome e email não usa índice e varre auth_user inteira a cada
+busca. Aqui a busca passa por BuscaUsuario, um espelho com o texto normalizado de
+cada usuário (minúsculas, sem acentos) mantido pelos signals de User:
+
+- PostgreSQL: índice GIN de trigramas (pg_trgm) na coluna; cada termo vira um
+  `LIKE '%termo%'` atendido pelo índice e o resultado é ordenado por
+  `word_similarity`.
+- SQLite: tabela FTS5 externa alimentada por triggers; cada termo é buscado por
+  prefixo e o resultado é ordenado pelo `bm25`.
+- Outros bancos: `LIKE` no espelho, sem ordenação por relevância.
+
+Todos os termos precisam aparecer. A busca devolve no máximo LIMITE_RESULTADOS
+usuários, os mais relevantes primeiro; o filtro de papel (opcional) é aplicado na
+própria consulta ao índice, antes do limite.
+
+Alterações feitas com `QuerySet.update()`/`bulk_update()` em User não disparam
+signals: depois delas, rode `python manage.py reindexar_busca_usuarios`.
+"""
+
+import re
+import unicodedata
+from typing import List
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+from .models import BuscaUsuario, Profile
+
+LIMITE_RESULTADOS = 200
+
+TABELA_FTS = "contas_buscausuario_fts"
+
+# Campos de User que entram no texto de busca
+CAMPOS_INDEXADOS = ("username", "first_name", "last_name", "email")
+
+TAMANHO_LOTE = 1000
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas e sem acentos ("João" → "joao")"""
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def termos(busca: str) -> List[str]:
+    """Palavras da busca, normalizadas"""
+    return re.findall(r"\w+", normalizar(busca))
+
+
+def texto_do_usuario(user) -> str:
+    return normalizar(" ".join(getattr(user, campo) for campo in CAMPOS_INDEXADOS if getattr(user, campo)))
+
+
+def _gravar(usuarios):
+    BuscaUsuario.objects.bulk_create(
+        [BuscaUsuario(user_id=user.pk, texto=texto_do_usuario(user)) for user in usuarios],
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["texto"],
+    )
+
+
+def indexar(user):
+    """Grava (ou atualiza) o texto de busca do usuário em uma consulta"""
+    _gravar([user])
+
+
+def reindexar(lote=TAMANHO_LOTE) -> int:
+    """
+    Regrava o texto de busca de todos os usuários
+
+    Args:
+        lote: Usuários gravados por consulta
+
+    Returns:
+        Quantidade de usuários indexados
+    """
+    total = 0
+    usuarios = User.objects.only("pk", *CAMPOS_INDEXADOS).order_by("pk")
+    ultimo = 0
+    while True:
+        pagina = list(usuarios.filter(pk__gt=ultimo)[:lote])
+        if not pagina:
+            return total
+        _gravar(pagina)
+        total += len(pagina)
+        ultimo = pagina[-1].pk
+
+
+def _espelho(palavras, role):
+    """Linhas do espelho com todos os termos (e do papel, se informado)"""
+    consulta = BuscaUsuario.objects.all()
+    for palavra in palavras:
+        consulta = consulta.filter(texto__contains=palavra)
+    if role:
+        consulta = consulta.filter(user__profile__role=role)
+    return consulta
+
+
+def _buscar_postgresql(palavras, limite, role):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    consulta = _espelho(palavras, role)
+    return list(
+        consulta.annotate(relevancia=TrigramWordSimilarity(" ".join(palavras), "texto"))
+        .order_by("-relevancia", "-user_id")
+        .values_list("user_id", flat=True)[:limite]
+    )
+
+
+def _buscar_sqlite(palavras, limite, role):
+    expressao = " ".join(f'"{palavra}"*' for palavra in palavras)
+    sql = f"SELECT {TABELA_FTS}.rowid FROM {TABELA_FTS}"
+    parametros = [expressao]
+    if role:
+        perfis = Profile._meta.db_table
+        sql += f" JOIN {perfis} ON {perfis}.user_id = {TABELA_FTS}.rowid AND {perfis}.role = %s"
+        parametros.insert(0, role)
+    sql += f" WHERE {TABELA_FTS} MATCH %s ORDER BY rank LIMIT %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*parametros, limite])
+        return [linha[0] for linha in cursor.fetchall()]
+
+
+def _buscar_like(palavras, limite, role):
+    return list(_espelho(palavras, role).order_by("-user_id").values_list("user_id", flat=True)[:limite])
+
+
+def buscar_ids(busca: str, limite=LIMITE_RESULTADOS, role=None) -> List[int]:
+    """
+    Ids dos usuários que contêm todos os termos da busca, do mais relevante ao menos
+
+    Args:
+        busca: Texto digitado
+        limite: Máximo de usuários retornados
+        role: Papel do perfil (opcional); filtrado antes do limite
+
+    Returns:
+        Lista de ids (vazia se a busca não tiver nenhum termo)
+    """
+    palavras = termos(busca)
+    if not palavras:
+        return []
+    if connection.vendor == "postgresql":
+        return _buscar_postgresql(palavras, limite, role)
+    if connection.vendor == "sqlite":
+        return _buscar_sqlite(palavras, limite, role)
+    return _buscar_like(palavras, limite, role)
+
+
+def filtrar(queryset, busca: str, campo_usuario="pk", limite=LIMITE_RESULTADOS, role=None):
+    """
+    Restringe o queryset aos usuários encontrados, anotando `relevancia`
+
+    Args:
+        queryset: QuerySet de User ou de um model ligado a User
+        busca: Texto digitado
+        campo_usuario: Caminho até o id do usuário (ex.: "user_id" para Profile)
+        limite: Máximo de usuários considerados
+        role: Papel do perfil (opcional); filtrado antes do limite
+
+    Returns:
+        QuerySet com a anotação `relevancia` (maior = mais relevante)
+    """
+    ids = buscar_ids(busca, limite, role=role)
+    posicoes = [When(**{campo_usuario: pk}, then=Value(len(ids) - i)) for i, pk in enumerate(ids)]
+    return queryset.filter(**{f"{campo_usuario}__in": ids}).annotate(
+        relevancia=Case(*posicoes, default=Value(0), output_field=IntegerField())
+    )
@@ -0,0 +1,96 @@
+"""
+Cache de usuário + perfil para o `get_user` dos backends de autenticação
+
+Cada requisição autenticada resolvia o usuário da sessão no banco. Agora o usuário
+(com o perfil já no cache do objeto) é guardado no cache do Django por
+CACHE_USUARIOS_TIMEOUT segundos.
+
+A chave é versionada: `contas:usuario:<pk>:<versao>`, com a versão guardada em
+`contas:usuario:<pk>:versao`. Invalidar é só trocar a versão, o que também protege
+contra uma requisição concorrente que leu o usuário antes da alteração e o grava no
+cache depois dela (a cópia velha fica numa chave que ninguém mais lê).
+
+Invalidado em: save/delete de User e Profile e logout. O motorista não entra no
+cache (muda a cada atribuição, inclusive por update em massa) e é carregado sob
+demanda por apps.contas.acesso.motorista_de.
+
+Com o cache local em memória (padrão) cada processo teria sua cópia e a invalidação
+só valeria para o processo que gravou; por isso, com ele, CACHE_USUARIOS_TIMEOUT é 0
+por padrão e o usuário é sempre lido do banco. Com um cache compartilhado
+(CACHE_BACKEND/CACHE_LOCATION) o timeout padrão é 60.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from .acesso import usuarios_com_perfil
+
+PREFIXO = "contas:usuario"
+
+
+def tempo_cache():
+    return getattr(settings, "CACHE_USUARIOS_TIMEOUT", 0)
+
+
+def _chave_versao(user_id):
+    return f"{PREFIXO}:{user_id}:versao"
+
+
+def _versao(user_id):
+    chave = _chave_versao(user_id)
+    versao = cache.get(chave)
+    if versao is None:
+        cache.add(chave, uuid.uuid4().hex, None)
+        versao = cache.get(chave)
+    return versao
+
+
+def invalidar_usuario(user_id):
+    """Descarta o usuário em cache (as próximas leituras vão ao banco)"""
+    if tempo_cache() <= 0:
+        return
+    cache.set(_chave_versao(user_id), uuid.uuid4().hex, None)
+
+
+def _sem_motorista(user):
+    """Remove o motorista do cache do perfil antes de serializar; devolve uma função que o restaura"""
+    try:
+        perfil = user.profile
+    except Exception:
+        return lambda: None
+    cache_relacoes = perfil._state.fields_cache
+    if "motorista" not in cache_relacoes:
+        return lambda: None
+    motorista = cache_relacoes.pop("motorista")
+    return lambda: cache_relacoes.__setitem__("motorista", motorista)
+
+
+def obter_usuario(user_id):
+    """
+    Usuário com perfil (e motorista, quando lido do banco) a partir do cache
+
+    Returns:
+        User ou None se não existir
+    """
+    if tempo_cache() <= 0:
+        return usuarios_com_perfil().filter(pk=user_id).first()
+
+    chave = f"{PREFIXO}:{user_id}:{_versao(user_id)}"
+    user = cache.get(chave)
+    if user is not None:
+        return user
+
+    try:
+        user = usuarios_com_perfil().get(pk=user_id)
+    except User.DoesNotExist:
+        return None
+
+    restaurar = _sem_motorista(user)
+    try:
+        cache.set(chave, user, tempo_cache())
+    finally:
+        restaurar()
+    return user
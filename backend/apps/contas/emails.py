@@ -0,0 +1,229 @@
+"""
+Fila de saída de emails (EmailPendente)
+
+Signals e views não falam mais com o provedor (Mailgun em produção) durante a
+requisição: `FilaEmails.enfileirar` grava o email já renderizado na mesma transação
+que o originou, então ele só passa a existir quando essa transação é confirmada (um
+cadastro revertido não envia nada). O comando `processar_emails` consome a fila:
+
+- reserva um lote de emails vencidos (`select_for_update(skip_locked=True)` onde o
+  banco suporta), empurrando `proxima_tentativa_em` para que outro worker não os pegue
+- envia o lote em até `concorrencia` threads, cada uma com uma única conexão do
+  EMAIL_BACKEND reaproveitada para todos os seus emails
+- em caso de erro reagenda com backoff exponencial; após `max_tentativas` o email
+  fica como FALHOU para análise no admin
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import EmailPendente, StatusEmail
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 50
+CONCORRENCIA = 4
+MAX_TENTATIVAS = 5
+TAMANHO_INSERCAO = 500
+
+# Backoff: 1 min, 2 min, 4 min... limitado a 1 hora
+ESPERA_INICIAL = timedelta(minutes=1)
+ESPERA_MAXIMA = timedelta(hours=1)
+
+# Tempo em que um email reservado fica invisível para outros workers
+RESERVA = timedelta(minutes=5)
+
+
+def espera_apos(tentativas):
+    """Intervalo até a próxima tentativa depois de `tentativas` falhas"""
+    return min(ESPERA_INICIAL * 2 ** max(tentativas - 1, 0), ESPERA_MAXIMA)
+
+
+@dataclass
+class ResultadoProcessamento:
+    """Resultado de uma rodada do processamento da fila"""
+
+    enviados: int = 0
+    reagendados: int = 0
+    falhas: int = 0
+
+    @property
+    def total(self):
+        return self.enviados + self.reagendados + self.falhas
+
+    def somar(self, outro: "ResultadoProcessamento"):
+        self.enviados += outro.enviados
+        self.reagendados += outro.reagendados
+        self.falhas += outro.falhas
+
+
+class FilaEmails:
+    """Service de enfileiramento e envio de emails"""
+
+    @staticmethod
+    def enfileirar(assunto, texto, destinatarios, html="", remetente=None) -> EmailPendente:
+        """
+        Coloca um email na fila de saída
+
+        Args:
+            assunto: Assunto do email
+            texto: Corpo em texto simples
+            destinatarios: Lista de endereços
+            html: Corpo HTML alternativo (opcional)
+            remetente: Remetente (padrão: DEFAULT_FROM_EMAIL)
+
+        Returns:
+            EmailPendente criado
+        """
+        return EmailPendente.objects.create(
+            assunto=assunto,
+            corpo_texto=texto,
+            corpo_html=html or "",
+            remetente=remetente or settings.DEFAULT_FROM_EMAIL,
+            destinatarios=list(destinatarios),
+        )
+
+    @staticmethod
+    def enfileirar_lote(itens, remetente=None) -> list[EmailPendente]:
+        """
+        Coloca vários emails já renderizados na fila com inserções em lote
+
+        Args:
+            itens: Pares (EmailRenderizado, destinatarios)
+            remetente: Remetente (padrão: DEFAULT_FROM_EMAIL)
+
+        Returns:
+            Lista de EmailPendente criados
+        """
+        remetente = remetente or settings.DEFAULT_FROM_EMAIL
+        return EmailPendente.objects.bulk_create(
+            [
+                EmailPendente(
+                    assunto=email.assunto,
+                    corpo_texto=email.texto,
+                    corpo_html=email.html or "",
+                    remetente=remetente,
+                    destinatarios=list(destinatarios),
+                )
+                for email, destinatarios in itens
+            ],
+            batch_size=TAMANHO_INSERCAO,
+        )
+
+    @staticmethod
+    def _mensagem(email, conexao):
+        mensagem = EmailMultiAlternatives(
+            subject=email.assunto,
+            body=email.corpo_texto,
+            from_email=email.remetente,
+            to=email.destinatarios,
+            connection=conexao,
+        )
+        if email.corpo_html:
+            mensagem.attach_alternative(email.corpo_html, "text/html")
+        return mensagem
+
+    @classmethod
+    def _enviar_grupo(cls, emails):
+        """
+        Envia um grupo de emails por uma única conexão (executado em uma thread)
+
+        Returns:
+            Lista de (email, erro ou None)
+        """
+        resultados = []
+        try:
+            with get_connection(fail_silently=False) as conexao:
+                for email in emails:
+                    try:
+                        cls._mensagem(email, conexao).send()
+                        resultados.append((email, None))
+                    except Exception as e:
+                        resultados.append((email, f"{type(e).__name__}: {e}"))
+        except Exception as e:
+            # Falha ao abrir/fechar a conexão: os emails ainda não enviados voltam para a fila
+            enviados = {email.pk for email, erro in resultados if erro is None}
+            erro = f"{type(e).__name__}: {e}"
+            resultados = [(email, None if email.pk in enviados else erro) for email in emails]
+        return resultados
+
+    @staticmethod
+    @transaction.atomic
+    def _reservar(lote, agora):
+        """Reserva os próximos emails vencidos, tornando-os invisíveis para outros workers"""
+        fila = EmailPendente.objects.filter(status=StatusEmail.PENDENTE, proxima_tentativa_em__lte=agora)
+        if connection.features.has_select_for_update_skip_locked:
+            fila = fila.select_for_update(skip_locked=True)
+        emails = list(fila.order_by("proxima_tentativa_em", "id")[:lote])
+        for email in emails:
+            email.tentativas += 1
+            email.proxima_tentativa_em = agora + RESERVA
+        EmailPendente.objects.bulk_update(emails, ["tentativas", "proxima_tentativa_em"])
+        return emails
+
+    @classmethod
+    def processar_lote(
+        cls, lote=TAMANHO_LOTE, concorrencia=CONCORRENCIA, max_tentativas=MAX_TENTATIVAS
+    ) -> ResultadoProcessamento:
+        """
+        Envia um lote de emails vencidos
+
+        Args:
+            lote: Máximo de emails reservados
+            concorrencia: Máximo de threads de envio simultâneas
+            max_tentativas: Tentativas antes de marcar o email como FALHOU
+
+        Returns:
+            ResultadoProcessamento
+        """
+        emails = cls._reservar(lote, timezone.now())
+        resultado = ResultadoProcessamento()
+        if not emails:
+            return resultado
+
+        grupos = [emails[i::concorrencia] for i in range(min(concorrencia, len(emails)))]
+        if len(grupos) == 1:
+            enviados = cls._enviar_grupo(grupos[0])
+        else:
+            with ThreadPoolExecutor(max_workers=len(grupos)) as executor:
+                enviados = [item for grupo in executor.map(cls._enviar_grupo, grupos) for item in grupo]
+
+        agora = timezone.now()
+        for email, erro in enviados:
+            if erro is None:
+                email.status = StatusEmail.ENVIADO
+                email.enviado_em = agora
+                email.ultimo_erro = ""
+                resultado.enviados += 1
+                continue
+            logger.warning("Falha ao enviar email %s (tentativa %s): %s", email.pk, email.tentativas, erro)
+            email.ultimo_erro = erro
+            if email.tentativas >= max_tentativas:
+                email.status = StatusEmail.FALHOU
+                resultado.falhas += 1
+            else:
+                email.proxima_tentativa_em = agora + espera_apos(email.tentativas)
+                resultado.reagendados += 1
+        EmailPendente.objects.bulk_update(
+            [email for email, _ in enviados], ["status", "enviado_em", "ultimo_erro", "proxima_tentativa_em"]
+        )
+        return resultado
+
+    @classmethod
+    def processar(
+        cls, lote=TAMANHO_LOTE, concorrencia=CONCORRENCIA, max_tentativas=MAX_TENTATIVAS
+    ) -> ResultadoProcessamento:
+        """Processa lotes até não haver mais emails vencidos"""
+        total = ResultadoProcessamento()
+        while True:
+            resultado = cls.processar_lote(lote, concorrencia, max_tentativas)
+            total.somar(resultado)
+            if resultado.total < lote:
+                return total
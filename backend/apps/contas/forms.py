@@ -3,13 +3,14 @@ from django.contrib.auth.forms import UserCreationForm, PasswordResetForm, Passw
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.contrib.sites.shortcuts import get_current_site
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
 from django.conf import settings
+from .backends import usuarios_por
 from .models import Profile
+from .renderizacao import ModeloEmail, RenderizadorEmail
 
 
 class SignupForm(UserCreationForm):
@@ -52,7 +53,7 @@ class SignupForm(UserCreationForm):
         email = self.cleaned_data.get("email")
         if email:
             email = email.lower().strip()
-            if User.objects.filter(email=email).exists():
+            if usuarios_por("email", email).exists():
                 raise ValidationError("Este e-mail já está em uso.")
         return email
 
@@ -123,36 +124,39 @@ class CustomPasswordResetForm(PasswordResetForm):
         else:
             site_name = domain = domain_override
 
-        for user in active_users:
-            # Contexto para os templates
-            context = {
-                "email": email,
-                "domain": domain,
-                "site_name": site_name,
+        # Dados comuns a todas as contas com este email; cada conta recebe o próprio link
+        comum = {
+            "email": email,
+            "domain": domain,
+            "site_name": site_name,
+            "protocol": "https" if use_https else "http",
+            **(extra_email_context or {}),
+        }
+        modelo = ModeloEmail(
+            assunto=subject_template_name,
+            texto="contas/email/password_reset_email.txt",
+            html="contas/email/password_reset_email.html",
+        )
+        contextos = [
+            {
                 "uid": urlsafe_base64_encode(force_bytes(user.pk)),
                 "user": user,
                 "token": token_generator.make_token(user),
-                "protocol": "https" if use_https else "http",
-                **(extra_email_context or {}),
             }
+            for user in active_users
+        ]
 
-            # Renderiza o assunto do email
-            subject = render_to_string(subject_template_name, context)
-            subject = "".join(subject.splitlines())  # Remove quebras de linha
-
-            # Renderiza o template HTML
-            html_content = render_to_string("contas/email/password_reset_email.html", context)
-
-            # Renderiza o template de texto simples
-            text_content = render_to_string("contas/email/password_reset_email.txt", context)
-
+        for renderizado in RenderizadorEmail.renderizar_lote(modelo, contextos, comum=comum):
             # Cria o email multipart
             email_message = EmailMultiAlternatives(
-                subject=subject, body=text_content, from_email=from_email or settings.DEFAULT_FROM_EMAIL, to=[email]
+                subject=renderizado.assunto,
+                body=renderizado.texto,
+                from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+                to=[email],
             )
 
             # Anexa a versão HTML
-            email_message.attach_alternative(html_content, "text/html")
+            email_message.attach_alternative(renderizado.html, "text/html")
 
             # Envia o email
             email_message.send(fail_silently=False)
@@ -193,7 +197,7 @@ class UserEditForm(forms.ModelForm):
         if email:
             email = email.lower().strip()
             # Verifica se o email já existe para outro usuário
-            if User.objects.filter(email=email).exclude(pk=self.instance.pk).exists():
+            if usuarios_por("email", email).exclude(pk=self.instance.pk).exists():
                 raise ValidationError("Este e-mail já está em uso por outro usuário.")
         return email
 
@@ -0,0 +1,165 @@
+"""
+Limpeza em lotes de registros expirados (comando `limpar_expirados`)
+
+Tokens de mudança de email vencidos, sessões expiradas, solicitações de mudança de
+perfil rejeitadas há muito tempo e emails já enviados da fila de saída nunca eram
+removidos. Apagar tudo em um único DELETE seguraria locks nessas tabelas (consultadas
+a cada login/requisição) durante toda a operação, então cada tabela é percorrida em
+ordem de chave primária:
+
+- seleciona até `lote` chaves candidatas acima da última chave processada
+- apaga só essas chaves em uma transação curta
+- dorme `pausa` segundos antes do próximo lote, deixando o banco livre para o tráfego
+
+Modelos com contador de status (ver apps.gestao.contadores) têm receivers de
+`post_delete`, o que impede o DELETE direto do Django e faria cada lote carregar as
+instâncias e disparar um signal por linha. Para eles o lote é apagado sem signals e a
+baixa nos contadores é registrada uma vez por lote.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.utils import timezone
+
+from apps.gestao import contadores
+from apps.gestao.models import SolicitacaoMudancaPerfil, StatusSolicitacao
+
+from .models import EmailChangeRequest, EmailPendente, StatusEmail
+
+TAMANHO_LOTE = 1000
+PAUSA = 0.1
+DIAS_SOLICITACOES = 90
+DIAS_EMAILS = 30
+
+
+def _definicao_contada(modelo):
+    """Definição de contador do modelo, se ele for contado e não tiver relações dependentes"""
+    if modelo._meta.related_objects:
+        return None
+    return next((definicao for definicao in contadores.DEFINICOES if definicao.model is modelo), None)
+
+
+def _apagar_contados(queryset, chaves, definicao):
+    """
+    Apaga as chaves sem signals e registra a exclusão nos contadores
+
+    Returns:
+        int: Registros apagados
+    """
+    campo = definicao.campo or "pk"
+    linhas = list(queryset.filter(pk__in=chaves).select_for_update().values_list("pk", campo))
+    if not linhas:
+        return 0
+    apagados = queryset.model._base_manager.filter(pk__in=[pk for pk, _ in linhas])._raw_delete(queryset.db)
+    valores = [valor if definicao.campo else True for _, valor in linhas]
+    contadores.registrar_transicoes(definicao.entidade, [(valor, None) for valor in valores])
+    return apagados
+
+
+def apagar_em_lotes(queryset, lote=TAMANHO_LOTE, pausa=PAUSA):
+    """
+    Apaga os registros do queryset em lotes limitados por chave primária
+
+    Args:
+        queryset: Registros a apagar (o filtro é reavaliado a cada lote)
+        lote: Quantidade máxima de registros por DELETE
+        pausa: Segundos de espera entre lotes
+
+    Returns:
+        int: Total de registros apagados (sem contar os apagados em cascata)
+    """
+    modelo = queryset.model
+    definicao = _definicao_contada(modelo)
+    ultima_chave = None
+    total = 0
+
+    while True:
+        candidatos = queryset.order_by("pk")
+        if ultima_chave is not None:
+            candidatos = candidatos.filter(pk__gt=ultima_chave)
+        chaves = list(candidatos.values_list("pk", flat=True)[:lote])
+        if not chaves:
+            return total
+
+        with transaction.atomic():
+            if definicao is not None:
+                total += _apagar_contados(queryset, chaves, definicao)
+            else:
+                _, por_modelo = modelo._base_manager.filter(pk__in=chaves).delete()
+                total += por_modelo.get(modelo._meta.label, 0)
+        ultima_chave = chaves[-1]
+
+        if len(chaves) < lote:
+            return total
+        if pausa:
+            time.sleep(pausa)
+
+
+@dataclass
+class ResultadoLimpeza:
+    """Quantidade de registros apagados por tipo"""
+
+    contagens: dict = field(default_factory=dict)
+
+    @property
+    def total(self):
+        return sum(self.contagens.values())
+
+
+class LimpezaExpirados:
+    """Serviço de remoção dos registros expirados"""
+
+    @staticmethod
+    def alvos(dias_solicitacoes=DIAS_SOLICITACOES, dias_emails=DIAS_EMAILS):
+        """
+        Querysets dos registros expirados, na ordem em que são apagados
+
+        Returns:
+            list[tuple[str, QuerySet]]: (descrição, registros)
+        """
+        agora = timezone.now()
+        return [
+            ("tokens de mudança de email", EmailChangeRequest.objects.filter(expires_at__lt=agora)),
+            ("sessões", Session.objects.filter(expire_date__lt=agora)),
+            (
+                "solicitações de perfil rejeitadas",
+                SolicitacaoMudancaPerfil.objects.filter(
+                    status=StatusSolicitacao.REJEITADA, created_at__lt=agora - timedelta(days=dias_solicitacoes)
+                ),
+            ),
+            (
+                "emails enviados",
+                EmailPendente.objects.filter(
+                    status=StatusEmail.ENVIADO, enviado_em__lt=agora - timedelta(days=dias_emails)
+                ),
+            ),
+        ]
+
+    @classmethod
+    def executar(
+        cls, lote=TAMANHO_LOTE, pausa=PAUSA, dias_solicitacoes=DIAS_SOLICITACOES, dias_emails=DIAS_EMAILS, simular=False
+    ):
+        """
+        Apaga (ou apenas conta, com `simular`) os registros expirados
+
+        Args:
+            lote: Registros por DELETE
+            pausa: Segundos entre lotes
+            dias_solicitacoes: Idade mínima das solicitações rejeitadas
+            dias_emails: Idade mínima dos emails enviados
+            simular: Só conta, sem apagar
+
+        Returns:
+            ResultadoLimpeza
+        """
+        resultado = ResultadoLimpeza()
+        for descricao, queryset in cls.alvos(dias_solicitacoes, dias_emails):
+            if simular:
+                resultado.contagens[descricao] = queryset.count()
+            else:
+                resultado.contagens[descricao] = apagar_em_lotes(queryset, lote=lote, pausa=pausa)
+        return resultado
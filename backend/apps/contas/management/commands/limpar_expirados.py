@@ -0,0 +1,56 @@
+"""
+Comando que remove tokens de mudança de email vencidos, sessões expiradas,
+solicitações de perfil rejeitadas antigas e emails já enviados
+
+Apaga em lotes pequenos por chave primária com pausas entre eles, então pode rodar
+(via cron) com o sistema atendendo requisições.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.contas.limpeza import DIAS_EMAILS, DIAS_SOLICITACOES, PAUSA, TAMANHO_LOTE, LimpezaExpirados
+
+
+class Command(BaseCommand):
+    help = "Remove em lotes os registros expirados (tokens de email, sessões, solicitações e emails enviados)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote", type=int, default=TAMANHO_LOTE, help=f"Registros apagados por vez (padrão: {TAMANHO_LOTE})"
+        )
+        parser.add_argument(
+            "--pausa", type=float, default=PAUSA, help=f"Segundos de espera entre lotes (padrão: {PAUSA})"
+        )
+        parser.add_argument(
+            "--dias-solicitacoes",
+            type=int,
+            default=DIAS_SOLICITACOES,
+            help=f"Idade mínima das solicitações de perfil rejeitadas (padrão: {DIAS_SOLICITACOES})",
+        )
+        parser.add_argument(
+            "--dias-emails",
+            type=int,
+            default=DIAS_EMAILS,
+            help=f"Idade mínima dos emails enviados da fila (padrão: {DIAS_EMAILS})",
+        )
+        parser.add_argument("--simular", action="store_true", help="Apenas conta os registros, sem apagar")
+
+    def handle(self, *args, **options):
+        resultado = LimpezaExpirados.executar(
+            lote=max(options["lote"], 1),
+            pausa=max(options["pausa"], 0),
+            dias_solicitacoes=max(options["dias_solicitacoes"], 0),
+            dias_emails=max(options["dias_emails"], 0),
+            simular=options["simular"],
+        )
+
+        acao = "a apagar" if options["simular"] else "apagado(s)"
+        for descricao, quantidade in resultado.contagens.items():
+            self.stdout.write(f"  {descricao}: {quantidade} {acao}")
+
+        if options["simular"]:
+            self.stdout.write(self.style.WARNING(f"⚠️  Simulação: {resultado.total} registro(s) seriam apagados."))
+        elif resultado.total:
+            self.stdout.write(self.style.SUCCESS(f"✅ {resultado.total} registro(s) expirado(s) removido(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Nenhum registro expirado."))
@@ -0,0 +1,68 @@
+"""
+Comando (worker) que envia os emails da fila de saída
+
+Sem `--continuo` esvazia a fila e termina (adequado para cron); com `--continuo`
+fica verificando a fila a cada `--intervalo` segundos.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.contas.emails import CONCORRENCIA, MAX_TENTATIVAS, TAMANHO_LOTE, FilaEmails
+
+
+class Command(BaseCommand):
+    help = "Envia os emails pendentes da fila de saída, com novas tentativas e concorrência limitada"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote", type=int, default=TAMANHO_LOTE, help=f"Emails reservados por vez (padrão: {TAMANHO_LOTE})"
+        )
+        parser.add_argument(
+            "--concorrencia",
+            type=int,
+            default=CONCORRENCIA,
+            help=f"Envios simultâneos (padrão: {CONCORRENCIA})",
+        )
+        parser.add_argument(
+            "--max-tentativas",
+            type=int,
+            default=MAX_TENTATIVAS,
+            help=f"Tentativas antes de desistir de um email (padrão: {MAX_TENTATIVAS})",
+        )
+        parser.add_argument("--continuo", action="store_true", help="Continua verificando a fila até ser interrompido")
+        parser.add_argument(
+            "--intervalo", type=float, default=5.0, help="Segundos entre verificações no modo contínuo (padrão: 5)"
+        )
+
+    def processar(self, options):
+        resultado = FilaEmails.processar(
+            lote=max(options["lote"], 1),
+            concorrencia=max(options["concorrencia"], 1),
+            max_tentativas=max(options["max_tentativas"], 1),
+        )
+        if resultado.total:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ {resultado.enviados} email(s) enviado(s), {resultado.reagendados} reagendado(s), "
+                    f"{resultado.falhas} com falha definitiva."
+                )
+            )
+        if resultado.falhas:
+            self.stdout.write(self.style.WARNING("⚠️  Veja os emails com status 'Falhou' no admin."))
+        return resultado
+
+    def handle(self, *args, **options):
+        if not options["continuo"]:
+            if not self.processar(options).total:
+                self.stdout.write(self.style.SUCCESS("✅ Nenhum email pendente."))
+            return
+
+        self.stdout.write("Processando a fila de emails (Ctrl+C para sair)...")
+        try:
+            while True:
+                self.processar(options)
+                time.sleep(options["intervalo"])
+        except KeyboardInterrupt:
+            self.stdout.write("\nEncerrado.")
@@ -0,0 +1,23 @@
+"""
+Comando que regrava o índice de busca de usuários (apps.contas.busca)
+
+Os signals mantêm o índice em dia; rode depois de alterações em massa em User
+(`QuerySet.update()`, importações) ou para reconstruir o índice do zero.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.contas.busca import TAMANHO_LOTE, reindexar
+
+
+class Command(BaseCommand):
+    help = "Regrava o texto de busca de todos os usuários"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote", type=int, default=TAMANHO_LOTE, help=f"Usuários gravados por vez (padrão: {TAMANHO_LOTE})"
+        )
+
+    def handle(self, *args, **options):
+        total = reindexar(lote=max(options["lote"], 1))
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} usuário(s) indexado(s)."))
@@ -0,0 +1,38 @@
+"""
+Middleware que carrega o usuário da requisição junto com perfil e motorista
+"""
+
+from django.contrib.auth.middleware import get_user
+from django.utils.functional import SimpleLazyObject
+
+from .acesso import perfil_de
+
+
+def carregar_usuario(request):
+    """
+    Usuário da sessão com perfil e motorista no cache do objeto
+
+    Os backends de apps.contas leem usuário e perfil do cache (apps.contas.cache_usuarios)
+    ou, na falta dele, trazem perfil e motorista na mesma consulta do usuário; para
+    sessões de outros backends (ex.: ModelBackend do admin) perfil e motorista vêm em
+    uma única consulta adicional.
+    """
+    user = get_user(request)
+    perfil_de(user)
+    return user
+
+
+class PerfilUsuarioMiddleware:
+    """
+    Substitui o `request.user` preguiçoso do AuthenticationMiddleware por um que já
+    resolve perfil e motorista, usados pelos decorators de permissão de todas as apps.
+
+    Deve vir logo depois de django.contrib.auth.middleware.AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user = SimpleLazyObject(lambda: carregar_usuario(request))
+        return self.get_response(request)
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.7 on 2026-10-19 03:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0002_emailchangerequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assunto', models.CharField(max_length=255, verbose_name='Assunto')),
+                ('corpo_texto', models.TextField(verbose_name='Corpo (texto)')),
+                ('corpo_html', models.TextField(blank=True, default='', verbose_name='Corpo (HTML)')),
+                ('remetente', models.CharField(max_length=255, verbose_name='Remetente')),
+                ('destinatarios', models.JSONField(default=list, verbose_name='Destinatários')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], default='pendente', max_length=10, verbose_name='Status')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('proxima_tentativa_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próxima tentativa em')),
+                ('ultimo_erro', models.TextField(blank=True, default='', verbose_name='Último erro')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('enviado_em', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+            ],
+            options={
+                'verbose_name': 'Email Pendente',
+                'verbose_name_plural': 'Emails Pendentes',
+                'ordering': ['proxima_tentativa_em', 'id'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa_em'], name='email_fila_idx')],
+            },
+        ),
+    ]
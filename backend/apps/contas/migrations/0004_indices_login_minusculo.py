@@ -0,0 +1,44 @@
+"""
+Índices funcionais em lower(email) e lower(username) de auth_user
+
+O login procura o usuário por `LOWER(email) = ...` e `LOWER(username) = ...`
+(apps.contas.backends); sem estes índices cada login varre a tabela inteira. Como
+auth_user pertence ao django.contrib.auth, os índices são criados aqui via
+schema_editor, apenas nos bancos com suporte a índices de expressão.
+"""
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+INDICES = [
+    models.Index(Lower("email"), name="auth_user_email_lower_idx"),
+    models.Index(Lower("username"), name="auth_user_username_lower_idx"),
+]
+
+
+def criar_indices(apps, schema_editor):
+    if not schema_editor.connection.features.supports_expression_indexes:
+        return
+    User = apps.get_model("auth", "User")
+    for indice in INDICES:
+        schema_editor.add_index(User, indice)
+
+
+def remover_indices(apps, schema_editor):
+    if not schema_editor.connection.features.supports_expression_indexes:
+        return
+    User = apps.get_model("auth", "User")
+    for indice in INDICES:
+        schema_editor.remove_index(User, indice)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contas", "0003_fila_emails"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
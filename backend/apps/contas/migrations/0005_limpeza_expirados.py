@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-19 03:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0004_indices_login_minusculo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailchangerequest',
+            index=models.Index(fields=['expires_at'], name='email_change_expira_idx'),
+        ),
+    ]
@@ -0,0 +1,125 @@
+"""
+Índice de busca de usuários (apps.contas.busca)
+
+Cria o espelho BuscaUsuario, preenche com os usuários existentes e cria o índice de
+texto conforme o banco:
+
+- PostgreSQL: extensão pg_trgm e índice GIN de trigramas em `texto`
+- SQLite: tabela FTS5 externa `contas_buscausuario_fts` mantida por triggers
+"""
+
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+CAMPOS = ("username", "first_name", "last_name", "email")
+
+SQL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX contas_busca_usuario_trgm_idx ON contas_buscausuario USING gin (texto gin_trgm_ops)",
+]
+
+REVERSO_POSTGRESQL = ["DROP INDEX IF EXISTS contas_busca_usuario_trgm_idx"]
+
+SQL_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE contas_buscausuario_fts USING fts5(
+        texto, content='contas_buscausuario', content_rowid='user_id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER contas_buscausuario_ai AFTER INSERT ON contas_buscausuario BEGIN
+        INSERT INTO contas_buscausuario_fts(rowid, texto) VALUES (new.user_id, new.texto);
+    END
+    """,
+    """
+    CREATE TRIGGER contas_buscausuario_ad AFTER DELETE ON contas_buscausuario BEGIN
+        INSERT INTO contas_buscausuario_fts(contas_buscausuario_fts, rowid, texto)
+        VALUES ('delete', old.user_id, old.texto);
+    END
+    """,
+    """
+    CREATE TRIGGER contas_buscausuario_au AFTER UPDATE ON contas_buscausuario BEGIN
+        INSERT INTO contas_buscausuario_fts(contas_buscausuario_fts, rowid, texto)
+        VALUES ('delete', old.user_id, old.texto);
+        INSERT INTO contas_buscausuario_fts(rowid, texto) VALUES (new.user_id, new.texto);
+    END
+    """,
+    "INSERT INTO contas_buscausuario_fts(contas_buscausuario_fts) VALUES ('rebuild')",
+]
+
+REVERSO_SQLITE = [
+    "DROP TRIGGER IF EXISTS contas_buscausuario_ai",
+    "DROP TRIGGER IF EXISTS contas_buscausuario_ad",
+    "DROP TRIGGER IF EXISTS contas_buscausuario_au",
+    "DROP TABLE IF EXISTS contas_buscausuario_fts",
+]
+
+
+def _normalizar(texto):
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def preencher(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    BuscaUsuario = apps.get_model("contas", "BuscaUsuario")
+    usuarios = User.objects.only("pk", *CAMPOS).iterator(chunk_size=1000)
+    lote = []
+    for user in usuarios:
+        texto = _normalizar(" ".join(getattr(user, campo) for campo in CAMPOS if getattr(user, campo)))
+        lote.append(BuscaUsuario(user_id=user.pk, texto=texto))
+        if len(lote) == 1000:
+            BuscaUsuario.objects.bulk_create(lote)
+            lote = []
+    BuscaUsuario.objects.bulk_create(lote)
+
+
+def criar_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    comandos = {"postgresql": SQL_POSTGRESQL, "sqlite": SQL_SQLITE}.get(vendor, [])
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+def remover_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    comandos = {"postgresql": REVERSO_POSTGRESQL, "sqlite": REVERSO_SQLITE}.get(vendor, [])
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contas", "0005_limpeza_expirados"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BuscaUsuario",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="busca",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuário",
+                    ),
+                ),
+                ("texto", models.TextField(verbose_name="Texto de busca")),
+            ],
+            options={
+                "verbose_name": "Índice de Busca de Usuário",
+                "verbose_name_plural": "Índice de Busca de Usuários",
+            },
+        ),
+        migrations.RunPython(preencher, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
@@ -42,6 +42,28 @@ class Profile(models.Model):
         return self.role == Role.OWNER
 
 
+class BuscaUsuario(models.Model):
+    """
+    Texto de busca de um usuário (apps.contas.busca).
+
+    Username, nome e email normalizados (minúsculas, sem acentos), mantidos pelos
+    signals de User. No PostgreSQL a coluna tem um índice GIN de trigramas; no SQLite
+    alimenta a tabela FTS5 `contas_buscausuario_fts` (por triggers).
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="busca", verbose_name="Usuário"
+    )
+    texto = models.TextField(verbose_name="Texto de busca")
+
+    class Meta:
+        verbose_name = "Índice de Busca de Usuário"
+        verbose_name_plural = "Índice de Busca de Usuários"
+
+    def __str__(self):
+        return self.texto
+
+
 class EmailChangeRequest(models.Model):
     """
     Modelo para armazenar solicitações de mudança de email que precisam de confirmação.
@@ -60,6 +82,7 @@ class EmailChangeRequest(models.Model):
         verbose_name = "Solicitação de Mudança de Email"
         verbose_name_plural = "Solicitações de Mudança de Email"
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["expires_at"], name="email_change_expira_idx")]
 
     def __str__(self):
         return f"{self.user.username}: {self.old_email} → {self.new_email}"
@@ -77,3 +100,41 @@ class EmailChangeRequest(models.Model):
     @property
     def is_valid(self):
         return not self.confirmed and not self.is_expired
+
+
+class StatusEmail(models.TextChoices):
+    PENDENTE = "pendente", "Pendente"
+    ENVIADO = "enviado", "Enviado"
+    FALHOU = "falhou", "Falhou"
+
+
+class EmailPendente(models.Model):
+    """
+    Email na fila de saída (apps.contas.emails).
+
+    Gravado na mesma transação que o originou e enviado depois pelo comando
+    `processar_emails`, fora do ciclo da requisição.
+    """
+
+    assunto = models.CharField(max_length=255, verbose_name="Assunto")
+    corpo_texto = models.TextField(verbose_name="Corpo (texto)")
+    corpo_html = models.TextField(blank=True, default="", verbose_name="Corpo (HTML)")
+    remetente = models.CharField(max_length=255, verbose_name="Remetente")
+    destinatarios = models.JSONField(default=list, verbose_name="Destinatários")
+    status = models.CharField(
+        max_length=10, choices=StatusEmail.choices, default=StatusEmail.PENDENTE, verbose_name="Status"
+    )
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    proxima_tentativa_em = models.DateTimeField(default=timezone.now, verbose_name="Próxima tentativa em")
+    ultimo_erro = models.TextField(blank=True, default="", verbose_name="Último erro")
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    enviado_em = models.DateTimeField(null=True, blank=True, verbose_name="Enviado em")
+
+    class Meta:
+        verbose_name = "Email Pendente"
+        verbose_name_plural = "Emails Pendentes"
+        ordering = ["proxima_tentativa_em", "id"]
+        indexes = [models.Index(fields=["status", "proxima_tentativa_em"], name="email_fila_idx")]
+
+    def __str__(self):
+        return f"{self.assunto} → {', '.join(self.destinatarios)} ({self.get_status_display()})"
@@ -0,0 +1,161 @@
+"""
+Renderização dos emails transacionais
+
+Os emails compartilham o layout `contas/email/layout.html` (cabeçalho e rodapé
+NeoCargo) e são descritos por um `ModeloEmail` (templates de assunto, texto e HTML).
+`render_to_string` refazia, a cada destinatário, a busca do template no loader e a
+montagem do contexto completo; aqui:
+
+- os templates de um modelo são compilados uma única vez por processo e mantidos em
+  memória (`precarregar`); as partes fixas do layout viram nós de texto já prontos,
+  então renderizar um destinatário só avalia as variáveis dele
+- o contexto comum do lote (protocolo, domínio, nome do site...) é montado uma vez e
+  cada destinatário só empilha os próprios dados sobre ele
+- `renderizar_lote` divide os destinatários em blocos processados por um pool de
+  threads; lotes pequenos são renderizados na própria thread
+
+Com DEBUG ligado os templates não ficam no cache deste módulo (o loader do Django
+recarrega os arquivos alterados).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.template import Context
+from django.template.loader import get_template
+
+CONCORRENCIA = 4
+# Abaixo disso o custo de distribuir entre threads supera o ganho
+MINIMO_PARALELO = 50
+
+
+@dataclass(frozen=True)
+class ModeloEmail:
+    """Templates que compõem um email"""
+
+    assunto: str
+    texto: str
+    html: str
+
+
+@dataclass
+class EmailRenderizado:
+    """Email pronto para entrar na fila de saída"""
+
+    assunto: str
+    texto: str
+    html: str
+
+
+BOAS_VINDAS = ModeloEmail(
+    assunto="contas/email/welcome_email_subject.txt",
+    texto="contas/email/welcome_email.txt",
+    html="contas/email/welcome_email.html",
+)
+
+_compilados = {}
+_trava = threading.Lock()
+
+
+def _compilar(nome):
+    """Template compilado (django.template.base.Template), mantido em memória"""
+    if settings.DEBUG:
+        return get_template(nome).template
+    template = _compilados.get(nome)
+    if template is None:
+        with _trava:
+            template = _compilados.get(nome)
+            if template is None:
+                template = _compilados[nome] = get_template(nome).template
+    return template
+
+
+def limpar():
+    """Descarta os templates compilados"""
+    with _trava:
+        _compilados.clear()
+
+
+def contexto_site():
+    """Protocolo e domínio usados nos links dos emails gerados fora de uma requisição"""
+    hosts = getattr(settings, "ALLOWED_HOSTS", None)
+    return {
+        "protocol": "https" if getattr(settings, "SECURE_SSL_REDIRECT", False) else "http",
+        "domain": hosts[0] if hosts else "localhost:8000",
+    }
+
+
+class RenderizadorEmail:
+    """Service de renderização de emails a partir de um ModeloEmail"""
+
+    @staticmethod
+    def precarregar(*modelos):
+        """Compila os templates dos modelos informados (padrão: todos os modelos conhecidos)"""
+        for modelo in modelos or (BOAS_VINDAS,):
+            for nome in (modelo.assunto, modelo.texto, modelo.html):
+                _compilar(nome)
+
+    @staticmethod
+    def _renderizar_bloco(modelo, comum, contextos):
+        """
+        Renderiza uma sequência de destinatários com um único contexto por tipo de corpo
+
+        O texto e o assunto são renderizados sem escape de HTML.
+        """
+        assunto, texto, html = (_compilar(modelo.assunto), _compilar(modelo.texto), _compilar(modelo.html))
+        contexto_texto = Context(comum, autoescape=False)
+        contexto_html = Context(comum)
+
+        emails = []
+        for dados in contextos:
+            with contexto_texto.push(dados):
+                linha_assunto = "".join(assunto.render(contexto_texto).splitlines()).strip()
+                corpo_texto = texto.render(contexto_texto).strip()
+            with contexto_html.push(dados):
+                corpo_html = html.render(contexto_html)
+            emails.append(EmailRenderizado(assunto=linha_assunto, texto=corpo_texto, html=corpo_html))
+        return emails
+
+    @classmethod
+    def renderizar(cls, modelo, contexto, comum=None) -> EmailRenderizado:
+        """
+        Renderiza um email
+
+        Args:
+            modelo: ModeloEmail
+            contexto: Dados do destinatário
+            comum: Dados compartilhados (padrão: contexto_site())
+
+        Returns:
+            EmailRenderizado
+        """
+        return cls._renderizar_bloco(modelo, comum or contexto_site(), [contexto])[0]
+
+    @classmethod
+    def renderizar_lote(cls, modelo, contextos, comum=None, concorrencia=CONCORRENCIA) -> list[EmailRenderizado]:
+        """
+        Renderiza o mesmo modelo para vários destinatários
+
+        Args:
+            modelo: ModeloEmail
+            contextos: Dados de cada destinatário
+            comum: Dados compartilhados por todo o lote (padrão: contexto_site())
+            concorrencia: Threads de renderização
+
+        Returns:
+            Lista de EmailRenderizado na mesma ordem de `contextos`
+        """
+        contextos = list(contextos)
+        comum = comum or contexto_site()
+        cls.precarregar(modelo)
+
+        if concorrencia <= 1 or len(contextos) < MINIMO_PARALELO:
+            return cls._renderizar_bloco(modelo, comum, contextos)
+
+        tamanho = -(-len(contextos) // concorrencia)
+        blocos = [contextos[i : i + tamanho] for i in range(0, len(contextos), tamanho)]
+        with ThreadPoolExecutor(max_workers=len(blocos)) as executor:
+            resultados = executor.map(lambda bloco: cls._renderizar_bloco(modelo, comum, bloco), blocos)
+        return [email for bloco in resultados for email in bloco]
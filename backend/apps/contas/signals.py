@@ -1,11 +1,18 @@
+import logging
+
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.conf import settings
-from django.template.loader import render_to_string
 
+from . import busca
+from .cache_usuarios import invalidar_usuario
+from .emails import FilaEmails
 from .models import Profile
+from .renderizacao import BOAS_VINDAS, RenderizadorEmail
+
+logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=User)
@@ -26,86 +33,59 @@ def save_user_profile(sender, instance, **kwargs):
         instance.profile.save()
 
 
+@receiver(post_save, sender=User)
+def indexar_busca_usuario(sender, instance, update_fields=None, **kwargs):
+    """
+    Mantém o texto de busca do usuário (apps.contas.busca) atualizado.
+
+    Saves que não tocam os campos indexados (ex.: o last_login do login) são ignorados;
+    a remoção do usuário apaga o registro por cascata.
+    """
+    if update_fields is not None and not set(update_fields) & set(busca.CAMPOS_INDEXADOS):
+        return
+    busca.indexar(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_cache_usuario(sender, instance, **kwargs):
+    """
+    Descarta o usuário do cache de autenticação quando ele é alterado ou removido.
+    """
+    invalidar_usuario(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidar_cache_perfil(sender, instance, **kwargs):
+    """
+    Descarta o usuário do cache de autenticação quando o perfil (papel) muda.
+    """
+    invalidar_usuario(instance.user_id)
+
+
+@receiver(user_logged_out)
+def invalidar_cache_no_logout(sender, request, user, **kwargs):
+    """
+    Descarta o usuário do cache de autenticação no logout.
+    """
+    if user is not None:
+        invalidar_usuario(user.pk)
+
+
 @receiver(post_save, sender=User)
 def send_welcome_email(sender, instance, created, **kwargs):
     """
-    Envia email de boas-vindas HTML bonito quando um usuário é criado.
+    Enfileira o email de boas-vindas HTML quando um usuário é criado.
+
+    O envio acontece no comando `processar_emails`, fora do cadastro. Uma falha ao
+    renderizar ou enfileirar é registrada no log e não impede o cadastro (o savepoint
+    mantém a transação do cadastro utilizável).
     """
     if created and instance.email:
-        subject = "🎉 Bem-vindo ao NeoCargo!"
-
-        # Context para o template
-        context = {
-            "user": instance,
-            "protocol": "https" if getattr(settings, "SECURE_SSL_REDIRECT", False) else "http",
-            "domain": (
-                getattr(settings, "ALLOWED_HOSTS", ["localhost:8000"])[0]
-                if getattr(settings, "ALLOWED_HOSTS")
-                else "localhost:8000"
-            ),
-        }
-
         try:
-            # Renderizar template HTML
-            html_content = render_to_string("contas/email/welcome_email.html", context)
-
-            # Criar versão texto simples como fallback
-            text_content = f"""
-Olá {instance.get_full_name() or instance.username},
-
-🎉 Bem-vindo ao NeoCargo!
-
-Sua conta foi criada com sucesso e já está pronta para uso.
-Com o NeoCargo, você pode gerenciar seus fretes, acompanhar entregas e muito mais, tudo em um só lugar.
-
-Recursos disponíveis:
-• 📦 Gestão de Fretes - Organize e acompanhe todos os seus fretes
-• 🚚 Rastreamento - Monitore entregas em tempo real
-• 📊 Relatórios - Acesse dados detalhados para decisões estratégicas
-• ⚡ Automação - Automatize processos e economize tempo
-
-Acesse sua conta: {context["protocol"]}://{context["domain"]}/dashboard/
-
-Próximos passos recomendados:
-1. Complete seu perfil - Adicione informações da sua empresa
-2. Explore a plataforma - Familiarize-se com as funcionalidades
-3. Configure suas preferências - Personalize sua experiência
-4. Cadastre seu primeiro frete - Comece a usar o sistema
-
-Precisa de ajuda? Nossa equipe de suporte está pronta para ajudar!
-
-Atenciosamente,
-Equipe NeoCargo 🚛
-            """.strip()
-
-            # Criar email multipart (HTML + texto)
-            email = EmailMultiAlternatives(
-                subject=subject, body=text_content, from_email=settings.DEFAULT_FROM_EMAIL, to=[instance.email]
-            )
-
-            # Anexar versão HTML
-            email.attach_alternative(html_content, "text/html")
-
-            # Enviar email
-            email.send(fail_silently=False)
-
-        except Exception as e:
-            # Log the error but don't break the user creation process
-            print(f"Erro ao enviar email de boas-vindas: {e}")
-
-            # Fallback para email simples em caso de erro
-            try:
-                message = (
-                    f"Olá {instance.get_full_name() or instance.username},\n\n"
-                    "Seja bem-vindo ao NeoCargo! Sua conta foi criada com sucesso.\n\n"
-                    "Atenciosamente,\nEquipe NeoCargo"
-                )
-                send_mail(
-                    subject="Bem-vindo ao NeoCargo!",
-                    message=message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[instance.email],
-                    fail_silently=True,
-                )
-            except Exception:
-                pass  # Se falhar completamente, não quebrar o processo
+            with transaction.atomic():
+                email = RenderizadorEmail.renderizar(BOAS_VINDAS, {"user": instance})
+                FilaEmails.enfileirar(email.assunto, email.texto, [instance.email], html=email.html)
+        except Exception:
+            logger.exception("Erro ao enfileirar email de boas-vindas do usuário %s", instance.pk)
@@ -0,0 +1,72 @@
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from apps.motoristas.models import CategoriaCNH, Motorista
+from apps.rotas.models import Cidade
+
+from ..acesso import motorista_de, papel_de, perfil_de, tem_papel
+from ..backends import EmailBackend
+from ..middleware import PerfilUsuarioMiddleware
+from ..models import Profile, Role
+
+
+class AcessoPerfilTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="motorista@example.com", email="motorista@example.com")
+        self.user.profile.role = Role.MOTORISTA
+        self.user.profile.save()
+        cidade = Cidade.objects.create(nome="São Paulo", estado="SP")
+        self.motorista = Motorista.objects.create(
+            profile=self.user.profile, sede_atual=cidade, cnh_categoria=CategoriaCNH.D
+        )
+
+    def test_backend_carrega_perfil_e_motorista_na_mesma_consulta(self):
+        with self.assertNumQueries(1):
+            user = EmailBackend().get_user(self.user.pk)
+            self.assertEqual(papel_de(user), Role.MOTORISTA)
+            self.assertEqual(motorista_de(user), self.motorista)
+
+    def test_usuario_sem_relacoes_carrega_perfil_uma_vez(self):
+        user = User.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(tem_papel(user, Role.MOTORISTA, Role.GERENTE))
+            self.assertEqual(motorista_de(user), self.motorista)
+            self.assertEqual(user.profile.role, Role.MOTORISTA)
+
+    def test_usuario_sem_perfil_e_sem_motorista(self):
+        cliente = User.objects.create_user(username="cliente@example.com")
+        Profile.objects.filter(user=cliente).delete()
+        cliente = User.objects.get(pk=cliente.pk)
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(perfil_de(cliente))
+            self.assertIsNone(papel_de(cliente))
+            self.assertIsNone(motorista_de(cliente))
+
+    def test_anonimo(self):
+        self.assertIsNone(papel_de(AnonymousUser()))
+        self.assertFalse(tem_papel(AnonymousUser(), Role.OWNER))
+
+    def test_middleware_resolve_usuario_perfil_e_motorista_em_uma_consulta(self):
+        self.client.force_login(self.user)
+        request = RequestFactory().get("/")
+        request.session = self.client.session
+        request.session.items()  # carrega a sessão fora da contagem
+        AuthenticationMiddleware(lambda r: None)(request)
+        PerfilUsuarioMiddleware(lambda r: None)(request)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(request.user.pk, self.user.pk)
+            self.assertEqual(request.user.profile.role, Role.MOTORISTA)
+            self.assertEqual(motorista_de(request.user), self.motorista)
+
+    def test_decorator_de_motorista_usa_o_acessor(self):
+        cliente = User.objects.create_user(username="outro@example.com", email="outro@example.com")
+        self.client.force_login(cliente)
+
+        response = self.client.get(reverse("motoristas:dashboard"))
+
+        self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from ..backends import EmailBackend, EmailOrUsernameBackend, usuarios_por
+
+
+class BuscaLoginTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Maria.Silva", email="Maria.Silva@Example.com", password="testpass123"
+        )
+
+    def test_email_sem_diferenciar_maiusculas(self):
+        user = EmailBackend().authenticate(None, username="  maria.silva@EXAMPLE.com ", password="testpass123")
+
+        self.assertEqual(user, self.user)
+
+    def test_email_ou_username_com_duas_buscas(self):
+        backend = EmailOrUsernameBackend()
+
+        with self.assertNumQueries(1):
+            por_email = backend.authenticate(None, username="MARIA.SILVA@example.com", password="testpass123")
+        with self.assertNumQueries(2):
+            por_username = backend.authenticate(None, username="maria.silva", password="testpass123")
+
+        self.assertEqual(por_email, self.user)
+        self.assertEqual(por_username, self.user)
+
+    def test_usuario_inexistente_ainda_calcula_o_hash(self):
+        for backend in (EmailBackend(), EmailOrUsernameBackend()):
+            with mock.patch.object(User, "set_password") as set_password:
+                self.assertIsNone(backend.authenticate(None, username="ninguem@example.com", password="x"))
+            set_password.assert_called_once_with("x")
+
+    def test_senha_errada(self):
+        self.assertIsNone(EmailOrUsernameBackend().authenticate(None, username="maria.silva", password="errada"))
+
+    def test_busca_usa_lower_do_indice(self):
+        consulta = usuarios_por("email", "A@B.com")
+
+        self.assertIn('LOWER("auth_user"."email")', str(consulta.query))
+        if connection.vendor == "sqlite":
+            self.assertIn("auth_user_email_lower_idx", consulta.explain())
+
+    def test_indices_funcionais_criados(self):
+        if not connection.features.supports_expression_indexes:
+            self.skipTest("Banco sem índices de expressão")
+        with connection.cursor() as cursor:
+            indices = connection.introspection.get_constraints(cursor, "auth_user")
+
+        self.assertIn("auth_user_email_lower_idx", indices)
+        self.assertIn("auth_user_username_lower_idx", indices)
@@ -0,0 +1,138 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import busca
+from ..busca import buscar_ids, filtrar, normalizar
+from ..models import BuscaUsuario, Profile, Role
+
+
+class BuscaUsuariosTest(TestCase):
+    def setUp(self):
+        self.joao = User.objects.create_user(
+            username="jsilva", email="joao.silva@example.com", first_name="João", last_name="Silva"
+        )
+        self.maria = User.objects.create_user(
+            username="maria", email="maria@example.com", first_name="Maria", last_name="Souza"
+        )
+        self.mariano = User.objects.create_user(
+            username="pcosta", email="pedro@example.com", first_name="Pedro", last_name="Mariano"
+        )
+
+    def test_normalizar(self):
+        self.assertEqual(normalizar("JOÃO Conceição"), "joao conceicao")
+
+    def test_indexa_ao_criar(self):
+        self.assertEqual(BuscaUsuario.objects.get(user=self.joao).texto, "jsilva joao silva joao.silva@example.com")
+
+    def test_sem_acento_maiusculas_e_prefixo(self):
+        self.assertEqual(buscar_ids("JOAO"), [self.joao.pk])
+        self.assertEqual(buscar_ids("silv"), [self.joao.pk])
+        self.assertEqual(buscar_ids("joão sil"), [self.joao.pk])
+
+    def test_todos_os_termos_precisam_aparecer(self):
+        self.assertEqual(buscar_ids("maria souza"), [self.maria.pk])
+        self.assertEqual(buscar_ids("maria inexistente"), [])
+        self.assertEqual(buscar_ids("@@"), [])
+
+    def test_ordena_por_relevancia(self):
+        self.assertEqual(buscar_ids("maria"), [self.maria.pk, self.mariano.pk])
+
+    def test_atualiza_e_remove(self):
+        self.joao.first_name = "Joaquim"
+        self.joao.save()
+        self.assertEqual(buscar_ids("joaquim"), [self.joao.pk])
+
+        self.joao.delete()
+        self.assertEqual(buscar_ids("joaquim"), [])
+
+    def test_login_nao_regrava_o_indice(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.joao.save(update_fields=["last_login"])
+
+        self.assertFalse([q for q in consultas.captured_queries if "contas_buscausuario" in q["sql"]])
+
+    def test_filtrar_profile(self):
+        perfis = filtrar(Profile.objects.all(), "maria", campo_usuario="user_id").order_by("-relevancia")
+
+        self.assertEqual([perfil.user_id for perfil in perfis], [self.maria.pk, self.mariano.pk])
+
+    def test_papel_filtrado_antes_do_limite(self):
+        self.mariano.profile.role = Role.MOTORISTA
+        self.mariano.profile.save()
+
+        # Sem o papel, o limite de 1 fica só com o mais relevante (maria)
+        self.assertEqual(buscar_ids("maria", limite=1), [self.maria.pk])
+        self.assertEqual(buscar_ids("maria", limite=1, role=Role.MOTORISTA), [self.mariano.pk])
+        self.assertEqual(buscar_ids("maria", role=Role.GERENTE), [])
+
+        perfis = filtrar(Profile.objects.all(), "maria", campo_usuario="user_id", limite=1, role=Role.MOTORISTA)
+        self.assertEqual([perfil.user_id for perfil in perfis], [self.mariano.pk])
+
+    def test_reindexar_depois_de_update_em_massa(self):
+        User.objects.filter(pk=self.maria.pk).update(first_name="Mirela")
+        self.assertEqual(buscar_ids("mirela"), [])
+
+        saida = StringIO()
+        call_command("reindexar_busca_usuarios", stdout=saida)
+
+        self.assertIn("✅ 3 usuário(s) indexado(s).", saida.getvalue())
+        self.assertEqual(buscar_ids("mirela"), [self.maria.pk])
+
+
+class BuscaUsuariosViewsTest(TestCase):
+    def setUp(self):
+        self.dono = User.objects.create_superuser(username="dono", email="dono@example.com", password="testpass123")
+        self.dono.profile.role = Role.OWNER
+        self.dono.profile.save()
+        self.maria = User.objects.create_user(username="maria", email="maria@example.com", first_name="Maria")
+        self.mariano = User.objects.create_user(username="pcosta", email="pedro@example.com", last_name="Mariano")
+        self.client.force_login(self.dono)
+
+    def test_listar_usuarios_usa_o_indice(self):
+        response = self.client.get(reverse("gestao:listar_usuarios"), {"search": "maria"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["page_obj"]), [self.maria, self.mariano])
+
+    def test_listar_usuarios_com_filtro_de_papel(self):
+        self.mariano.profile.role = Role.MOTORISTA
+        self.mariano.profile.save()
+
+        response = self.client.get(reverse("gestao:listar_usuarios"), {"search": "maria", "role": Role.MOTORISTA})
+
+        self.assertEqual(list(response.context["page_obj"]), [self.mariano])
+
+    def test_busca_do_admin(self):
+        response = self.client.get(reverse("admin:auth_user_changelist"), {"q": "maria"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["cl"].result_list), [self.maria, self.mariano])
+
+        response = self.client.get(reverse("admin:contas_profile_changelist"), {"q": "pedro"})
+
+        self.assertEqual([perfil.user for perfil in response.context["cl"].result_list], [self.mariano])
+
+    def test_busca_do_admin_com_filtro_de_papel(self):
+        self.mariano.profile.role = Role.MOTORISTA
+        self.mariano.profile.save()
+
+        # Limite de 1: sem o papel na busca, só a maria (mais relevante) entraria
+        with mock.patch.object(
+            busca, "filtrar", wraps=lambda *args, **kwargs: filtrar(*args, **{**kwargs, "limite": 1})
+        ):
+            usuarios = self.client.get(
+                reverse("admin:auth_user_changelist"), {"q": "maria", "profile__role__exact": Role.MOTORISTA}
+            )
+            perfis = self.client.get(
+                reverse("admin:contas_profile_changelist"), {"q": "maria", "role__exact": Role.MOTORISTA}
+            )
+
+        self.assertEqual(list(usuarios.context["cl"].result_list), [self.mariano])
+        self.assertEqual([perfil.user for perfil in perfis.context["cl"].result_list], [self.mariano])
@@ -0,0 +1,102 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.motoristas.models import CategoriaCNH, Motorista
+from apps.rotas.models import Cidade
+
+from ..acesso import motorista_de, papel_de
+from ..backends import EmailBackend
+from ..cache_usuarios import invalidar_usuario, obter_usuario, tempo_cache
+from ..models import Role
+
+
+@override_settings(CACHE_USUARIOS_TIMEOUT=60)
+class CacheUsuariosTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="cache@example.com", email="cache@example.com", password="testpass123"
+        )
+
+    def test_segunda_leitura_nao_consulta_o_banco(self):
+        with self.assertNumQueries(1):
+            obter_usuario(self.user.pk)
+
+        with self.assertNumQueries(0):
+            user = EmailBackend().get_user(self.user.pk)
+            self.assertEqual(papel_de(user), Role.CLIENTE)
+
+    def test_usuario_inexistente(self):
+        self.assertIsNone(obter_usuario(999999))
+
+    def test_motorista_fica_fora_do_cache(self):
+        cidade = Cidade.objects.create(nome="São Paulo", estado="SP")
+        self.user.profile.role = Role.MOTORISTA
+        self.user.profile.save()
+        motorista = Motorista.objects.create(profile=self.user.profile, sede_atual=cidade, cnh_categoria=CategoriaCNH.D)
+
+        # Leitura do banco já traz o motorista para a requisição corrente
+        with self.assertNumQueries(1):
+            self.assertEqual(motorista_de(obter_usuario(self.user.pk)), motorista)
+
+        # Do cache, o motorista é buscado sob demanda (dados sempre atuais)
+        Motorista.objects.filter(pk=motorista.pk).update(disponivel=False)
+        with self.assertNumQueries(1):
+            self.assertFalse(motorista_de(obter_usuario(self.user.pk)).disponivel)
+
+    def test_save_do_perfil_e_do_usuario_invalidam(self):
+        obter_usuario(self.user.pk)
+
+        self.user.profile.role = Role.GERENTE
+        self.user.profile.save()
+        self.assertEqual(papel_de(obter_usuario(self.user.pk)), Role.GERENTE)
+
+        self.user.first_name = "Novo"
+        self.user.save()
+        self.assertEqual(obter_usuario(self.user.pk).first_name, "Novo")
+
+    def test_invalidacao_explicita_apos_update_em_massa(self):
+        obter_usuario(self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        # update() não dispara signals: o cache continua com a cópia anterior
+        self.assertTrue(obter_usuario(self.user.pk).is_active)
+
+        invalidar_usuario(self.user.pk)
+        self.assertFalse(obter_usuario(self.user.pk).is_active)
+
+    def test_logout_invalida(self):
+        self.client.login(username="cache@example.com", password="testpass123")
+        self.client.get(reverse("contas:perfil"))
+        User.objects.filter(pk=self.user.pk).update(first_name="Depois")
+
+        self.client.post(reverse("contas:logout"))
+
+        self.assertEqual(obter_usuario(self.user.pk).first_name, "Depois")
+
+    def test_requisicao_autenticada_usa_sessao_e_usuario_do_cache(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("dashboard:cliente"))
+
+        # Sessão (cached_db) e usuário vêm do cache: só as 4 consultas de pedidos da própria view
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("dashboard:cliente"))
+
+        self.assertEqual(response.status_code, 200)
+
+
+class CacheUsuariosDesligadoTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="semcache@example.com", email="semcache@example.com", password="testpass123"
+        )
+
+    def test_cache_local_desliga_o_cache_de_usuarios(self):
+        # Padrão com LocMemCache: cada worker teria sua cópia e não veria as invalidações dos outros
+        self.assertEqual(tempo_cache(), 0)
+
+        User.objects.filter(pk=self.user.pk).update(first_name="Sem cache")
+        with self.assertNumQueries(1):
+            self.assertEqual(obter_usuario(self.user.pk).first_name, "Sem cache")
+        with self.assertNumQueries(1):
+            obter_usuario(self.user.pk)
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from ..emails import FilaEmails, espera_apos
+from ..models import EmailPendente, StatusEmail
+
+
+class BackendComFalha(BaseEmailBackend):
+    """Backend de teste que recusa todas as mensagens"""
+
+    def send_messages(self, email_messages):
+        raise ConnectionError("provedor indisponível")
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class FilaEmailsTest(TestCase):
+    def setUp(self):
+        mail.outbox = []
+
+    def test_cadastro_enfileira_sem_enviar(self):
+        """O email de boas-vindas entra na fila e só sai no worker"""
+        User.objects.create_user(username="fila@example.com", email="fila@example.com", password="testpass123")
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = EmailPendente.objects.get()
+        self.assertEqual(email.destinatarios, ["fila@example.com"])
+        self.assertEqual(email.status, StatusEmail.PENDENTE)
+
+    def test_transacao_revertida_nao_enfileira(self):
+        """A fila é gravada na mesma transação do cadastro"""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            User.objects.create_user(username="revertido@example.com", email="revertido@example.com")
+            raise RuntimeError
+
+        self.assertFalse(EmailPendente.objects.exists())
+
+    def test_falha_ao_renderizar_nao_impede_o_cadastro(self):
+        with mock.patch("apps.contas.signals.RenderizadorEmail.renderizar", side_effect=ValueError("template")):
+            with self.assertLogs("apps.contas.signals", level="ERROR"):
+                user = User.objects.create_user(username="semmail@example.com", email="semmail@example.com")
+
+        self.assertTrue(User.objects.filter(pk=user.pk).exists())
+        self.assertFalse(EmailPendente.objects.exists())
+
+    def test_processar_envia_html_e_marca_como_enviado(self):
+        email = FilaEmails.enfileirar("Assunto", "Texto", ["a@example.com"], html="<p>HTML</p>")
+
+        resultado = FilaEmails.processar()
+
+        self.assertEqual(resultado.enviados, 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], "<p>HTML</p>")
+        email.refresh_from_db()
+        self.assertEqual(email.status, StatusEmail.ENVIADO)
+        self.assertIsNotNone(email.enviado_em)
+
+    def test_envio_concorrente_em_lotes(self):
+        for i in range(11):
+            FilaEmails.enfileirar(f"Email {i}", "Texto", [f"dest{i}@example.com"])
+
+        resultado = FilaEmails.processar(lote=4, concorrencia=3)
+
+        self.assertEqual(resultado.enviados, 11)
+        self.assertEqual(len(mail.outbox), 11)
+        self.assertFalse(EmailPendente.objects.exclude(status=StatusEmail.ENVIADO).exists())
+
+    @override_settings(EMAIL_BACKEND="apps.contas.tests.test_emails.BackendComFalha")
+    def test_falha_reagenda_com_backoff_e_desiste(self):
+        email = FilaEmails.enfileirar("Assunto", "Texto", ["a@example.com"])
+
+        resultado = FilaEmails.processar(max_tentativas=2)
+
+        self.assertEqual(resultado.reagendados, 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, StatusEmail.PENDENTE)
+        self.assertIn("provedor indisponível", email.ultimo_erro)
+        self.assertGreater(email.proxima_tentativa_em, timezone.now() + espera_apos(1) - timedelta(seconds=5))
+
+        # Ainda não venceu: nada a fazer
+        self.assertEqual(FilaEmails.processar(max_tentativas=2).total, 0)
+
+        EmailPendente.objects.update(proxima_tentativa_em=timezone.now())
+        resultado = FilaEmails.processar(max_tentativas=2)
+
+        self.assertEqual(resultado.falhas, 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, StatusEmail.FALHOU)
+        self.assertEqual(email.tentativas, 2)
+
+    def test_espera_cresce_ate_o_limite(self):
+        self.assertEqual(espera_apos(1), timedelta(minutes=1))
+        self.assertEqual(espera_apos(3), timedelta(minutes=4))
+        self.assertEqual(espera_apos(20), timedelta(hours=1))
+
+    def test_comando(self):
+        FilaEmails.enfileirar("Assunto", "Texto", ["a@example.com"])
+        saida = StringIO()
+
+        call_command("processar_emails", stdout=saida)
+        call_command("processar_emails", stdout=saida)
+
+        self.assertIn("1 email(s) enviado(s)", saida.getvalue())
+        self.assertIn("Nenhum email pendente", saida.getvalue())
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.gestao import contadores
+from apps.gestao.models import SolicitacaoMudancaPerfil, StatusSolicitacao
+
+from ..limpeza import apagar_em_lotes
+from ..models import EmailChangeRequest, EmailPendente, Role, StatusEmail
+
+
+class LimpezaExpiradosTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="limpeza@example.com", email="limpeza@example.com")
+        EmailPendente.objects.all().delete()
+        agora = timezone.now()
+
+        for dias in (2, 3, 4):
+            EmailChangeRequest.objects.create(
+                user=self.user,
+                old_email="limpeza@example.com",
+                new_email=f"novo{dias}@example.com",
+                expires_at=agora - timedelta(days=dias),
+            )
+        self.token_valido = EmailChangeRequest.objects.create(
+            user=self.user, old_email="limpeza@example.com", new_email="valido@example.com"
+        )
+
+        Session.objects.create(session_key="expirada", session_data="", expire_date=agora - timedelta(hours=1))
+        Session.objects.create(session_key="ativa", session_data="", expire_date=agora + timedelta(days=1))
+
+        self.rejeitada_antiga = self._solicitacao(StatusSolicitacao.REJEITADA, dias=120)
+        self.rejeitada_recente = self._solicitacao(StatusSolicitacao.REJEITADA, dias=10)
+        self.pendente_antiga = self._solicitacao(StatusSolicitacao.PENDENTE, dias=120)
+
+        self.enviado_antigo = self._email(StatusEmail.ENVIADO, dias=40)
+        self.enviado_recente = self._email(StatusEmail.ENVIADO, dias=1)
+        self.falhou_antigo = self._email(StatusEmail.FALHOU, dias=40)
+
+    def _solicitacao(self, status, dias):
+        solicitacao = SolicitacaoMudancaPerfil.objects.create(
+            usuario=self.user,
+            role_atual=Role.CLIENTE,
+            role_solicitada=Role.MOTORISTA,
+            justificativa="Teste",
+            status=status,
+        )
+        SolicitacaoMudancaPerfil.objects.filter(pk=solicitacao.pk).update(
+            created_at=timezone.now() - timedelta(days=dias)
+        )
+        return solicitacao
+
+    def _email(self, status, dias):
+        return EmailPendente.objects.create(
+            assunto="Teste",
+            corpo_texto="Teste",
+            destinatarios=["limpeza@example.com"],
+            status=status,
+            enviado_em=timezone.now() - timedelta(days=dias),
+        )
+
+    def test_remove_somente_registros_expirados(self):
+        saida = StringIO()
+        call_command("limpar_expirados", "--lote", "2", "--pausa", "0", stdout=saida)
+
+        self.assertEqual(list(EmailChangeRequest.objects.all()), [self.token_valido])
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["ativa"])
+        self.assertCountEqual(
+            SolicitacaoMudancaPerfil.objects.values_list("pk", flat=True),
+            [self.rejeitada_recente.pk, self.pendente_antiga.pk],
+        )
+        self.assertCountEqual(
+            EmailPendente.objects.values_list("pk", flat=True), [self.enviado_recente.pk, self.falhou_antigo.pk]
+        )
+        self.assertIn("tokens de mudança de email: 3 apagado(s)", saida.getvalue())
+        self.assertIn("✅ 6 registro(s) expirado(s) removido(s).", saida.getvalue())
+
+    def test_simulacao_nao_apaga(self):
+        saida = StringIO()
+        call_command("limpar_expirados", "--simular", stdout=saida)
+
+        self.assertEqual(EmailChangeRequest.objects.count(), 4)
+        self.assertIn("6 registro(s) seriam apagados", saida.getvalue())
+
+    def test_lotes_limitados_com_pausa_entre_eles(self):
+        with mock.patch("apps.contas.limpeza.time.sleep") as sleep:
+            apagados = apagar_em_lotes(EmailChangeRequest.objects.filter(expires_at__lt=timezone.now()), 1, 0.5)
+
+        self.assertEqual(apagados, 3)
+        # Três lotes cheios de 1 registro: pausa após cada um (o último lote vazio encerra)
+        self.assertEqual(sleep.call_count, 3)
+        sleep.assert_called_with(0.5)
+
+    def test_solicitacoes_apagadas_sem_signals_atualizam_contadores(self):
+        for dias in (100, 110):
+            self._solicitacao(StatusSolicitacao.REJEITADA, dias=dias)
+        contadores.recontar("solicitacao")
+        antigas = SolicitacaoMudancaPerfil.objects.filter(
+            status=StatusSolicitacao.REJEITADA, created_at__lt=timezone.now() - timedelta(days=90)
+        )
+
+        registrar = contadores.registrar_transicoes
+        with mock.patch("apps.gestao.contadores.registrar_transicoes", wraps=registrar) as registro:
+            apagados = apagar_em_lotes(antigas, lote=2, pausa=0)
+
+        self.assertEqual(apagados, 3)
+        # Um registro por lote (2 + 1), nenhum por linha
+        self.assertEqual(registro.call_count, 2)
+        self.assertEqual(contadores.ler()["solicitacao"], contadores.contar("solicitacao"))
+
+    def test_sem_registros_expirados(self):
+        call_command("limpar_expirados", "--pausa", "0", stdout=StringIO())
+        saida = StringIO()
+
+        call_command("limpar_expirados", "--pausa", "0", stdout=saida)
+
+        self.assertIn("✅ Nenhum registro expirado.", saida.getvalue())
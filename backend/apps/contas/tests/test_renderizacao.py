@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from .. import renderizacao
+from ..emails import FilaEmails
+from ..models import EmailPendente
+from ..renderizacao import BOAS_VINDAS, RenderizadorEmail
+
+
+@override_settings(ALLOWED_HOSTS=["neocargo.example.com"], SECURE_SSL_REDIRECT=True)
+class RenderizadorEmailTest(TestCase):
+    def setUp(self):
+        renderizacao.limpar()
+        self.user = User(username="ana", email="ana@example.com", first_name="Ana", last_name="Souza")
+
+    def test_boas_vindas_usa_layout_compartilhado(self):
+        email = RenderizadorEmail.renderizar(BOAS_VINDAS, {"user": self.user})
+
+        self.assertEqual(email.assunto, "🎉 Bem-vindo ao NeoCargo!")
+        self.assertIn("Olá Ana Souza,", email.texto)
+        self.assertIn("https://neocargo.example.com/dashboard/", email.texto)
+        self.assertIn("Bem-vindo(a), Ana Souza!", email.html)
+        self.assertIn("Sistema de Gestão de Transportadora", email.html)
+        self.assertIn("Obrigado por escolher nossa plataforma!", email.html)
+
+    def test_texto_sem_escape_e_html_com_escape(self):
+        self.user.first_name, self.user.last_name = "Ana & Cia", ""
+
+        email = RenderizadorEmail.renderizar(BOAS_VINDAS, {"user": self.user})
+
+        self.assertIn("Olá Ana & Cia,", email.texto)
+        self.assertIn("Ana &amp; Cia", email.html)
+
+    def test_templates_compilados_uma_vez(self):
+        with mock.patch.object(renderizacao, "get_template", wraps=renderizacao.get_template) as get_template:
+            RenderizadorEmail.renderizar(BOAS_VINDAS, {"user": self.user})
+            RenderizadorEmail.renderizar(BOAS_VINDAS, {"user": self.user})
+
+        self.assertEqual(get_template.call_count, 3)
+
+    def test_lote_em_threads_preserva_a_ordem(self):
+        usuarios = [User(username=f"cliente{i}", first_name=f"Cliente {i}") for i in range(120)]
+
+        emails = RenderizadorEmail.renderizar_lote(BOAS_VINDAS, [{"user": u} for u in usuarios], concorrencia=4)
+
+        self.assertEqual(len(emails), 120)
+        for usuario, email in zip(usuarios, emails):
+            self.assertIn(f"Olá {usuario.first_name},", email.texto)
+            self.assertIn(f"Bem-vindo(a), {usuario.first_name}!", email.html)
+
+    def test_lote_enfileirado_com_insercao_em_lote(self):
+        usuarios = [User(username=f"c{i}", email=f"c{i}@example.com") for i in range(3)]
+        emails = RenderizadorEmail.renderizar_lote(BOAS_VINDAS, [{"user": u} for u in usuarios])
+
+        with self.assertNumQueries(1):
+            FilaEmails.enfileirar_lote([(email, [u.email]) for email, u in zip(emails, usuarios)])
+
+        self.assertEqual(
+            sorted(EmailPendente.objects.values_list("destinatarios", flat=True)),
+            [["c0@example.com"], ["c1@example.com"], ["c2@example.com"]],
+        )
@@ -1,4 +1,7 @@
+from io import StringIO
+
 from django.test import TestCase
+from django.core.management import call_command
 from django.contrib.auth.models import User
 from django.core import mail
 from django.test.utils import override_settings
@@ -52,6 +55,10 @@ class SignalsTest(TestCase):
             last_name="User",
         )
 
+        # O cadastro só enfileira; o worker envia
+        self.assertEqual(len(mail.outbox), 0)
+        call_command("processar_emails", stdout=StringIO())
+
         # Verifica se um email foi enviado
         self.assertEqual(len(mail.outbox), 1)
 
@@ -69,6 +76,7 @@ class SignalsTest(TestCase):
         mail.outbox = []
 
         User.objects.create_user(username="testuser@example.com", email="testuser@example.com", password="testpass123")
+        call_command("processar_emails", stdout=StringIO())
 
         self.assertEqual(len(mail.outbox), 1)
         email = mail.outbox[0]
@@ -1,4 +1,7 @@
+from io import StringIO
+
 from django.test import TestCase, Client
+from django.core.management import call_command
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.contrib.messages import get_messages
@@ -134,6 +137,7 @@ class SignupViewTest(TestCase):
         mail.outbox = []
 
         self.client.post(self.signup_url, self.valid_data)
+        call_command("processar_emails", stdout=StringIO())
 
         # Verifica se email foi enviado
         self.assertEqual(len(mail.outbox), 1)
@@ -422,6 +426,8 @@ class EmailChangeNotificationTest(TestCase):
             last_name="User",
         )
         self.profile, _ = Profile.objects.get_or_create(user=self.user, defaults={"role": Role.CLIENTE})
+        # Envia o email de boas-vindas já enfileirado para não misturá-lo com o de confirmação
+        call_command("processar_emails", stdout=StringIO())
 
     def test_email_change_sends_notification(self):
         """Testa se mudança de email envia notificação para email antigo"""
@@ -443,6 +449,7 @@ class EmailChangeNotificationTest(TestCase):
 
         # Verifica redirecionamento
         self.assertEqual(response.status_code, 302)
+        call_command("processar_emails", stdout=StringIO())
 
         # Verifica se email foi enviado (pode ser 0 ou 1 dependendo da configuração)
         # O importante é que o sistema funcione
@@ -503,8 +510,10 @@ class EmailChangeNotificationTest(TestCase):
 
         result = send_email_change_confirmation(email_change_request=email_request, request=request)
 
-        # Verifica que a função retorna True (sucesso)
+        # Verifica que a função retorna True (email enfileirado)
         self.assertTrue(result)
+        self.assertEqual(len(mail.outbox), 0)
+        call_command("processar_emails", stdout=StringIO())
 
         # Verifica se email foi enviado
         self.assertEqual(len(mail.outbox), 1)
@@ -15,19 +15,19 @@ from django.contrib.auth.views import (
 )
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
-from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.contrib.sites.shortcuts import get_current_site
 from django.conf import settings
 from django.utils import timezone
 
 from .forms import SignupForm, CustomPasswordResetForm, UserEditForm, ProfileEditForm, CustomPasswordChangeForm
+from .emails import FilaEmails
 from .models import Role, Profile, EmailChangeRequest
 
 
 def send_email_change_confirmation(email_change_request, request):
     """
-    Envia email de confirmação de mudança para o email antigo.
+    Enfileira o email de confirmação de mudança para o email antigo.
     """
     import logging
 
@@ -100,26 +100,19 @@ para {email_change_request.new_email}.
         Equipe {current_site.name}
         """
 
-    # Cria e envia o email
-    email_message = EmailMultiAlternatives(
-        subject=subject,
-        body=text_content,
-        from_email=getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@neocargo.local"),
-        to=[email_change_request.old_email],
-    )
-
-    email_message.attach_alternative(html_content, "text/html")
-
-    logger.info(f"Tentando enviar email para: {email_change_request.old_email}")
-    logger.info(f"Assunto: {subject}")
-
+    # Enfileira o email; o envio acontece no comando `processar_emails`
     try:
-        result = email_message.send(fail_silently=False)
-        logger.info(f"Email enviado com sucesso! Resultado: {result}")
+        FilaEmails.enfileirar(
+            subject,
+            text_content,
+            [email_change_request.old_email],
+            html=html_content,
+            remetente=getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@neocargo.local"),
+        )
+        logger.info(f"Email de confirmação enfileirado para: {email_change_request.old_email}")
         return True
     except Exception as e:
-        logger.error(f"Falha ao enviar email de confirmação: {e}")
-        logger.error(f"Tipo do erro: {type(e).__name__}")
+        logger.error(f"Falha ao enfileirar email de confirmação: {e}")
         return False
 
 
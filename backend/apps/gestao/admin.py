@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ConfiguracaoSistema, SolicitacaoMudancaPerfil
+from .models import ConfiguracaoSistema, ContadorStatus, FatoPedidoDiario, RentabilidadeRota, SolicitacaoMudancaPerfil
 
 
 @admin.register(ConfiguracaoSistema)
@@ -40,3 +40,43 @@ class SolicitacaoMudancaPerfilAdmin(admin.ModelAdmin):
         ("Aprovação", {"fields": ("status", "observacoes_admin", "aprovado_por", "data_aprovacao")}),
         ("Timestamps", {"fields": ("created_at", "updated_at"), "classes": ("collapse",)}),
     )
+
+
+@admin.register(ContadorStatus)
+class ContadorStatusAdmin(admin.ModelAdmin):
+    list_display = ["entidade", "chave", "total", "atualizado_em"]
+    list_filter = ["entidade"]
+    readonly_fields = ["entidade", "chave", "total", "atualizado_em"]
+
+    def has_add_permission(self, request):
+        # Contadores são mantidos pelo sistema (ver reconciliar_contadores)
+        return False
+
+
+@admin.register(FatoPedidoDiario)
+class FatoPedidoDiarioAdmin(admin.ModelAdmin):
+    list_display = [
+        "data",
+        "status",
+        "estado_origem",
+        "tipo_veiculo",
+        "pedidos_criados",
+        "pedidos_concluidos",
+        "receita",
+    ]
+    list_filter = ["status", "tipo_veiculo"]
+    date_hierarchy = "data"
+
+    def has_add_permission(self, request):
+        # Agregados são mantidos pelo comando atualizar_fatos_pedidos
+        return False
+
+
+@admin.register(RentabilidadeRota)
+class RentabilidadeRotaAdmin(admin.ModelAdmin):
+    list_display = ["rota", "pedidos", "receita", "lucro", "margem", "fator_carga_medio", "atualizado_em"]
+    list_select_related = ["rota__origem", "rota__destino"]
+
+    def has_add_permission(self, request):
+        # Agregados são mantidos pelo comando atualizar_rentabilidade_rotas
+        return False
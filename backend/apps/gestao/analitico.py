@@ -0,0 +1,211 @@
+"""
+Leitura em lotes da tabela de fatos de pedidos para exportação analítica
+
+Cada linha é um pedido com a atribuição, a especificação do veículo e as dimensões
+de cidade/rota já resolvidas. Os lotes são lidos por paginação de chave
+(`updated_at`, `id`) e devolvidos em formato colunar (uma lista por coluna),
+separados por partição (ano/mês de criação). A gravação em Parquet fica no comando
+`exportar_parquet`, que é o único ponto que depende do pyarrow; a conversão dos
+valores e o avanço da marca d'água ficam aqui.
+
+Como em apps.gestao.fatos, a marca nunca passa de SOBREPOSICAO antes do início da
+exportação: pedidos gravados nessa janela são exportados de novo na execução
+seguinte (linhas repetidas, com o mesmo `updated_at`), e uma transação que fez commit
+depois da exportação com um `updated_at` anterior não é perdida.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.gestao.fatos import SOBREPOSICAO, estado_do_texto
+from apps.gestao.models import MarcaProcessamento
+from apps.pedidos.models import Pedido
+from apps.rotas.models import Cidade, Estado, Rota
+
+MARCA_EXPORTACAO_PARQUET = "exportacao_parquet"
+TAMANHO_LOTE = 5000
+
+# Tipos lógicos das colunas: "inteiro", "real", "decimal", "texto", "data_hora"
+CAMPOS_PEDIDO = [
+    ("pedido_id", "id", "inteiro"),
+    ("cliente_id", "cliente_id", "inteiro"),
+    ("status", "status", "texto"),
+    ("opcao", "opcao", "texto"),
+    ("cidade_origem", "cidade_origem", "texto"),
+    ("cidade_destino", "cidade_destino", "texto"),
+    ("peso_carga", "peso_carga", "decimal"),
+    ("prazo_desejado", "prazo_desejado", "inteiro"),
+    ("preco_final", "preco_final", "decimal"),
+    ("litros_combustivel", "litros_combustivel", "decimal"),
+    ("custo_combustivel", "custo_combustivel", "decimal"),
+    ("custo_pedagio", "custo_pedagio", "decimal"),
+    ("created_at", "created_at", "data_hora"),
+    ("updated_at", "updated_at", "data_hora"),
+    ("concluido_em", "concluido_em", "data_hora"),
+    ("atribuicao_status", "atribuicao__status", "texto"),
+    ("motorista_id", "atribuicao__motorista_id", "inteiro"),
+    ("carga_id", "atribuicao__carga_id", "inteiro"),
+    ("custo_rateado", "atribuicao__custo_rateado", "decimal"),
+    ("veiculo_placa", "atribuicao__veiculo__placa", "texto"),
+    ("veiculo_tipo", "atribuicao__veiculo__especificacao__tipo", "texto"),
+    ("veiculo_carga_maxima", "atribuicao__veiculo__especificacao__carga_maxima", "real"),
+]
+
+CAMPOS_DIMENSOES = [
+    ("estado_origem", "texto"),
+    ("uf_origem", "texto"),
+    ("latitude_origem", "real"),
+    ("longitude_origem", "real"),
+    ("estado_destino", "texto"),
+    ("uf_destino", "texto"),
+    ("latitude_destino", "real"),
+    ("longitude_destino", "real"),
+    ("distancia_km", "decimal"),
+]
+
+COLUNAS = [(nome, tipo) for nome, _, tipo in CAMPOS_PEDIDO] + CAMPOS_DIMENSOES
+
+_CENTAVOS = Decimal("0.01")
+
+_NOMES_PEDIDO = [nome for nome, _, _ in CAMPOS_PEDIDO]
+_INDICE_UPDATED_AT = _NOMES_PEDIDO.index("updated_at")
+_INDICE_CREATED_AT = _NOMES_PEDIDO.index("created_at")
+_INDICE_ORIGEM = _NOMES_PEDIDO.index("cidade_origem")
+_INDICE_DESTINO = _NOMES_PEDIDO.index("cidade_destino")
+
+
+def converter_valor(tipo: str, valor):
+    """Converte um valor lido do banco para o tipo da coluna (ver COLUNAS)"""
+    if valor is None:
+        return None
+    if tipo == "real":
+        return float(valor)
+    if tipo == "decimal":
+        return Decimal(valor).quantize(_CENTAVOS)
+    return valor
+
+
+@dataclass
+class LoteAnalitico:
+    """Lote lido do banco, em colunas, separado por partição (ano, mês)"""
+
+    particoes: Dict[Tuple[int, int], Dict[str, list]] = field(default_factory=dict)
+    linhas: int = 0
+    ultimo_updated_at: Optional[datetime] = None
+
+
+class FatosPedidosAnaliticos:
+    """Service que lê os pedidos desnormalizados para exportação analítica"""
+
+    @staticmethod
+    def _dimensoes_cidades():
+        """Cidades indexadas pelo texto gravado no pedido ("Nome - Estado")"""
+        estados = dict(Estado.choices)
+        return {
+            f"{nome} - {estados.get(uf, uf)}": (uf, latitude, longitude)
+            for nome, uf, latitude, longitude in Cidade.objects.values_list("nome", "estado", "latitude", "longitude")
+        }
+
+    @staticmethod
+    def _distancias_rotas():
+        """Distância das rotas indexada pelos nomes de origem e destino"""
+        return {
+            (origem, destino): distancia
+            for origem, destino, distancia in Rota.objects.values_list("origem__nome", "destino__nome", "distancia_km")
+        }
+
+    @staticmethod
+    def _nome_cidade(cidade_texto):
+        return cidade_texto.rsplit(" - ", 1)[0].strip() if cidade_texto else ""
+
+    @classmethod
+    def lotes(cls, desde: Optional[datetime] = None, tamanho: int = TAMANHO_LOTE):
+        """
+        Gera os pedidos alterados depois de `desde` em lotes colunares
+
+        Args:
+            desde: Marca d'água (só pedidos com updated_at maior são lidos)
+            tamanho: Quantidade de pedidos por consulta
+
+        Yields:
+            LoteAnalitico
+        """
+        cidades = cls._dimensoes_cidades()
+        distancias = cls._distancias_rotas()
+        campos = [campo for _, campo, _ in CAMPOS_PEDIDO]
+
+        base = Pedido.objects.order_by("updated_at", "id")
+        if desde is not None:
+            base = base.filter(updated_at__gt=desde)
+
+        cursor = None
+        while True:
+            consulta = base
+            if cursor is not None:
+                consulta = consulta.filter(Q(updated_at__gt=cursor[0]) | Q(updated_at=cursor[0], id__gt=cursor[1]))
+            registros = list(consulta.values_list(*campos)[:tamanho])
+            if not registros:
+                return
+
+            lote = LoteAnalitico(linhas=len(registros))
+            colunas_por_particao = defaultdict(lambda: {nome: [] for nome, _ in COLUNAS})
+            for registro in registros:
+                criado = timezone.localtime(registro[_INDICE_CREATED_AT])
+                colunas = colunas_por_particao[(criado.year, criado.month)]
+                for (nome, _, _), valor in zip(CAMPOS_PEDIDO, registro):
+                    colunas[nome].append(valor)
+                cls._adicionar_dimensoes(colunas, registro, cidades, distancias)
+
+            lote.particoes = dict(colunas_por_particao)
+            lote.ultimo_updated_at = registros[-1][_INDICE_UPDATED_AT]
+            cursor = (registros[-1][_INDICE_UPDATED_AT], registros[-1][0])
+            yield lote
+
+            if len(registros) < tamanho:
+                return
+
+    @classmethod
+    def _adicionar_dimensoes(cls, colunas, registro, cidades, distancias):
+        origem_texto = registro[_INDICE_ORIGEM]
+        destino_texto = registro[_INDICE_DESTINO]
+        for sufixo, texto in (("origem", origem_texto), ("destino", destino_texto)):
+            uf, latitude, longitude = cidades.get(texto, (None, None, None))
+            colunas[f"estado_{sufixo}"].append(estado_do_texto(texto) or None)
+            colunas[f"uf_{sufixo}"].append(uf)
+            colunas[f"latitude_{sufixo}"].append(latitude)
+            colunas[f"longitude_{sufixo}"].append(longitude)
+        colunas["distancia_km"].append(
+            distancias.get((cls._nome_cidade(origem_texto), cls._nome_cidade(destino_texto)))
+        )
+
+    @staticmethod
+    def colunas_convertidas(colunas: Dict[str, list]) -> Dict[str, list]:
+        """Colunas de uma partição com os valores convertidos para o tipo de cada coluna"""
+        return {nome: [converter_valor(tipo, valor) for valor in colunas[nome]] for nome, tipo in COLUNAS}
+
+    @staticmethod
+    def avancar_marca(ultimo_updated_at: datetime, inicio: datetime) -> Optional[datetime]:
+        """
+        Avança a marca d'água da exportação depois que todos os lotes foram gravados
+
+        Args:
+            ultimo_updated_at: Maior `updated_at` exportado
+            inicio: Instante em que a exportação começou
+
+        Returns:
+            Valor da marca depois do avanço
+        """
+        novo_valor = min(ultimo_updated_at, inicio - SOBREPOSICAO)
+        with transaction.atomic():
+            marca, _ = MarcaProcessamento.objects.select_for_update().get_or_create(nome=MARCA_EXPORTACAO_PARQUET)
+            if marca.valor is None or novo_valor > marca.valor:
+                marca.valor = novo_valor
+                marca.save(update_fields=["valor", "atualizado_em"])
+        return marca.valor
@@ -0,0 +1,162 @@
+"""
+Cache do relatório gerencial com "stale-while-revalidate"
+
+Cada combinação (periodo, ano) guarda o último resultado calculado junto com a versão
+dos dados usada no cálculo. A versão é incrementada a cada gravação acompanhada de
+`Pedido`/`ProblemaEntrega` (ver apps.gestao.signals). Quando a versão muda ou o
+resultado passa de `IDADE_MAXIMA`, o valor antigo continua sendo servido enquanto uma
+única thread recalcula em segundo plano; a trava expira em `INTERVALO_RECALCULO`, então
+o banco vê no máximo um recálculo por chave nesse intervalo.
+
+Sem valor nenhum em cache (primeiro acesso, despejo) a mesma trava elege quem calcula;
+os demais esperam até `ESPERA_CALCULO` segundos pelo resultado em vez de calcular
+também, e só calculam se ele não aparecer nesse prazo.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+
+from apps.gestao.relatorios import RelatorioGerencial, paralelismo_disponivel
+
+logger = logging.getLogger(__name__)
+
+CHAVE_VERSAO = "gestao:relatorios:versao"
+PREFIXO = "gestao:relatorios"
+
+# Resultado mais velho que isso é recalculado mesmo sem gravações (períodos andam com o tempo)
+IDADE_MAXIMA = 300
+# Intervalo mínimo entre recálculos da mesma chave
+INTERVALO_RECALCULO = 30
+# Espera máxima (e intervalo entre leituras) de quem não obteve a trava sem valor em cache
+ESPERA_CALCULO = 10
+INTERVALO_ESPERA = 0.1
+
+PERIODOS_VALIDOS = {"7dias", "30dias", "90dias", "ano", "todos"}
+
+
+@dataclass
+class RelatorioEmCache:
+    """Resultado do relatório com a data do cálculo"""
+
+    dados: Dict[str, Any]
+    calculado_em: datetime
+    desatualizado: bool = False
+
+    @property
+    def idade_segundos(self) -> int:
+        return int((timezone.now() - self.calculado_em).total_seconds())
+
+
+class CacheRelatorios:
+    """Cache versionado do relatório gerencial"""
+
+    @staticmethod
+    def versao():
+        """Versão atual dos dados (inicializada com o relógio para não colidir após despejo)"""
+        versao = cache.get(CHAVE_VERSAO)
+        if versao is None:
+            cache.add(CHAVE_VERSAO, time.time_ns(), None)
+            versao = cache.get(CHAVE_VERSAO)
+        return versao
+
+    @staticmethod
+    def invalidar():
+        """Marca os relatórios em cache como desatualizados"""
+        try:
+            cache.incr(CHAVE_VERSAO)
+        except ValueError:
+            cache.add(CHAVE_VERSAO, time.time_ns(), None)
+
+    @staticmethod
+    def _chaves(periodo, ano):
+        sufixo = f"{periodo}:{ano}"
+        return f"{PREFIXO}:{sufixo}", f"{PREFIXO}:recalculando:{sufixo}"
+
+    @classmethod
+    def _calcular(cls, periodo, ano, chave):
+        """Calcula o relatório e grava no cache com a versão lida antes do cálculo"""
+        versao = cls.versao()
+        dados = RelatorioGerencial.get_relatorio_completo(periodo=periodo, ano=ano)
+        entrada = {"versao": versao, "calculado_em": timezone.now(), "dados": dados}
+        cache.set(chave, entrada, None)
+        return entrada
+
+    @classmethod
+    def _calcular_sem_cache(cls, periodo, ano, chave, chave_trava):
+        """Calcula sob a trava; sem ela, espera o resultado de quem a obteve"""
+        if cache.add(chave_trava, True, INTERVALO_RECALCULO):
+            try:
+                return cls._calcular(periodo, ano, chave)
+            finally:
+                cache.delete(chave_trava)
+
+        limite = time.monotonic() + ESPERA_CALCULO
+        while time.monotonic() < limite:
+            time.sleep(INTERVALO_ESPERA)
+            entrada = cache.get(chave)
+            if entrada is not None:
+                return entrada
+        logger.warning("Relatório %s/%s não ficou pronto em %ss; calculando", periodo, ano, ESPERA_CALCULO)
+        return cls._calcular(periodo, ano, chave)
+
+    @classmethod
+    def _recalcular_em_segundo_plano(cls, periodo, ano, chave):
+        def executar():
+            try:
+                cls._calcular(periodo, ano, chave)
+            except Exception:
+                logger.exception("Falha ao recalcular relatório %s/%s em segundo plano", periodo, ano)
+            finally:
+                connections.close_all()
+
+        threading.Thread(target=executar, name=f"relatorio-{periodo}-{ano}", daemon=True).start()
+
+    @classmethod
+    def obter(cls, periodo="30dias", ano: Optional[int] = None) -> RelatorioEmCache:
+        """
+        Retorna o relatório de (periodo, ano), do cache sempre que possível
+
+        Args:
+            periodo: Período dos relatórios (valores desconhecidos equivalem a "todos")
+            ano: Ano dos gráficos mensais (padrão: ano atual)
+
+        Returns:
+            RelatorioEmCache
+        """
+        if periodo not in PERIODOS_VALIDOS:
+            periodo = "todos"
+        if ano is None:
+            ano = timezone.now().year
+        chave, chave_trava = cls._chaves(periodo, ano)
+
+        entrada = cache.get(chave)
+        if entrada is None:
+            entrada = cls._calcular_sem_cache(periodo, ano, chave, chave_trava)
+            return RelatorioEmCache(entrada["dados"], entrada["calculado_em"])
+
+        idade = (timezone.now() - entrada["calculado_em"]).total_seconds()
+        if entrada["versao"] == cls.versao() and idade < IDADE_MAXIMA:
+            return RelatorioEmCache(entrada["dados"], entrada["calculado_em"])
+
+        # Desatualizado: só quem obtiver a trava recalcula; os demais servem o valor antigo
+        if cache.add(chave_trava, True, INTERVALO_RECALCULO):
+            if not paralelismo_disponivel():
+                entrada = cls._calcular(periodo, ano, chave)
+                return RelatorioEmCache(entrada["dados"], entrada["calculado_em"])
+            cls._recalcular_em_segundo_plano(periodo, ano, chave)
+
+        return RelatorioEmCache(entrada["dados"], entrada["calculado_em"], desatualizado=True)
+
+
+def invalidar_relatorios():
+    """Invalida o cache agora e de novo após o commit (um recálculo concorrente pode ter lido o estado anterior)"""
+    CacheRelatorios.invalidar()
+    transaction.on_commit(CacheRelatorios.invalidar)
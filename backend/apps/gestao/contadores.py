@@ -0,0 +1,223 @@
+"""
+Contadores de status mantidos incrementalmente para os dashboards de gestão
+
+Em vez de um `count()` por status a cada carregamento de dashboard, cada transição
+(criação, mudança de status/papel, exclusão) ajusta uma linha de `ContadorStatus`
+na mesma transação da gravação. Os dashboards leem todas as linhas com uma consulta.
+
+Gravações via `save()`/`delete()` são acompanhadas pelos signals de apps.gestao.signals;
+gravações em lote que não disparam signals (`update()`, `bulk_update()`) devem chamar
+`registrar_transicoes`. O comando `reconciliar_contadores` recalcula tudo do zero e
+reporta a diferença.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from django.apps import apps
+from django.db.models import BigIntegerField, Case, Count, F, Value, When
+from django.utils import timezone
+
+from apps.gestao.models import ContadorStatus
+
+TOTAL = "total"
+ATIVA = "ativa"
+INATIVA = "inativa"
+
+
+@dataclass(frozen=True)
+class DefinicaoContador:
+    """Entidade contada: modelo e campo que define a chave (None conta apenas o total)"""
+
+    entidade: str
+    modelo: str
+    campo: Optional[str] = None
+
+    @property
+    def model(self):
+        return apps.get_model(self.modelo)
+
+    def chave(self, valor) -> str:
+        """Converte o valor do campo na chave gravada no contador"""
+        if self.campo is None:
+            return TOTAL
+        if isinstance(valor, bool):
+            return ATIVA if valor else INATIVA
+        return str(valor)
+
+    def chaves_conhecidas(self) -> List[str]:
+        """Chaves que sempre existem para a entidade (mesmo com total zero)"""
+        if self.campo is None:
+            return [TOTAL]
+        field = self.model._meta.get_field(self.campo)
+        if field.get_internal_type() == "BooleanField":
+            return [ATIVA, INATIVA]
+        return [str(valor) for valor, _ in field.choices or []]
+
+
+DEFINICOES = [
+    DefinicaoContador("pedido", "pedidos.Pedido", "status"),
+    DefinicaoContador("problema", "motoristas.ProblemaEntrega", "status"),
+    DefinicaoContador("solicitacao", "gestao.SolicitacaoMudancaPerfil", "status"),
+    DefinicaoContador("perfil", "contas.Profile", "role"),
+    DefinicaoContador("usuario", "auth.User"),
+    DefinicaoContador("veiculo", "veiculos.Veiculo"),
+    DefinicaoContador("cidade", "rotas.Cidade", "ativa"),
+    DefinicaoContador("rota", "rotas.Rota", "ativa"),
+]
+POR_ENTIDADE = {definicao.entidade: definicao for definicao in DEFINICOES}
+
+
+@dataclass
+class Divergencia:
+    """Diferença entre o valor armazenado e o recalculado de um contador"""
+
+    entidade: str
+    chave: str
+    armazenado: int
+    real: int
+
+    @property
+    def diferenca(self) -> int:
+        return self.real - self.armazenado
+
+
+def contar(entidade: str) -> Dict[str, int]:
+    """
+    Conta a entidade diretamente nas tabelas de origem (uma consulta agrupada)
+
+    Args:
+        entidade: Nome da entidade (ver DEFINICOES)
+
+    Returns:
+        Dicionário {chave: total}, incluindo chaves conhecidas com zero
+    """
+    definicao = POR_ENTIDADE[entidade]
+    totais = dict.fromkeys(definicao.chaves_conhecidas(), 0)
+    if definicao.campo is None:
+        totais[TOTAL] = definicao.model.objects.count()
+        return totais
+
+    linhas = definicao.model.objects.order_by().values(definicao.campo).annotate(total=Count("pk"))
+    for linha in linhas:
+        totais[definicao.chave(linha[definicao.campo])] = linha["total"]
+    return totais
+
+
+def _gravar(entidade: str, totais: Dict[str, int]):
+    """Grava os totais da entidade com upsert (cria as linhas que faltarem)"""
+    agora = timezone.now()
+    ContadorStatus.objects.bulk_create(
+        [
+            ContadorStatus(entidade=entidade, chave=chave, total=total, atualizado_em=agora)
+            for chave, total in totais.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["entidade", "chave"],
+        update_fields=["total", "atualizado_em"],
+    )
+
+
+def recontar(entidade: str) -> Dict[str, int]:
+    """Recalcula e grava os contadores de uma entidade"""
+    totais = contar(entidade)
+    _gravar(entidade, totais)
+    return totais
+
+
+def ajustar(entidade: str, deltas: Dict[str, int]):
+    """
+    Soma `deltas` aos contadores da entidade na transação corrente (um único UPDATE)
+
+    Se alguma chave ainda não tem linha (tabela recém-criada ou valor novo), a entidade
+    inteira é recontada; como a gravação que originou o ajuste já está visível na
+    transação, a recontagem já a inclui.
+
+    Args:
+        entidade: Nome da entidade
+        deltas: Dicionário {chave: variação}
+    """
+    deltas = {chave: delta for chave, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    incremento = Case(
+        *[When(chave=chave, then=Value(delta)) for chave, delta in deltas.items()],
+        output_field=BigIntegerField(),
+    )
+    atualizados = ContadorStatus.objects.filter(entidade=entidade, chave__in=deltas).update(
+        total=F("total") + incremento, atualizado_em=timezone.now()
+    )
+    if atualizados != len(deltas):
+        recontar(entidade)
+
+
+def registrar_transicoes(entidade: str, transicoes):
+    """
+    Registra transições feitas sem signals (ex: `update()` em lote)
+
+    Args:
+        entidade: Nome da entidade
+        transicoes: Iterável de pares (valor_antigo, valor_novo); None indica criação/exclusão
+    """
+    definicao = POR_ENTIDADE[entidade]
+    deltas = Counter()
+    for antigo, novo in transicoes:
+        if antigo is not None:
+            deltas[definicao.chave(antigo)] -= 1
+        if novo is not None:
+            deltas[definicao.chave(novo)] += 1
+    ajustar(entidade, deltas)
+
+
+def ler() -> Dict[str, Dict[str, int]]:
+    """
+    Lê todos os contadores com uma consulta
+
+    Entidades que ainda não têm linhas (primeira leitura após a migração) são
+    recontadas e gravadas.
+
+    Returns:
+        Dicionário {entidade: {chave: total}}
+    """
+    contadores = {definicao.entidade: {} for definicao in DEFINICOES}
+    for entidade, chave, total in ContadorStatus.objects.values_list("entidade", "chave", "total"):
+        if entidade in contadores:
+            contadores[entidade][chave] = total
+
+    for entidade, totais in contadores.items():
+        if not totais:
+            totais.update(recontar(entidade))
+    return contadores
+
+
+def reconciliar(corrigir: bool = True) -> List[Divergencia]:
+    """
+    Recalcula todos os contadores do zero e compara com os armazenados
+
+    Args:
+        corrigir: Se True, grava os valores recalculados
+
+    Returns:
+        Lista de divergências encontradas
+    """
+    armazenados = {
+        (entidade, chave): total
+        for entidade, chave, total in ContadorStatus.objects.values_list("entidade", "chave", "total")
+    }
+    divergencias = []
+    for definicao in DEFINICOES:
+        totais = contar(definicao.entidade)
+        chaves_armazenadas = {chave for entidade, chave in armazenados if entidade == definicao.entidade}
+        for chave in chaves_armazenadas - set(totais):
+            totais[chave] = 0
+
+        for chave, real in totais.items():
+            armazenado = armazenados.get((definicao.entidade, chave), 0)
+            if armazenado != real:
+                divergencias.append(Divergencia(definicao.entidade, chave, armazenado, real))
+
+        if corrigir:
+            _gravar(definicao.entidade, totais)
+    return divergencias
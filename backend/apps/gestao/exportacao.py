@@ -0,0 +1,327 @@
+"""
+Exportação em streaming (CSV e XLSX) das listagens e relatórios
+
+As linhas são geradas sob demanda (tipicamente de `values_list(...).iterator(chunk_size=...)`)
+e enviadas ao cliente por `StreamingHttpResponse`, sem montar o arquivo em memória.
+O XLSX é escrito diretamente como um zip em streaming (planilha única com strings
+inline), então o consumo de memória não cresce com o número de linhas.
+"""
+
+import codecs
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from apps.pedidos.models import OpcaoCotacao, StatusPedido
+
+FORMATOS = ("csv", "xlsx")
+TAMANHO_LOTE = 2000
+
+_TIPOS_CONTEUDO = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+_CARACTERES_INVALIDOS_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Textos com estes prefixos seriam interpretados como fórmula pelo Excel/LibreOffice
+_PREFIXOS_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def formato_solicitado(request):
+    """Retorna o formato pedido em `?exportar=` ("csv"/"xlsx") ou None"""
+    formato = request.GET.get("exportar", "").lower()
+    return formato if formato in FORMATOS else None
+
+
+def formatar_valor(valor):
+    """Converte um valor do banco para o texto/número exportado"""
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime("%d/%m/%Y %H:%M")
+    if isinstance(valor, date):
+        return valor.strftime("%d/%m/%Y")
+    if isinstance(valor, bool):
+        return "Sim" if valor else "Não"
+    if isinstance(valor, str) and valor.startswith(_PREFIXOS_FORMULA):
+        # Injeção de fórmula: o apóstrofo faz a planilha tratar a célula como texto
+        return "'" + valor
+    return valor
+
+
+class _Eco:
+    """Destino de escrita que apenas devolve o que recebe (para csv.writer)"""
+
+    def write(self, valor):
+        return valor
+
+
+class _Acumulador:
+    """Destino de escrita sem seek para o zipfile; os bytes são drenados a cada lote"""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        dados = b"".join(self.partes)
+        self.partes = []
+        return dados
+
+
+def gerar_csv(cabecalho, linhas):
+    """Gera o CSV (separador ";", com BOM para o Excel reconhecer UTF-8) em pedaços"""
+    escritor = csv.writer(_Eco(), delimiter=";")
+    yield codecs.BOM_UTF8.decode("utf-8") + escritor.writerow(cabecalho)
+    for linha in linhas:
+        yield escritor.writerow([formatar_valor(valor) for valor in linha])
+
+
+def _coluna(indice):
+    """Índice 0-based -> letra da coluna (0 -> A, 26 -> AA)"""
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celula(referencia, valor):
+    valor = formatar_valor(valor)
+    if isinstance(valor, (int, float, Decimal)):
+        return f'<c r="{referencia}"><v>{valor}</v></c>'
+    texto = escape(_CARACTERES_INVALIDOS_XML.sub("", str(valor)))
+    return f'<c r="{referencia}" t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _linha_xml(numero, valores):
+    celulas = "".join(_celula(f"{_coluna(indice)}{numero}", valor) for indice, valor in enumerate(valores))
+    return f'<row r="{numero}">{celulas}</row>'
+
+
+_ARQUIVOS_FIXOS_XLSX = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+def gerar_xlsx(cabecalho, linhas, nome_planilha="Dados"):
+    """Gera o XLSX em pedaços, escrevendo a planilha linha a linha dentro de um zip em streaming"""
+    destino = _Acumulador()
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as arquivo:
+        for nome, conteudo in _ARQUIVOS_FIXOS_XLSX.items():
+            arquivo.writestr(nome, conteudo)
+        arquivo.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(nome_planilha[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            "</workbook>",
+        )
+        yield destino.drenar()
+
+        with arquivo.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as planilha:
+            planilha.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            planilha.write(_linha_xml(1, cabecalho).encode("utf-8"))
+            for numero, linha in enumerate(linhas, start=2):
+                planilha.write(_linha_xml(numero, linha).encode("utf-8"))
+                if numero % TAMANHO_LOTE == 0:
+                    yield destino.drenar()
+            planilha.write(b"</sheetData></worksheet>")
+    yield destino.drenar()
+
+
+def resposta_exportacao(formato, nome_arquivo, cabecalho, linhas):
+    """
+    Monta a resposta em streaming para o formato pedido
+
+    Args:
+        formato: "csv" ou "xlsx"
+        nome_arquivo: Nome do arquivo sem extensão
+        cabecalho: Lista com os títulos das colunas
+        linhas: Iterável de tuplas (consumido sob demanda)
+
+    Returns:
+        StreamingHttpResponse
+    """
+    if formato == "xlsx":
+        conteudo = gerar_xlsx(cabecalho, linhas, nome_planilha=nome_arquivo)
+    else:
+        conteudo = gerar_csv(cabecalho, linhas)
+
+    resposta = StreamingHttpResponse(conteudo, content_type=_TIPOS_CONTEUDO[formato])
+    resposta["Content-Disposition"] = f'attachment; filename="{nome_arquivo}.{formato}"'
+    return resposta
+
+
+def exportar_queryset(formato, nome_arquivo, colunas, queryset, transformar=None):
+    """
+    Exporta um queryset lendo apenas as colunas necessárias, em lotes
+
+    Args:
+        formato: "csv" ou "xlsx"
+        nome_arquivo: Nome do arquivo sem extensão
+        colunas: Lista de pares (título, campo do values_list)
+        queryset: QuerySet já filtrado e ordenado
+        transformar: Função opcional aplicada a cada tupla (ex: rótulos de choices)
+
+    Returns:
+        StreamingHttpResponse
+    """
+    linhas = queryset.values_list(*[campo for _, campo in colunas]).iterator(chunk_size=TAMANHO_LOTE)
+    if transformar is not None:
+        linhas = (transformar(linha) for linha in linhas)
+    return resposta_exportacao(formato, nome_arquivo, [titulo for titulo, _ in colunas], linhas)
+
+
+COLUNAS_PEDIDOS = [
+    ("Pedido", "id"),
+    ("Cliente", "cliente__username"),
+    ("Origem", "cidade_origem"),
+    ("Destino", "cidade_destino"),
+    ("Peso (kg)", "peso_carga"),
+    ("Prazo desejado (dias)", "prazo_desejado"),
+    ("Opção", "opcao"),
+    ("Preço final", "preco_final"),
+    ("Status", "status"),
+    ("Motorista", "atribuicao__motorista__profile__user__username"),
+    ("Veículo", "atribuicao__veiculo__placa"),
+    ("Criado em", "created_at"),
+]
+
+
+def exportar_pedidos(formato, queryset, nome_arquivo="pedidos"):
+    """Exporta pedidos com as colunas de COLUNAS_PEDIDOS e os rótulos das opções/status"""
+    opcoes = dict(OpcaoCotacao.choices)
+    status = dict(StatusPedido.choices)
+    indice_opcao = [campo for _, campo in COLUNAS_PEDIDOS].index("opcao")
+    indice_status = [campo for _, campo in COLUNAS_PEDIDOS].index("status")
+
+    def rotular(linha):
+        linha = list(linha)
+        linha[indice_opcao] = opcoes.get(linha[indice_opcao], linha[indice_opcao])
+        linha[indice_status] = status.get(linha[indice_status], linha[indice_status])
+        return linha
+
+    return exportar_queryset(formato, nome_arquivo, COLUNAS_PEDIDOS, queryset, transformar=rotular)
+
+
+SECOES_RELATORIO = {
+    "financeiro": "Resumo financeiro",
+    "pedidos": "Pedidos",
+    "veiculos": "Veículos",
+    "motoristas": "Motoristas",
+    "problemas": "Problemas",
+    "utilizacao": "Utilização da frota",
+    "mensal": "Evolução mensal",
+}
+
+_MESES = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+
+def linhas_secao_relatorio(relatorio, secao):
+    """
+    Converte uma seção do relatório gerencial em (cabecalho, linhas)
+
+    Seções de indicadores viram pares (indicador, valor); as listas aninhadas
+    ("por_status", "por_tipo") são expandidas em uma linha por item.
+
+    Args:
+        relatorio: Dicionário de RelatorioGerencial.get_relatorio_completo
+        secao: Chave de SECOES_RELATORIO
+
+    Returns:
+        Tupla (cabecalho, lista de linhas)
+    """
+    if secao == "mensal":
+        linhas = [
+            (mes, pedidos, receita)
+            for mes, pedidos, receita in zip(_MESES, relatorio["pedidos_por_mes"], relatorio["receita_por_mes"])
+        ]
+        return ["Mês", "Pedidos", "Receita"], linhas
+
+    if secao == "utilizacao":
+        utilizacao = relatorio["utilizacao"]
+        linhas = [
+            (
+                dimensao,
+                linha["grupo"],
+                linha["veiculos"],
+                linha["horas_ocupadas"],
+                linha["utilizacao"],
+                linha["pico_simultaneo"],
+                linha["maior_ociosidade_horas"],
+                linha["ociosidade_media_horas"],
+            )
+            for dimensao, grupo in [
+                ("Frota", [utilizacao["geral"]]),
+                ("Tipo", utilizacao["por_tipo"]),
+                ("Cidade", utilizacao["por_cidade"]),
+                ("Dia", utilizacao["por_dia"]),
+            ]
+            for linha in grupo
+        ]
+        cabecalho = [
+            "Dimensão",
+            "Grupo",
+            "Veículos",
+            "Horas em uso",
+            "Utilização (%)",
+            "Pico simultâneo",
+            "Maior ociosidade (h)",
+            "Ociosidade média (h)",
+        ]
+        return cabecalho, linhas
+
+    linhas = []
+    for indicador, valor in relatorio[secao].items():
+        if isinstance(valor, list):
+            for item in valor:
+                rotulo = item.get("status_display") or item.get("status") or item.get("tipo")
+                linhas.append((f"{indicador} - {rotulo}", item["total"]))
+        else:
+            linhas.append((indicador, valor))
+    return ["Indicador", "Valor"], linhas
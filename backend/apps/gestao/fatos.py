@@ -0,0 +1,178 @@
+"""
+Agregados diários de pedidos (FatoPedidoDiario) para os relatórios gerenciais
+
+Os relatórios leem estas linhas em vez dos pedidos brutos, então o custo passa a
+depender do número de dias do período e não do número de pedidos. A atualização é
+incremental: a marca d'água guarda o maior `updated_at` já processado e só os dias
+tocados por pedidos alterados depois dela são recalculados. Uma gravação pode ganhar
+seu `updated_at` antes de outra que faz commit depois; por isso a marca nunca passa
+de SOBREPOSICAO antes do início da execução, e os pedidos alterados nessa janela são
+relidos na execução seguinte.
+
+Os relatórios só leem os agregados: agende `python manage.py atualizar_fatos_pedidos`
+no cron (ex.: a cada 5 minutos).
+
+Exclusões de pedidos não alteram `updated_at`; use `atualizar(completo=True)` (ou
+`atualizar_fatos_pedidos --completo`) após exclusões em massa.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.gestao.cache_relatorios import invalidar_relatorios
+from apps.gestao.models import FatoPedidoDiario, MarcaProcessamento
+from apps.pedidos.models import Pedido, StatusPedido
+
+MARCA_FATOS_PEDIDOS = "fatos_pedidos"
+
+# Janela relida na execução seguinte (transações que fizeram commit fora de ordem)
+SOBREPOSICAO = timedelta(minutes=5)
+
+
+def estado_do_texto(cidade_texto):
+    """Extrai o estado de uma cidade gravada como "Cidade - Estado" ("" se não houver)"""
+    if not cidade_texto or " - " not in cidade_texto:
+        return ""
+    return cidade_texto.rsplit(" - ", 1)[1].strip()
+
+
+@dataclass
+class ResultadoAtualizacao:
+    """Resumo de uma atualização dos agregados"""
+
+    dias: int = 0
+    linhas: int = 0
+
+
+class FatosPedidos:
+    """Service que mantém a tabela FatoPedidoDiario"""
+
+    @staticmethod
+    def _dia_local(momento):
+        return timezone.localtime(momento).date() if momento else None
+
+    @classmethod
+    def _dias_tocados(cls, marca):
+        """Dias de criação e de conclusão dos pedidos alterados depois da marca"""
+        alterados = Pedido.objects.all()
+        if marca is not None:
+            alterados = alterados.filter(updated_at__gt=marca)
+
+        dias = set()
+        maior_updated_at = marca
+        for created_at, concluido_em, updated_at in alterados.values_list(
+            "created_at", "concluido_em", "updated_at"
+        ).iterator(chunk_size=2000):
+            dias.add(cls._dia_local(created_at))
+            if concluido_em:
+                dias.add(cls._dia_local(concluido_em))
+            if maior_updated_at is None or updated_at > maior_updated_at:
+                maior_updated_at = updated_at
+        return dias, maior_updated_at
+
+    @classmethod
+    def _agregar(cls, dias=None):
+        """
+        Calcula as linhas dos dias informados (todos se `dias` for None)
+
+        Returns:
+            Lista de FatoPedidoDiario não salvos
+        """
+        linhas = defaultdict(
+            lambda: {
+                "criados": 0,
+                "concluidos": 0,
+                "receita": Decimal("0.00"),
+                "combustivel": Decimal("0.00"),
+                "pedagio": Decimal("0.00"),
+            }
+        )
+
+        criados = Pedido.objects.order_by()
+        concluidos = Pedido.objects.order_by().filter(status=StatusPedido.CONCLUIDO, concluido_em__isnull=False)
+        if dias is not None:
+            criados = criados.filter(created_at__date__in=dias)
+            concluidos = concluidos.filter(concluido_em__date__in=dias)
+
+        for linha in (
+            criados.annotate(dia=TruncDate("created_at"))
+            .values("dia", "status", "cidade_origem", tipo=F("atribuicao__veiculo__especificacao__tipo"))
+            .annotate(total=Count("id"))
+        ):
+            chave = (linha["dia"], linha["status"], estado_do_texto(linha["cidade_origem"]), linha["tipo"] or "")
+            linhas[chave]["criados"] += linha["total"]
+
+        for linha in (
+            concluidos.annotate(dia=TruncDate("concluido_em"))
+            .values("dia", "cidade_origem", tipo=F("atribuicao__veiculo__especificacao__tipo"))
+            .annotate(
+                total=Count("id"),
+                receita=Sum("preco_final"),
+                combustivel=Sum("custo_combustivel"),
+                pedagio=Sum("custo_pedagio"),
+            )
+        ):
+            chave = (linha["dia"], StatusPedido.CONCLUIDO, estado_do_texto(linha["cidade_origem"]), linha["tipo"] or "")
+            linhas[chave]["concluidos"] += linha["total"]
+            linhas[chave]["receita"] += linha["receita"] or Decimal("0.00")
+            linhas[chave]["combustivel"] += linha["combustivel"] or Decimal("0.00")
+            linhas[chave]["pedagio"] += linha["pedagio"] or Decimal("0.00")
+
+        return [
+            FatoPedidoDiario(
+                data=data,
+                status=status,
+                estado_origem=estado,
+                tipo_veiculo=tipo,
+                pedidos_criados=valores["criados"],
+                pedidos_concluidos=valores["concluidos"],
+                receita=valores["receita"],
+                custo_combustivel=valores["combustivel"],
+                custo_pedagio=valores["pedagio"],
+            )
+            for (data, status, estado, tipo), valores in linhas.items()
+        ]
+
+    @classmethod
+    @transaction.atomic
+    def atualizar(cls, completo=False) -> ResultadoAtualizacao:
+        """
+        Recalcula os dias tocados desde a última marca d'água
+
+        Args:
+            completo: Recalcula todos os dias, ignorando a marca
+
+        Returns:
+            ResultadoAtualizacao com os dias e linhas regravados
+        """
+        marca, _ = MarcaProcessamento.objects.select_for_update().get_or_create(nome=MARCA_FATOS_PEDIDOS)
+        limite_marca = timezone.now() - SOBREPOSICAO
+
+        if completo:
+            dias = None
+            maior_updated_at = Pedido.objects.aggregate(maior=Max("updated_at"))["maior"]
+            FatoPedidoDiario.objects.all().delete()
+        else:
+            dias, maior_updated_at = cls._dias_tocados(marca.valor)
+            if not dias:
+                return ResultadoAtualizacao()
+            FatoPedidoDiario.objects.filter(data__in=dias).delete()
+
+        linhas = cls._agregar(dias)
+        FatoPedidoDiario.objects.bulk_create(linhas, batch_size=500)
+
+        if maior_updated_at is not None:
+            maior_updated_at = min(maior_updated_at, limite_marca)
+        marca.valor = maior_updated_at
+        marca.save(update_fields=["valor", "atualizado_em"])
+        invalidar_relatorios()
+
+        total_dias = len(dias) if dias is not None else len({linha.data for linha in linhas})
+        return ResultadoAtualizacao(dias=total_dias, linhas=len(linhas))
@@ -0,0 +1,29 @@
+"""
+Comando para atualizar os agregados diários de pedidos usados nos relatórios
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.gestao.fatos import FatosPedidos
+
+
+class Command(BaseCommand):
+    help = "Recalcula os agregados diários de pedidos tocados desde a última execução"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Recalcula todos os dias (ex: após excluir pedidos)",
+        )
+
+    def handle(self, *args, **options):
+        resultado = FatosPedidos.atualizar(completo=options["completo"])
+
+        if not resultado.dias:
+            self.stdout.write(self.style.SUCCESS("✅ Agregados já estão atualizados."))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ {resultado.dias} dia(s) recalculado(s), {resultado.linhas} linha(s) gravada(s).")
+        )
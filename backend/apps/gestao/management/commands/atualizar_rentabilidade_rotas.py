@@ -0,0 +1,27 @@
+"""
+Comando para atualizar o agregado de rentabilidade por rota
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.gestao.rentabilidade import RentabilidadeRotas
+
+
+class Command(BaseCommand):
+    help = "Recalcula a rentabilidade das rotas com pedidos alterados desde a última execução"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Recalcula todas as rotas (ex: após excluir pedidos ou renomear cidades)",
+        )
+
+    def handle(self, *args, **options):
+        resultado = RentabilidadeRotas.atualizar(completo=options["completo"])
+
+        if not resultado.linhas:
+            self.stdout.write(self.style.SUCCESS("✅ Rentabilidade das rotas já está atualizada."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {resultado.linhas} rota(s) recalculada(s)."))
@@ -0,0 +1,34 @@
+"""
+Comando que enfileira o resumo diário dos gerentes (agende no cron uma vez por dia)
+
+Os emails saem pela fila de saída (`processar_emails`).
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.gestao.resumo import ResumoGerentes
+
+
+class Command(BaseCommand):
+    help = "Enfileira para cada gerente o resumo dos pedidos e problemas desde o último resumo"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--enviar-vazio", action="store_true", help="Envia o resumo mesmo sem eventos no período")
+
+    def handle(self, *args, **options):
+        resultado = ResumoGerentes.gerar(enviar_vazio=options["enviar_vazio"])
+        resumo = resultado.resumo
+
+        inicio, fim = timezone.localtime(resumo.inicio), timezone.localtime(resumo.fim)
+        self.stdout.write(
+            f"  Período: {inicio:%d/%m/%Y %H:%M} a {fim:%d/%m/%Y %H:%M} — "
+            f"{resumo.pedidos_criados} pedido(s) criado(s), {resumo.pedidos_pendentes} pendente(s), "
+            f"{resumo.entregas_concluidas} entrega(s) concluída(s), {resumo.problemas_abertos} problema(s)"
+        )
+        if resultado.enfileirados:
+            self.stdout.write(self.style.SUCCESS(f"✅ Resumo enfileirado para {resultado.enfileirados} gerente(s)."))
+        elif resumo.tem_eventos or options["enviar_vazio"]:
+            self.stdout.write(self.style.WARNING("⚠️  Nenhum gerente ativo com email cadastrado."))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Nenhum evento no período; resumo não enviado."))
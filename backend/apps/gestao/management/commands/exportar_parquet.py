@@ -0,0 +1,98 @@
+"""
+Comando para exportar a tabela de fatos de pedidos em Parquet particionado
+
+Os arquivos são gravados em `<destino>/ano=AAAA/mes=MM/` (particionamento no estilo
+Hive, lido diretamente por pyarrow, DuckDB, Spark e pandas). Cada execução grava
+apenas os pedidos alterados desde a última marca d'água em arquivos novos, então um
+pedido alterado aparece de novo na exportação seguinte: ao analisar, mantenha a
+linha com o maior `updated_at` por `pedido_id`. A marca fica SOBREPOSICAO atrás do
+início da execução (ver apps.gestao.analitico), então pedidos alterados nos últimos
+minutos são exportados de novo, com o mesmo conteúdo.
+
+Requer o pacote opcional `pyarrow` (pip install pyarrow).
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.gestao.analitico import COLUNAS, MARCA_EXPORTACAO_PARQUET, TAMANHO_LOTE, FatosPedidosAnaliticos
+from apps.gestao.models import MarcaProcessamento
+
+
+class Command(BaseCommand):
+    help = "Exporta pedidos (com atribuição, veículo e cidades) para arquivos Parquet particionados por ano/mês"
+
+    def add_arguments(self, parser):
+        parser.add_argument("destino", help="Diretório onde os arquivos Parquet serão gravados")
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Ignora a marca d'água e exporta todos os pedidos (use um diretório vazio)",
+        )
+        parser.add_argument(
+            "--tamanho-lote",
+            type=int,
+            default=TAMANHO_LOTE,
+            help=f"Pedidos lidos por consulta (padrão: {TAMANHO_LOTE})",
+        )
+        parser.add_argument(
+            "--compressao",
+            default="zstd",
+            choices=["zstd", "snappy", "gzip", "none"],
+            help="Codec de compressão das colunas (padrão: zstd)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise CommandError("O pacote 'pyarrow' é necessário para exportar em Parquet (pip install pyarrow).")
+
+        tipos = {
+            "inteiro": pa.int64(),
+            "real": pa.float64(),
+            "decimal": pa.decimal128(14, 2),
+            "texto": pa.string(),
+            "data_hora": pa.timestamp("us", tz="UTC"),
+        }
+        esquema = pa.schema([(nome, tipos[tipo]) for nome, tipo in COLUNAS])
+
+        destino = Path(options["destino"])
+        compressao = None if options["compressao"] == "none" else options["compressao"]
+        inicio = timezone.now()
+        execucao = inicio.strftime("%Y%m%dT%H%M%S")
+
+        marca, _ = MarcaProcessamento.objects.get_or_create(nome=MARCA_EXPORTACAO_PARQUET)
+        desde = None if options["completo"] else marca.valor
+
+        total_linhas = 0
+        arquivos = 0
+        ultimo_updated_at = None
+        for numero, lote in enumerate(FatosPedidosAnaliticos.lotes(desde, options["tamanho_lote"]), start=1):
+            for (ano, mes), colunas in sorted(lote.particoes.items()):
+                convertidas = FatosPedidosAnaliticos.colunas_convertidas(colunas)
+                arrays = [pa.array(convertidas[nome], tipos[tipo]) for nome, tipo in COLUNAS]
+                diretorio = destino / f"ano={ano}" / f"mes={mes:02d}"
+                diretorio.mkdir(parents=True, exist_ok=True)
+                pq.write_table(
+                    pa.Table.from_arrays(arrays, schema=esquema),
+                    diretorio / f"pedidos-{execucao}-{numero:05d}.parquet",
+                    compression=compressao,
+                )
+                arquivos += 1
+            total_linhas += lote.linhas
+            ultimo_updated_at = lote.ultimo_updated_at
+
+        if not total_linhas:
+            self.stdout.write(self.style.SUCCESS("✅ Nenhum pedido alterado desde a última exportação."))
+            return
+
+        # A marca só avança depois que todos os lotes foram gravados
+        FatosPedidosAnaliticos.avancar_marca(ultimo_updated_at, inicio)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ {total_linhas} pedido(s) exportado(s) em {arquivos} arquivo(s) em {destino}.")
+        )
@@ -0,0 +1,39 @@
+"""
+Comando para recalcular os contadores de status dos dashboards e reportar divergências
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.gestao import contadores
+
+
+class Command(BaseCommand):
+    help = "Recalcula do zero os contadores de status dos dashboards e reporta a diferença"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--apenas-verificar",
+            action="store_true",
+            help="Só reporta as divergências, sem corrigir os contadores",
+        )
+
+    def handle(self, *args, **options):
+        corrigir = not options["apenas_verificar"]
+        divergencias = contadores.reconciliar(corrigir=corrigir)
+
+        if not divergencias:
+            self.stdout.write(self.style.SUCCESS("✅ Contadores consistentes, nenhuma divergência encontrada."))
+            return
+
+        for divergencia in divergencias:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"⚠️  {divergencia.entidade}:{divergencia.chave} armazenado={divergencia.armazenado} "
+                    f"real={divergencia.real} ({divergencia.diferenca:+d})"
+                )
+            )
+
+        if corrigir:
+            self.stdout.write(self.style.SUCCESS(f"\n✅ {len(divergencias)} contador(es) corrigido(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(f"\n{len(divergencias)} contador(es) divergente(s)."))
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestao', '0002_solicitacaomudancaperfil_cnh_categoria_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidade', models.CharField(max_length=30, verbose_name='Entidade')),
+                ('chave', models.CharField(max_length=30, verbose_name='Chave')),
+                ('total', models.BigIntegerField(default=0, verbose_name='Total')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Contador de Status',
+                'verbose_name_plural': 'Contadores de Status',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='contadorstatus',
+            constraint=models.UniqueConstraint(fields=('entidade', 'chave'), name='contador_status_unico'),
+        ),
+    ]
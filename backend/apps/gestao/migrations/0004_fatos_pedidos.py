@@ -0,0 +1,49 @@
+# Generated by Django 5.0.7 on 2026-10-19 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestao', '0003_contadorstatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FatoPedidoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('status', models.CharField(choices=[('cotacao', 'Cotação Gerada'), ('pendente', 'Pendente'), ('aprovado', 'Aprovado'), ('recusado', 'Recusado'), ('cancelado', 'Cancelado'), ('em_transporte', 'Em Transporte'), ('concluido', 'Concluído')], max_length=20, verbose_name='Status')),
+                ('estado_origem', models.CharField(blank=True, default='', max_length=100, verbose_name='Estado de Origem')),
+                ('tipo_veiculo', models.CharField(blank=True, choices=[('carreta', 'Carreta'), ('van', 'Van'), ('carro', 'Carro'), ('moto', 'Moto')], default='', max_length=20, verbose_name='Tipo de Veículo')),
+                ('pedidos_criados', models.PositiveIntegerField(default=0, verbose_name='Pedidos Criados')),
+                ('pedidos_concluidos', models.PositiveIntegerField(default=0, verbose_name='Pedidos Concluídos')),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Receita')),
+                ('custo_combustivel', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Custo de Combustível')),
+            ],
+            options={
+                'verbose_name': 'Fato Diário de Pedidos',
+                'verbose_name_plural': 'Fatos Diários de Pedidos',
+                'ordering': ['data'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MarcaProcessamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=50, unique=True, verbose_name='Nome')),
+                ('valor', models.DateTimeField(blank=True, null=True, verbose_name='Processado até')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Marca de Processamento',
+                'verbose_name_plural': 'Marcas de Processamento',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='fatopedidodiario',
+            constraint=models.UniqueConstraint(fields=('data', 'status', 'estado_origem', 'tipo_veiculo'), name='fato_pedido_diario_unico'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+def reiniciar_agregados(apps, schema_editor):
+    """Os agregados passam a usar os custos registrados na cotação: reconstrói tudo na próxima atualização"""
+    apps.get_model("gestao", "FatoPedidoDiario").objects.all().delete()
+    apps.get_model("gestao", "MarcaProcessamento").objects.filter(nome="fatos_pedidos").update(valor=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestao', '0004_fatos_pedidos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fatopedidodiario',
+            name='custo_pedagio',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Custo de Pedágio'),
+        ),
+        migrations.RunPython(reiniciar_agregados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.7 on 2026-10-19 02:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestao', '0005_fato_custo_pedagio'),
+        ('rotas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentabilidadeRota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pedidos', models.PositiveIntegerField(default=0, verbose_name='Pedidos Concluídos')),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Receita')),
+                ('custo_combustivel', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Custo de Combustível')),
+                ('custo_pedagio', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Custo de Pedágio')),
+                ('lucro', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Lucro')),
+                ('margem', models.FloatField(default=0, verbose_name='Margem (%)')),
+                ('peso_medio', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Peso Médio (Kg)')),
+                ('fator_carga_medio', models.FloatField(blank=True, help_text='Peso / carga máxima do veículo', null=True, verbose_name='Fator de Carga Médio (%)')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('rota', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rentabilidade', to='rotas.rota', verbose_name='Rota')),
+            ],
+            options={
+                'verbose_name': 'Rentabilidade de Rota',
+                'verbose_name_plural': 'Rentabilidade das Rotas',
+                'ordering': ['-lucro'],
+                'indexes': [models.Index(fields=['lucro'], name='rentab_rota_lucro_idx'), models.Index(fields=['receita'], name='rentab_rota_receita_idx'), models.Index(fields=['margem'], name='rentab_rota_margem_idx'), models.Index(fields=['pedidos'], name='rentab_rota_pedidos_idx')],
+            },
+        ),
+    ]
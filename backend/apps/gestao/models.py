@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.contas.models import Role
+from apps.pedidos.models import StatusPedido
 from apps.veiculos.models import TipoVeiculo
 
 
@@ -134,3 +135,120 @@ class SolicitacaoMudancaPerfil(models.Model):
     @property
     def is_rejeitada(self):
         return self.status == StatusSolicitacao.REJEITADA
+
+
+class ContadorStatus(models.Model):
+    """
+    Contadores mantidos incrementalmente para os dashboards de gestão
+
+    Cada linha guarda quantos registros de uma entidade estão em uma chave (status,
+    papel, ativa/inativa). Os valores são ajustados na mesma transação das gravações
+    (ver apps.gestao.contadores) e conferidos pelo comando `reconciliar_contadores`.
+    """
+
+    entidade = models.CharField(max_length=30, verbose_name="Entidade")
+    chave = models.CharField(max_length=30, verbose_name="Chave")
+    total = models.BigIntegerField(default=0, verbose_name="Total")
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Contador de Status"
+        verbose_name_plural = "Contadores de Status"
+        constraints = [models.UniqueConstraint(fields=["entidade", "chave"], name="contador_status_unico")]
+
+    def __str__(self):
+        return f"{self.entidade}:{self.chave} = {self.total}"
+
+
+class MarcaProcessamento(models.Model):
+    """Marca d'água de processamentos incrementais (até onde os dados de origem já foram lidos)"""
+
+    nome = models.CharField(max_length=50, unique=True, verbose_name="Nome")
+    valor = models.DateTimeField(blank=True, null=True, verbose_name="Processado até")
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Marca de Processamento"
+        verbose_name_plural = "Marcas de Processamento"
+
+    def __str__(self):
+        return f"{self.nome}: {self.valor or 'nunca processado'}"
+
+
+class FatoPedidoDiario(models.Model):
+    """
+    Agregado diário de pedidos usado pelos relatórios gerenciais
+
+    Cada linha reúne os pedidos de um dia com o mesmo status, estado de origem e tipo de
+    veículo. `pedidos_criados` conta pelo dia de criação; `pedidos_concluidos`, `receita`
+    e os custos (registrados na cotação do pedido) contam pelo dia de conclusão
+    (`Pedido.concluido_em`).
+    Mantido por apps.gestao.fatos.FatosPedidos.
+    """
+
+    data = models.DateField(verbose_name="Data")
+    status = models.CharField(max_length=20, choices=StatusPedido.choices, verbose_name="Status")
+    estado_origem = models.CharField(max_length=100, blank=True, default="", verbose_name="Estado de Origem")
+    tipo_veiculo = models.CharField(
+        max_length=20, choices=TipoVeiculo.choices, blank=True, default="", verbose_name="Tipo de Veículo"
+    )
+    pedidos_criados = models.PositiveIntegerField(default=0, verbose_name="Pedidos Criados")
+    pedidos_concluidos = models.PositiveIntegerField(default=0, verbose_name="Pedidos Concluídos")
+    receita = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Receita")
+    custo_combustivel = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Custo de Combustível"
+    )
+    custo_pedagio = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Custo de Pedágio")
+
+    class Meta:
+        verbose_name = "Fato Diário de Pedidos"
+        verbose_name_plural = "Fatos Diários de Pedidos"
+        ordering = ["data"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["data", "status", "estado_origem", "tipo_veiculo"], name="fato_pedido_diario_unico"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.data} {self.status} {self.estado_origem or '-'} {self.tipo_veiculo or '-'}"
+
+
+class RentabilidadeRota(models.Model):
+    """
+    Agregado de rentabilidade por rota (pedidos concluídos)
+
+    Os pedidos são associados à rota pelos nomes das cidades de origem e destino.
+    Mantido por apps.gestao.rentabilidade.RentabilidadeRotas.
+    """
+
+    rota = models.OneToOneField(
+        "rotas.Rota", on_delete=models.CASCADE, related_name="rentabilidade", verbose_name="Rota"
+    )
+    pedidos = models.PositiveIntegerField(default=0, verbose_name="Pedidos Concluídos")
+    receita = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Receita")
+    custo_combustivel = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Custo de Combustível"
+    )
+    custo_pedagio = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Custo de Pedágio")
+    lucro = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Lucro")
+    margem = models.FloatField(default=0, verbose_name="Margem (%)")
+    peso_medio = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Peso Médio (Kg)")
+    fator_carga_medio = models.FloatField(
+        null=True, blank=True, verbose_name="Fator de Carga Médio (%)", help_text="Peso / carga máxima do veículo"
+    )
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Rentabilidade de Rota"
+        verbose_name_plural = "Rentabilidade das Rotas"
+        ordering = ["-lucro"]
+        indexes = [
+            models.Index(fields=["lucro"], name="rentab_rota_lucro_idx"),
+            models.Index(fields=["receita"], name="rentab_rota_receita_idx"),
+            models.Index(fields=["margem"], name="rentab_rota_margem_idx"),
+            models.Index(fields=["pedidos"], name="rentab_rota_pedidos_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.rota_id}: {self.pedidos} pedido(s), lucro {self.lucro}"
@@ -0,0 +1,254 @@
+"""
+Paginação por cursor (keyset) para as listagens grandes da gestão
+
+Em vez de `OFFSET`, cada página guarda no cursor os valores da ordenação do último
+(ou primeiro) item exibido e a próxima consulta continua a partir deles com
+`WHERE (a, b, id) > (...)`. Com um índice na ordenação a página 5000 custa o mesmo
+que a primeira. O `id` é sempre acrescentado como desempate, então a ordem é total.
+
+O cursor é opaco (assinado com django.core.signing) e vinculado à ordenação da
+listagem; um cursor inválido ou de outra listagem volta para a primeira página, como
+`Paginator.get_page` faz com números inválidos.
+
+Limitação: os campos da ordenação não podem ser nulos.
+
+O total de itens não é exibido na navegação (seria um `COUNT(*)` por página);
+`count`/`total_estimado` só consultam o banco se forem lidos.
+
+Uso na view:
+
+    page_obj = paginar_por_cursor(request, queryset.order_by("-created_at"), 20)
+
+e no template `{% include "components/paginacao_cursor.html" %}`.
+"""
+
+import json
+import math
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import cached_property
+from operator import attrgetter
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+
+SALT = "gestao.paginacao"
+
+# Abaixo disso a estimativa do planejador não compensa: a contagem exata é barata
+LIMITE_CONTAGEM_EXATA = 10000
+
+PARAMETRO_CURSOR = "cursor"
+
+
+def _serializar(valor):
+    if isinstance(valor, (datetime, date, time)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+class PaginadorCursor:
+    """
+    Paginador keyset sobre um QuerySet já ordenado
+
+    Args:
+        queryset: QuerySet com order_by() explícito (ou Meta.ordering)
+        por_pagina: Itens por página
+    """
+
+    def __init__(self, queryset, por_pagina):
+        self.queryset = queryset
+        self.por_pagina = por_pagina
+        self.model = queryset.model
+
+        ordenacao = [campo for campo in (queryset.query.order_by or self.model._meta.ordering) if campo != "?"]
+        if not all(isinstance(campo, str) for campo in ordenacao):
+            raise ValueError("PaginadorCursor aceita apenas ordenação por nomes de campo")
+        campos = [campo.lstrip("-") for campo in ordenacao]
+        if not {"id", "pk"} & set(campos):
+            ordenacao.append("-pk" if ordenacao and ordenacao[-1].startswith("-") else "pk")
+            # O SQL precisa ordenar pelo desempate que o cursor compara
+            self.queryset = queryset.order_by(*ordenacao)
+
+        self.chaves = [(campo.lstrip("-"), campo.startswith("-")) for campo in ordenacao]
+        self.campos = [self._resolver_campo(nome) for nome, _ in self.chaves]
+        self._obter = attrgetter(*(nome.replace("__", ".") for nome, _ in self.chaves))
+        self._salt = f"{SALT}:{self.model._meta.label}:{','.join(ordenacao)}"
+
+    def _resolver_campo(self, nome):
+        model = self.model
+        partes = nome.split("__")
+        for parte in partes[:-1]:
+            model = model._meta.get_field(parte).related_model
+        campo = model._meta.pk if partes[-1] == "pk" else model._meta.get_field(partes[-1])
+        if campo.null:
+            raise ValueError(f"O campo '{nome}' aceita nulos e não pode ser usado na paginação por cursor")
+        return campo
+
+    def _valores(self, objeto):
+        valores = self._obter(objeto)
+        return list(valores) if len(self.chaves) > 1 else [valores]
+
+    def _filtro(self, valores, para_tras):
+        """(a, b, c) depois (ou antes) de (va, vb, vc), respeitando a direção de cada campo"""
+        condicao = Q()
+        anteriores = {}
+        for (nome, decrescente), valor in zip(self.chaves, valores):
+            operador = "lt" if decrescente != para_tras else "gt"
+            condicao |= Q(**anteriores, **{f"{nome}__{operador}": valor})
+            anteriores[nome] = valor
+        return condicao
+
+    def cursor(self, objeto, para_tras, numero):
+        """Cursor opaco apontando para antes/depois do objeto"""
+        dados = {"v": [_serializar(valor) for valor in self._valores(objeto)], "t": int(para_tras), "n": numero}
+        return signing.dumps(dados, salt=self._salt, compress=True)
+
+    def _ler_cursor(self, cursor):
+        """Decodifica o cursor; None se ausente, adulterado ou de outra listagem"""
+        if not cursor:
+            return None
+        try:
+            dados = signing.loads(cursor, salt=self._salt)
+            valores = [campo.to_python(valor) for campo, valor in zip(self.campos, dados["v"], strict=True)]
+            return valores, bool(dados["t"]), int(dados["n"])
+        except (signing.BadSignature, ValidationError, KeyError, TypeError, ValueError):
+            return None
+
+    def get_page(self, cursor=None) -> "PaginaCursor":
+        """Página que começa depois (ou termina antes) do cursor; a primeira se o cursor for inválido"""
+        lido = self._ler_cursor(cursor)
+        if lido is None:
+            itens = list(self.queryset[: self.por_pagina + 1])
+            return PaginaCursor(self, itens[: self.por_pagina], 1, len(itens) > self.por_pagina, False)
+
+        valores, para_tras, numero = lido
+        queryset = self.queryset.filter(self._filtro(valores, para_tras))
+        if not para_tras:
+            itens = list(queryset[: self.por_pagina + 1])
+            return PaginaCursor(self, itens[: self.por_pagina], numero, len(itens) > self.por_pagina, True)
+
+        itens = list(queryset.reverse()[: self.por_pagina + 1])
+        existe_anterior = len(itens) > self.por_pagina
+        itens = itens[: self.por_pagina][::-1]
+        return PaginaCursor(self, itens, numero if existe_anterior else 1, True, existe_anterior)
+
+    @cached_property
+    def count(self) -> int:
+        """Total exato (uma contagem; só é executada se alguém pedir)"""
+        return self.queryset.count()
+
+    @cached_property
+    def _estimativa(self):
+        if connection.vendor == "postgresql":
+            try:
+                plano = self.queryset.order_by().explain(format="json")
+                linhas = int(json.loads(plano)[0]["Plan"]["Plan Rows"])
+            except Exception:
+                linhas = 0
+            if linhas >= LIMITE_CONTAGEM_EXATA:
+                return linhas, True
+        return self.count, False
+
+    @property
+    def total_estimado(self) -> int:
+        """
+        Total aproximado a partir das estatísticas do planejador (PostgreSQL)
+
+        Em outros bancos, ou quando a estimativa é pequena, é a contagem exata.
+        """
+        return self._estimativa[0]
+
+    @property
+    def total_e_estimado(self) -> bool:
+        return self._estimativa[1]
+
+    @property
+    def num_pages(self) -> int:
+        return max(1, math.ceil(self.total_estimado / self.por_pagina))
+
+
+class PaginaCursor:
+    """Página de um PaginadorCursor (interface próxima de django.core.paginator.Page)"""
+
+    def __init__(self, paginator, object_list, number, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.parametros = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def cursor_proximo(self):
+        if not self._has_next:
+            return None
+        return self.paginator.cursor(self.object_list[-1], False, self.number + 1)
+
+    @cached_property
+    def cursor_anterior(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.cursor(self.object_list[0], True, max(self.number - 1, 1))
+
+    def _querystring(self, cursor):
+        parametros = self.parametros.copy() if self.parametros is not None else None
+        if parametros is None:
+            return f"{PARAMETRO_CURSOR}={cursor}" if cursor else ""
+        parametros.pop("page", None)
+        parametros.pop(PARAMETRO_CURSOR, None)
+        if cursor:
+            parametros[PARAMETRO_CURSOR] = cursor
+        return parametros.urlencode()
+
+    @property
+    def querystring_primeira(self):
+        return self._querystring(None)
+
+    @property
+    def querystring_anterior(self):
+        return self._querystring(self.cursor_anterior)
+
+    @property
+    def querystring_proxima(self):
+        return self._querystring(self.cursor_proximo)
+
+
+def paginar_por_cursor(request, queryset, por_pagina) -> PaginaCursor:
+    """
+    Página pedida em `?cursor=` de uma listagem ordenada
+
+    Os links gerados pela página mantêm os demais parâmetros da URL (filtros, busca).
+
+    Args:
+        request: HttpRequest da listagem
+        queryset: QuerySet ordenado
+        por_pagina: Itens por página
+
+    Returns:
+        PaginaCursor
+    """
+    pagina = PaginadorCursor(queryset, por_pagina).get_page(request.GET.get(PARAMETRO_CURSOR))
+    pagina.parametros = request.GET
+    return pagina
@@ -2,18 +2,71 @@
 Módulo de geração de relatórios para Dono e Gerente
 """
 
-from django.db.models import Sum, Count, F
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, connections
+from django.db.models import Sum, Count, F, Q
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 
-from apps.pedidos.models import Pedido, StatusPedido
+from apps.gestao.models import FatoPedidoDiario
+from apps.gestao.utilizacao import UtilizacaoFrota
+from apps.pedidos.models import StatusPedido
 from apps.veiculos.models import Veiculo
 from apps.motoristas.models import Motorista, ProblemaEntrega, StatusProblema
 
 
+# Máximo de seções do relatório consultadas ao mesmo tempo (cada uma usa uma conexão)
+MAX_SECOES_PARALELAS = 4
+
+
+def _executar_secao(funcao):
+    """Executa uma seção em uma thread do pool e fecha a conexão que ela abriu"""
+    try:
+        return funcao()
+    finally:
+        connections.close_all()
+
+
+def paralelismo_disponivel():
+    """
+    Indica se consultas podem rodar em outras threads (cada uma com sua conexão)
+
+    Não vale dentro de blocos atômicos (outras threads não enxergam a transação
+    corrente) nem no SQLite, que serializa o acesso a um único arquivo.
+    """
+    return connection.vendor != "sqlite" and not connection.in_atomic_block
+
+
+def executar_secoes(secoes):
+    """
+    Executa as seções do relatório, em paralelo quando possível
+
+    Cada thread usa sua própria conexão com o banco (ver paralelismo_disponivel).
+
+    Args:
+        secoes: Dicionário {nome: função sem argumentos}
+
+    Returns:
+        Dicionário {nome: resultado}
+    """
+    if len(secoes) < 2 or not paralelismo_disponivel():
+        return {nome: funcao() for nome, funcao in secoes.items()}
+
+    with ThreadPoolExecutor(max_workers=min(MAX_SECOES_PARALELAS, len(secoes))) as executor:
+        futuros = {nome: executor.submit(_executar_secao, funcao) for nome, funcao in secoes.items()}
+        return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+
 class RelatorioGerencial:
-    """Classe para gerar dados de relatórios gerenciais"""
+    """
+    Classe para gerar dados de relatórios gerenciais
+
+    Cada seção é calculada com uma única consulta (agregação condicional com
+    `Count(filter=Q(...))` ou agrupamento único); as seções de pedidos leem os
+    agregados diários (ver apps.gestao.fatos).
+    """
 
     @staticmethod
     def get_periodo_datas(periodo):
@@ -34,80 +87,76 @@ class RelatorioGerencial:
         return data_inicio, hoje
 
     @staticmethod
-    def get_resumo_financeiro(periodo="30dias"):
-        """Retorna resumo financeiro dos pedidos"""
+    def _fatos_no_periodo(periodo):
+        """
+        Agregados diários do período
+
+        Só leitura: os agregados são mantidos pelo comando `atualizar_fatos_pedidos`
+        (agendado no cron), então o relatório reflete a última execução dele.
+        """
         data_inicio, data_fim = RelatorioGerencial.get_periodo_datas(periodo)
 
-        # Filtrar pedidos concluídos no período
-        pedidos = Pedido.objects.filter(status=StatusPedido.CONCLUIDO)
+        fatos = FatoPedidoDiario.objects.filter(data__lte=timezone.localtime(data_fim).date())
         if data_inicio:
-            pedidos = pedidos.filter(updated_at__gte=data_inicio, updated_at__lte=data_fim)
+            fatos = fatos.filter(data__gte=timezone.localtime(data_inicio).date())
+        return fatos
 
-        # Calcular totais
-        total_receita = pedidos.aggregate(total=Sum("preco_final"))["total"] or Decimal("0.00")
+    @staticmethod
+    def get_resumo_financeiro(periodo="30dias"):
+        """Retorna resumo financeiro dos pedidos concluídos no período (pela data de conclusão)"""
+        totais = RelatorioGerencial._fatos_no_periodo(periodo).aggregate(
+            receita=Sum("receita"),
+            pedidos=Sum("pedidos_concluidos"),
+            combustivel=Sum("custo_combustivel"),
+            pedagio=Sum("custo_pedagio"),
+        )
 
-        total_pedidos = pedidos.count()
+        total_receita = totais["receita"] or Decimal("0.00")
+        total_pedidos = totais["pedidos"] or 0
 
         # Ticket médio
         ticket_medio = total_receita / total_pedidos if total_pedidos > 0 else Decimal("0.00")
 
-        # Estimar custos de combustível
-        custo_combustivel = RelatorioGerencial.estimar_custo_combustivel(pedidos)
+        # Custos registrados na cotação de cada pedido
+        custo_combustivel = totais["combustivel"] or Decimal("0.00")
+        custo_pedagio = totais["pedagio"] or Decimal("0.00")
 
-        # Calcular lucro estimado (receita - custo combustível)
-        lucro_estimado = total_receita - custo_combustivel
+        # Calcular lucro estimado (receita - custos da viagem)
+        lucro_estimado = total_receita - custo_combustivel - custo_pedagio
 
         return {
             "total_receita": total_receita,
             "total_pedidos": total_pedidos,
             "ticket_medio": ticket_medio,
             "custo_combustivel": custo_combustivel,
+            "custo_pedagio": custo_pedagio,
             "lucro_estimado": lucro_estimado,
             "margem_lucro": round((lucro_estimado / total_receita * 100) if total_receita > 0 else 0, 1),
         }
 
-    @staticmethod
-    def estimar_custo_combustivel(pedidos_queryset):
-        """
-        Estima o custo de combustível para pedidos concluídos
-        Usa uma estimativa baseada em 20% do valor do frete
-        """
-        custo_total = Decimal("0.00")
-
-        for pedido in pedidos_queryset:
-            if pedido.preco_final:
-                # Estimativa: custo operacional é aproximadamente 30-40% do valor do frete
-                # Sendo combustível cerca de 60% dos custos operacionais
-                # Portanto: combustível ≈ 18-24% do frete (usaremos 20%)
-                custo_estimado = pedido.preco_final * Decimal("0.20")
-                custo_total += custo_estimado
-
-        return custo_total
-
     @staticmethod
     def get_estatisticas_pedidos(periodo="30dias"):
-        """Retorna estatísticas de pedidos por status"""
-        data_inicio, data_fim = RelatorioGerencial.get_periodo_datas(periodo)
-
-        pedidos = Pedido.objects.all()
-        if data_inicio:
-            pedidos = pedidos.filter(created_at__gte=data_inicio, created_at__lte=data_fim)
-
-        # Contagem por status
-        stats_por_status = pedidos.values("status").annotate(total=Count("id")).order_by("-total")
+        """Retorna estatísticas de pedidos criados no período, por status (um agrupamento)"""
+        por_status = dict(
+            RelatorioGerencial._fatos_no_periodo(periodo)
+            .values("status")
+            .annotate(total=Sum("pedidos_criados"))
+            .values_list("status", "total")
+        )
+        por_status = {status: total for status, total in por_status.items() if total}
 
         # Total geral
-        total_geral = pedidos.count()
+        total_geral = sum(por_status.values())
 
         # Calcular percentuais
         stats_formatadas = []
-        for stat in stats_por_status:
-            percentual = (stat["total"] / total_geral * 100) if total_geral > 0 else 0
+        for status, total in sorted(por_status.items(), key=lambda item: -item[1]):
+            percentual = (total / total_geral * 100) if total_geral > 0 else 0
             stats_formatadas.append(
                 {
-                    "status": stat["status"],
-                    "status_display": dict(StatusPedido.choices).get(stat["status"]),
-                    "total": stat["total"],
+                    "status": status,
+                    "status_display": dict(StatusPedido.choices).get(status),
+                    "total": total,
                     "percentual": round(percentual, 1),
                 }
             )
@@ -115,138 +164,151 @@ class RelatorioGerencial:
         return {
             "total_geral": total_geral,
             "por_status": stats_formatadas,
-            "total_concluidos": pedidos.filter(status=StatusPedido.CONCLUIDO).count(),
-            "total_em_transporte": pedidos.filter(status=StatusPedido.EM_TRANSPORTE).count(),
-            "total_pendentes": pedidos.filter(status=StatusPedido.PENDENTE).count(),
-            "total_cancelados": pedidos.filter(status=StatusPedido.CANCELADO).count(),
+            "total_concluidos": por_status.get(StatusPedido.CONCLUIDO, 0),
+            "total_em_transporte": por_status.get(StatusPedido.EM_TRANSPORTE, 0),
+            "total_pendentes": por_status.get(StatusPedido.PENDENTE, 0),
+            "total_cancelados": por_status.get(StatusPedido.CANCELADO, 0),
         }
 
     @staticmethod
     def get_estatisticas_veiculos():
-        """Retorna estatísticas sobre a frota de veículos"""
-        total_veiculos = Veiculo.objects.count()
-        veiculos_ativos = Veiculo.objects.filter(ativo=True).count()
-        veiculos_inativos = total_veiculos - veiculos_ativos
-
-        # Veículos por tipo
-        veiculos_por_tipo = (
-            Veiculo.objects.values(tipo=F("especificacao__tipo")).annotate(total=Count("id")).order_by("-total")
+        """Retorna estatísticas sobre a frota de veículos (um agrupamento por tipo)"""
+        por_tipo = list(
+            Veiculo.objects.order_by()
+            .values(tipo=F("especificacao__tipo"))
+            .annotate(total=Count("id"), ativos=Count("id", filter=Q(ativo=True)))
         )
+        total_veiculos = sum(linha["total"] for linha in por_tipo)
+        veiculos_ativos = sum(linha["ativos"] for linha in por_tipo)
 
         return {
             "total_veiculos": total_veiculos,
             "veiculos_ativos": veiculos_ativos,
-            "veiculos_inativos": veiculos_inativos,
-            "por_tipo": list(veiculos_por_tipo),
-            "taxa_utilizacao": round((veiculos_ativos / total_veiculos * 100) if total_veiculos > 0 else 0, 1),
+            "veiculos_inativos": total_veiculos - veiculos_ativos,
+            "por_tipo": [
+                {"tipo": linha["tipo"], "total": linha["total"]}
+                for linha in sorted(por_tipo, key=lambda linha: -linha["total"])
+            ],
+            "percentual_ativos": round((veiculos_ativos / total_veiculos * 100) if total_veiculos > 0 else 0, 1),
         }
 
+    @staticmethod
+    def get_utilizacao_frota(periodo="30dias"):
+        """Utilização real da frota no período, pelos intervalos de uso das atribuições"""
+        data_inicio, data_fim = RelatorioGerencial.get_periodo_datas(periodo)
+        return UtilizacaoFrota.calcular(data_inicio, data_fim)
+
     @staticmethod
     def get_estatisticas_motoristas():
         """Retorna estatísticas sobre motoristas"""
-        total_motoristas = Motorista.objects.count()
-        motoristas_ativos = Motorista.objects.filter(profile__user__is_active=True).count()
+        totais = Motorista.objects.aggregate(
+            total=Count("id"), ativos=Count("id", filter=Q(profile__user__is_active=True))
+        )
 
         return {
-            "total_motoristas": total_motoristas,
-            "motoristas_ativos": motoristas_ativos,
-            "motoristas_inativos": total_motoristas - motoristas_ativos,
+            "total_motoristas": totais["total"],
+            "motoristas_ativos": totais["ativos"],
+            "motoristas_inativos": totais["total"] - totais["ativos"],
         }
 
     @staticmethod
     def get_estatisticas_problemas(periodo="30dias"):
-        """Retorna estatísticas sobre problemas reportados"""
+        """Retorna estatísticas sobre problemas reportados (um agrupamento por tipo)"""
         data_inicio, data_fim = RelatorioGerencial.get_periodo_datas(periodo)
 
-        problemas = ProblemaEntrega.objects.all()
+        problemas = ProblemaEntrega.objects.order_by()
         if data_inicio:
             problemas = problemas.filter(criado_em__gte=data_inicio, criado_em__lte=data_fim)
 
-        total_problemas = problemas.count()
-
-        # Por status
-        problemas_pendentes = problemas.filter(status=StatusProblema.PENDENTE).count()
-        problemas_em_analise = problemas.filter(status=StatusProblema.EM_ANALISE).count()
-        problemas_resolvidos = problemas.filter(status=StatusProblema.RESOLVIDO).count()
-
-        # Por tipo
-        problemas_por_tipo = problemas.values("tipo").annotate(total=Count("id")).order_by("-total")
+        por_tipo = list(
+            problemas.values("tipo").annotate(
+                total=Count("id"),
+                pendentes=Count("id", filter=Q(status=StatusProblema.PENDENTE)),
+                em_analise=Count("id", filter=Q(status=StatusProblema.EM_ANALISE)),
+                resolvidos=Count("id", filter=Q(status=StatusProblema.RESOLVIDO)),
+            )
+        )
+        total_problemas = sum(linha["total"] for linha in por_tipo)
+        problemas_resolvidos = sum(linha["resolvidos"] for linha in por_tipo)
 
         return {
             "total_problemas": total_problemas,
-            "pendentes": problemas_pendentes,
-            "em_analise": problemas_em_analise,
+            "pendentes": sum(linha["pendentes"] for linha in por_tipo),
+            "em_analise": sum(linha["em_analise"] for linha in por_tipo),
             "resolvidos": problemas_resolvidos,
-            "por_tipo": list(problemas_por_tipo),
+            "por_tipo": [
+                {"tipo": linha["tipo"], "total": linha["total"]}
+                for linha in sorted(por_tipo, key=lambda linha: -linha["total"])
+            ],
             "taxa_resolucao": round((problemas_resolvidos / total_problemas * 100) if total_problemas > 0 else 0, 1),
         }
 
+    @staticmethod
+    def _por_mes(ano):
+        """Pedidos criados e receita por mês do ano, em uma consulta sobre os agregados diários"""
+        linhas = (
+            FatoPedidoDiario.objects.filter(data__year=ano)
+            .values("data__month")
+            .annotate(pedidos=Sum("pedidos_criados"), receita=Sum("receita"))
+        )
+        pedidos = [0] * 12
+        receita = [0.0] * 12
+        for linha in linhas:
+            pedidos[linha["data__month"] - 1] = linha["pedidos"] or 0
+            receita[linha["data__month"] - 1] = float(linha["receita"] or Decimal("0.00"))
+        return pedidos, receita
+
     @staticmethod
     def get_pedidos_por_mes(ano=None):
-        """Retorna quantidade de pedidos por mês"""
+        """Retorna quantidade de pedidos criados por mês"""
         if ano is None:
             ano = timezone.now().year
 
-        # Inicializar todos os meses com 0
-        meses = {i: 0 for i in range(1, 13)}
-
-        # Buscar pedidos do ano
-        pedidos = Pedido.objects.filter(created_at__year=ano).values("created_at__month").annotate(total=Count("id"))
-
-        # Preencher com os dados reais
-        for pedido in pedidos:
-            mes = pedido["created_at__month"]
-            meses[mes] = pedido["total"]
-
-        # Converter para lista ordenada
-        return [meses[i] for i in range(1, 13)]
+        return RelatorioGerencial._por_mes(ano)[0]
 
     @staticmethod
     def get_receita_por_mes(ano=None):
-        """Retorna receita por mês"""
+        """Retorna receita por mês (pela data de conclusão dos pedidos)"""
         if ano is None:
             ano = timezone.now().year
 
-        # Inicializar todos os meses com 0
-        meses = {i: Decimal("0.00") for i in range(1, 13)}
-
-        # Buscar receita de pedidos concluídos do ano
-        receitas = (
-            Pedido.objects.filter(updated_at__year=ano, status=StatusPedido.CONCLUIDO)
-            .values("updated_at__month")
-            .annotate(total=Sum("preco_final"))
-        )
-
-        # Preencher com os dados reais
-        for receita in receitas:
-            mes = receita["updated_at__month"]
-            meses[mes] = receita["total"] or Decimal("0.00")
-
-        # Converter para lista ordenada
-        return [float(meses[i]) for i in range(1, 13)]
+        return RelatorioGerencial._por_mes(ano)[1]
 
     @staticmethod
     def get_relatorio_completo(periodo="30dias", ano=None):
-        """Gera relatório completo com todos os dados"""
-        from django.utils import timezone
+        """
+        Gera relatório completo com todos os dados
 
+        As seções são consultadas em paralelo (ver executar_secoes), então a latência
+        fica próxima à da seção mais lenta.
+        """
         if ano is None:
             ano = timezone.now().year
 
-        # Verificar se há dados suficientes
-        financeiro = RelatorioGerencial.get_resumo_financeiro(periodo)
-        pedidos_mes = RelatorioGerencial.get_pedidos_por_mes(ano)
-        receita_mes = RelatorioGerencial.get_receita_por_mes(ano)
+        secoes = executar_secoes(
+            {
+                "financeiro": lambda: RelatorioGerencial.get_resumo_financeiro(periodo),
+                "pedidos": lambda: RelatorioGerencial.get_estatisticas_pedidos(periodo),
+                "veiculos": RelatorioGerencial.get_estatisticas_veiculos,
+                "utilizacao": lambda: RelatorioGerencial.get_utilizacao_frota(periodo),
+                "motoristas": RelatorioGerencial.get_estatisticas_motoristas,
+                "problemas": lambda: RelatorioGerencial.get_estatisticas_problemas(periodo),
+                "por_mes": lambda: RelatorioGerencial._por_mes(ano),
+            }
+        )
+        financeiro = secoes["financeiro"]
+        pedidos_mes, receita_mes = secoes["por_mes"]
 
         # Verificar se há dados no ano selecionado
         tem_dados_ano = any(pedidos_mes) or any(receita_mes)
 
         return {
             "financeiro": financeiro,
-            "pedidos": RelatorioGerencial.get_estatisticas_pedidos(periodo),
-            "veiculos": RelatorioGerencial.get_estatisticas_veiculos(),
-            "motoristas": RelatorioGerencial.get_estatisticas_motoristas(),
-            "problemas": RelatorioGerencial.get_estatisticas_problemas(periodo),
+            "pedidos": secoes["pedidos"],
+            "veiculos": secoes["veiculos"],
+            "utilizacao": secoes["utilizacao"],
+            "motoristas": secoes["motoristas"],
+            "problemas": secoes["problemas"],
             "pedidos_por_mes": pedidos_mes,
             "receita_por_mes": receita_mes,
             "tem_dados_ano": tem_dados_ano,
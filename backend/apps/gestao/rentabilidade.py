@@ -0,0 +1,228 @@
+"""
+Rentabilidade por rota (RentabilidadeRota)
+
+A tela e a API de rentabilidade leem apenas a tabela agregada, uma linha por rota,
+então ordenar e paginar milhares de rotas não toca nos pedidos. A atualização é
+incremental como em apps.gestao.fatos: a marca d'água guarda o maior `updated_at` já
+processado (nunca além de SOBREPOSICAO antes da execução) e só as rotas com pedidos
+alterados depois dela são recalculadas. A tabela é mantida pelo comando
+`atualizar_rentabilidade_rotas` (agendado no cron); a tela e a API só leem.
+
+O fator de carga é medido por viagem: um pedido com veículo próprio é uma viagem e
+uma carga consolidada é uma viagem só, com o peso somado dos seus pedidos.
+
+Os pedidos guardam as cidades como texto ("Cidade - Estado"); a rota é encontrada
+pelos textos de origem e destino. Use `atualizar(completo=True)` após excluir pedidos
+ou renomear cidades.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, Max, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from apps.gestao.fatos import SOBREPOSICAO, ResultadoAtualizacao
+from apps.gestao.models import MarcaProcessamento, RentabilidadeRota
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.models import Estado, Rota
+
+MARCA_RENTABILIDADE_ROTAS = "rentabilidade_rotas"
+
+# Campos aceitos em `?ordenar=` (com ou sem "-")
+ORDENACOES = {
+    "lucro": "lucro",
+    "receita": "receita",
+    "margem": "margem",
+    "pedidos": "pedidos",
+    "custo_combustivel": "custo_combustivel",
+    "custo_pedagio": "custo_pedagio",
+    "peso_medio": "peso_medio",
+    "fator_carga": "fator_carga_medio",
+    "origem": "rota__origem__nome",
+    "destino": "rota__destino__nome",
+}
+ORDENACAO_PADRAO = "-lucro"
+
+
+def ordenacao_valida(valor):
+    """Converte `?ordenar=` no argumento de order_by (padrão: maior lucro primeiro)"""
+    campo = (valor or "").lstrip("-")
+    if campo not in ORDENACOES:
+        return ORDENACAO_PADRAO, ORDENACOES["lucro"], True
+    decrescente = (valor or "").startswith("-")
+    return valor, ORDENACOES[campo], decrescente
+
+
+class RentabilidadeRotas:
+    """Service que mantém e consulta a tabela RentabilidadeRota"""
+
+    @staticmethod
+    def _rotas_por_texto():
+        """(texto de origem, texto de destino) como gravados no pedido -> id da rota"""
+        estados = dict(Estado.choices)
+        rotas = {}
+        for rota_id, origem, uf_origem, destino, uf_destino in Rota.objects.values_list(
+            "id", "origem__nome", "origem__estado", "destino__nome", "destino__estado"
+        ):
+            texto_origem = f"{origem} - {estados.get(uf_origem, uf_origem)}"
+            texto_destino = f"{destino} - {estados.get(uf_destino, uf_destino)}"
+            rotas[(texto_origem, texto_destino)] = rota_id
+        return rotas
+
+    @staticmethod
+    def _fator_carga_por_viagem(pedidos):
+        """
+        Fator de carga médio por par (origem, destino), contando cada viagem uma vez
+
+        Returns:
+            Dicionário par -> fator médio (0 a 1)
+        """
+        somas = defaultdict(lambda: [0.0, 0])
+
+        individuais = pedidos.filter(atribuicao__carga__isnull=True).values("cidade_origem", "cidade_destino")
+        for linha in individuais.annotate(
+            soma=Sum(
+                Cast("peso_carga", FloatField())
+                / Cast(F("atribuicao__veiculo__especificacao__carga_maxima"), FloatField())
+            ),
+            viagens=Count("atribuicao__veiculo__especificacao__carga_maxima"),
+        ):
+            if linha["viagens"]:
+                par = somas[(linha["cidade_origem"], linha["cidade_destino"])]
+                par[0] += linha["soma"]
+                par[1] += linha["viagens"]
+
+        consolidados = pedidos.filter(atribuicao__carga__isnull=False).values(
+            "cidade_origem", "cidade_destino", "atribuicao__carga"
+        )
+        for linha in consolidados.annotate(
+            peso=Sum("peso_carga"), capacidade=Max("atribuicao__carga__veiculo__especificacao__carga_maxima")
+        ):
+            if linha["capacidade"]:
+                par = somas[(linha["cidade_origem"], linha["cidade_destino"])]
+                par[0] += float(linha["peso"]) / linha["capacidade"]
+                par[1] += 1
+
+        return {par: soma / viagens for par, (soma, viagens) in somas.items()}
+
+    @classmethod
+    def _agregar(cls, pares=None):
+        """
+        Agrega os pedidos concluídos por par (origem, destino)
+
+        Args:
+            pares: Pares de texto a recalcular (todos se None)
+
+        Returns:
+            Dicionário par -> valores agregados
+        """
+        pedidos = Pedido.objects.order_by().filter(status=StatusPedido.CONCLUIDO)
+        if pares is not None:
+            pedidos = pedidos.filter(
+                cidade_origem__in={origem for origem, _ in pares}, cidade_destino__in={destino for _, destino in pares}
+            )
+
+        linhas = pedidos.values("cidade_origem", "cidade_destino").annotate(
+            total=Count("id"),
+            receita=Sum("preco_final"),
+            combustivel=Sum("custo_combustivel"),
+            pedagio=Sum("custo_pedagio"),
+            peso_medio=Avg("peso_carga"),
+        )
+        fatores = cls._fator_carga_por_viagem(pedidos)
+
+        agregados = {}
+        for linha in linhas:
+            par = (linha["cidade_origem"], linha["cidade_destino"])
+            if pares is None or par in pares:
+                linha["fator_carga"] = fatores.get(par)
+                agregados[par] = linha
+        return agregados
+
+    @staticmethod
+    def _linha(rota_id, valores):
+        receita = valores["receita"] or Decimal("0.00")
+        combustivel = valores["combustivel"] or Decimal("0.00")
+        pedagio = valores["pedagio"] or Decimal("0.00")
+        lucro = receita - combustivel - pedagio
+        fator_carga = valores["fator_carga"]
+        return RentabilidadeRota(
+            rota_id=rota_id,
+            pedidos=valores["total"],
+            receita=receita,
+            custo_combustivel=combustivel,
+            custo_pedagio=pedagio,
+            lucro=lucro,
+            margem=round(float(lucro / receita * 100), 1) if receita > 0 else 0,
+            peso_medio=Decimal(valores["peso_medio"] or 0).quantize(Decimal("0.01")),
+            fator_carga_medio=round(fator_carga * 100, 1) if fator_carga is not None else None,
+        )
+
+    @classmethod
+    @transaction.atomic
+    def atualizar(cls, completo=False) -> ResultadoAtualizacao:
+        """
+        Recalcula as rotas com pedidos alterados desde a última marca d'água
+
+        Args:
+            completo: Recalcula todas as rotas, ignorando a marca
+
+        Returns:
+            ResultadoAtualizacao (`dias` não se aplica; `linhas` são as rotas regravadas)
+        """
+        marca, _ = MarcaProcessamento.objects.select_for_update().get_or_create(nome=MARCA_RENTABILIDADE_ROTAS)
+        limite_marca = timezone.now() - SOBREPOSICAO
+        rotas = cls._rotas_por_texto()
+
+        if completo:
+            pares = None
+            maior_updated_at = Pedido.objects.aggregate(maior=Max("updated_at"))["maior"]
+            RentabilidadeRota.objects.all().delete()
+        else:
+            alterados = Pedido.objects.order_by()
+            if marca.valor is not None:
+                alterados = alterados.filter(updated_at__gt=marca.valor)
+            pares = set()
+            maior_updated_at = marca.valor
+            for origem, destino, updated_at in alterados.values_list(
+                "cidade_origem", "cidade_destino", "updated_at"
+            ).iterator(chunk_size=2000):
+                pares.add((origem, destino))
+                if maior_updated_at is None or updated_at > maior_updated_at:
+                    maior_updated_at = updated_at
+            pares = {par for par in pares if par in rotas}
+            if not pares and maior_updated_at == marca.valor:
+                return ResultadoAtualizacao()
+            RentabilidadeRota.objects.filter(rota_id__in=[rotas[par] for par in pares]).delete()
+
+        linhas = []
+        if pares is None or pares:
+            linhas = [cls._linha(rotas[par], valores) for par, valores in cls._agregar(pares).items() if par in rotas]
+        RentabilidadeRota.objects.bulk_create(linhas, batch_size=500)
+
+        if maior_updated_at is not None:
+            maior_updated_at = min(maior_updated_at, limite_marca)
+        marca.valor = maior_updated_at
+        marca.save(update_fields=["valor", "atualizado_em"])
+        return ResultadoAtualizacao(linhas=len(linhas))
+
+    @staticmethod
+    def listar(ordenar=ORDENACAO_PADRAO):
+        """
+        QuerySet das rotas agregadas na ordem pedida
+
+        Args:
+            ordenar: Valor de `?ordenar=` (ver ORDENACOES)
+
+        Returns:
+            Tupla (queryset, ordenação aplicada)
+        """
+        ordenar, campo, decrescente = ordenacao_valida(ordenar)
+        expressao = F(campo).desc(nulls_last=True) if decrescente else F(campo).asc(nulls_last=True)
+        queryset = RentabilidadeRota.objects.select_related("rota__origem", "rota__destino").order_by(
+            expressao, "rota_id"
+        )
+        return queryset, ordenar
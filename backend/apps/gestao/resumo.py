@@ -0,0 +1,194 @@
+"""
+Resumo diário por email para os gerentes (comando `enviar_resumo_gerentes`)
+
+Lê apenas o que mudou desde o último resumo (marca d'água em MarcaProcessamento):
+pedidos criados, pedidos que ficaram pendentes de aprovação, entregas concluídas e
+problemas abertos/resolvidos no período. Como todos os gerentes acompanham a mesma
+operação, o período é agregado uma única vez (uma consulta por tabela, independente
+do número de eventos) e só a saudação muda de um gerente para outro: os emails são
+renderizados em lote (apps.contas.renderizacao) e entram na fila de saída com uma
+inserção em lote, na mesma transação que avança a marca.
+
+O período termina SOBREPOSICAO antes do instante da geração (como em
+apps.gestao.fatos): uma gravação que ganhou seu horário antes de outra e fez commit
+depois ainda cai no resumo seguinte, em vez de ficar atrás da marca.
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.contas.emails import FilaEmails
+from apps.contas.models import Role
+from apps.contas.renderizacao import ModeloEmail, RenderizadorEmail, contexto_site
+from apps.gestao import contadores
+from apps.gestao.fatos import SOBREPOSICAO
+from apps.gestao.models import MarcaProcessamento
+from apps.motoristas.models import ProblemaEntrega, StatusProblema
+from apps.pedidos.models import Pedido, StatusPedido
+
+MARCA_RESUMO_GERENTES = "resumo_gerentes"
+
+# Período do primeiro resumo (ainda sem marca d'água)
+PERIODO_INICIAL = timedelta(days=1)
+
+# Itens listados no corpo do email (os totais cobrem o período inteiro)
+ITENS_LISTADOS = 10
+
+RESUMO_GERENTES = ModeloEmail(
+    assunto="gestao/email/resumo_gerentes_assunto.txt",
+    texto="gestao/email/resumo_gerentes.txt",
+    html="gestao/email/resumo_gerentes.html",
+)
+
+
+@dataclass
+class ResumoGerencial:
+    """Eventos do período, comuns a todos os gerentes"""
+
+    inicio: object
+    fim: object
+    pedidos_criados: int = 0
+    pedidos_pendentes: int = 0
+    entregas_concluidas: int = 0
+    receita_concluida: Decimal = Decimal("0.00")
+    problemas_abertos: int = 0
+    problemas_resolvidos: int = 0
+    total_pendentes: int = 0
+    total_problemas_em_aberto: int = 0
+    pendentes: list = field(default_factory=list)
+    problemas: list = field(default_factory=list)
+
+    @property
+    def tem_eventos(self):
+        return bool(
+            self.pedidos_criados
+            or self.pedidos_pendentes
+            or self.entregas_concluidas
+            or self.problemas_abertos
+            or self.problemas_resolvidos
+        )
+
+
+@dataclass
+class ResultadoResumo:
+    """Resultado de uma geração de resumos"""
+
+    resumo: ResumoGerencial
+    enfileirados: int = 0
+
+
+class ResumoGerentes:
+    """Service que gera e enfileira o resumo diário dos gerentes"""
+
+    @staticmethod
+    def agregar(inicio, fim) -> ResumoGerencial:
+        """
+        Agrega os eventos do período (inicio, fim]
+
+        Args:
+            inicio: Início exclusivo (marca d'água anterior)
+            fim: Fim inclusivo
+
+        Returns:
+            ResumoGerencial
+        """
+        no_periodo = {"updated_at__gt": inicio, "updated_at__lte": fim}
+        criado = Q(created_at__gt=inicio, created_at__lte=fim)
+        pendente = Q(status=StatusPedido.PENDENTE)
+        concluido = Q(status=StatusPedido.CONCLUIDO, concluido_em__gt=inicio, concluido_em__lte=fim)
+
+        # Todo evento de pedido altera updated_at: o índice de updated_at limita a leitura ao período
+        pedidos = Pedido.objects.filter(**no_periodo).aggregate(
+            criados=Count("id", filter=criado),
+            pendentes=Count("id", filter=pendente),
+            concluidos=Count("id", filter=concluido),
+            receita=Sum("preco_final", filter=concluido),
+        )
+
+        aberto = Q(criado_em__gt=inicio, criado_em__lte=fim)
+        resolvido = Q(status=StatusProblema.RESOLVIDO, resolvido_em__gt=inicio, resolvido_em__lte=fim)
+        problemas = ProblemaEntrega.objects.filter(aberto | resolvido).aggregate(
+            abertos=Count("id", filter=aberto), resolvidos=Count("id", filter=resolvido)
+        )
+
+        totais = contadores.ler()
+
+        return ResumoGerencial(
+            inicio=inicio,
+            fim=fim,
+            pedidos_criados=pedidos["criados"],
+            pedidos_pendentes=pedidos["pendentes"],
+            entregas_concluidas=pedidos["concluidos"],
+            receita_concluida=pedidos["receita"] or Decimal("0.00"),
+            problemas_abertos=problemas["abertos"],
+            problemas_resolvidos=problemas["resolvidos"],
+            total_pendentes=totais["pedido"].get(StatusPedido.PENDENTE, 0),
+            total_problemas_em_aberto=(
+                totais["problema"].get(StatusProblema.PENDENTE, 0)
+                + totais["problema"].get(StatusProblema.EM_ANALISE, 0)
+            ),
+            pendentes=list(
+                Pedido.objects.filter(pendente, **no_periodo)
+                .select_related("cliente")
+                .order_by("updated_at", "id")[:ITENS_LISTADOS]
+            ),
+            problemas=list(
+                ProblemaEntrega.objects.filter(aberto)
+                .exclude(status=StatusProblema.RESOLVIDO)
+                .select_related("atribuicao__pedido")
+                .order_by("-criado_em", "-id")[:ITENS_LISTADOS]
+            ),
+        )
+
+    @staticmethod
+    def gerentes():
+        """Gerentes ativos com email, com apenas os campos usados no email"""
+        return (
+            User.objects.filter(profile__role=Role.GERENTE, is_active=True)
+            .exclude(email="")
+            .only("username", "first_name", "last_name", "email")
+            .order_by("pk")
+        )
+
+    @classmethod
+    @transaction.atomic
+    def gerar(cls, enviar_vazio=False) -> ResultadoResumo:
+        """
+        Agrega os eventos desde o último resumo e enfileira um email por gerente
+
+        A marca d'água só avança junto com o enfileiramento (mesma transação) e fica
+        SOBREPOSICAO atrás do instante da geração.
+
+        Args:
+            enviar_vazio: Envia o resumo mesmo sem eventos no período
+
+        Returns:
+            ResultadoResumo
+        """
+        marca, _ = MarcaProcessamento.objects.select_for_update().get_or_create(nome=MARCA_RESUMO_GERENTES)
+        fim = timezone.now() - SOBREPOSICAO
+        inicio = marca.valor or fim - PERIODO_INICIAL
+        fim = max(fim, inicio)
+
+        resumo = cls.agregar(inicio, fim)
+        resultado = ResultadoResumo(resumo=resumo)
+
+        if resumo.tem_eventos or enviar_vazio:
+            gerentes = list(cls.gerentes())
+            emails = RenderizadorEmail.renderizar_lote(
+                RESUMO_GERENTES,
+                [{"gerente": gerente} for gerente in gerentes],
+                comum={**contexto_site(), "resumo": resumo},
+            )
+            FilaEmails.enfileirar_lote((email, [gerente.email]) for email, gerente in zip(emails, gerentes))
+            resultado.enfileirados = len(emails)
+
+        marca.valor = fim
+        marca.save(update_fields=["valor", "atualizado_em"])
+        return resultado
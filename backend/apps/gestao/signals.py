@@ -1 +1,90 @@
-# Signals removidos - o app contas já gerencia a criação de perfis
+"""
+Signals que mantêm os contadores de status dos dashboards (ver apps.gestao.contadores)
+e invalidam o cache do relatório gerencial (ver apps.gestao.cache_relatorios)
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.gestao import contadores
+from apps.gestao.cache_relatorios import invalidar_relatorios
+from apps.motoristas.models import ProblemaEntrega
+from apps.pedidos.models import Pedido
+
+_AUSENTE = object()
+
+
+def _valor_carregado(instance, campo):
+    """Valor do campo sem disparar carga de campo adiado (`only()`/`defer()`)"""
+    return instance.__dict__.get(campo, _AUSENTE)
+
+
+def _guardar_original_ao_carregar(modelo, campo):
+    """
+    Guarda o valor do campo contado quando a instância é carregada do banco
+
+    Envolve `from_db` em vez de usar `post_init`: instâncias criadas em memória não
+    pagam nada e cada linha carregada custa apenas uma leitura do `__dict__`.
+    """
+    from_db_original = modelo.from_db.__func__
+
+    def from_db(cls, db, field_names, values):
+        instance = from_db_original(cls, db, field_names, values)
+        instance._contador_original = _valor_carregado(instance, campo)
+        return instance
+
+    modelo.from_db = classmethod(from_db)
+
+
+def _conectar(definicao):
+    """Conecta os handlers de contador ao modelo da definição"""
+    modelo = definicao.model
+    campo = definicao.campo
+
+    def preparar(sender, instance, raw=False, update_fields=None, **kwargs):
+        instance._contador_transicao = None
+        if instance.pk is None or campo is None or (update_fields is not None and campo not in update_fields):
+            return
+
+        novo = getattr(instance, campo)
+        antigo = _AUSENTE if instance._state.adding else getattr(instance, "_contador_original", _AUSENTE)
+        if antigo is _AUSENTE or antigo != novo:
+            # Possível transição: confirma o valor atual no banco (a instância pode estar desatualizada)
+            antigo = modelo._default_manager.filter(pk=instance.pk).values_list(campo, flat=True).first()
+        if antigo is not None and antigo != novo:
+            instance._contador_transicao = (antigo, novo)
+
+    def registrar_gravacao(sender, instance, created=False, **kwargs):
+        transicao = getattr(instance, "_contador_transicao", None)
+        instance._contador_transicao = None
+        if created:
+            contadores.registrar_transicoes(definicao.entidade, [(None, getattr(instance, campo) if campo else True)])
+        elif transicao:
+            contadores.registrar_transicoes(definicao.entidade, [transicao])
+        if campo:
+            instance._contador_original = getattr(instance, campo)
+
+    def registrar_exclusao(sender, instance, **kwargs):
+        valor = _valor_carregado(instance, campo) if campo else True
+        if valor is _AUSENTE:
+            contadores.recontar(definicao.entidade)
+        else:
+            contadores.registrar_transicoes(definicao.entidade, [(valor, None)])
+
+    if campo:
+        _guardar_original_ao_carregar(modelo, campo)
+
+    uid = f"gestao_contador_{definicao.entidade}"
+    pre_save.connect(preparar, sender=modelo, weak=False, dispatch_uid=uid)
+    post_save.connect(registrar_gravacao, sender=modelo, weak=False, dispatch_uid=uid)
+    post_delete.connect(registrar_exclusao, sender=modelo, weak=False, dispatch_uid=uid)
+
+
+for _definicao in contadores.DEFINICOES:
+    _conectar(_definicao)
+
+
+@receiver([post_save, post_delete], sender=Pedido, dispatch_uid="gestao_relatorios_pedido")
+@receiver([post_save, post_delete], sender=ProblemaEntrega, dispatch_uid="gestao_relatorios_problema")
+def invalidar_relatorios_ao_gravar(sender, **kwargs):
+    invalidar_relatorios()
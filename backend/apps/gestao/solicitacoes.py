@@ -0,0 +1,248 @@
+"""
+Aprovação e rejeição em massa de solicitações de mudança de perfil
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.contas.cache_usuarios import invalidar_usuario
+from apps.contas.models import Profile, Role
+from apps.gestao import contadores
+from apps.gestao.models import SolicitacaoMudancaPerfil, StatusSolicitacao
+from apps.motoristas.filas import filas
+from apps.motoristas.models import Motorista
+
+
+class AcaoSolicitacao:
+    APROVAR = "aprovar"
+    REJEITAR = "rejeitar"
+
+    CHOICES = [(APROVAR, "Aprovar"), (REJEITAR, "Rejeitar")]
+
+
+@dataclass
+class ResultadoAprovacao:
+    """Resumo de uma aprovação/rejeição em massa."""
+
+    processadas: List[int] = field(default_factory=list)
+    ignoradas: Dict[int, str] = field(default_factory=dict)
+
+
+class AprovacaoEmMassaService:
+    """
+    Service para aprovar ou rejeitar muitas solicitações em uma transação
+
+    As solicitações são carregadas com usuário, perfil e motorista em uma consulta e
+    todas as gravações são feitas por conjunto (`bulk_create`/`bulk_update`), então o
+    número de consultas não depende do tamanho do lote. Como essas gravações não
+    disparam signals, os contadores dos dashboards, o cache de usuários e as filas de
+    motoristas das cidades afetadas são atualizados aqui.
+    """
+
+    @staticmethod
+    def _carregar(solicitacao_ids, resultado):
+        """
+        Carrega as solicitações pendentes (todas se `solicitacao_ids` for None)
+
+        Apenas uma solicitação por usuário é processada no lote (a mais recente).
+        """
+        pendentes = (
+            SolicitacaoMudancaPerfil.objects.select_for_update(of=("self",))
+            .filter(status=StatusSolicitacao.PENDENTE)
+            .select_related("usuario__profile__motorista")
+            .order_by("-created_at", "-id")
+        )
+        if solicitacao_ids is not None:
+            pendentes = pendentes.filter(id__in=solicitacao_ids)
+
+        solicitacoes = []
+        usuarios = set()
+        for solicitacao in pendentes:
+            if solicitacao.usuario_id in usuarios:
+                resultado.ignoradas[solicitacao.id] = "Usuário já tem uma solicitação mais recente neste lote."
+                continue
+            usuarios.add(solicitacao.usuario_id)
+            solicitacoes.append(solicitacao)
+
+        if solicitacao_ids is not None:
+            encontradas = {solicitacao.id for solicitacao in solicitacoes} | set(resultado.ignoradas)
+            for solicitacao_id in solicitacao_ids:
+                if solicitacao_id not in encontradas:
+                    resultado.ignoradas[solicitacao_id] = "Solicitação não encontrada ou já analisada."
+        return solicitacoes
+
+    @staticmethod
+    def _finalizar(solicitacoes, status, aprovado_por, observacoes, agora):
+        """Grava o status das solicitações e registra a transição nos contadores"""
+        for solicitacao in solicitacoes:
+            solicitacao.status = status
+            solicitacao.aprovado_por = aprovado_por
+            solicitacao.data_aprovacao = agora
+            solicitacao.updated_at = agora
+            if observacoes:
+                solicitacao.observacoes_admin = observacoes
+        SolicitacaoMudancaPerfil.objects.bulk_update(
+            solicitacoes, ["status", "aprovado_por", "data_aprovacao", "observacoes_admin", "updated_at"]
+        )
+        contadores.registrar_transicoes("solicitacao", [(StatusSolicitacao.PENDENTE, status) for _ in solicitacoes])
+
+    @staticmethod
+    def _perfil(usuario):
+        try:
+            return usuario.profile
+        except Profile.DoesNotExist:
+            return None
+
+    @staticmethod
+    def _motorista(perfil):
+        try:
+            return perfil.motorista
+        except Motorista.DoesNotExist:
+            return None
+
+    @classmethod
+    def _aplicar_perfis(cls, solicitacoes, agora):
+        """
+        Aplica os novos papéis, criando os perfis que faltam
+
+        Returns:
+            Dicionário {id da solicitação: (Profile, motorista atual ou None)}
+        """
+        novos, alterados, transicoes, perfis = [], [], [], {}
+        for solicitacao in solicitacoes:
+            perfil = cls._perfil(solicitacao.usuario)
+            if perfil is None:
+                perfil = Profile(user=solicitacao.usuario, role=solicitacao.role_solicitada)
+                novos.append(perfil)
+                transicoes.append((None, perfil.role))
+                perfis[solicitacao.id] = (perfil, None)
+                continue
+            if perfil.role != solicitacao.role_solicitada:
+                transicoes.append((perfil.role, solicitacao.role_solicitada))
+                perfil.role = solicitacao.role_solicitada
+                perfil.updated_at = agora
+                alterados.append(perfil)
+            perfis[solicitacao.id] = (perfil, cls._motorista(perfil))
+
+        Profile.objects.bulk_create(novos)
+        Profile.objects.bulk_update(alterados, ["role", "updated_at"])
+        contadores.registrar_transicoes("perfil", transicoes)
+        return perfis
+
+    @staticmethod
+    def _aplicar_motoristas(solicitacoes, perfis, agora):
+        """
+        Cria ou atualiza o Motorista das solicitações de motorista com CNH e sede
+
+        Returns:
+            Ids das cidades cujas filas de motoristas mudaram
+        """
+        novos, alterados, cidades = [], [], set()
+        for solicitacao in solicitacoes:
+            if not (
+                solicitacao.role_solicitada == Role.MOTORISTA
+                and solicitacao.cnh_categoria
+                and solicitacao.sede_atual_id
+            ):
+                continue
+            perfil, motorista = perfis[solicitacao.id]
+            cidades.add(solicitacao.sede_atual_id)
+            if motorista is None:
+                novos.append(
+                    Motorista(
+                        profile=perfil,
+                        sede_atual_id=solicitacao.sede_atual_id,
+                        cnh_categoria=solicitacao.cnh_categoria,
+                        disponivel=True,
+                        entregas_concluidas=0,
+                    )
+                )
+                continue
+            cidades.add(motorista.sede_atual_id)
+            motorista.sede_atual_id = solicitacao.sede_atual_id
+            motorista.cnh_categoria = solicitacao.cnh_categoria
+            motorista.disponivel = True
+            motorista.entregas_concluidas = 0
+            motorista.updated_at = agora
+            alterados.append(motorista)
+
+        Motorista.objects.bulk_create(novos)
+        Motorista.objects.bulk_update(
+            alterados, ["sede_atual", "cnh_categoria", "disponivel", "entregas_concluidas", "updated_at"]
+        )
+        cidades.discard(None)
+        return cidades
+
+    @staticmethod
+    def _invalidar_caches(usuario_ids, cidade_ids):
+        """Invalida agora e de novo após o commit (outro processo pode ter lido o estado anterior)"""
+
+        def invalidar():
+            for usuario_id in usuario_ids:
+                invalidar_usuario(usuario_id)
+            for cidade_id in cidade_ids:
+                filas.invalidar_cidade(cidade_id)
+
+        invalidar()
+        transaction.on_commit(invalidar)
+
+    @classmethod
+    @transaction.atomic
+    def aprovar(cls, solicitacao_ids, aprovado_por, observacoes="") -> ResultadoAprovacao:
+        """
+        Aprova várias solicitações e aplica as mudanças de perfil
+
+        Args:
+            solicitacao_ids: Ids das solicitações (None para todas as pendentes)
+            aprovado_por: Usuário que aprovou
+            observacoes: Observações gravadas em todas as solicitações (opcional)
+
+        Returns:
+            ResultadoAprovacao
+        """
+        resultado = ResultadoAprovacao()
+        solicitacoes = cls._carregar(solicitacao_ids, resultado)
+        if not solicitacoes:
+            return resultado
+
+        agora = timezone.now()
+        cls._finalizar(solicitacoes, StatusSolicitacao.APROVADA, aprovado_por, observacoes, agora)
+        perfis = cls._aplicar_perfis(solicitacoes, agora)
+        cidades = cls._aplicar_motoristas(solicitacoes, perfis, agora)
+        cls._invalidar_caches({solicitacao.usuario_id for solicitacao in solicitacoes}, cidades)
+
+        resultado.processadas = [solicitacao.id for solicitacao in solicitacoes]
+        return resultado
+
+    @classmethod
+    @transaction.atomic
+    def rejeitar(cls, solicitacao_ids, aprovado_por, observacoes="") -> ResultadoAprovacao:
+        """
+        Rejeita várias solicitações
+
+        Args:
+            solicitacao_ids: Ids das solicitações (None para todas as pendentes)
+            aprovado_por: Usuário que rejeitou
+            observacoes: Observações gravadas em todas as solicitações (opcional)
+
+        Returns:
+            ResultadoAprovacao
+        """
+        resultado = ResultadoAprovacao()
+        solicitacoes = cls._carregar(solicitacao_ids, resultado)
+        if solicitacoes:
+            cls._finalizar(solicitacoes, StatusSolicitacao.REJEITADA, aprovado_por, observacoes, timezone.now())
+            resultado.processadas = [solicitacao.id for solicitacao in solicitacoes]
+        return resultado
+
+    @classmethod
+    def executar(cls, acao, solicitacao_ids, aprovado_por, observacoes="") -> ResultadoAprovacao:
+        """Despacha a ação em massa ("aprovar" ou "rejeitar")"""
+        if acao == AcaoSolicitacao.APROVAR:
+            return cls.aprovar(solicitacao_ids, aprovado_por, observacoes)
+        if acao == AcaoSolicitacao.REJEITAR:
+            return cls.rejeitar(solicitacao_ids, aprovado_por, observacoes)
+        raise ValueError(f"Ação inválida: {acao}")
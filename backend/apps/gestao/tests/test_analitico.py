@@ -0,0 +1,140 @@
+"""
+Testes para a leitura analítica em lotes e a exportação Parquet
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from apps.gestao.analitico import COLUNAS, MARCA_EXPORTACAO_PARQUET, FatosPedidosAnaliticos, converter_valor
+from apps.gestao.fatos import SOBREPOSICAO
+from apps.gestao.models import MarcaProcessamento
+from apps.pedidos.models import Pedido
+from apps.rotas.models import Cidade, Estado, Rota
+
+
+@pytest.mark.django_db
+class TestFatosPedidosAnaliticos:
+    """Testes da paginação por chave e das dimensões"""
+
+    @pytest.fixture
+    def cliente(self):
+        return User.objects.create_user(username="cliente_analitico", password="testpass123")
+
+    def criar_pedido(self, cliente, criado_em):
+        pedido = Pedido.objects.create(
+            cliente=cliente,
+            cidade_origem="Campinas - São Paulo",
+            cidade_destino="Curitiba - Paraná",
+            peso_carga=Decimal("100"),
+            prazo_desejado=3,
+        )
+        Pedido.objects.filter(pk=pedido.pk).update(created_at=criado_em)
+        return pedido
+
+    def test_lotes_por_chave_com_empates_de_updated_at(self, cliente):
+        pedidos = [self.criar_pedido(cliente, datetime(2024, 1, 10, 12, tzinfo=dt_timezone.utc)) for _ in range(5)]
+        mesmo_instante = datetime(2024, 2, 1, 12, tzinfo=dt_timezone.utc)
+        Pedido.objects.update(updated_at=mesmo_instante)
+
+        lotes = list(FatosPedidosAnaliticos.lotes(tamanho=2))
+
+        ids = [pedido_id for lote in lotes for colunas in lote.particoes.values() for pedido_id in colunas["pedido_id"]]
+        assert ids == [pedido.id for pedido in pedidos]
+        assert [lote.linhas for lote in lotes] == [2, 2, 1]
+
+    def test_particiona_por_mes_de_criacao_e_resolve_dimensoes(self, cliente):
+        campinas = Cidade.objects.create(nome="Campinas", estado=Estado.SP, latitude=Decimal("-22.9"))
+        curitiba = Cidade.objects.create(nome="Curitiba", estado=Estado.PR)
+        Rota.objects.create(origem=campinas, destino=curitiba, distancia_km=Decimal("500.00"))
+        self.criar_pedido(cliente, datetime(2024, 1, 10, 12, tzinfo=dt_timezone.utc))
+        self.criar_pedido(cliente, datetime(2024, 3, 10, 12, tzinfo=dt_timezone.utc))
+
+        (lote,) = FatosPedidosAnaliticos.lotes()
+
+        assert set(lote.particoes) == {(2024, 1), (2024, 3)}
+        colunas = lote.particoes[(2024, 1)]
+        assert colunas["uf_origem"] == ["SP"]
+        assert colunas["estado_destino"] == ["Paraná"]
+        assert colunas["latitude_origem"] == [Decimal("-22.9")]
+        assert colunas["distancia_km"] == [Decimal("500.00")]
+        assert colunas["veiculo_tipo"] == [None]
+
+    def test_respeita_marca_dagua(self, cliente):
+        self.criar_pedido(cliente, datetime(2024, 1, 10, 12, tzinfo=dt_timezone.utc))
+        marca = Pedido.objects.get().updated_at
+
+        assert list(FatosPedidosAnaliticos.lotes(desde=marca)) == []
+
+    def test_converte_valores_para_o_tipo_da_coluna(self):
+        assert str(converter_valor("decimal", Decimal("10.5"))) == "10.50"
+        assert str(converter_valor("decimal", 3)) == "3.00"
+        assert converter_valor("real", Decimal("-22.9")) == -22.9
+        assert converter_valor("inteiro", 7) == 7
+        assert converter_valor("texto", None) is None
+
+    def test_colunas_convertidas_do_lote(self, cliente):
+        self.criar_pedido(cliente, datetime(2024, 1, 10, 12, tzinfo=dt_timezone.utc))
+
+        (lote,) = FatosPedidosAnaliticos.lotes()
+        colunas = FatosPedidosAnaliticos.colunas_convertidas(lote.particoes[(2024, 1)])
+
+        assert list(colunas) == [nome for nome, _ in COLUNAS]
+        assert all(len(valores) == 1 for valores in colunas.values())
+        assert colunas["peso_carga"] == [Decimal("100.00")]
+        assert colunas["distancia_km"] == [None]
+
+    def test_marca_fica_atras_do_inicio_da_exportacao(self, cliente):
+        inicio = timezone.now()
+        recente = inicio - timedelta(seconds=30)
+        antigo = inicio - timedelta(hours=1)
+
+        assert FatosPedidosAnaliticos.avancar_marca(recente, inicio) == inicio - SOBREPOSICAO
+        assert FatosPedidosAnaliticos.avancar_marca(antigo, inicio) == inicio - SOBREPOSICAO
+        assert MarcaProcessamento.objects.get(nome=MARCA_EXPORTACAO_PARQUET).valor == inicio - SOBREPOSICAO
+
+    def test_commit_tardio_entra_na_exportacao_seguinte(self, cliente):
+        inicio = timezone.now()
+        exportado = self.criar_pedido(cliente, datetime(2024, 1, 10, 12, tzinfo=dt_timezone.utc))
+        Pedido.objects.filter(pk=exportado.pk).update(updated_at=inicio - timedelta(seconds=10))
+        (lote,) = FatosPedidosAnaliticos.lotes()
+        marca = FatosPedidosAnaliticos.avancar_marca(lote.ultimo_updated_at, inicio)
+
+        # Gravado antes do último exportado, mas visível só depois da exportação
+        tardio = self.criar_pedido(cliente, datetime(2024, 1, 11, 12, tzinfo=dt_timezone.utc))
+        Pedido.objects.filter(pk=tardio.pk).update(updated_at=inicio - timedelta(seconds=20))
+
+        ids = [
+            pedido_id
+            for lote in FatosPedidosAnaliticos.lotes(desde=marca)
+            for colunas in lote.particoes.values()
+            for pedido_id in colunas["pedido_id"]
+        ]
+        assert ids == [tardio.id, exportado.id]
+
+    def test_comando_exige_pyarrow(self, tmp_path):
+        with mock.patch.dict(sys.modules, {"pyarrow": None, "pyarrow.parquet": None}):
+            with pytest.raises(CommandError, match="pyarrow"):
+                call_command("exportar_parquet", str(tmp_path))
+
+    def test_comando_grava_particoes_e_avanca_marca(self, cliente, tmp_path):
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+
+        self.criar_pedido(cliente, datetime(2024, 1, 10, 12, tzinfo=dt_timezone.utc))
+        # Fora da janela de sobreposição: a segunda execução não exporta de novo
+        Pedido.objects.update(updated_at=timezone.now() - 2 * SOBREPOSICAO)
+
+        call_command("exportar_parquet", str(tmp_path))
+        call_command("exportar_parquet", str(tmp_path))
+
+        arquivos = list(tmp_path.glob("ano=2024/mes=01/*.parquet"))
+        assert len(arquivos) == 1
+        assert pq.read_table(arquivos[0]).num_rows == 1
+        assert MarcaProcessamento.objects.get(nome=MARCA_EXPORTACAO_PARQUET).valor is not None
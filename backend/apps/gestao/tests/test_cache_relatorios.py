@@ -0,0 +1,112 @@
+"""
+Testes para o cache do relatório gerencial
+"""
+
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.contas.models import Role
+from apps.gestao.cache_relatorios import CacheRelatorios
+from apps.gestao.fatos import FatosPedidos
+from apps.pedidos.models import Pedido, StatusPedido
+
+
+def criar_pedido_concluido(cliente):
+    return Pedido.objects.create(
+        cliente=cliente,
+        cidade_origem="Campinas - São Paulo",
+        cidade_destino="Curitiba - Paraná",
+        peso_carga=Decimal("100"),
+        prazo_desejado=3,
+        status=StatusPedido.CONCLUIDO,
+        preco_final=Decimal("250.00"),
+    )
+
+
+@pytest.mark.django_db
+class TestCacheRelatorios:
+    """Testes do cache com stale-while-revalidate"""
+
+    @pytest.fixture
+    def cliente(self):
+        return User.objects.create_user(username="cliente_cache_rel", password="testpass123")
+
+    def test_segunda_leitura_vem_do_cache(self, django_assert_num_queries):
+        primeira = CacheRelatorios.obter("30dias", 2024)
+
+        with django_assert_num_queries(0):
+            segunda = CacheRelatorios.obter("30dias", 2024)
+
+        assert segunda.calculado_em == primeira.calculado_em
+        assert segunda.desatualizado is False
+
+    def test_atualizacao_dos_agregados_invalida(self, cliente):
+        assert CacheRelatorios.obter().dados["financeiro"]["total_pedidos"] == 0
+
+        criar_pedido_concluido(cliente)
+        FatosPedidos.atualizar()
+        relatorio = CacheRelatorios.obter()
+
+        assert relatorio.dados["financeiro"]["total_pedidos"] == 1
+
+    def test_recalculo_recente_serve_valor_antigo(self, cliente):
+        CacheRelatorios.obter("30dias", 2024)
+        _, chave_trava = CacheRelatorios._chaves("30dias", 2024)
+        cache.add(chave_trava, True, 30)
+
+        criar_pedido_concluido(cliente)
+        relatorio = CacheRelatorios.obter("30dias", 2024)
+
+        assert relatorio.desatualizado is True
+        assert relatorio.dados["financeiro"]["total_pedidos"] == 0
+
+    def test_recalculo_em_segundo_plano_unico(self):
+        CacheRelatorios.obter("7dias", 2024)
+        CacheRelatorios.invalidar()
+
+        with mock.patch("apps.gestao.cache_relatorios.paralelismo_disponivel", return_value=True), mock.patch.object(
+            CacheRelatorios, "_recalcular_em_segundo_plano"
+        ) as recalcular:
+            primeira = CacheRelatorios.obter("7dias", 2024)
+            segunda = CacheRelatorios.obter("7dias", 2024)
+
+        assert primeira.desatualizado and segunda.desatualizado
+        recalcular.assert_called_once()
+
+    def test_sem_cache_quem_nao_tem_a_trava_espera_o_resultado(self):
+        chave, chave_trava = CacheRelatorios._chaves("90dias", 2024)
+        cache.add(chave_trava, True, 30)
+        pronto = {"versao": CacheRelatorios.versao(), "calculado_em": timezone.now(), "dados": {"pronto": True}}
+
+        # Outro processo grava o resultado enquanto este espera
+        with mock.patch(
+            "apps.gestao.cache_relatorios.time.sleep", side_effect=lambda _: cache.set(chave, pronto, None)
+        ), mock.patch.object(CacheRelatorios, "_calcular") as calcular:
+            relatorio = CacheRelatorios.obter("90dias", 2024)
+
+        calcular.assert_not_called()
+        assert relatorio.dados == {"pronto": True}
+
+    def test_sem_cache_calcula_sob_a_trava_e_libera(self):
+        _, chave_trava = CacheRelatorios._chaves("ano", 2024)
+
+        CacheRelatorios.obter("ano", 2024)
+
+        assert cache.add(chave_trava, True, 30)
+
+    def test_pagina_mostra_idade_do_cache(self, client):
+        gerente = User.objects.create_user(username="gerente_cache_rel", password="testpass123")
+        gerente.profile.role = Role.GERENTE
+        gerente.profile.save()
+        client.force_login(gerente)
+
+        response = client.get(reverse("gestao:relatorios"))
+
+        assert response.status_code == 200
+        assert "Calculado há" in response.content.decode()
@@ -0,0 +1,116 @@
+"""
+Testes para os contadores de status incrementais dos dashboards
+"""
+
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.contas.models import Role
+from apps.gestao import contadores
+from apps.gestao.models import ContadorStatus
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.models import Cidade
+
+
+def criar_pedido(cliente, status=StatusPedido.PENDENTE):
+    return Pedido.objects.create(
+        cliente=cliente,
+        cidade_origem="São Paulo - São Paulo",
+        cidade_destino="Rio de Janeiro - Rio de Janeiro",
+        peso_carga=Decimal("100"),
+        prazo_desejado=3,
+        status=status,
+    )
+
+
+@pytest.mark.django_db
+class TestContadores:
+    """Testes da manutenção incremental dos contadores"""
+
+    @pytest.fixture
+    def cliente(self):
+        return User.objects.create_user(username="cliente_contador", password="testpass123")
+
+    def test_acompanha_criacao_transicao_e_exclusao(self, cliente):
+        pedido = criar_pedido(cliente)
+        criar_pedido(cliente)
+        assert contadores.ler()["pedido"][StatusPedido.PENDENTE] == 2
+
+        pedido.status = StatusPedido.APROVADO
+        pedido.save()
+        totais = contadores.ler()["pedido"]
+        assert totais[StatusPedido.PENDENTE] == 1
+        assert totais[StatusPedido.APROVADO] == 1
+
+        pedido.delete()
+        assert contadores.ler()["pedido"][StatusPedido.APROVADO] == 0
+        assert contadores.reconciliar() == []
+
+    def test_instancia_desatualizada_nao_gera_divergencia(self, cliente):
+        pedido = criar_pedido(cliente)
+        contadores.ler()
+        Pedido.objects.filter(pk=pedido.pk).update(status=StatusPedido.CANCELADO)
+        contadores.registrar_transicoes("pedido", [(StatusPedido.PENDENTE, StatusPedido.CANCELADO)])
+
+        pedido.status = StatusPedido.CANCELADO
+        pedido.save()
+
+        assert contadores.reconciliar() == []
+
+    def test_instancia_carregada_sem_transicao_nao_consulta_o_banco(self, cliente):
+        pedido = Pedido.objects.get(pk=criar_pedido(cliente).pk)
+
+        pedido.peso_carga = Decimal("150")
+        with CaptureQueriesContext(connection) as consultas:
+            pedido.save()
+
+        selects = [q["sql"] for q in consultas.captured_queries if q["sql"].startswith("SELECT")]
+        assert not [sql for sql in selects if 'FROM "pedidos_pedido"' in sql]
+        assert contadores.reconciliar() == []
+
+    def test_papel_e_cidade_ativa(self, cliente):
+        cliente.profile.role = Role.MOTORISTA
+        cliente.profile.save()
+        cidade = Cidade.objects.create(nome="Recife", estado="PE")
+        cidade.ativa = False
+        cidade.save(update_fields=["ativa"])
+
+        totais = contadores.ler()
+        assert totais["perfil"][Role.MOTORISTA] == 1
+        assert totais["usuario"][contadores.TOTAL] == 1
+        assert totais["cidade"][contadores.INATIVA] == 1
+        assert totais["cidade"][contadores.ATIVA] == 0
+
+    def test_comando_reporta_e_corrige_divergencia(self, cliente):
+        criar_pedido(cliente)
+        contadores.ler()
+        ContadorStatus.objects.filter(entidade="pedido", chave=StatusPedido.PENDENTE).update(total=7)
+
+        saida = StringIO()
+        call_command("reconciliar_contadores", "--apenas-verificar", stdout=saida)
+        assert "pedido:pendente armazenado=7 real=1 (-6)" in saida.getvalue()
+        assert ContadorStatus.objects.get(entidade="pedido", chave=StatusPedido.PENDENTE).total == 7
+
+        call_command("reconciliar_contadores", stdout=StringIO())
+        assert ContadorStatus.objects.get(entidade="pedido", chave=StatusPedido.PENDENTE).total == 1
+
+    def test_dashboard_le_os_contadores(self, client, cliente, django_assert_max_num_queries):
+        criar_pedido(cliente, StatusPedido.CONCLUIDO)
+        gerente = User.objects.create_user(username="gerente_contador", password="testpass123")
+        gerente.profile.role = Role.GERENTE
+        gerente.profile.save()
+        client.force_login(gerente)
+        contadores.ler()
+
+        response = client.get(reverse("gestao:dashboard_gerente"))
+
+        assert response.context["pedidos_concluidos"] == 1
+        assert response.context["total_pedidos"] == 1
+        assert response.context["total_clientes"] == 1
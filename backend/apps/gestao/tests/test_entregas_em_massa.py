@@ -0,0 +1,87 @@
+"""
+Testes para a tela de transições de entregas em massa
+"""
+
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from apps.contas.models import Role
+from apps.motoristas.models import AtribuicaoPedido, CategoriaCNH, Motorista, StatusAtribuicao
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.models import Cidade
+from apps.veiculos.models import EspecificacaoVeiculo, TipoCombustivel, TipoVeiculo, Veiculo
+
+
+@pytest.mark.django_db
+class TestEntregasEmMassaView:
+    """Testes da view entregas_em_massa"""
+
+    @pytest.fixture
+    def gerente(self):
+        user = User.objects.create_user(username="gerente_massa", password="testpass123")
+        user.profile.role = Role.GERENTE
+        user.profile.save()
+        return user
+
+    @pytest.fixture
+    def atribuicao(self):
+        cidade = Cidade.objects.create(nome="Recife", estado="PE")
+        motorista_user = User.objects.create_user(username="motorista_massa", password="testpass123")
+        motorista_user.profile.role = Role.MOTORISTA
+        motorista_user.profile.save()
+        motorista = Motorista.objects.create(
+            profile=motorista_user.profile, sede_atual=cidade, cnh_categoria=CategoriaCNH.D, disponivel=False
+        )
+        espec = EspecificacaoVeiculo.objects.create(
+            tipo=TipoVeiculo.VAN,
+            combustivel_principal=TipoCombustivel.DIESEL,
+            rendimento_principal=10.0,
+            carga_maxima=1500,
+            velocidade_media=80,
+            reducao_rendimento_principal=0.001,
+        )
+        veiculo = Veiculo.objects.create(
+            especificacao=espec, marca="Fiat", modelo="Ducato", placa="REC1234", ano=2020, cor="Branco"
+        )
+        pedido = Pedido.objects.create(
+            cliente=motorista_user,
+            cidade_origem="Recife - Pernambuco",
+            cidade_destino="Recife - Pernambuco",
+            peso_carga=Decimal("100"),
+            prazo_desejado=3,
+            status=StatusPedido.EM_TRANSPORTE,
+        )
+        return AtribuicaoPedido.objects.create(
+            pedido=pedido, motorista=motorista, veiculo=veiculo, status=StatusAtribuicao.PENDENTE
+        )
+
+    def test_lista_entregas_ativas(self, client, gerente, atribuicao):
+        client.force_login(gerente)
+        response = client.get(reverse("gestao:entregas_em_massa"))
+
+        assert response.status_code == 200
+        assert atribuicao in response.context["page_obj"].object_list
+
+    def test_aplica_acao_nas_selecionadas(self, client, gerente, atribuicao):
+        client.force_login(gerente)
+        response = client.post(
+            reverse("gestao:entregas_em_massa"), {"acao": "iniciar", "atribuicao_ids": [atribuicao.id]}
+        )
+
+        assert response.status_code == 302
+        atribuicao.refresh_from_db()
+        assert atribuicao.status == StatusAtribuicao.EM_ANDAMENTO
+
+    def test_cliente_sem_acesso(self, client, atribuicao):
+        cliente = User.objects.create_user(username="cliente_massa", password="testpass123")
+        client.force_login(cliente)
+        response = client.post(
+            reverse("gestao:entregas_em_massa"), {"acao": "cancelar", "atribuicao_ids": [atribuicao.id]}
+        )
+
+        assert response.status_code == 302
+        atribuicao.refresh_from_db()
+        assert atribuicao.status == StatusAtribuicao.PENDENTE
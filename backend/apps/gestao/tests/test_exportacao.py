@@ -0,0 +1,106 @@
+"""
+Testes para a exportação em streaming (CSV/XLSX)
+"""
+
+import io
+import zipfile
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from apps.contas.models import Role
+from apps.gestao.exportacao import _coluna, gerar_csv, gerar_xlsx
+from apps.pedidos.models import Pedido, StatusPedido
+
+
+def conteudo(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestExportacao:
+    """Testes das exportações das listagens e relatórios"""
+
+    @pytest.fixture
+    def gerente(self, client):
+        gerente = User.objects.create_user(username="gerente_export", password="testpass123")
+        gerente.profile.role = Role.GERENTE
+        gerente.profile.save()
+        client.force_login(gerente)
+        return gerente
+
+    @pytest.fixture
+    def pedido(self):
+        cliente = User.objects.create_user(username="cliente_export", password="testpass123")
+        return Pedido.objects.create(
+            cliente=cliente,
+            cidade_origem="Campinas - São Paulo",
+            cidade_destino="Curitiba - Paraná",
+            peso_carga=Decimal("100"),
+            prazo_desejado=3,
+            status=StatusPedido.PENDENTE,
+            observacoes='Frágil; "manusear com cuidado"',
+        )
+
+    def test_coluna(self):
+        assert _coluna(0) == "A"
+        assert _coluna(25) == "Z"
+        assert _coluna(26) == "AA"
+
+    def test_csv_pedidos_para_aprovacao(self, client, gerente, pedido):
+        response = client.get(reverse("gestao:pedidos_para_aprovacao"), {"exportar": "csv"})
+
+        assert response.streaming
+        assert response["Content-Disposition"] == 'attachment; filename="pedidos_para_aprovacao.csv"'
+        linhas = conteudo(response).decode("utf-8-sig").splitlines()
+        assert linhas[0].startswith("Pedido;Cliente;Origem")
+        assert linhas[1].startswith(f"{pedido.id};cliente_export;Campinas - São Paulo")
+        assert ";Pendente;" in linhas[1]
+
+    def test_xlsx_listagem_de_pedidos(self, client, gerente, pedido):
+        response = client.get(reverse("pedidos:listar"), {"exportar": "xlsx"})
+
+        arquivo = zipfile.ZipFile(io.BytesIO(conteudo(response)))
+        assert arquivo.testzip() is None
+        assert "xl/workbook.xml" in arquivo.namelist()
+        planilha = arquivo.read("xl/worksheets/sheet1.xml").decode()
+        assert '<c r="A2"><v>' in planilha
+        assert "cliente_export" in planilha
+
+    def test_xlsx_escapa_texto_e_remove_caracteres_de_controle(self):
+        dados = b"".join(gerar_xlsx(["Texto"], [("<a & b>\x01",)]))
+
+        planilha = zipfile.ZipFile(io.BytesIO(dados)).read("xl/worksheets/sheet1.xml").decode()
+        assert "&lt;a &amp; b&gt;</t>" in planilha
+
+    def test_neutraliza_formulas(self):
+        csv_gerado = "".join(gerar_csv(["Texto", "Valor"], [('=HYPERLINK("x")', Decimal("-5.00")), ("@SUM(A1)", "ok")]))
+        assert "'=HYPERLINK" in csv_gerado
+        assert "'@SUM(A1)" in csv_gerado
+        assert ";-5.00" in csv_gerado
+
+        dados = b"".join(gerar_xlsx(["Texto"], [("+1+1",), ("-2",)]))
+        planilha = zipfile.ZipFile(io.BytesIO(dados)).read("xl/worksheets/sheet1.xml").decode()
+        assert '<t xml:space="preserve">\'+1+1</t>' in planilha
+        assert '<t xml:space="preserve">\'-2</t>' in planilha
+
+    def test_exportacao_de_problemas(self, client, gerente):
+        response = client.get(reverse("gestao:listar_problemas"), {"exportar": "csv", "status": "todos"})
+
+        assert response.status_code == 200
+        assert conteudo(response).decode("utf-8-sig").startswith("Problema;Pedido;Motorista")
+
+    def test_exportacao_de_secao_do_relatorio(self, client, gerente):
+        response = client.get(reverse("gestao:relatorios"), {"exportar": "csv", "secao": "mensal", "ano": 2024})
+
+        linhas = conteudo(response).decode("utf-8-sig").splitlines()
+        assert linhas[0] == "Mês;Pedidos;Receita"
+        assert len(linhas) == 13
+
+    def test_formato_desconhecido_renderiza_pagina(self, client, gerente):
+        response = client.get(reverse("gestao:pedidos_para_aprovacao"), {"exportar": "pdf"})
+
+        assert response.status_code == 200
+        assert not response.streaming
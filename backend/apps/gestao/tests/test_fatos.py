@@ -0,0 +1,116 @@
+"""
+Testes para os agregados diários de pedidos usados nos relatórios
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.gestao.fatos import FatosPedidos, estado_do_texto
+from apps.gestao.models import FatoPedidoDiario
+from apps.gestao.relatorios import RelatorioGerencial
+from apps.pedidos.models import Pedido, StatusPedido
+
+
+@pytest.mark.django_db
+class TestFatosPedidos:
+    """Testes da atualização incremental dos agregados"""
+
+    @pytest.fixture
+    def cliente(self):
+        return User.objects.create_user(username="cliente_fatos", password="testpass123")
+
+    def criar_pedido(self, cliente, status=StatusPedido.PENDENTE, preco=None):
+        return Pedido.objects.create(
+            cliente=cliente,
+            cidade_origem="Campinas - São Paulo",
+            cidade_destino="Curitiba - Paraná",
+            peso_carga=Decimal("100"),
+            prazo_desejado=3,
+            status=status,
+            preco_final=preco,
+            custo_combustivel=Decimal("45.30") if preco else None,
+            custo_pedagio=Decimal("12.00") if preco else None,
+        )
+
+    def test_estado_do_texto(self):
+        assert estado_do_texto("Campinas - São Paulo") == "São Paulo"
+        assert estado_do_texto("Campinas") == ""
+
+    def test_conclusao_registra_data_real(self, cliente):
+        pedido = self.criar_pedido(cliente)
+        assert pedido.concluido_em is None
+
+        pedido.status = StatusPedido.CONCLUIDO
+        pedido.save(update_fields=["status", "updated_at"])
+
+        pedido.refresh_from_db()
+        assert pedido.concluido_em is not None
+
+    def test_agrega_por_dia_status_e_estado(self, cliente):
+        self.criar_pedido(cliente)
+        self.criar_pedido(cliente, StatusPedido.CONCLUIDO, Decimal("300.00"))
+
+        resultado = FatosPedidos.atualizar()
+
+        assert resultado.dias == 1
+        concluido = FatoPedidoDiario.objects.get(status=StatusPedido.CONCLUIDO)
+        assert concluido.estado_origem == "São Paulo"
+        assert concluido.pedidos_criados == 1
+        assert concluido.pedidos_concluidos == 1
+        assert concluido.receita == Decimal("300.00")
+        assert concluido.custo_combustivel == Decimal("45.30")
+        assert concluido.custo_pedagio == Decimal("12.00")
+
+    def test_reprocessa_apenas_dias_tocados(self, cliente):
+        antigo = self.criar_pedido(cliente)
+        dez_dias = timezone.now() - timedelta(days=10)
+        Pedido.objects.filter(pk=antigo.pk).update(created_at=dez_dias, updated_at=dez_dias)
+        FatosPedidos.atualizar()
+        assert FatosPedidos.atualizar().dias == 0
+
+        pedido = self.criar_pedido(cliente)
+        pedido.status = StatusPedido.CONCLUIDO
+        pedido.preco_final = Decimal("100.00")
+        pedido.save()
+
+        resultado = FatosPedidos.atualizar()
+        assert resultado.dias == 1
+        assert FatoPedidoDiario.objects.filter(status=StatusPedido.PENDENTE).count() == 1
+
+    def test_rele_janela_de_sobreposicao(self, cliente):
+        """Pedido gravado com updated_at anterior à marca (commit atrasado) ainda é processado"""
+        primeiro = self.criar_pedido(cliente)
+        FatosPedidos.atualizar()
+
+        atrasado = self.criar_pedido(cliente, StatusPedido.CONCLUIDO, Decimal("80.00"))
+        Pedido.objects.filter(pk=atrasado.pk).update(updated_at=primeiro.updated_at - timedelta(minutes=1))
+        FatosPedidos.atualizar()
+
+        assert FatoPedidoDiario.objects.get(status=StatusPedido.CONCLUIDO).receita == Decimal("80.00")
+
+    def test_relatorio_usa_data_de_conclusao(self, cliente):
+        pedido = self.criar_pedido(cliente, StatusPedido.CONCLUIDO, Decimal("500.00"))
+        Pedido.objects.filter(pk=pedido.pk).update(concluido_em=timezone.now() - timedelta(days=60))
+        FatosPedidos.atualizar(completo=True)
+
+        assert RelatorioGerencial.get_resumo_financeiro("30dias")["total_pedidos"] == 0
+        resumo = RelatorioGerencial.get_resumo_financeiro("90dias")
+        assert resumo["total_receita"] == Decimal("500.00")
+        assert resumo["lucro_estimado"] == Decimal("442.70")
+
+    def test_comando(self, cliente):
+        pedido = self.criar_pedido(cliente)
+        Pedido.objects.filter(pk=pedido.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        saida = StringIO()
+
+        call_command("atualizar_fatos_pedidos", stdout=saida)
+        call_command("atualizar_fatos_pedidos", stdout=saida)
+
+        assert "1 dia(s) recalculado(s)" in saida.getvalue()
+        assert "Agregados já estão atualizados" in saida.getvalue()
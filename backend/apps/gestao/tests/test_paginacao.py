@@ -0,0 +1,161 @@
+"""
+Testes para a paginação por cursor das listagens
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.contas.models import Role
+from apps.gestao.paginacao import PaginadorCursor, paginar_por_cursor
+from apps.pedidos.models import Pedido
+from apps.rotas.models import Cidade
+
+
+@pytest.mark.django_db
+class TestPaginadorCursor:
+    """Testes da navegação para frente e para trás"""
+
+    @pytest.fixture
+    def pedidos(self):
+        cliente = User.objects.create_user(username="cliente_cursor", password="testpass123")
+        pedidos = [
+            Pedido.objects.create(
+                cliente=cliente,
+                cidade_origem="São Paulo - São Paulo",
+                cidade_destino="Rio de Janeiro - Rio de Janeiro",
+                peso_carga=Decimal("100"),
+                prazo_desejado=3,
+            )
+            for _ in range(7)
+        ]
+        # Dois pedidos com o mesmo created_at: o id desempata
+        base = timezone.make_aware(datetime(2024, 3, 1, 12))
+        for i, pedido in enumerate(pedidos):
+            Pedido.objects.filter(pk=pedido.pk).update(created_at=base + timedelta(hours=min(i, 5)))
+        return Pedido.objects.order_by("-created_at")
+
+    def ids(self, pagina):
+        return [pedido.id for pedido in pagina]
+
+    def test_percorre_todas_as_paginas_sem_repetir(self, pedidos):
+        esperado = list(pedidos.order_by("-created_at", "-id").values_list("id", flat=True))
+        paginador = PaginadorCursor(pedidos, 3)
+
+        primeira = paginador.get_page()
+        segunda = paginador.get_page(primeira.cursor_proximo)
+        terceira = paginador.get_page(segunda.cursor_proximo)
+
+        assert self.ids(primeira) + self.ids(segunda) + self.ids(terceira) == esperado
+        assert (primeira.number, segunda.number, terceira.number) == (1, 2, 3)
+        assert not primeira.has_previous() and not terceira.has_next()
+        assert paginador.count == 7
+
+    def test_empate_na_ordenacao_nao_repete_nem_pula(self):
+        criados = [User.objects.create_user(username=f"empate{i}") for i in range(7)]
+        User.objects.filter(pk__in=[user.pk for user in criados]).update(
+            date_joined=timezone.make_aware(datetime(2024, 3, 1, 12))
+        )
+        paginador = PaginadorCursor(User.objects.order_by("-date_joined"), 3)
+
+        vistos = []
+        pagina = paginador.get_page()
+        while True:
+            vistos.extend(self.ids(pagina))
+            if not pagina.has_next():
+                break
+            pagina = paginador.get_page(pagina.cursor_proximo)
+
+        assert vistos == sorted((user.pk for user in criados), reverse=True)
+
+    def test_volta_para_a_pagina_anterior(self, pedidos):
+        paginador = PaginadorCursor(pedidos, 3)
+        primeira = paginador.get_page()
+        segunda = paginador.get_page(primeira.cursor_proximo)
+        terceira = paginador.get_page(segunda.cursor_proximo)
+
+        de_volta = paginador.get_page(terceira.cursor_anterior)
+        assert self.ids(de_volta) == self.ids(segunda)
+        assert de_volta.number == 2
+
+        inicio = paginador.get_page(de_volta.cursor_anterior)
+        assert self.ids(inicio) == self.ids(primeira)
+        assert inicio.number == 1
+        assert not inicio.has_previous()
+
+    def test_ordem_com_direcoes_mistas(self):
+        for nome, estado in [("Campinas", "SP"), ("Niterói", "RJ"), ("Santos", "SP"), ("Angra", "RJ")]:
+            Cidade.objects.create(nome=nome, estado=estado)
+        cidades = Cidade.objects.order_by("estado", "-nome")
+        paginador = PaginadorCursor(cidades, 1)
+
+        nomes = []
+        pagina = paginador.get_page()
+        while True:
+            nomes.extend(cidade.nome for cidade in pagina)
+            if not pagina.has_next():
+                break
+            pagina = paginador.get_page(pagina.cursor_proximo)
+
+        assert nomes == ["Niterói", "Angra", "Santos", "Campinas"]
+
+    def test_cursor_invalido_ou_de_outra_listagem_volta_ao_inicio(self, pedidos):
+        cursor = PaginadorCursor(pedidos, 3).get_page().cursor_proximo
+
+        assert PaginadorCursor(pedidos, 3).get_page(cursor + "x").number == 1
+        assert PaginadorCursor(pedidos.order_by("created_at"), 3).get_page(cursor).number == 1
+
+    def test_campo_nulo_nao_e_aceito(self):
+        with pytest.raises(ValueError):
+            PaginadorCursor(Pedido.objects.order_by("concluido_em"), 10)
+
+    def test_links_mantem_os_filtros(self, pedidos):
+        request = RequestFactory().get("/pedidos/", {"status": "PENDENTE", "page": "4"})
+
+        pagina = paginar_por_cursor(request, pedidos, 3)
+
+        assert pagina.querystring_proxima.startswith("status=PENDENTE&cursor=")
+        assert pagina.querystring_primeira == "status=PENDENTE"
+
+
+@pytest.mark.django_db
+class TestListagensComCursor:
+    """As listagens da gestão navegam por `?cursor=`"""
+
+    def test_navegacao_nao_conta_os_itens(self, client):
+        gerente = User.objects.create_user(username="gerente_contagem", password="testpass123")
+        gerente.profile.role = Role.GERENTE
+        gerente.profile.save()
+        client.force_login(gerente)
+        for i in range(25):
+            Cidade.objects.create(nome=f"Cidade {i:02d}", estado="SP")
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.get(reverse("rotas:listar_cidades"))
+
+        assert "Página 1" in response.content.decode()
+        assert not [q for q in consultas.captured_queries if "COUNT(*)" in q["sql"] and "rotas_cidade" in q["sql"]]
+
+    def test_listar_cidades_segue_o_cursor(self, client):
+        gerente = User.objects.create_user(username="gerente_cursor", password="testpass123")
+        gerente.profile.role = Role.GERENTE
+        gerente.profile.save()
+        client.force_login(gerente)
+        for i in range(25):
+            Cidade.objects.create(nome=f"Cidade {i:02d}", estado="SP")
+
+        primeira = client.get(reverse("rotas:listar_cidades"))
+        page_obj = primeira.context["page_obj"]
+        assert len(page_obj) == 20
+        assert page_obj.paginator.count == 25
+        assert "cursor=" in primeira.content.decode()
+
+        segunda = client.get(reverse("rotas:listar_cidades"), {"cursor": page_obj.cursor_proximo})
+        assert [cidade.nome for cidade in segunda.context["page_obj"]] == [f"Cidade {i:02d}" for i in range(20, 25)]
@@ -10,7 +10,9 @@ from decimal import Decimal
 
 from apps.contas.models import Profile, Role
 from apps.pedidos.models import Pedido, StatusPedido
-from apps.gestao.relatorios import RelatorioGerencial
+from apps.gestao.fatos import FatosPedidos
+from apps.gestao.models import FatoPedidoDiario
+from apps.gestao.relatorios import RelatorioGerencial, executar_secoes
 
 
 @pytest.mark.django_db
@@ -144,8 +146,8 @@ class TestRelatorioGerencial:
 
     @pytest.fixture
     def pedido_concluido(self, cliente_user):
-        """Cria um pedido concluído para testes"""
-        return Pedido.objects.create(
+        """Cria um pedido concluído para testes (com os agregados diários atualizados)"""
+        pedido = Pedido.objects.create(
             cliente=cliente_user,
             cidade_origem="São Paulo",
             cidade_destino="Rio de Janeiro",
@@ -154,6 +156,8 @@ class TestRelatorioGerencial:
             status=StatusPedido.CONCLUIDO,
             preco_final=Decimal("500.00"),
         )
+        FatosPedidos.atualizar()
+        return pedido
 
     def test_get_resumo_financeiro_sem_pedidos(self):
         """Testa resumo financeiro sem pedidos"""
@@ -186,7 +190,7 @@ class TestRelatorioGerencial:
         assert "total_veiculos" in resultado
         assert "veiculos_ativos" in resultado
         assert "veiculos_inativos" in resultado
-        assert "taxa_utilizacao" in resultado
+        assert "percentual_ativos" in resultado
 
     def test_get_estatisticas_motoristas(self):
         """Testa estatísticas de motoristas"""
@@ -239,6 +243,23 @@ class TestRelatorioGerencial:
         # Verificar que tem_dados_financeiros está correto
         assert resultado["tem_dados_financeiros"] is True  # pedido_concluido existe
 
+    def test_relatorio_nao_atualiza_agregados(self, cliente_user):
+        """Testa que o relatório só lê os agregados mantidos pelo comando"""
+        Pedido.objects.create(
+            cliente=cliente_user,
+            cidade_origem="São Paulo",
+            cidade_destino="Rio de Janeiro",
+            peso_carga=Decimal("1000.00"),
+            prazo_desejado=3,
+            status=StatusPedido.CONCLUIDO,
+            preco_final=Decimal("500.00"),
+        )
+
+        resultado = RelatorioGerencial.get_relatorio_completo()
+
+        assert resultado["financeiro"]["total_pedidos"] == 0
+        assert not FatoPedidoDiario.objects.exists()
+
     def test_get_periodo_datas_7dias(self):
         """Testa cálculo de período para 7 dias"""
         data_inicio, data_fim = RelatorioGerencial.get_periodo_datas("7dias")
@@ -254,3 +275,39 @@ class TestRelatorioGerencial:
 
         assert data_inicio is None
         assert data_fim is not None
+
+
+@pytest.mark.django_db
+class TestSecoesRelatorio:
+    """Testes da agregação em uma consulta por seção e da execução das seções"""
+
+    def test_cada_secao_usa_uma_consulta(self, django_assert_num_queries):
+        """Testa que as seções sem agregados diários fazem uma única consulta"""
+        with django_assert_num_queries(1):
+            RelatorioGerencial.get_estatisticas_problemas()
+        with django_assert_num_queries(1):
+            RelatorioGerencial.get_estatisticas_veiculos()
+        with django_assert_num_queries(1):
+            RelatorioGerencial.get_estatisticas_motoristas()
+        with django_assert_num_queries(1):
+            RelatorioGerencial.get_resumo_financeiro()
+
+    def test_executa_em_sequencia_no_sqlite(self):
+        """Testa que no SQLite (ou dentro de transação) as seções rodam na thread atual"""
+        import threading
+
+        resultado = executar_secoes({"a": threading.get_ident, "b": threading.get_ident})
+
+        assert resultado == {"a": threading.get_ident(), "b": threading.get_ident()}
+
+    def test_executa_em_paralelo_fora_do_sqlite(self):
+        """Testa que em outros bancos as seções rodam no pool de threads"""
+        import threading
+        from unittest import mock
+
+        conexao = mock.Mock(vendor="postgresql", in_atomic_block=False)
+        with mock.patch("apps.gestao.relatorios.connection", conexao):
+            resultado = executar_secoes({"a": threading.get_ident, "b": lambda: 2})
+
+        assert resultado["b"] == 2
+        assert resultado["a"] != threading.get_ident()
@@ -0,0 +1,183 @@
+"""
+Testes para o agregado de rentabilidade por rota
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.contas.models import Profile, Role
+from apps.gestao.models import RentabilidadeRota
+from apps.gestao.rentabilidade import RentabilidadeRotas
+from apps.motoristas.models import AtribuicaoPedido, CargaConsolidada, CategoriaCNH, Motorista, StatusAtribuicao
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.models import Cidade, Rota
+from apps.veiculos.models import EspecificacaoVeiculo, TipoCombustivel, TipoVeiculo, Veiculo
+
+
+@pytest.mark.django_db
+class TestRentabilidadeRotas:
+    """Testes da atualização incremental e da consulta ordenada"""
+
+    @pytest.fixture
+    def cenario(self):
+        sp = Cidade.objects.create(nome="São Paulo", estado="SP")
+        rj = Cidade.objects.create(nome="Rio de Janeiro", estado="RJ")
+        bh = Cidade.objects.create(nome="Belo Horizonte", estado="MG")
+        return {
+            "sp_rj": Rota.objects.create(origem=sp, destino=rj, distancia_km=Decimal("430")),
+            "sp_bh": Rota.objects.create(origem=sp, destino=bh, distancia_km=Decimal("590")),
+            "cliente": User.objects.create_user(username="cliente_rentab", password="testpass123"),
+        }
+
+    def criar_pedido(self, cliente, destino, preco, combustivel, pedagio=Decimal("0.00"), peso=Decimal("100")):
+        return Pedido.objects.create(
+            cliente=cliente,
+            cidade_origem="São Paulo - São Paulo",
+            cidade_destino=destino,
+            peso_carga=peso,
+            prazo_desejado=3,
+            status=StatusPedido.CONCLUIDO,
+            preco_final=preco,
+            custo_combustivel=combustivel,
+            custo_pedagio=pedagio,
+        )
+
+    def test_agrega_por_rota(self, cenario):
+        cliente = cenario["cliente"]
+        rio = "Rio de Janeiro - Rio de Janeiro"
+        self.criar_pedido(cliente, rio, Decimal("500.00"), Decimal("100.00"), Decimal("50.00"))
+        self.criar_pedido(cliente, rio, Decimal("300.00"), Decimal("50.00"), peso=Decimal("300"))
+        self.criar_pedido(cliente, "Belo Horizonte - Minas Gerais", Decimal("100.00"), Decimal("150.00"))
+
+        resultado = RentabilidadeRotas.atualizar()
+
+        assert resultado.linhas == 2
+        sp_rj = RentabilidadeRota.objects.get(rota=cenario["sp_rj"])
+        assert sp_rj.pedidos == 2
+        assert sp_rj.receita == Decimal("800.00")
+        assert sp_rj.lucro == Decimal("600.00")
+        assert sp_rj.margem == 75.0
+        assert sp_rj.peso_medio == Decimal("200.00")
+        assert RentabilidadeRota.objects.get(rota=cenario["sp_bh"]).lucro == Decimal("-50.00")
+
+    @pytest.fixture
+    def frota(self, cenario):
+        sp = cenario["sp_rj"].origem
+        espec = EspecificacaoVeiculo.objects.create(
+            tipo=TipoVeiculo.VAN,
+            combustivel_principal=TipoCombustivel.DIESEL,
+            rendimento_principal=10.0,
+            carga_maxima=1000,
+            velocidade_media=80,
+            reducao_rendimento_principal=0.001,
+        )
+        veiculo = Veiculo.objects.create(
+            especificacao=espec, marca="Fiat", modelo="Ducato", placa="REN1000", ano=2020, cor="Branco", sede_atual=sp
+        )
+        user = User.objects.create_user(username="motorista_rentab", password="testpass123")
+        profile = Profile.objects.get(user=user)
+        profile.role = Role.MOTORISTA
+        profile.save()
+        motorista = Motorista.objects.create(profile=profile, sede_atual=sp, cnh_categoria=CategoriaCNH.D)
+        return veiculo, motorista
+
+    def test_fator_de_carga_usa_capacidade_do_veiculo(self, cenario, frota):
+        veiculo, motorista = frota
+        pedido = self.criar_pedido(
+            cenario["cliente"], "Rio de Janeiro - Rio de Janeiro", Decimal("500.00"), Decimal("100.00"), peso=250
+        )
+        AtribuicaoPedido.objects.create(
+            pedido=pedido, motorista=motorista, veiculo=veiculo, status=StatusAtribuicao.CONCLUIDO
+        )
+
+        RentabilidadeRotas.atualizar()
+
+        assert RentabilidadeRota.objects.get(rota=cenario["sp_rj"]).fator_carga_medio == 25.0
+
+    def test_fator_de_carga_conta_a_carga_consolidada_como_uma_viagem(self, cenario, frota):
+        veiculo, motorista = frota
+        carga = CargaConsolidada.objects.create(
+            rota=cenario["sp_rj"],
+            veiculo=veiculo,
+            motorista=motorista,
+            janela_inicio=timezone.localdate(),
+            peso_total=Decimal("900"),
+            custo_viagem=Decimal("600.00"),
+        )
+        for peso in (Decimal("500"), Decimal("400")):
+            pedido = self.criar_pedido(
+                cenario["cliente"], "Rio de Janeiro - Rio de Janeiro", Decimal("500.00"), Decimal("100.00"), peso=peso
+            )
+            AtribuicaoPedido.objects.create(
+                pedido=pedido, motorista=motorista, veiculo=veiculo, status=StatusAtribuicao.CONCLUIDO, carga=carga
+            )
+
+        RentabilidadeRotas.atualizar()
+
+        linha = RentabilidadeRota.objects.get(rota=cenario["sp_rj"])
+        assert linha.pedidos == 2
+        assert linha.fator_carga_medio == 90.0
+
+    def test_recalcula_apenas_rotas_tocadas(self, cenario):
+        cliente = cenario["cliente"]
+        self.criar_pedido(cliente, "Rio de Janeiro - Rio de Janeiro", Decimal("500.00"), Decimal("100.00"))
+        self.criar_pedido(cliente, "Belo Horizonte - Minas Gerais", Decimal("100.00"), Decimal("10.00"))
+        Pedido.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        RentabilidadeRotas.atualizar()
+        assert RentabilidadeRotas.atualizar().linhas == 0
+
+        self.criar_pedido(cliente, "Belo Horizonte - Minas Gerais", Decimal("200.00"), Decimal("20.00"))
+        assert RentabilidadeRotas.atualizar().linhas == 1
+        assert RentabilidadeRota.objects.get(rota=cenario["sp_bh"]).pedidos == 2
+
+    def test_listar_ordena_e_ignora_campo_desconhecido(self, cenario):
+        cliente = cenario["cliente"]
+        self.criar_pedido(cliente, "Rio de Janeiro - Rio de Janeiro", Decimal("500.00"), Decimal("100.00"))
+        self.criar_pedido(cliente, "Belo Horizonte - Minas Gerais", Decimal("100.00"), Decimal("10.00"))
+        RentabilidadeRotas.atualizar()
+
+        por_lucro, ordenar = RentabilidadeRotas.listar("campo_invalido")
+        assert ordenar == "-lucro"
+        assert [linha.rota_id for linha in por_lucro] == [cenario["sp_rj"].id, cenario["sp_bh"].id]
+
+        por_margem, _ = RentabilidadeRotas.listar("-margem")
+        assert [linha.rota_id for linha in por_margem] == [cenario["sp_bh"].id, cenario["sp_rj"].id]
+
+    def test_pagina_e_api(self, cenario, client):
+        self.criar_pedido(cenario["cliente"], "Rio de Janeiro - Rio de Janeiro", Decimal("500.00"), Decimal("100.00"))
+        RentabilidadeRotas.atualizar()
+        gerente = User.objects.create_user(username="gerente_rentab", password="testpass123")
+        gerente.profile.role = Role.GERENTE
+        gerente.profile.save()
+        client.force_login(gerente)
+
+        pagina = client.get(reverse("gestao:rentabilidade_rotas"), {"ordenar": "receita"})
+        assert pagina.status_code == 200
+        assert "Rio de Janeiro" in pagina.content.decode()
+
+        dados = client.get(reverse("gestao:api_rentabilidade_rotas")).json()
+        assert dados["total"] == 1
+        assert dados["rotas"][0]["lucro"] == "400.00"
+
+    def test_api_exige_gestao(self, cenario, client):
+        client.force_login(cenario["cliente"])
+
+        assert client.get(reverse("gestao:api_rentabilidade_rotas")).status_code == 403
+
+    def test_comando(self, cenario):
+        self.criar_pedido(cenario["cliente"], "Rio de Janeiro - Rio de Janeiro", Decimal("500.00"), Decimal("100.00"))
+        Pedido.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        saida = StringIO()
+
+        call_command("atualizar_rentabilidade_rotas", stdout=saida)
+        call_command("atualizar_rentabilidade_rotas", stdout=saida)
+
+        assert "1 rota(s) recalculada(s)" in saida.getvalue()
+        assert "já está atualizada" in saida.getvalue()
@@ -0,0 +1,186 @@
+"""
+Testes do resumo diário por email dos gerentes
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.contas.models import EmailPendente, Role
+from apps.gestao import contadores
+from apps.gestao.fatos import SOBREPOSICAO
+from apps.gestao.models import MarcaProcessamento
+from apps.gestao.resumo import MARCA_RESUMO_GERENTES, ResumoGerentes
+from apps.motoristas.models import (
+    AtribuicaoPedido,
+    CategoriaCNH,
+    Motorista,
+    ProblemaEntrega,
+    StatusAtribuicao,
+    StatusProblema,
+    TipoProblema,
+)
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.models import Cidade
+from apps.veiculos.models import EspecificacaoVeiculo, TipoCombustivel, TipoVeiculo, Veiculo
+
+
+def criar_usuario(username, role, **extra):
+    user = User.objects.create_user(username=username, email=f"{username}@example.com", **extra)
+    user.profile.role = role
+    user.profile.save()
+    return user
+
+
+@pytest.mark.django_db
+class TestResumoGerentes:
+    """Testes da agregação incremental e do enfileiramento do resumo"""
+
+    @pytest.fixture
+    def gerentes(self, cliente):
+        gerentes = [criar_usuario(f"gerente{i}", Role.GERENTE, first_name=f"Gerente {i}") for i in range(3)]
+        criar_usuario("inativo", Role.GERENTE, is_active=False)
+        criar_usuario("dono", Role.OWNER)
+        EmailPendente.objects.all().delete()
+        return gerentes
+
+    @pytest.fixture
+    def cliente(self):
+        return criar_usuario("cliente", Role.CLIENTE, first_name="Cliente")
+
+    def criar_pedido(self, cliente, status=StatusPedido.PENDENTE, preco=None):
+        return Pedido.objects.create(
+            cliente=cliente,
+            cidade_origem="Campinas - São Paulo",
+            cidade_destino="Curitiba - Paraná",
+            peso_carga=Decimal("100"),
+            prazo_desejado=3,
+            status=status,
+            preco_final=preco,
+        )
+
+    def antes_da_sobreposicao(self, *pedidos):
+        """Recua os horários dos pedidos para fora da janela de sobreposição"""
+        antes = timezone.now() - 2 * SOBREPOSICAO
+        Pedido.objects.filter(pk__in=[pedido.pk for pedido in pedidos]).update(created_at=antes, updated_at=antes)
+
+    def criar_problema(self, pedido, status=StatusProblema.PENDENTE):
+        cidade = Cidade.objects.create(nome="Campinas", estado="SP")
+        motorista = Motorista.objects.create(
+            profile=criar_usuario("motorista", Role.MOTORISTA).profile, sede_atual=cidade, cnh_categoria=CategoriaCNH.D
+        )
+        especificacao = EspecificacaoVeiculo.objects.create(
+            tipo=TipoVeiculo.CARRETA,
+            combustivel_principal=TipoCombustivel.DIESEL,
+            rendimento_principal=3.5,
+            carga_maxima=25000,
+            velocidade_media=80,
+            reducao_rendimento_principal=0.0001,
+        )
+        veiculo = Veiculo.objects.create(
+            especificacao=especificacao, marca="Scania", modelo="R450", placa="RES1234", ano=2021, cor="Branco"
+        )
+        atribuicao = AtribuicaoPedido.objects.create(
+            pedido=pedido, motorista=motorista, veiculo=veiculo, status=StatusAtribuicao.EM_ANDAMENTO
+        )
+        return ProblemaEntrega.objects.create(
+            atribuicao=atribuicao, tipo=TipoProblema.VEICULO, descricao="Pneu furou", status=status
+        )
+
+    def test_agrega_eventos_do_periodo(self, cliente):
+        inicio = timezone.now() - timedelta(hours=1)
+        pendente = self.criar_pedido(cliente)
+        self.criar_pedido(cliente, StatusPedido.CONCLUIDO, Decimal("300.00"))
+        em_transporte = self.criar_pedido(cliente, StatusPedido.EM_TRANSPORTE)
+        problema = self.criar_problema(em_transporte)
+
+        resumo = ResumoGerentes.agregar(inicio, timezone.now())
+
+        assert resumo.pedidos_criados == 3
+        assert resumo.pedidos_pendentes == 1
+        assert resumo.entregas_concluidas == 1
+        assert resumo.receita_concluida == Decimal("300.00")
+        assert resumo.problemas_abertos == 1
+        assert resumo.pendentes == [pendente]
+        assert resumo.problemas == [problema]
+        assert resumo.tem_eventos
+
+    def test_agregacao_nao_cresce_com_o_numero_de_eventos(self, cliente, django_assert_max_num_queries):
+        inicio = timezone.now() - timedelta(hours=1)
+        for _ in range(30):
+            self.criar_pedido(cliente)
+        contadores.ler()  # primeira leitura recalcula os contadores
+
+        with django_assert_max_num_queries(5):
+            resumo = ResumoGerentes.agregar(inicio, timezone.now())
+
+        assert resumo.pedidos_pendentes == 30
+        assert len(resumo.pendentes) == 10
+
+    def test_um_email_por_gerente_ativo(self, gerentes, cliente):
+        self.antes_da_sobreposicao(self.criar_pedido(cliente))
+
+        resultado = ResumoGerentes.gerar()
+
+        assert resultado.enfileirados == 3
+        emails = list(EmailPendente.objects.order_by("id"))
+        assert [email.destinatarios for email in emails] == [[g.email] for g in gerentes]
+        assert "Olá Gerente 0," in emails[0].corpo_texto
+        assert "Pedidos aguardando aprovação: 1" in emails[0].corpo_texto
+        assert "Campinas - São Paulo → Curitiba - Paraná" in emails[0].corpo_html
+        assert emails[0].assunto.startswith("📊 Resumo NeoCargo de ")
+
+    def test_marca_dagua_evita_repetir_eventos(self, gerentes, cliente):
+        self.antes_da_sobreposicao(self.criar_pedido(cliente))
+        ResumoGerentes.gerar()
+        marca = MarcaProcessamento.objects.get(nome=MARCA_RESUMO_GERENTES)
+        assert marca.valor is not None
+
+        resultado = ResumoGerentes.gerar()
+
+        assert not resultado.resumo.tem_eventos
+        assert resultado.enfileirados == 0
+        assert EmailPendente.objects.count() == 3
+
+    def test_eventos_recentes_ficam_para_o_resumo_seguinte(self, gerentes, cliente):
+        # Gravado há pouco (ou com commit atrasado): ainda dentro da sobreposição
+        self.criar_pedido(cliente)
+
+        primeiro = ResumoGerentes.gerar()
+
+        assert not primeiro.resumo.tem_eventos
+        assert MarcaProcessamento.objects.get(nome=MARCA_RESUMO_GERENTES).valor <= timezone.now() - SOBREPOSICAO
+
+        depois = timezone.now() + 2 * SOBREPOSICAO
+        with mock.patch("apps.gestao.resumo.timezone.now", return_value=depois):
+            segundo = ResumoGerentes.gerar()
+
+        assert segundo.resumo.pedidos_criados == 1
+        assert segundo.enfileirados == 3
+
+    def test_problema_resolvido_no_periodo(self, cliente):
+        inicio = timezone.now() - timedelta(hours=1)
+        problema = self.criar_problema(self.criar_pedido(cliente, StatusPedido.EM_TRANSPORTE))
+        ProblemaEntrega.objects.filter(pk=problema.pk).update(
+            status=StatusProblema.RESOLVIDO, resolvido_em=timezone.now(), criado_em=inicio - timedelta(days=1)
+        )
+
+        resumo = ResumoGerentes.agregar(inicio, timezone.now())
+
+        assert resumo.problemas_abertos == 0
+        assert resumo.problemas_resolvidos == 1
+
+    def test_comando(self, gerentes, cliente):
+        saida = StringIO()
+        call_command("enviar_resumo_gerentes", stdout=saida)
+        assert "Nenhum evento no período" in saida.getvalue()
+
+        saida = StringIO()
+        call_command("enviar_resumo_gerentes", "--enviar-vazio", stdout=saida)
+        assert "✅ Resumo enfileirado para 3 gerente(s)." in saida.getvalue()
@@ -0,0 +1,214 @@
+"""
+Testes da aprovação/rejeição em massa de solicitações de mudança de perfil
+"""
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.contas.models import Profile, Role
+from apps.gestao import contadores
+from apps.gestao.models import SolicitacaoMudancaPerfil, StatusSolicitacao
+from apps.gestao.solicitacoes import AprovacaoEmMassaService
+from apps.motoristas.models import CategoriaCNH, Motorista
+from apps.rotas.models import Cidade
+
+
+def criar_usuario(username, role=Role.CLIENTE):
+    user = User.objects.create_user(username=username, password="testpass123")
+    user.profile.role = role
+    user.profile.save()
+    return user
+
+
+@pytest.mark.django_db
+class TestAprovacaoEmMassaService:
+    """Testes do service de aprovação em massa"""
+
+    @pytest.fixture
+    def dono(self):
+        return criar_usuario("dono_massa", Role.OWNER)
+
+    @pytest.fixture
+    def cidade(self):
+        return Cidade.objects.create(nome="Recife", estado="PE")
+
+    def criar_solicitacoes(self, quantidade, cidade, prefixo="motorista"):
+        return [
+            SolicitacaoMudancaPerfil.objects.create(
+                usuario=criar_usuario(f"{prefixo}{i}"),
+                role_atual=Role.CLIENTE,
+                role_solicitada=Role.MOTORISTA,
+                justificativa="Quero dirigir",
+                cnh_categoria=CategoriaCNH.D,
+                sede_atual=cidade,
+            )
+            for i in range(quantidade)
+        ]
+
+    def test_aprova_e_cria_motoristas(self, dono, cidade):
+        solicitacoes = self.criar_solicitacoes(3, cidade)
+
+        resultado = AprovacaoEmMassaService.aprovar([s.id for s in solicitacoes], dono, observacoes="Lote 1")
+
+        assert sorted(resultado.processadas) == sorted(s.id for s in solicitacoes)
+        for solicitacao in solicitacoes:
+            solicitacao.refresh_from_db()
+            assert solicitacao.status == StatusSolicitacao.APROVADA
+            assert solicitacao.aprovado_por == dono
+            assert solicitacao.data_aprovacao is not None
+            assert solicitacao.observacoes_admin == "Lote 1"
+            assert Profile.objects.get(user=solicitacao.usuario).role == Role.MOTORISTA
+        assert Motorista.objects.filter(sede_atual=cidade, disponivel=True).count() == 3
+
+    def test_atualiza_motorista_existente(self, dono, cidade):
+        (solicitacao,) = self.criar_solicitacoes(1, cidade)
+        antiga = Cidade.objects.create(nome="Natal", estado="RN")
+        Motorista.objects.create(
+            profile=solicitacao.usuario.profile, sede_atual=antiga, cnh_categoria=CategoriaCNH.B, disponivel=False
+        )
+
+        AprovacaoEmMassaService.aprovar([solicitacao.id], dono)
+
+        motorista = Motorista.objects.get(profile__user=solicitacao.usuario)
+        assert motorista.sede_atual == cidade
+        assert motorista.cnh_categoria == CategoriaCNH.D
+        assert motorista.disponivel
+
+    def test_cria_perfil_ausente(self, dono, cidade):
+        (solicitacao,) = self.criar_solicitacoes(1, cidade)
+        Profile.objects.filter(user=solicitacao.usuario).delete()
+
+        AprovacaoEmMassaService.aprovar([solicitacao.id], dono)
+
+        perfil = Profile.objects.get(user=solicitacao.usuario)
+        assert perfil.role == Role.MOTORISTA
+        assert Motorista.objects.filter(profile=perfil).exists()
+
+    def test_numero_de_consultas_constante(self, dono, cidade):
+        pequeno = self.criar_solicitacoes(3, cidade, prefixo="pequeno")
+        grande = self.criar_solicitacoes(30, cidade, prefixo="grande")
+        contadores.ler()
+
+        with CaptureQueriesContext(connection) as consultas_pequeno:
+            AprovacaoEmMassaService.aprovar([s.id for s in pequeno], dono)
+        with CaptureQueriesContext(connection) as consultas_grande:
+            AprovacaoEmMassaService.aprovar([s.id for s in grande], dono)
+
+        assert len(consultas_grande) == len(consultas_pequeno)
+        assert Motorista.objects.count() == 33
+
+    def test_contadores_acompanham_o_lote(self, dono, cidade):
+        solicitacoes = self.criar_solicitacoes(4, cidade)
+        contadores.ler()
+
+        AprovacaoEmMassaService.aprovar([s.id for s in solicitacoes[:3]], dono)
+        AprovacaoEmMassaService.rejeitar([solicitacoes[3].id], dono)
+
+        assert contadores.reconciliar(corrigir=False) == []
+
+    def test_ignora_analisadas_inexistentes_e_duplicadas(self, dono, cidade):
+        primeira, segunda = self.criar_solicitacoes(2, cidade)
+        SolicitacaoMudancaPerfil.objects.filter(pk=segunda.pk).update(status=StatusSolicitacao.REJEITADA)
+        repetida = SolicitacaoMudancaPerfil.objects.create(
+            usuario=primeira.usuario,
+            role_atual=Role.CLIENTE,
+            role_solicitada=Role.GERENTE,
+            justificativa="Mudei de ideia",
+        )
+
+        resultado = AprovacaoEmMassaService.aprovar([primeira.id, segunda.id, repetida.id, 999999], dono)
+
+        assert resultado.processadas == [repetida.id]
+        assert set(resultado.ignoradas) == {primeira.id, segunda.id, 999999}
+        assert Profile.objects.get(user=primeira.usuario).role == Role.GERENTE
+
+    def test_rejeita_sem_alterar_perfis(self, dono, cidade):
+        solicitacoes = self.criar_solicitacoes(2, cidade)
+
+        resultado = AprovacaoEmMassaService.rejeitar(None, dono, observacoes="Documentação incompleta")
+
+        assert len(resultado.processadas) == 2
+        assert not Motorista.objects.exists()
+        for solicitacao in solicitacoes:
+            solicitacao.refresh_from_db()
+            assert solicitacao.status == StatusSolicitacao.REJEITADA
+            assert Profile.objects.get(user=solicitacao.usuario).role == Role.CLIENTE
+
+
+@pytest.mark.django_db
+class TestSolicitacoesEmMassaView:
+    """Testes da view solicitacoes_em_massa"""
+
+    @pytest.fixture
+    def solicitacao(self):
+        return SolicitacaoMudancaPerfil.objects.create(
+            usuario=criar_usuario("candidato"),
+            role_atual=Role.CLIENTE,
+            role_solicitada=Role.GERENTE,
+            justificativa="Experiência em gestão",
+        )
+
+    def test_dono_aprova_selecionadas(self, client, solicitacao):
+        client.force_login(criar_usuario("dono_view", Role.OWNER))
+        response = client.post(
+            reverse("gestao:solicitacoes_em_massa"), {"acao": "aprovar", "solicitacao_ids": [solicitacao.id]}
+        )
+
+        assert response.status_code == 302
+        solicitacao.refresh_from_db()
+        assert solicitacao.status == StatusSolicitacao.APROVADA
+        assert Profile.objects.get(user=solicitacao.usuario).role == Role.GERENTE
+
+    def test_todas_as_pendentes(self, client, solicitacao):
+        client.force_login(criar_usuario("dono_view", Role.OWNER))
+        client.post(reverse("gestao:solicitacoes_em_massa"), {"acao": "rejeitar", "todas": "1"})
+
+        solicitacao.refresh_from_db()
+        assert solicitacao.status == StatusSolicitacao.REJEITADA
+
+    def test_gerente_sem_acesso(self, client, solicitacao):
+        client.force_login(criar_usuario("gerente_view", Role.GERENTE))
+        client.post(reverse("gestao:solicitacoes_em_massa"), {"acao": "aprovar", "todas": "1"})
+
+        solicitacao.refresh_from_db()
+        assert solicitacao.status == StatusSolicitacao.PENDENTE
+
+    def test_lista_exibe_acoes_em_massa(self, client, solicitacao):
+        client.force_login(criar_usuario("dono_view", Role.OWNER))
+        response = client.get(reverse("gestao:listar_solicitacoes"))
+
+        assert response.status_code == 200
+        assert response.context["total_pendentes"] == 1
+        assert b'name="solicitacao_ids"' in response.content
+
+    def test_aprovacao_individual_usa_o_service(self, client, solicitacao):
+        client.force_login(criar_usuario("dono_view", Role.OWNER))
+        contadores.recontar("solicitacao")
+        contadores.recontar("perfil")
+
+        response = client.post(
+            reverse("gestao:aprovar_solicitacao", args=[solicitacao.id]),
+            {"status": StatusSolicitacao.APROVADA, "observacoes_admin": "Ok"},
+        )
+
+        assert response.status_code == 302
+        solicitacao.refresh_from_db()
+        assert solicitacao.status == StatusSolicitacao.APROVADA
+        assert solicitacao.observacoes_admin == "Ok"
+        assert Profile.objects.get(user=solicitacao.usuario).role == Role.GERENTE
+        assert contadores.ler()["solicitacao"] == contadores.contar("solicitacao")
+        assert contadores.ler()["perfil"] == contadores.contar("perfil")
+
+    def test_aprovacao_individual_de_solicitacao_ja_analisada(self, client, solicitacao):
+        client.force_login(criar_usuario("dono_view", Role.OWNER))
+        url = reverse("gestao:aprovar_solicitacao", args=[solicitacao.id])
+        client.post(url, {"status": StatusSolicitacao.REJEITADA, "observacoes_admin": ""})
+
+        client.post(url, {"status": StatusSolicitacao.APROVADA, "observacoes_admin": ""})
+
+        solicitacao.refresh_from_db()
+        assert solicitacao.status == StatusSolicitacao.REJEITADA
+        assert Profile.objects.get(user=solicitacao.usuario).role == Role.CLIENTE
@@ -0,0 +1,167 @@
+"""
+Testes para a utilização da frota por intervalos de uso
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.contas.models import Profile, Role
+from apps.gestao.utilizacao import DIAS_SERIE_DIARIA, IndiceIntervalos, UtilizacaoFrota, lacunas, mesclar
+from apps.motoristas.models import AtribuicaoPedido, CategoriaCNH, Motorista, StatusAtribuicao
+from apps.pedidos.models import Pedido
+from apps.rotas.models import Cidade
+from apps.veiculos.models import EspecificacaoVeiculo, TipoCombustivel, TipoVeiculo, Veiculo
+
+
+def momento(dia, hora):
+    return timezone.make_aware(datetime(2024, 3, dia, hora))
+
+
+class TestIntervalos:
+    """Testes das operações sobre intervalos"""
+
+    def test_mesclar_une_sobrepostos(self):
+        intervalos = [
+            (momento(1, 10), momento(1, 12)),
+            (momento(1, 8), momento(1, 11)),
+            (momento(1, 14), momento(1, 15)),
+        ]
+
+        assert mesclar(intervalos) == [(momento(1, 8), momento(1, 12)), (momento(1, 14), momento(1, 15))]
+
+    def test_lacunas(self):
+        intervalos = [(momento(1, 8), momento(1, 12)), (momento(1, 14), momento(1, 15))]
+
+        assert lacunas(intervalos, momento(1, 6), momento(1, 18)) == [2.0, 2.0, 3.0]
+
+    def test_indice_de_intervalos(self):
+        indice = IndiceIntervalos(
+            [(momento(1, 8), momento(1, 12)), (momento(1, 10), momento(1, 14)), (momento(1, 12), momento(1, 13))]
+        )
+
+        assert indice.ativos_em(momento(1, 11)) == 2
+        assert indice.ativos_em(momento(1, 12)) == 2
+        assert indice.ativos_em(momento(1, 15)) == 0
+        assert indice.pico() == 2
+
+
+@pytest.mark.django_db
+class TestUtilizacaoFrota:
+    """Testes do cálculo por dia, tipo e cidade"""
+
+    @pytest.fixture
+    def cenario(self):
+        sp = Cidade.objects.create(nome="São Paulo", estado="SP")
+        rj = Cidade.objects.create(nome="Rio de Janeiro", estado="RJ")
+        espec = EspecificacaoVeiculo.objects.create(
+            tipo=TipoVeiculo.VAN,
+            combustivel_principal=TipoCombustivel.DIESEL,
+            rendimento_principal=10.0,
+            carga_maxima=1500,
+            velocidade_media=80,
+            reducao_rendimento_principal=0.001,
+        )
+        cliente = User.objects.create_user(username="cliente_utilizacao", password="testpass123")
+        user = User.objects.create_user(username="motorista_utilizacao", password="testpass123")
+        profile = Profile.objects.get(user=user)
+        profile.role = Role.MOTORISTA
+        profile.save()
+        motorista = Motorista.objects.create(profile=profile, sede_atual=sp, cnh_categoria=CategoriaCNH.D)
+        veiculos = [
+            Veiculo.objects.create(
+                especificacao=espec,
+                marca="Fiat",
+                modelo="Ducato",
+                placa=f"UTI{i}000",
+                ano=2020,
+                cor="Branco",
+                sede_atual=sede,
+            )
+            for i, sede in enumerate([sp, sp, rj])
+        ]
+        return {"cliente": cliente, "motorista": motorista, "veiculos": veiculos}
+
+    def atribuir(self, cenario, veiculo, inicio, fim):
+        pedido = Pedido.objects.create(
+            cliente=cenario["cliente"],
+            cidade_origem="São Paulo - São Paulo",
+            cidade_destino="Rio de Janeiro - Rio de Janeiro",
+            peso_carga=Decimal("100"),
+            prazo_desejado=3,
+        )
+        return AtribuicaoPedido.objects.create(
+            pedido=pedido,
+            motorista=cenario["motorista"],
+            veiculo=veiculo,
+            status=StatusAtribuicao.CONCLUIDO if fim else StatusAtribuicao.EM_ANDAMENTO,
+            iniciado_em=inicio,
+            finalizado_em=fim,
+        )
+
+    def test_save_registra_inicio_e_fim(self, cenario):
+        atribuicao = self.atribuir(cenario, cenario["veiculos"][0], None, None)
+        assert atribuicao.iniciado_em is not None
+        assert atribuicao.finalizado_em is None
+
+        atribuicao.status = StatusAtribuicao.CONCLUIDO
+        atribuicao.save(update_fields=["status"])
+
+        atribuicao.refresh_from_db()
+        assert atribuicao.finalizado_em is not None
+
+    def test_concluir_pendente_preenche_inicio(self, cenario):
+        atribuicao = self.atribuir(cenario, cenario["veiculos"][0], None, None)
+        AtribuicaoPedido.objects.filter(pk=atribuicao.pk).update(status=StatusAtribuicao.PENDENTE, iniciado_em=None)
+        atribuicao.refresh_from_db()
+
+        atribuicao.status = StatusAtribuicao.CONCLUIDO
+        atribuicao.save(update_fields=["status"])
+
+        atribuicao.refresh_from_db()
+        assert atribuicao.iniciado_em == atribuicao.finalizado_em
+
+    def test_serie_diaria_limitada(self, cenario):
+        self.atribuir(cenario, cenario["veiculos"][0], momento(1, 6) - timedelta(days=400), momento(1, 18))
+
+        resultado = UtilizacaoFrota.calcular(None, momento(2, 0))
+
+        assert len(resultado["por_dia"]) == DIAS_SERIE_DIARIA
+        assert resultado["por_dia"][-1]["grupo"] == "01/03/2024"
+        assert resultado["geral"]["horas_disponiveis"] > DIAS_SERIE_DIARIA * 24 * 3
+
+    def test_utilizacao_por_tipo_cidade_e_dia(self, cenario):
+        sp_1, sp_2, rj = cenario["veiculos"]
+        self.atribuir(cenario, sp_1, momento(1, 6), momento(1, 18))
+        self.atribuir(cenario, sp_1, momento(1, 12), momento(1, 20))
+        self.atribuir(cenario, sp_2, momento(1, 10), momento(2, 10))
+
+        resultado = UtilizacaoFrota.calcular(momento(1, 0), momento(3, 0))
+
+        geral = resultado["geral"]
+        assert geral["veiculos"] == 3
+        assert geral["horas_disponiveis"] == 144.0
+        assert geral["horas_ocupadas"] == 38.0
+        assert geral["pico_simultaneo"] == 2
+        assert geral["maior_ociosidade_horas"] == 48.0
+        assert resultado["taxa_utilizacao"] == round(38 / 144 * 100, 1)
+
+        cidades = {linha["grupo"]: linha for linha in resultado["por_cidade"]}
+        assert cidades["São Paulo"]["horas_ocupadas"] == 38.0
+        assert cidades["Rio de Janeiro"]["utilizacao"] == 0.0
+        assert resultado["por_tipo"][0]["grupo"] == "Van"
+
+        dia_1, dia_2 = resultado["por_dia"]
+        assert dia_1["horas_ocupadas"] == 14.0 + 14.0
+        assert dia_2["horas_ocupadas"] == 10.0
+        assert dia_2["pico_simultaneo"] == 1
+
+    def test_entrega_em_andamento_conta_ate_o_fim_do_periodo(self, cenario):
+        self.atribuir(cenario, cenario["veiculos"][0], momento(1, 12), None)
+
+        resultado = UtilizacaoFrota.calcular(momento(1, 0), momento(2, 0))
+
+        assert resultado["geral"]["horas_ocupadas"] == 12.0
@@ -15,6 +15,7 @@ urlpatterns = [
     path("minhas-solicitacoes/", views.minhas_solicitacoes, name="minhas_solicitacoes"),
     path("solicitacoes/", views.listar_solicitacoes, name="listar_solicitacoes"),
     path("solicitacoes/<int:solicitacao_id>/aprovar/", views.aprovar_solicitacao, name="aprovar_solicitacao"),
+    path("solicitacoes/em-massa/", views.solicitacoes_em_massa, name="solicitacoes_em_massa"),
     # Pedidos - aprovação pelo dono/gerente
     path("pedidos/pendentes/", views.pedidos_para_aprovacao, name="pedidos_para_aprovacao"),
     path("pedidos/<int:pedido_id>/aprovar/", views.aprovar_pedido, name="aprovar_pedido"),
@@ -23,8 +24,12 @@ urlpatterns = [
     path("problemas/", views.listar_problemas, name="listar_problemas"),
     path("problemas/<int:problema_id>/analisar/", views.analisar_problema, name="analisar_problema"),
     path("problemas/<int:problema_id>/resolver/", views.resolver_problema, name="resolver_problema"),
+    # Entregas - transições em massa
+    path("entregas/em-massa/", views.entregas_em_massa, name="entregas_em_massa"),
     # Relatórios
     path("relatorios/", views.relatorios, name="relatorios"),
+    path("relatorios/rotas/", views.rentabilidade_rotas, name="rentabilidade_rotas"),
+    path("api/relatorios/rotas/", views.api_rentabilidade_rotas, name="api_rentabilidade_rotas"),
     # Configurações
     path("toggle-solicitacoes/", views.toggle_solicitacoes, name="toggle_solicitacoes"),
 ]
@@ -0,0 +1,254 @@
+"""
+Utilização real da frota a partir dos intervalos de uso das atribuições
+
+Um veículo está ocupado entre `AtribuicaoPedido.iniciado_em` (entrega iniciada) e
+`AtribuicaoPedido.finalizado_em` (concluída ou cancelada); entregas ainda em
+andamento contam até o fim do período. Os intervalos de cada veículo são ordenados e
+mesclados (cargas consolidadas geram intervalos sobrepostos no mesmo veículo) e os
+indicadores saem de varreduras sobre listas ordenadas, em O(n log n):
+
+- utilização: horas ocupadas / horas disponíveis (veículos x horas do período)
+- ociosidade: lacunas entre os intervalos de cada veículo dentro do período
+- pico simultâneo: maior número de veículos ocupados ao mesmo tempo
+
+A cidade de um veículo é a sede atual (`Veiculo.sede_atual`). A série diária cobre
+no máximo os últimos DIAS_SERIE_DIARIA dias do período.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Tuple
+
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from apps.motoristas.models import AtribuicaoPedido
+from apps.veiculos.models import TipoVeiculo, Veiculo
+
+Intervalo = Tuple[datetime, datetime]
+
+HORA = 3600
+
+# Limite da série "por_dia" (o período "todos" cobriria o histórico inteiro)
+DIAS_SERIE_DIARIA = 92
+
+
+def mesclar(intervalos: List[Intervalo]) -> List[Intervalo]:
+    """Ordena e une intervalos sobrepostos ou encostados"""
+    mesclados = []
+    for inicio, fim in sorted(intervalos):
+        if mesclados and inicio <= mesclados[-1][1]:
+            if fim > mesclados[-1][1]:
+                mesclados[-1] = (mesclados[-1][0], fim)
+        else:
+            mesclados.append((inicio, fim))
+    return mesclados
+
+
+def lacunas(intervalos: List[Intervalo], inicio: datetime, fim: datetime) -> List[float]:
+    """Durações (em horas) dos períodos livres entre intervalos mesclados dentro de [inicio, fim)"""
+    duracoes = []
+    cursor = inicio
+    for ocupado_inicio, ocupado_fim in intervalos:
+        if ocupado_inicio > cursor:
+            duracoes.append((ocupado_inicio - cursor).total_seconds() / HORA)
+        cursor = max(cursor, ocupado_fim)
+    if fim > cursor:
+        duracoes.append((fim - cursor).total_seconds() / HORA)
+    return duracoes
+
+
+class IndiceIntervalos:
+    """
+    Índice de intervalos baseado em duas listas ordenadas (inícios e fins)
+
+    Quantos intervalos cobrem um instante é respondido com duas buscas binárias; o
+    pico de sobreposição sai de uma única varredura sobre as duas listas.
+    """
+
+    def __init__(self, intervalos: List[Intervalo]):
+        self.inicios = sorted(inicio for inicio, _ in intervalos)
+        self.fins = sorted(fim for _, fim in intervalos)
+
+    def ativos_em(self, instante: datetime) -> int:
+        """Intervalos [inicio, fim) que contêm o instante"""
+        return bisect_right(self.inicios, instante) - bisect_right(self.fins, instante)
+
+    def pico(self) -> int:
+        """Maior número de intervalos sobrepostos (fins no mesmo instante saem antes dos inícios)"""
+        maior = atual = 0
+        j = 0
+        for inicio in self.inicios:
+            while j < len(self.fins) and self.fins[j] <= inicio:
+                atual -= 1
+                j += 1
+            atual += 1
+            maior = max(maior, atual)
+        return maior
+
+
+@dataclass
+class IndicadoresUtilizacao:
+    """Indicadores de utilização de um grupo de veículos"""
+
+    grupo: str
+    veiculos: int = 0
+    horas_disponiveis: float = 0.0
+    horas_ocupadas: float = 0.0
+    pico_simultaneo: int = 0
+    maior_ociosidade_horas: float = 0.0
+    ociosidade_media_horas: float = 0.0
+
+    @property
+    def utilizacao(self) -> float:
+        if not self.horas_disponiveis:
+            return 0.0
+        return round(self.horas_ocupadas / self.horas_disponiveis * 100, 1)
+
+    def como_dict(self):
+        dados = asdict(self)
+        for campo in ("horas_disponiveis", "horas_ocupadas", "maior_ociosidade_horas", "ociosidade_media_horas"):
+            dados[campo] = round(dados[campo], 1)
+        dados["utilizacao"] = self.utilizacao
+        return dados
+
+
+class UtilizacaoFrota:
+    """Service que calcula a utilização da frota em um período"""
+
+    @staticmethod
+    def _carregar(inicio, fim):
+        """
+        Intervalos de uso que tocam o período, cortados nos limites, e os veículos considerados
+
+        Returns:
+            Tupla (intervalos mesclados por veículo, {veiculo_id: (tipo, cidade)})
+        """
+        por_veiculo = defaultdict(list)
+        for veiculo_id, iniciado_em, finalizado_em in (
+            AtribuicaoPedido.objects.order_by()
+            .filter(iniciado_em__isnull=False, iniciado_em__lt=fim)
+            .filter(Q(finalizado_em__isnull=True) | Q(finalizado_em__gt=inicio))
+            .values_list("veiculo_id", "iniciado_em", "finalizado_em")
+            .iterator(chunk_size=2000)
+        ):
+            intervalo = (max(iniciado_em, inicio), min(finalizado_em or fim, fim))
+            if intervalo[1] > intervalo[0]:
+                por_veiculo[veiculo_id].append(intervalo)
+
+        veiculos = {
+            veiculo_id: (tipo, cidade or "Sem sede")
+            for veiculo_id, tipo, cidade in Veiculo.objects.order_by()
+            .filter(Q(ativo=True) | Q(id__in=list(por_veiculo)))
+            .values_list("id", "especificacao__tipo", "sede_atual__nome")
+        }
+        return {veiculo_id: mesclar(intervalos) for veiculo_id, intervalos in por_veiculo.items()}, veiculos
+
+    @staticmethod
+    def _indicadores(grupo, total_veiculos, ocupacao, inicio, fim):
+        """
+        Indicadores de um grupo na janela [inicio, fim)
+
+        Args:
+            grupo: Nome do grupo
+            total_veiculos: Veículos do grupo (inclusive os que não rodaram)
+            ocupacao: {veiculo_id: intervalos mesclados já contidos na janela} dos veículos que rodaram
+        """
+        intervalos = [intervalo for proprios in ocupacao.values() for intervalo in proprios]
+        ociosidades = [lacuna for proprios in ocupacao.values() for lacuna in lacunas(proprios, inicio, fim)]
+        horas_janela = (fim - inicio).total_seconds() / HORA
+        parados = total_veiculos - len(ocupacao)
+        total_ociosidades = len(ociosidades) + parados
+
+        return IndicadoresUtilizacao(
+            grupo=grupo,
+            veiculos=total_veiculos,
+            horas_disponiveis=total_veiculos * horas_janela,
+            horas_ocupadas=sum((b - a).total_seconds() for a, b in intervalos) / HORA,
+            pico_simultaneo=IndiceIntervalos(intervalos).pico(),
+            maior_ociosidade_horas=horas_janela if parados else max(ociosidades, default=0.0),
+            ociosidade_media_horas=(
+                (sum(ociosidades) + parados * horas_janela) / total_ociosidades if total_ociosidades else 0.0
+            ),
+        )
+
+    @staticmethod
+    def _limites_do_dia(dia):
+        return (
+            timezone.make_aware(datetime.combine(dia, time.min)),
+            timezone.make_aware(datetime.combine(dia + timedelta(days=1), time.min)),
+        )
+
+    @classmethod
+    def _por_dia(cls, ocupacao, total_veiculos, inicio, fim):
+        """Corta cada intervalo nos limites dos dias (uma passada) e calcula os indicadores de cada dia"""
+        pedacos = defaultdict(lambda: defaultdict(list))
+        for veiculo_id, intervalos in ocupacao.items():
+            for a, b in intervalos:
+                a, b = max(a, inicio), min(b, fim)
+                dia = timezone.localtime(a).date()
+                while a < b:
+                    _, dia_fim = cls._limites_do_dia(dia)
+                    pedacos[dia][veiculo_id].append((a, min(b, dia_fim)))
+                    a = dia_fim
+                    dia += timedelta(days=1)
+
+        linhas = []
+        dia = timezone.localtime(inicio).date()
+        while True:
+            dia_inicio, dia_fim = cls._limites_do_dia(dia)
+            if dia_inicio >= fim:
+                return linhas
+            janela = (max(dia_inicio, inicio), min(dia_fim, fim))
+            linhas.append(
+                cls._indicadores(dia.strftime("%d/%m/%Y"), total_veiculos, pedacos.get(dia, {}), *janela).como_dict()
+            )
+            dia += timedelta(days=1)
+
+    @classmethod
+    def calcular(cls, inicio=None, fim=None) -> Dict[str, object]:
+        """
+        Calcula a utilização da frota no período
+
+        Args:
+            inicio: Início do período (padrão: primeiro uso registrado)
+            fim: Fim do período (padrão: agora)
+
+        Returns:
+            Dicionário com "geral" e as listas "por_dia" (últimos DIAS_SERIE_DIARIA dias),
+            "por_tipo" e "por_cidade"
+        """
+        fim = fim or timezone.now()
+        if inicio is None:
+            inicio = AtribuicaoPedido.objects.aggregate(primeiro=Min("iniciado_em"))["primeiro"] or fim
+
+        ocupacao, veiculos = cls._carregar(inicio, fim)
+
+        por_tipo = defaultdict(list)
+        por_cidade = defaultdict(list)
+        for veiculo_id, (tipo, cidade) in veiculos.items():
+            por_tipo[tipo].append(veiculo_id)
+            por_cidade[cidade].append(veiculo_id)
+        tipos = dict(TipoVeiculo.choices)
+
+        def indicadores_do_grupo(grupo, veiculo_ids):
+            proprios = {veiculo_id: ocupacao[veiculo_id] for veiculo_id in veiculo_ids if veiculo_id in ocupacao}
+            return cls._indicadores(grupo, len(veiculo_ids), proprios, inicio, fim).como_dict()
+
+        geral = indicadores_do_grupo("Frota", list(veiculos))
+        inicio_serie = max(inicio, fim - timedelta(days=DIAS_SERIE_DIARIA))
+        return {
+            "geral": geral,
+            "taxa_utilizacao": geral["utilizacao"],
+            "por_dia": cls._por_dia(ocupacao, len(veiculos), inicio_serie, fim) if fim > inicio_serie else [],
+            "por_tipo": sorted(
+                (indicadores_do_grupo(tipos.get(tipo, tipo), ids) for tipo, ids in por_tipo.items()),
+                key=lambda linha: -linha["utilizacao"],
+            ),
+            "por_cidade": sorted(
+                (indicadores_do_grupo(cidade, ids) for cidade, ids in por_cidade.items()),
+                key=lambda linha: -linha["utilizacao"],
+            ),
+        }
@@ -3,26 +3,38 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db import transaction, models
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q
+from django.http import JsonResponse
 
+from apps.contas import busca as busca_usuarios
+from apps.contas.acesso import papel_de, tem_papel
 from apps.contas.models import Profile, Role
+from . import contadores
+from .exportacao import (
+    SECOES_RELATORIO,
+    exportar_pedidos,
+    exportar_queryset,
+    formato_solicitado,
+    linhas_secao_relatorio,
+    resposta_exportacao,
+)
+from .paginacao import paginar_por_cursor
+from .rentabilidade import ORDENACOES, RentabilidadeRotas
+from .solicitacoes import AcaoSolicitacao, AprovacaoEmMassaService
 from .models import ConfiguracaoSistema, SolicitacaoMudancaPerfil, StatusSolicitacao
 from .forms import SolicitacaoMudancaPerfilForm, AprovarSolicitacaoForm
 from apps.pedidos.models import Pedido, StatusPedido
 from apps.motoristas.services import AtribuicaoService
-from apps.motoristas.models import ProblemaEntrega, StatusProblema
+from apps.motoristas.models import AtribuicaoPedido, ProblemaEntrega, StatusAtribuicao, StatusProblema, TipoProblema
+from apps.motoristas.transicoes import AcaoTransicao, TransicaoEmMassaService
 from django.core.exceptions import ValidationError
 
 
 def user_has_role(user, required_role):
     """Verifica se o usuário tem o role necessário"""
-    try:
-        return user.profile.role == required_role
-    except Profile.DoesNotExist:
-        return False
+    return tem_papel(user, required_role)
 
 
 def require_role(role):
@@ -47,10 +59,7 @@ def require_role(role):
 
 def user_has_any_role(user, roles):
     """Verifica se o usuário possui qualquer um dos papéis informados"""
-    try:
-        return user.profile.role in roles
-    except Profile.DoesNotExist:
-        return False
+    return tem_papel(user, *roles)
 
 
 def require_any_role(roles):
@@ -73,6 +82,42 @@ def require_any_role(roles):
     return decorator
 
 
+def _estatisticas_dashboard(incluir_usuarios=False):
+    """
+    Estatísticas dos dashboards lidas dos contadores incrementais (uma consulta)
+
+    Os contadores são mantidos a cada transição de status (ver apps.gestao.contadores),
+    então o custo não cresce com o tamanho das tabelas.
+
+    Args:
+        incluir_usuarios: Inclui os totais de gestão de usuários (apenas dashboard do dono)
+    """
+    totais = contadores.ler()
+    pedidos = totais["pedido"]
+    problemas = totais["problema"]
+    perfis = totais["perfil"]
+    estatisticas = {
+        "total_clientes": perfis.get(Role.CLIENTE, 0),
+        "total_motoristas": perfis.get(Role.MOTORISTA, 0),
+        "total_veiculos": totais["veiculo"].get(contadores.TOTAL, 0),
+        "total_cidades": totais["cidade"].get(contadores.ATIVA, 0),
+        "total_rotas": totais["rota"].get(contadores.ATIVA, 0),
+        "total_pedidos": sum(pedidos.values()),
+        "pedidos_cotacao": pedidos.get(StatusPedido.COTACAO, 0),
+        "pedidos_pendentes": pedidos.get(StatusPedido.PENDENTE, 0),
+        "pedidos_aprovados": pedidos.get(StatusPedido.APROVADO, 0),
+        "pedidos_em_transporte": pedidos.get(StatusPedido.EM_TRANSPORTE, 0),
+        "pedidos_concluidos": pedidos.get(StatusPedido.CONCLUIDO, 0),
+        "pedidos_cancelados": pedidos.get(StatusPedido.CANCELADO, 0),
+        "total_problemas_pendentes": problemas.get(StatusProblema.PENDENTE, 0),
+        "total_problemas_em_analise": problemas.get(StatusProblema.EM_ANALISE, 0),
+    }
+    if incluir_usuarios:
+        estatisticas["total_usuarios"] = totais["usuario"].get(contadores.TOTAL, 0)
+        estatisticas["total_solicitacoes_pendentes"] = totais["solicitacao"].get(StatusSolicitacao.PENDENTE, 0)
+    return estatisticas
+
+
 @login_required
 def dashboard_gerente(request):
     """Dashboard principal do gerente com estatísticas e gestão"""
@@ -80,30 +125,12 @@ def dashboard_gerente(request):
         messages.error(request, "Acesso negado. Apenas gerentes podem acessar esta área.")
         return redirect("home")
 
-    # Estatísticas gerais (sem gestão de usuários)
-    total_clientes = Profile.objects.filter(role=Role.CLIENTE).count()
-    total_motoristas = Profile.objects.filter(role=Role.MOTORISTA).count()
+    # Estatísticas gerais (sem gestão de usuários), lidas dos contadores incrementais
+    estatisticas = _estatisticas_dashboard()
 
     # Configuração do sistema
     config = ConfiguracaoSistema.get_config()
 
-    # Estatísticas de veículos e rotas
-    from apps.veiculos.models import Veiculo
-    from apps.rotas.models import Cidade, Rota
-
-    total_veiculos = Veiculo.objects.count()
-    total_cidades = Cidade.objects.filter(ativa=True).count()
-    total_rotas = Rota.objects.filter(ativa=True).count()
-
-    # Estatísticas de pedidos
-    total_pedidos = Pedido.objects.count()
-    pedidos_cotacao = Pedido.objects.filter(status=StatusPedido.COTACAO).count()
-    pedidos_pendentes = Pedido.objects.filter(status=StatusPedido.PENDENTE).count()
-    pedidos_aprovados = Pedido.objects.filter(status=StatusPedido.APROVADO).count()
-    pedidos_em_transporte = Pedido.objects.filter(status=StatusPedido.EM_TRANSPORTE).count()
-    pedidos_concluidos = Pedido.objects.filter(status=StatusPedido.CONCLUIDO).count()
-    pedidos_cancelados = Pedido.objects.filter(status=StatusPedido.CANCELADO).count()
-
     # Pedidos recentes
     pedidos_recentes = (
         Pedido.objects.select_related("cliente")
@@ -111,10 +138,6 @@ def dashboard_gerente(request):
         .order_by("-created_at")[:5]
     )
 
-    # Estatísticas de problemas
-    total_problemas_pendentes = ProblemaEntrega.objects.filter(status=StatusProblema.PENDENTE).count()
-    total_problemas_em_analise = ProblemaEntrega.objects.filter(status=StatusProblema.EM_ANALISE).count()
-
     # Problemas recentes (últimos 5)
     problemas_recentes = (
         ProblemaEntrega.objects.select_related(
@@ -128,21 +151,8 @@ def dashboard_gerente(request):
 
     context = {
         "titulo": "Dashboard do Gerente",
-        "total_clientes": total_clientes,
-        "total_motoristas": total_motoristas,
-        "total_veiculos": total_veiculos,
-        "total_cidades": total_cidades,
-        "total_rotas": total_rotas,
-        "total_pedidos": total_pedidos,
-        "pedidos_cotacao": pedidos_cotacao,
-        "pedidos_pendentes": pedidos_pendentes,
-        "pedidos_aprovados": pedidos_aprovados,
-        "pedidos_em_transporte": pedidos_em_transporte,
-        "pedidos_concluidos": pedidos_concluidos,
-        "pedidos_cancelados": pedidos_cancelados,
+        **estatisticas,
         "pedidos_recentes": pedidos_recentes,
-        "total_problemas_pendentes": total_problemas_pendentes,
-        "total_problemas_em_analise": total_problemas_em_analise,
         "problemas_recentes": problemas_recentes,
         "config": config,
     }
@@ -157,13 +167,8 @@ def dashboard_dono(request):
         messages.error(request, "Acesso negado. Apenas donos podem acessar esta área.")
         return redirect("home")
 
-    # Estatísticas gerais
-    total_usuarios = User.objects.count()
-    total_clientes = Profile.objects.filter(role=Role.CLIENTE).count()
-    total_motoristas = Profile.objects.filter(role=Role.MOTORISTA).count()
-
-    # Total de solicitações pendentes
-    total_solicitacoes_pendentes = SolicitacaoMudancaPerfil.objects.filter(status=StatusSolicitacao.PENDENTE).count()
+    # Estatísticas gerais, lidas dos contadores incrementais
+    estatisticas = _estatisticas_dashboard(incluir_usuarios=True)
 
     # Usuários recentes (apenas 5)
     usuarios_recentes = User.objects.select_related("profile").order_by("-date_joined")[:5]
@@ -178,24 +183,6 @@ def dashboard_dono(request):
     # Configuração do sistema
     config = ConfiguracaoSistema.get_config()
 
-    # Estatísticas de veículos e rotas
-    from apps.veiculos.models import Veiculo
-    from apps.rotas.models import Cidade, Rota
-    from apps.pedidos.models import Pedido, StatusPedido
-
-    total_veiculos = Veiculo.objects.count()
-    total_cidades = Cidade.objects.filter(ativa=True).count()
-    total_rotas = Rota.objects.filter(ativa=True).count()
-
-    # Estatísticas de pedidos
-    total_pedidos = Pedido.objects.count()
-    pedidos_cotacao = Pedido.objects.filter(status=StatusPedido.COTACAO).count()
-    pedidos_pendentes = Pedido.objects.filter(status=StatusPedido.PENDENTE).count()
-    pedidos_aprovados = Pedido.objects.filter(status=StatusPedido.APROVADO).count()
-    pedidos_em_transporte = Pedido.objects.filter(status=StatusPedido.EM_TRANSPORTE).count()
-    pedidos_concluidos = Pedido.objects.filter(status=StatusPedido.CONCLUIDO).count()
-    pedidos_cancelados = Pedido.objects.filter(status=StatusPedido.CANCELADO).count()
-
     # Pedidos recentes (com atribuições carregadas para exibição de motorista/veículo)
     pedidos_recentes = (
         Pedido.objects.select_related("cliente")
@@ -203,33 +190,12 @@ def dashboard_dono(request):
         .order_by("-created_at")[:5]
     )
 
-    # Estatísticas de problemas
-    from apps.motoristas.models import ProblemaEntrega, StatusProblema
-
-    total_problemas_pendentes = ProblemaEntrega.objects.filter(status=StatusProblema.PENDENTE).count()
-    total_problemas_em_analise = ProblemaEntrega.objects.filter(status=StatusProblema.EM_ANALISE).count()
-
     context = {
         "titulo": "Dashboard do Dono",
-        "total_usuarios": total_usuarios,
-        "total_clientes": total_clientes,
-        "total_motoristas": total_motoristas,
-        "total_solicitacoes_pendentes": total_solicitacoes_pendentes,
-        "total_veiculos": total_veiculos,
-        "total_cidades": total_cidades,
-        "total_rotas": total_rotas,
-        "total_pedidos": total_pedidos,
-        "pedidos_cotacao": pedidos_cotacao,
-        "pedidos_pendentes": pedidos_pendentes,
-        "pedidos_aprovados": pedidos_aprovados,
-        "pedidos_em_transporte": pedidos_em_transporte,
-        "pedidos_concluidos": pedidos_concluidos,
-        "pedidos_cancelados": pedidos_cancelados,
+        **estatisticas,
         "usuarios_recentes": usuarios_recentes,
         "solicitacoes_recentes": solicitacoes_recentes,
         "pedidos_recentes": pedidos_recentes,
-        "total_problemas_pendentes": total_problemas_pendentes,
-        "total_problemas_em_analise": total_problemas_em_analise,
         "config": config,
     }
 
@@ -253,17 +219,12 @@ def listar_usuarios(request):
         usuarios = usuarios.filter(profile__role=role_filter)
 
     if search:
-        usuarios = usuarios.filter(
-            models.Q(username__icontains=search)
-            | models.Q(first_name__icontains=search)
-            | models.Q(last_name__icontains=search)
-            | models.Q(email__icontains=search)
+        # Índice de texto: os mais relevantes (já do papel filtrado), em uma página só
+        page_obj = list(
+            busca_usuarios.filtrar(usuarios, search, role=role_filter).order_by("-relevancia", "-date_joined")
         )
-
-    # Paginação
-    paginator = Paginator(usuarios, 20)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    else:
+        page_obj = paginar_por_cursor(request, usuarios, 20)
 
     context = {
         "titulo": "Gestão de Usuários",
@@ -271,6 +232,7 @@ def listar_usuarios(request):
         "roles": Role.choices,
         "role_filter": role_filter,
         "search": search,
+        "limite_busca": busca_usuarios.LIMITE_RESULTADOS,
     }
 
     return render(request, "gestao/listar_usuarios.html", context)
@@ -380,6 +342,8 @@ def listar_solicitacoes(request):
         "page_obj": page_obj,
         "status_choices": StatusSolicitacao.choices,
         "status_filter": status_filter,
+        "acoes": AcaoSolicitacao.CHOICES,
+        "total_pendentes": contadores.ler()["solicitacao"].get(StatusSolicitacao.PENDENTE, 0),
     }
 
     return render(request, "gestao/listar_solicitacoes.html", context)
@@ -396,9 +360,11 @@ def pedidos_para_aprovacao(request):
         .order_by("-created_at")
     )
 
-    paginator = Paginator(pedidos, 15)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    formato = formato_solicitado(request)
+    if formato:
+        return exportar_pedidos(formato, pedidos, "pedidos_para_aprovacao")
+
+    page_obj = paginar_por_cursor(request, pedidos, 15)
 
     context = {
         "titulo": "Pedidos para Aprovação",
@@ -476,24 +442,27 @@ def aprovar_solicitacao(request, solicitacao_id):
     if request.method == "POST":
         form = AprovarSolicitacaoForm(request.POST, instance=solicitacao)
         if form.is_valid():
-            with transaction.atomic():
-                solicitacao = form.save(commit=False)
-                solicitacao.aprovado_por = request.user
-                solicitacao.data_aprovacao = timezone.now()
-                solicitacao.save()
-
-                # Se aprovada, atualiza o perfil do usuário
-                if solicitacao.status == StatusSolicitacao.APROVADA:
-                    _aplicar_mudanca_perfil(solicitacao)
-                    messages.success(
-                        request,
-                        f"Solicitação aprovada! {solicitacao.usuario.username} "
-                        f"agora é {solicitacao.get_role_solicitada_display()}.",
-                    )
-                else:
-                    messages.info(request, "Solicitação rejeitada.")
-
-                return redirect("gestao:listar_solicitacoes")
+            # Mesmo caminho da aprovação em massa: contadores, cache de usuários e filas de motoristas
+            acao = (
+                AcaoSolicitacao.APROVAR
+                if form.cleaned_data["status"] == StatusSolicitacao.APROVADA
+                else AcaoSolicitacao.REJEITAR
+            )
+            resultado = AprovacaoEmMassaService.executar(
+                acao, [solicitacao.id], request.user, observacoes=form.cleaned_data["observacoes_admin"]
+            )
+            if not resultado.processadas:
+                messages.error(request, resultado.ignoradas.get(solicitacao.id, "Solicitação não processada."))
+            elif acao == AcaoSolicitacao.APROVAR:
+                messages.success(
+                    request,
+                    f"Solicitação aprovada! {solicitacao.usuario.username} "
+                    f"agora é {solicitacao.get_role_solicitada_display()}.",
+                )
+            else:
+                messages.info(request, "Solicitação rejeitada.")
+
+            return redirect("gestao:listar_solicitacoes")
     else:
         form = AprovarSolicitacaoForm(instance=solicitacao)
 
@@ -506,35 +475,34 @@ def aprovar_solicitacao(request, solicitacao_id):
     return render(request, "gestao/aprovar_solicitacao.html", context)
 
 
-def _aplicar_mudanca_perfil(solicitacao):
-    """Aplica a mudança de perfil aprovada"""
-    usuario = solicitacao.usuario
-
-    # Cria ou atualiza o perfil
-    perfil, created = Profile.objects.get_or_create(user=usuario, defaults={"role": solicitacao.role_solicitada})
-
-    if not created:
-        perfil.role = solicitacao.role_solicitada
-
-    perfil.save()
+@login_required
+@require_http_methods(["POST"])
+def solicitacoes_em_massa(request):
+    """Aprova ou rejeita várias solicitações de uma vez (apenas dono)"""
+    if not user_has_role(request.user, Role.OWNER):
+        messages.error(request, "Acesso negado.")
+        return redirect("home")
 
-    # Se a mudança for para motorista E tiver os dados obrigatórios, cria o registro de Motorista
-    if solicitacao.role_solicitada == Role.MOTORISTA and solicitacao.cnh_categoria and solicitacao.sede_atual:
-        from apps.motoristas.models import Motorista
+    acao = request.POST.get("acao", "")
+    todas = request.POST.get("todas") == "1"
+    solicitacao_ids = [int(i) for i in request.POST.getlist("solicitacao_ids") if i.isdigit()]
 
-        # Cria ou atualiza o registro de Motorista
-        Motorista.objects.update_or_create(
-            profile=perfil,
-            defaults={
-                "sede_atual": solicitacao.sede_atual,
-                "cnh_categoria": solicitacao.cnh_categoria,
-                "disponivel": True,
-                "entregas_concluidas": 0,
-            },
-        )
+    if acao not in dict(AcaoSolicitacao.CHOICES) or not (todas or solicitacao_ids):
+        messages.error(request, "Selecione uma ação e ao menos uma solicitação.")
+        return redirect("gestao:listar_solicitacoes")
 
-    # Nota: Veículos serão gerenciados separadamente pelo gerente/dono
-    # não são mais vinculados ao cadastro do motorista
+    resultado = AprovacaoEmMassaService.executar(
+        acao,
+        None if todas else solicitacao_ids,
+        request.user,
+        observacoes=request.POST.get("observacoes", "").strip(),
+    )
+    if resultado.processadas:
+        situacao = "aprovada(s)" if acao == AcaoSolicitacao.APROVAR else "rejeitada(s)"
+        messages.success(request, f"{len(resultado.processadas)} solicitação(ões) {situacao} com sucesso.")
+    for solicitacao_id, motivo in resultado.ignoradas.items():
+        messages.warning(request, f"Solicitação #{solicitacao_id} ignorada: {motivo}")
+    return redirect("gestao:listar_solicitacoes")
 
 
 @login_required
@@ -594,10 +562,31 @@ def listar_problemas(request):
     # Ordenar por mais recentes e não resolvidos primeiro
     problemas = problemas.order_by("status", "-criado_em")
 
+    formato = formato_solicitado(request)
+    if formato:
+        tipos = dict(TipoProblema.choices)
+        status = dict(StatusProblema.choices)
+        return exportar_queryset(
+            formato,
+            "problemas",
+            [
+                ("Problema", "id"),
+                ("Pedido", "atribuicao__pedido_id"),
+                ("Motorista", "atribuicao__motorista__profile__user__username"),
+                ("Veículo", "atribuicao__veiculo__placa"),
+                ("Tipo", "tipo"),
+                ("Status", "status"),
+                ("Descrição", "descricao"),
+                ("Criado em", "criado_em"),
+                ("Resolvido em", "resolvido_em"),
+                ("Resolução", "resolucao"),
+            ],
+            problemas,
+            transformar=lambda linha: (*linha[:4], tipos.get(linha[4]), status.get(linha[5]), *linha[6:]),
+        )
+
     # Paginação
-    paginator = Paginator(problemas, 20)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar_por_cursor(request, problemas, 20)
 
     # Contar problemas por status
     total_pendentes = ProblemaEntrega.objects.filter(status=StatusProblema.PENDENTE).count()
@@ -668,20 +657,58 @@ def resolver_problema(request, problema_id):
     return redirect("gestao:listar_problemas")
 
 
+@login_required
+@require_any_role([Role.OWNER, Role.GERENTE])
+def entregas_em_massa(request):
+    """Lista entregas ativas e permite iniciar, concluir ou cancelar várias de uma vez."""
+    if request.method == "POST":
+        acao = request.POST.get("acao", "")
+        atribuicao_ids = [int(i) for i in request.POST.getlist("atribuicao_ids") if i.isdigit()]
+
+        if acao not in dict(AcaoTransicao.CHOICES) or not atribuicao_ids:
+            messages.error(request, "Selecione uma ação e ao menos uma entrega.")
+            return redirect("gestao:entregas_em_massa")
+
+        resultado = TransicaoEmMassaService.executar(acao, atribuicao_ids, motivo="Cancelado pelo gestor")
+        if resultado.processadas:
+            messages.success(request, f"{len(resultado.processadas)} entrega(s) atualizada(s) com sucesso.")
+        for atribuicao_id, motivo in resultado.ignoradas.items():
+            messages.warning(request, f"Entrega #{atribuicao_id} ignorada: {motivo}")
+        return redirect("gestao:entregas_em_massa")
+
+    status_filter = request.GET.get("status", "")
+    atribuicoes = AtribuicaoPedido.objects.filter(
+        status__in=[StatusAtribuicao.PENDENTE, StatusAtribuicao.EM_ANDAMENTO]
+    ).select_related("pedido", "motorista__profile__user", "veiculo")
+    if status_filter in (StatusAtribuicao.PENDENTE, StatusAtribuicao.EM_ANDAMENTO):
+        atribuicoes = atribuicoes.filter(status=status_filter)
+
+    paginator = Paginator(atribuicoes.order_by("created_at"), 100)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    context = {
+        "titulo": "Entregas em Massa",
+        "page_obj": page_obj,
+        "status_filter": status_filter,
+        "acoes": AcaoTransicao.CHOICES,
+    }
+
+    return render(request, "gestao/entregas_em_massa.html", context)
+
+
 @login_required
 def relatorios(request):
     """View para exibir relatórios gerenciais - Dono e Gerente"""
     # Verificar se usuário é Dono ou Gerente
-    try:
-        user_role = request.user.profile.role
-        if user_role not in [Role.OWNER, Role.GERENTE]:
-            messages.error(request, "Você não tem permissão para acessar os relatórios.")
-            return redirect("home")
-    except Profile.DoesNotExist:
+    user_role = papel_de(request.user)
+    if user_role is None:
         messages.error(request, "Perfil não encontrado.")
         return redirect("home")
+    if user_role not in [Role.OWNER, Role.GERENTE]:
+        messages.error(request, "Você não tem permissão para acessar os relatórios.")
+        return redirect("home")
 
-    from .relatorios import RelatorioGerencial
+    from .cache_relatorios import CacheRelatorios
 
     # Obter parâmetros da requisição
     periodo = request.GET.get("periodo", "30dias")
@@ -693,18 +720,27 @@ def relatorios(request):
         except ValueError:
             ano = None
 
-    # Gerar relatório completo
-    dados_relatorio = RelatorioGerencial.get_relatorio_completo(periodo=periodo, ano=ano)
+    # Relatório completo, servido do cache (recalculado quando os dados mudam)
+    relatorio = CacheRelatorios.obter(periodo=periodo, ano=ano)
+
+    formato = formato_solicitado(request)
+    secao = request.GET.get("secao", "financeiro")
+    if formato and secao in SECOES_RELATORIO:
+        cabecalho, linhas = linhas_secao_relatorio(relatorio.dados, secao)
+        return resposta_exportacao(formato, f"relatorio_{secao}_{periodo}", cabecalho, linhas)
 
     # Anos disponíveis para seleção (últimos 5 anos + ano atual)
     ano_atual = timezone.now().year
     anos_disponiveis = list(range(ano_atual - 4, ano_atual + 1))
 
     context = {
-        "relatorio": dados_relatorio,
+        "relatorio": relatorio.dados,
+        "relatorio_calculado_em": relatorio.calculado_em,
+        "relatorio_desatualizado": relatorio.desatualizado,
         "periodo_selecionado": periodo,
         "ano_selecionado": ano or ano_atual,
         "anos_disponiveis": anos_disponiveis,
+        "secoes_exportacao": list(SECOES_RELATORIO.items()),
         "periodos": [
             ("7dias", "Últimos 7 dias"),
             ("30dias", "Últimos 30 dias"),
@@ -715,3 +751,87 @@ def relatorios(request):
     }
 
     return render(request, "gestao/relatorios.html", context)
+
+
+@login_required
+@require_any_role([Role.OWNER, Role.GERENTE])
+def rentabilidade_rotas(request):
+    """Rentabilidade por rota, ordenável e paginada (lida da tabela agregada, mantida pelo cron)"""
+    rotas, ordenar = RentabilidadeRotas.listar(request.GET.get("ordenar"))
+
+    paginator = Paginator(rotas, 25)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    # Cabeçalhos clicáveis: o primeiro clique ordena decrescente, o segundo inverte
+    colunas = []
+    for campo, titulo in [
+        ("origem", "Origem"),
+        ("destino", "Destino"),
+        ("pedidos", "Pedidos"),
+        ("receita", "Receita"),
+        ("custo_combustivel", "Combustível"),
+        ("custo_pedagio", "Pedágios"),
+        ("lucro", "Lucro"),
+        ("margem", "Margem"),
+        ("peso_medio", "Peso Médio"),
+        ("fator_carga", "Fator de Carga"),
+    ]:
+        ativo = ordenar.lstrip("-") == campo
+        colunas.append(
+            {
+                "titulo": titulo,
+                "ordenar": campo if ativo and ordenar.startswith("-") else f"-{campo}",
+                "ativo": ativo,
+                "decrescente": ativo and ordenar.startswith("-"),
+            }
+        )
+
+    context = {
+        "titulo": "Rentabilidade por Rota",
+        "page_obj": page_obj,
+        "ordenar": ordenar,
+        "colunas": colunas,
+    }
+
+    return render(request, "gestao/rentabilidade_rotas.html", context)
+
+
+@login_required
+def api_rentabilidade_rotas(request):
+    """API JSON da rentabilidade por rota (mesmos parâmetros `ordenar` e `page` da tela)"""
+    if not user_has_any_role(request.user, [Role.OWNER, Role.GERENTE]):
+        return JsonResponse({"error": "Sem permissão."}, status=403)
+
+    rotas, ordenar = RentabilidadeRotas.listar(request.GET.get("ordenar"))
+
+    try:
+        por_pagina = min(max(int(request.GET.get("por_pagina", 50)), 1), 500)
+    except ValueError:
+        por_pagina = 50
+    page_obj = Paginator(rotas, por_pagina).get_page(request.GET.get("page"))
+
+    return JsonResponse(
+        {
+            "ordenar": ordenar,
+            "ordenacoes": sorted(ORDENACOES),
+            "pagina": page_obj.number,
+            "paginas": page_obj.paginator.num_pages,
+            "total": page_obj.paginator.count,
+            "rotas": [
+                {
+                    "rota_id": linha.rota_id,
+                    "origem": linha.rota.origem.nome_completo,
+                    "destino": linha.rota.destino.nome_completo,
+                    "pedidos": linha.pedidos,
+                    "receita": str(linha.receita),
+                    "custo_combustivel": str(linha.custo_combustivel),
+                    "custo_pedagio": str(linha.custo_pedagio),
+                    "lucro": str(linha.lucro),
+                    "margem": linha.margem,
+                    "peso_medio": str(linha.peso_medio),
+                    "fator_carga_medio": linha.fator_carga_medio,
+                }
+                for linha in page_obj
+            ],
+        }
+    )
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Motorista, AtribuicaoPedido, ProblemaEntrega
+from .models import Motorista, AtribuicaoPedido, CargaConsolidada, PeriodoAgenda, ProblemaEntrega
 
 
 @admin.register(Motorista)
@@ -15,14 +15,30 @@ class MotoristaAdmin(admin.ModelAdmin):
     get_nome.short_description = "Nome"
 
 
+@admin.register(PeriodoAgenda)
+class PeriodoAgendaAdmin(admin.ModelAdmin):
+    list_display = ["motorista", "tipo", "inicio", "fim"]
+    list_filter = ["tipo", "inicio"]
+    search_fields = ["motorista__profile__user__username", "observacoes"]
+    readonly_fields = ["created_at", "updated_at"]
+
+
 @admin.register(AtribuicaoPedido)
 class AtribuicaoPedidoAdmin(admin.ModelAdmin):
-    list_display = ["pedido", "motorista", "veiculo", "status", "created_at"]
+    list_display = ["pedido", "motorista", "veiculo", "status", "carga", "custo_rateado", "created_at"]
     list_filter = ["status", "created_at"]
     search_fields = ["pedido__id", "motorista__profile__user__username", "veiculo__placa"]
     readonly_fields = ["created_at", "updated_at"]
 
 
+@admin.register(CargaConsolidada)
+class CargaConsolidadaAdmin(admin.ModelAdmin):
+    list_display = ["id", "rota", "veiculo", "motorista", "peso_total", "custo_viagem", "status", "janela_inicio"]
+    list_filter = ["status", "janela_inicio"]
+    search_fields = ["veiculo__placa", "motorista__profile__user__username"]
+    readonly_fields = ["created_at", "updated_at"]
+
+
 @admin.register(ProblemaEntrega)
 class ProblemaEntregaAdmin(admin.ModelAdmin):
     list_display = ["get_pedido_id", "tipo", "status", "get_motorista", "criado_em"]
@@ -0,0 +1,175 @@
+"""
+Agenda dos motoristas: folgas, férias e descansos indexados em memória, e as regras
+de jornada usadas para saber se uma viagem cabe na janela livre do motorista.
+
+Os períodos de cada motorista são fundidos em intervalos disjuntos e ordenados; a
+verificação de conflito é uma busca binária, O(log n) por candidato, independente de
+quantos meses de agenda existam. O índice é montado a partir do banco no primeiro uso
+e recarregado quando a versão guardada no cache do Django muda (signals de
+`PeriodoAgenda`) ou quando passa de IDADE_MAXIMA_SEGUNDOS, já que com um cache local
+por processo a versão não chega aos outros workers. O motorista escolhido é
+confirmado no banco (`confirmar`) antes da atribuição.
+"""
+
+import bisect
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import PeriodoAgenda
+
+# Regras de jornada do motorista profissional (Lei 13.103/2015, simplificada)
+HORAS_DIRECAO_POR_JORNADA = 10  # 8h de jornada + 2h extras
+HORAS_DESCANSO_ENTRE_JORNADAS = 11
+HORAS_DIRECAO_CONTINUA = 5.5
+HORAS_PAUSA = 0.5
+
+CHAVE_VERSAO = "motoristas:agenda:versao"
+
+# Idade máxima do índice em memória (mesmo critério das filas de motoristas)
+IDADE_MAXIMA_SEGUNDOS = 300
+
+
+def duracao_com_descansos(horas_direcao):
+    """
+    Calcula quanto tempo uma viagem ocupa na agenda incluindo pausas e descansos.
+
+    Args:
+        horas_direcao: Tempo de direção da viagem (ex: tempo_viagem_horas)
+
+    Returns:
+        timedelta com a duração total
+    """
+    restante = float(horas_direcao)
+    if restante <= 0:
+        return timedelta(0)
+
+    jornadas = math.ceil(restante / HORAS_DIRECAO_POR_JORNADA)
+    pausas = 0
+    while restante > 0:
+        direcao = min(restante, HORAS_DIRECAO_POR_JORNADA)
+        pausas += math.ceil(direcao / HORAS_DIRECAO_CONTINUA) - 1
+        restante -= direcao
+
+    total = float(horas_direcao) + pausas * HORAS_PAUSA + (jornadas - 1) * HORAS_DESCANSO_ENTRE_JORNADAS
+    return timedelta(hours=total)
+
+
+class IndiceIntervalos:
+    """Intervalos ocupados de um motorista, fundidos e ordenados pelo início."""
+
+    def __init__(self, intervalos):
+        self.inicios = []
+        self.fins = []
+        for inicio, fim in sorted(intervalos):
+            if self.fins and inicio <= self.fins[-1]:
+                self.fins[-1] = max(self.fins[-1], fim)
+            else:
+                self.inicios.append(inicio)
+                self.fins.append(fim)
+
+    def livre(self, inicio, fim):
+        """Indica se [inicio, fim) não intercepta nenhum intervalo ocupado."""
+        posicao = bisect.bisect_left(self.inicios, fim)
+        return posicao == 0 or self.fins[posicao - 1] <= inicio
+
+
+class AgendaMotoristas:
+    """Índice em memória da agenda futura de todos os motoristas."""
+
+    def __init__(self):
+        self._indices = {}
+        self._versao = None
+        self._montado_em = 0.0
+        self._lock = threading.Lock()
+
+    def limpar(self):
+        """Descarta o índice (será recarregado no próximo uso)."""
+        with self._lock:
+            self._indices = {}
+            self._versao = None
+
+    def invalidar(self):
+        """Sinaliza a todos os processos que a agenda mudou."""
+        try:
+            cache.incr(CHAVE_VERSAO)
+        except ValueError:
+            cache.add(CHAVE_VERSAO, 1, timeout=None)
+        with self._lock:
+            self._versao = None
+
+    def _sincronizar(self):
+        versao = cache.get(CHAVE_VERSAO)
+        if versao is None:
+            cache.add(CHAVE_VERSAO, 0, timeout=None)
+            versao = cache.get(CHAVE_VERSAO, 0)
+
+        with self._lock:
+            if versao != self._versao or time.monotonic() - self._montado_em > IDADE_MAXIMA_SEGUNDOS:
+                intervalos = {}
+                periodos = PeriodoAgenda.objects.filter(fim__gt=timezone.now()).values_list(
+                    "motorista_id", "inicio", "fim"
+                )
+                for motorista_id, inicio, fim in periodos:
+                    intervalos.setdefault(motorista_id, []).append((inicio, fim))
+                self._indices = {motorista_id: IndiceIntervalos(lista) for motorista_id, lista in intervalos.items()}
+                self._versao = versao
+                self._montado_em = time.monotonic()
+            return self._indices
+
+    def verificador(self, horas_direcao, inicio=None):
+        """
+        Retorna uma função que diz se um motorista está livre para a viagem.
+
+        A agenda é sincronizada uma única vez; cada chamada da função resultante é
+        apenas uma busca binária no índice do motorista.
+
+        Args:
+            horas_direcao: Tempo de direção da viagem
+            inicio: Início da viagem (padrão: agora)
+
+        Returns:
+            Função motorista_id -> bool
+        """
+        indices = self._sincronizar()
+        inicio = inicio or timezone.now()
+        fim = inicio + duracao_com_descansos(horas_direcao)
+
+        def livre(motorista_id):
+            indice = indices.get(motorista_id)
+            return indice is None or indice.livre(inicio, fim)
+
+        return livre
+
+    def livre(self, motorista_id, horas_direcao, inicio=None):
+        """Indica se o motorista está livre durante toda a viagem."""
+        return self.verificador(horas_direcao, inicio)(motorista_id)
+
+    def confirmar(self, motorista_id, horas_direcao, inicio=None):
+        """
+        Confirma no banco que o motorista está livre durante a viagem.
+
+        Se o banco discordar, o índice deste processo está desatualizado (período
+        gravado em outro processo) e é descartado.
+
+        Args:
+            motorista_id: Motorista escolhido pelo índice
+            horas_direcao: Tempo de direção da viagem
+            inicio: Início da viagem (padrão: agora)
+
+        Returns:
+            bool
+        """
+        inicio = inicio or timezone.now()
+        fim = inicio + duracao_com_descansos(horas_direcao)
+        ocupado = PeriodoAgenda.objects.filter(motorista_id=motorista_id, inicio__lt=fim, fim__gt=inicio).exists()
+        if ocupado:
+            self.limpar()
+        return not ocupado
+
+
+agenda = AgendaMotoristas()
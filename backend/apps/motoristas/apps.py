@@ -5,3 +5,6 @@ class MotoristasConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.motoristas"
     verbose_name = "Motoristas"
+
+    def ready(self):
+        import apps.motoristas.signals  # noqa
@@ -0,0 +1,377 @@
+"""
+Consolidação de cargas: agrupa pedidos aprovados da mesma rota em um único veículo
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.gestao import contadores
+from apps.gestao.cache_relatorios import invalidar_relatorios
+from apps.motoristas.filas import filas
+from apps.motoristas.models import AtribuicaoPedido, CargaConsolidada, Motorista, StatusAtribuicao
+from apps.motoristas.services import AtribuicaoService
+from apps.pedidos.calculadora import CalculadoraCustos
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.itinerario import Itinerario, OtimizadorItinerario, paradas_dos_pedidos
+from apps.rotas.models import Cidade, Rota
+
+
+@dataclass
+class Compartimento:
+    """Veículo (bin) com os pedidos alocados a ele."""
+
+    veiculo_id: int
+    capacidade: Decimal
+    itens: List[Tuple[int, Decimal]] = field(default_factory=list)
+
+    @property
+    def carga(self) -> Decimal:
+        return sum((peso for _, peso in self.itens), Decimal("0"))
+
+    @property
+    def livre(self) -> Decimal:
+        return self.capacidade - self.carga
+
+    def cabe(self, peso: Decimal) -> bool:
+        return peso <= self.livre
+
+
+def empacotar_cargas(
+    itens: List[Tuple[int, Decimal]], veiculos: List[Tuple[int, Decimal]]
+) -> Tuple[List[Compartimento], List[int]]:
+    """
+    Distribui pedidos em veículos de capacidades diferentes (bin packing).
+
+    Usa first-fit-decreasing: os pedidos são ordenados do mais pesado para o mais
+    leve e cada um vai para o primeiro veículo aberto onde cabe. Quando não cabe em
+    nenhum, abre-se o menor veículo disponível capaz de levá-lo. Em seguida uma busca
+    local tenta esvaziar os veículos menos carregados e trocar veículos por outros
+    menores que ainda comportem a carga.
+
+    Args:
+        itens: Lista de (id do pedido, peso em kg)
+        veiculos: Lista de (id do veículo, carga máxima em kg)
+
+    Returns:
+        Tupla (compartimentos usados, ids de pedidos que não couberam em nenhum veículo)
+    """
+    livres = sorted(veiculos, key=lambda v: (v[1], v[0]))
+    abertos: List[Compartimento] = []
+    nao_alocados: List[int] = []
+
+    for item_id, peso in sorted(itens, key=lambda i: (-i[1], i[0])):
+        destino = next((c for c in abertos if c.cabe(peso)), None)
+        if destino is None:
+            indice = next((i for i, (_, capacidade) in enumerate(livres) if peso <= capacidade), None)
+            if indice is None:
+                nao_alocados.append(item_id)
+                continue
+            veiculo_id, capacidade = livres.pop(indice)
+            destino = Compartimento(veiculo_id=veiculo_id, capacidade=capacidade)
+            abertos.append(destino)
+        destino.itens.append((item_id, peso))
+
+    _esvaziar_compartimentos(abertos, livres)
+    _reduzir_veiculos(abertos, livres)
+
+    return abertos, nao_alocados
+
+
+def _esvaziar_compartimentos(abertos: List[Compartimento], livres: List[Tuple[int, Decimal]]):
+    """Busca local: tenta redistribuir os itens do veículo menos carregado entre os demais."""
+    melhorou = True
+    while melhorou and len(abertos) > 1:
+        melhorou = False
+        for candidato in sorted(abertos, key=lambda c: c.carga):
+            outros = [c for c in abertos if c is not candidato]
+            folgas = {id(c): c.livre for c in outros}
+            movimentos = []
+            for item in sorted(candidato.itens, key=lambda i: -i[1]):
+                destino = next((c for c in outros if item[1] <= folgas[id(c)]), None)
+                if destino is None:
+                    break
+                folgas[id(destino)] -= item[1]
+                movimentos.append((item, destino))
+            else:
+                for item, destino in movimentos:
+                    destino.itens.append(item)
+                abertos.remove(candidato)
+                livres.append((candidato.veiculo_id, candidato.capacidade))
+                livres.sort(key=lambda v: (v[1], v[0]))
+                melhorou = True
+                break
+
+
+def _reduzir_veiculos(abertos: List[Compartimento], livres: List[Tuple[int, Decimal]]):
+    """Busca local: troca cada veículo pelo menor veículo livre que ainda comporta sua carga."""
+    for compartimento in abertos:
+        carga = compartimento.carga
+        indice = next(
+            (i for i, (_, capacidade) in enumerate(livres) if carga <= capacidade < compartimento.capacidade),
+            None,
+        )
+        if indice is not None:
+            veiculo_id, capacidade = livres.pop(indice)
+            livres.append((compartimento.veiculo_id, compartimento.capacidade))
+            livres.sort(key=lambda v: (v[1], v[0]))
+            compartimento.veiculo_id = veiculo_id
+            compartimento.capacidade = capacidade
+
+
+@dataclass
+class ResultadoConsolidacao:
+    """Resumo de uma execução da consolidação."""
+
+    cargas: List[CargaConsolidada] = field(default_factory=list)
+    pedidos_consolidados: int = 0
+    pedidos_nao_alocados: List[int] = field(default_factory=list)
+    mensagens: List[str] = field(default_factory=list)
+
+
+class ConsolidacaoService:
+    """Service para consolidar pedidos aprovados em cargas compartilhadas"""
+
+    @staticmethod
+    def _resolvedor_cidades():
+        """Retorna função que resolve o texto da cidade de um pedido, com cache por nome"""
+        cidades = {}
+
+        def resolver(texto):
+            nome = AtribuicaoService.extrair_nome_cidade(texto).lower()
+            if nome not in cidades:
+                cidades[nome] = Cidade.objects.filter(nome__iexact=nome, ativa=True).first()
+            return cidades[nome]
+
+        return resolver
+
+    @classmethod
+    def agrupar_pedidos(cls, pedidos, janela_dias=1) -> Dict[Tuple[int, int, object], List[Pedido]]:
+        """
+        Agrupa pedidos por rota e janela de tempo
+
+        Args:
+            pedidos: Iterável de pedidos aprovados
+            janela_dias: Tamanho da janela (em dias, pela data de criação do pedido)
+
+        Returns:
+            Dicionário {(id origem, id destino, início da janela): [pedidos]}
+        """
+        resolver = cls._resolvedor_cidades()
+
+        grupos = defaultdict(list)
+        for pedido in pedidos:
+            origem = resolver(pedido.cidade_origem)
+            destino = resolver(pedido.cidade_destino)
+            if not origem or not destino:
+                continue
+
+            data = timezone.localdate(pedido.created_at)
+            janela_inicio = data - timedelta(days=data.toordinal() % janela_dias)
+            grupos[(origem.id, destino.id, janela_inicio)].append(pedido)
+
+        return grupos
+
+    @classmethod
+    def consolidar(cls, janela_dias=1, pedidos=None) -> ResultadoConsolidacao:
+        """
+        Consolida pedidos aprovados sem atribuição em cargas compartilhadas
+
+        Para cada grupo (rota, janela) com mais de um pedido, distribui os pedidos nos
+        veículos livres da cidade de origem e cria uma CargaConsolidada por veículo,
+        com uma AtribuicaoPedido por pedido e o custo da viagem rateado por peso.
+
+        Args:
+            janela_dias: Tamanho da janela de agrupamento em dias
+            pedidos: QuerySet opcional de pedidos (padrão: aprovados sem atribuição)
+
+        Returns:
+            ResultadoConsolidacao
+        """
+        if pedidos is None:
+            pedidos = Pedido.objects.filter(status=StatusPedido.APROVADO, atribuicao__isnull=True)
+
+        resultado = ResultadoConsolidacao()
+        calculadora = CalculadoraCustos()
+
+        grupos = cls.agrupar_pedidos(pedidos.order_by("created_at"), janela_dias=janela_dias)
+        for (origem_id, destino_id, janela_inicio), grupo in grupos.items():
+            if len(grupo) < 2:
+                continue
+
+            rota = (
+                Rota.objects.filter(origem_id=origem_id, destino_id=destino_id, ativa=True)
+                .select_related("origem", "destino")
+                .first()
+            )
+            if not rota:
+                continue
+
+            cargas, consolidados, nao_alocados = cls._consolidar_grupo(rota, janela_inicio, grupo, calculadora)
+            resultado.cargas.extend(cargas)
+            resultado.pedidos_consolidados += consolidados
+            resultado.pedidos_nao_alocados.extend(nao_alocados)
+            if nao_alocados:
+                resultado.mensagens.append(
+                    f"{len(nao_alocados)} pedido(s) da rota {rota} não couberam nos veículos disponíveis."
+                )
+
+        return resultado
+
+    @classmethod
+    def planejar_itinerario(cls, partida, pedidos, tempo_limite_ms=50) -> Itinerario:
+        """
+        Calcula a ordem de coletas e entregas de um conjunto de pedidos
+
+        Args:
+            partida: Cidade onde o veículo está
+            pedidos: Pedidos transportados pelo veículo
+            tempo_limite_ms: Orçamento de tempo da otimização
+
+        Returns:
+            Itinerario otimizado
+        """
+        paradas = paradas_dos_pedidos(pedidos, cls._resolvedor_cidades())
+        return OtimizadorItinerario(tempo_limite_ms=tempo_limite_ms).otimizar(partida.id, paradas)
+
+    @classmethod
+    def itinerario_da_carga(cls, carga, tempo_limite_ms=50) -> Itinerario:
+        """Calcula o itinerário de uma carga consolidada a partir da sede do veículo"""
+        pedidos = [atribuicao.pedido for atribuicao in carga.atribuicoes.select_related("pedido")]
+        partida = carga.veiculo.sede_atual or carga.rota.origem
+        return cls.planejar_itinerario(partida, pedidos, tempo_limite_ms=tempo_limite_ms)
+
+    @classmethod
+    @transaction.atomic
+    def _consolidar_grupo(cls, rota, janela_inicio, grupo, calculadora):
+        """Empacota um grupo de pedidos e persiste as cargas resultantes"""
+        veiculos = {
+            veiculo.id: veiculo
+            for veiculo in AtribuicaoService.veiculos_livres(rota.origem, excluir_reservados=True).select_related(
+                "especificacao"
+            )
+        }
+        pedidos = {pedido.id: pedido for pedido in grupo}
+
+        compartimentos, nao_alocados = empacotar_cargas(
+            [(pedido.id, pedido.peso_carga) for pedido in grupo],
+            [(veiculo.id, Decimal(str(veiculo.especificacao.carga_maxima))) for veiculo in veiculos.values()],
+        )
+
+        planejadas = []
+        escolhidos = set()
+        for compartimento in compartimentos:
+            veiculo = veiculos[compartimento.veiculo_id]
+            horas_viagem = AtribuicaoService.estimar_horas_viagem(rota.origem, rota.destino, veiculo)
+            motorista = AtribuicaoService.buscar_motorista_disponivel(
+                rota.origem, veiculo.categoria_minima_cnh, horas_viagem, excluir=escolhidos
+            )
+            if not motorista:
+                nao_alocados.extend(item_id for item_id, _ in compartimento.itens)
+                continue
+
+            escolhidos.add(motorista.id)
+            planejadas.append((compartimento, veiculo, motorista))
+
+        cargas = cls._criar_cargas(rota, janela_inicio, planejadas, pedidos, calculadora)
+        consolidados = sum(len(compartimento.itens) for compartimento, _, _ in planejadas)
+        return cargas, consolidados, nao_alocados
+
+    @staticmethod
+    def _custos_do_pedido(viagem, pesos, pedido_id, custo_rateado):
+        """
+        Divide o custo rateado de um pedido em combustível e pedágio
+
+        O pedágio é rateado pelo peso como o custo total; o combustível fica com o
+        restante, então os dois sempre somam o custo rateado.
+        """
+        peso_total = sum(pesos.values(), Decimal("0"))
+        pedagio = (viagem.custo_pedagio * pesos[pedido_id] / peso_total).quantize(Decimal("0.01"))
+        pedagio = min(pedagio, custo_rateado)
+        return custo_rateado - pedagio, pedagio
+
+    @classmethod
+    def _criar_cargas(cls, rota, janela_inicio, planejadas, pedidos, calculadora):
+        """
+        Cria as cargas e as atribuições com o custo rateado e reserva motoristas e pedidos
+
+        O custo rateado substitui o custo de combustível e pedágio da cotação individual
+        do pedido, então os relatórios de margem refletem a viagem compartilhada; o preço
+        final acordado com o cliente não muda. Todas as gravações são feitas por conjunto
+        e, como não disparam signals, contadores, cache de relatórios e filas de
+        motoristas são atualizados aqui.
+
+        Args:
+            rota: Rota do grupo
+            janela_inicio: Início da janela de agrupamento
+            planejadas: Lista de (Compartimento, Veiculo, Motorista)
+            pedidos: Dicionário {id: Pedido} do grupo
+            calculadora: CalculadoraCustos
+
+        Returns:
+            Lista de CargaConsolidada criadas
+        """
+        if not planejadas:
+            return []
+
+        agora = timezone.now()
+        cargas, atribuicoes, motoristas, alterados, transicoes = [], [], [], [], []
+        for compartimento, veiculo, motorista in planejadas:
+            pesos = {item_id: peso for item_id, peso in compartimento.itens}
+            viagem, rateio = calculadora.calcular_rateio_consolidado(
+                veiculo, pesos, rota.distancia_km, rota.pedagio_valor
+            )
+            carga = CargaConsolidada(
+                rota=rota,
+                veiculo=veiculo,
+                motorista=motorista,
+                janela_inicio=janela_inicio,
+                peso_total=compartimento.carga,
+                custo_viagem=viagem.custo_total.quantize(Decimal("0.01")),
+            )
+            cargas.append(carga)
+
+            for pedido_id in pesos:
+                pedido = pedidos[pedido_id]
+                custo_rateado = rateio.get(pedido_id)
+                atribuicoes.append(
+                    AtribuicaoPedido(
+                        pedido=pedido,
+                        motorista=motorista,
+                        veiculo=veiculo,
+                        status=StatusAtribuicao.PENDENTE,
+                        carga=carga,
+                        custo_rateado=custo_rateado,
+                    )
+                )
+                if custo_rateado is not None:
+                    pedido.custo_combustivel, pedido.custo_pedagio = cls._custos_do_pedido(
+                        viagem, pesos, pedido_id, custo_rateado
+                    )
+                transicoes.append((pedido.status, StatusPedido.EM_TRANSPORTE))
+                pedido.status = StatusPedido.EM_TRANSPORTE
+                pedido.updated_at = agora
+                alterados.append(pedido)
+
+            motorista.disponivel = False
+            motorista.ultima_atribuicao_em = agora
+            motorista.updated_at = agora
+            motoristas.append(motorista)
+
+        CargaConsolidada.objects.bulk_create(cargas)
+        AtribuicaoPedido.objects.bulk_create(atribuicoes)
+        Motorista.objects.bulk_update(motoristas, ["disponivel", "ultima_atribuicao_em", "updated_at"])
+        Pedido.objects.bulk_update(alterados, ["status", "custo_combustivel", "custo_pedagio", "updated_at"])
+
+        contadores.registrar_transicoes("pedido", transicoes)
+        invalidar_relatorios()
+
+        # Invalida agora e de novo após o commit (outro processo pode ter lido o estado anterior)
+        filas.invalidar_cidade(rota.origem_id)
+        transaction.on_commit(lambda: filas.invalidar_cidade(rota.origem_id))
+        return cargas
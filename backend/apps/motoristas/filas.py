@@ -0,0 +1,209 @@
+"""
+Filas de prioridade de motoristas disponíveis por cidade, mantidas em memória.
+
+Cada cidade tem um heap por categoria de CNH com a chave
+(ordem da CNH, entregas concluídas, última atribuição, id). A seleção olha apenas
+o topo dos heaps das categorias aceitas, sem varrer os motoristas da cidade.
+
+As filas são montadas a partir do banco no primeiro uso em cada processo e
+atualizadas pelos signals de `Motorista`. Uma versão por cidade guardada no cache
+do Django sinaliza alterações feitas por outros processos: quando a versão local
+difere da compartilhada, a cidade é recarregada do banco. Alterações que não
+disparam signals (`update()`, `bulk_update()`) devem chamar `invalidar_cidade`.
+"""
+
+import heapq
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import CategoriaCNH, Motorista
+
+# Categorias menores primeiro: motoristas com CNH mais alta ficam livres para veículos que exigem
+ORDEM_CNH = {CategoriaCNH.B: 0, CategoriaCNH.C: 1, CategoriaCNH.D: 2, CategoriaCNH.E: 3}
+
+# Intervalo máximo entre recargas completas de uma cidade (corrige alterações desfeitas por rollback)
+IDADE_MAXIMA_SEGUNDOS = 300
+
+
+def chave_prioridade(cnh_categoria, entregas_concluidas, ultima_atribuicao_em, motorista_id):
+    """Chave de ordenação do heap: menor chave é atendida primeiro."""
+    ultima = ultima_atribuicao_em.timestamp() if ultima_atribuicao_em else 0.0
+    return (ORDEM_CNH.get(cnh_categoria, len(ORDEM_CNH)), entregas_concluidas, ultima, motorista_id)
+
+
+def _chave_versao(cidade_id):
+    return f"motoristas:fila:{cidade_id}:versao"
+
+
+class _FilaCidade:
+    """Heaps de uma cidade com remoção preguiçosa de entradas desatualizadas."""
+
+    def __init__(self, versao):
+        self.versao = versao
+        self.montada_em = time.monotonic()
+        self.heaps = {}
+        self.entradas = {}
+
+    def inserir(self, categoria, chave):
+        motorista_id = chave[-1]
+        self.entradas[motorista_id] = chave
+        heapq.heappush(self.heaps.setdefault(categoria, []), chave)
+
+    def remover(self, motorista_id):
+        self.entradas.pop(motorista_id, None)
+
+    def topo(self, categoria):
+        heap = self.heaps.get(categoria, [])
+        while heap and self.entradas.get(heap[0][-1]) != heap[0]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+
+class FilasMotoristas:
+    """Conjunto de filas por cidade do processo atual."""
+
+    def __init__(self):
+        self._cidades = {}
+        self._cidade_do_motorista = {}
+        self._lock = threading.RLock()
+
+    def limpar(self):
+        """Descarta todas as filas (serão recarregadas no próximo uso)."""
+        with self._lock:
+            self._cidades.clear()
+            self._cidade_do_motorista.clear()
+
+    @staticmethod
+    def _versao_compartilhada(cidade_id):
+        versao = cache.get(_chave_versao(cidade_id))
+        if versao is None:
+            cache.add(_chave_versao(cidade_id), 0, timeout=None)
+            versao = cache.get(_chave_versao(cidade_id), 0)
+        return versao
+
+    @staticmethod
+    def _incrementar_versao(cidade_id):
+        try:
+            return cache.incr(_chave_versao(cidade_id))
+        except ValueError:
+            cache.add(_chave_versao(cidade_id), 1, timeout=None)
+            return None
+
+    def _montar(self, cidade_id, versao):
+        fila = _FilaCidade(versao)
+        for motorista_id in [m for m, c in self._cidade_do_motorista.items() if c == cidade_id]:
+            del self._cidade_do_motorista[motorista_id]
+
+        disponiveis = Motorista.objects.filter(disponivel=True, sede_atual_id=cidade_id).values_list(
+            "id", "cnh_categoria", "entregas_concluidas", "ultima_atribuicao_em"
+        )
+        for motorista_id, categoria, entregas, ultima in disponiveis:
+            fila.inserir(categoria, chave_prioridade(categoria, entregas, ultima, motorista_id))
+            self._cidade_do_motorista[motorista_id] = cidade_id
+
+        self._cidades[cidade_id] = fila
+        return fila
+
+    def _fila(self, cidade_id):
+        """Retorna (fila da cidade, se acabou de ser montada a partir do banco)."""
+        versao = self._versao_compartilhada(cidade_id)
+        fila = self._cidades.get(cidade_id)
+        if fila is None or fila.versao != versao or time.monotonic() - fila.montada_em > IDADE_MAXIMA_SEGUNDOS:
+            return self._montar(cidade_id, versao), True
+        return fila, False
+
+    def invalidar_cidade(self, cidade_id):
+        """Força a recarga da cidade neste e nos demais processos."""
+        with self._lock:
+            self._incrementar_versao(cidade_id)
+            self._cidades.pop(cidade_id, None)
+
+    def atualizar(self, motorista):
+        """Reflete o estado atual de um motorista nas filas (chamado pelos signals)."""
+        with self._lock:
+            cidade_anterior = self._cidade_do_motorista.pop(motorista.id, None)
+            cidades = {cidade_anterior, motorista.sede_atual_id} - {None}
+
+            for cidade_id in cidades:
+                fila = self._cidades.get(cidade_id)
+                nova_versao = self._incrementar_versao(cidade_id)
+                if fila is None:
+                    continue
+                if nova_versao is None or nova_versao != fila.versao + 1:
+                    # Outro processo alterou a cidade: recarrega no próximo uso
+                    del self._cidades[cidade_id]
+                    continue
+
+                fila.versao = nova_versao
+                fila.remover(motorista.id)
+                if motorista.disponivel and cidade_id == motorista.sede_atual_id:
+                    chave = chave_prioridade(
+                        motorista.cnh_categoria,
+                        motorista.entregas_concluidas,
+                        motorista.ultima_atribuicao_em,
+                        motorista.id,
+                    )
+                    fila.inserir(motorista.cnh_categoria, chave)
+                    self._cidade_do_motorista[motorista.id] = cidade_id
+
+    def remover(self, motorista_id, cidade_id):
+        """Retira um motorista excluído das filas."""
+        with self._lock:
+            self._cidade_do_motorista.pop(motorista_id, None)
+            fila = self._cidades.get(cidade_id)
+            if fila is not None:
+                fila.remover(motorista_id)
+
+    def proximo(self, cidade, categorias, aceitar=None):
+        """
+        Retorna o motorista disponível de maior prioridade na cidade.
+
+        O candidato do topo é confirmado no banco na mesma consulta que o carrega;
+        se o banco discordar da fila (ou a fila estiver vazia sem ter sido montada
+        agora), a cidade é recarregada e a busca refeita uma vez.
+
+        Args:
+            cidade: Cidade de origem
+            categorias: Categorias de CNH aceitas
+            aceitar: Função opcional motorista_id -> bool; candidatos recusados são pulados
+
+        Returns:
+            Motorista ou None
+        """
+        with self._lock:
+            fila, recem_montada = self._fila(cidade.id)
+            while True:
+                motorista_id = self._melhor_aceito(fila, categorias, aceitar)
+                if motorista_id is not None:
+                    motorista = Motorista.objects.filter(
+                        pk=motorista_id, disponivel=True, sede_atual=cidade, cnh_categoria__in=categorias
+                    ).first()
+                    if motorista is not None:
+                        return motorista
+                if recem_montada:
+                    return None
+                fila, recem_montada = self._montar(cidade.id, self._versao_compartilhada(cidade.id)), True
+
+    @staticmethod
+    def _melhor_aceito(fila, categorias, aceitar):
+        """Percorre os topos em ordem de prioridade até achar um candidato aceito."""
+        pulados = []
+        try:
+            while True:
+                topos = {categoria: fila.topo(categoria) for categoria in categorias}
+                topos = {categoria: topo for categoria, topo in topos.items() if topo}
+                if not topos:
+                    return None
+                categoria = min(topos, key=topos.get)
+                motorista_id = topos[categoria][-1]
+                if aceitar is None or aceitar(motorista_id):
+                    return motorista_id
+                pulados.append((categoria, heapq.heappop(fila.heaps[categoria])))
+        finally:
+            for categoria, chave in pulados:
+                heapq.heappush(fila.heaps[categoria], chave)
+
+
+filas = FilasMotoristas()
@@ -0,0 +1,38 @@
+"""
+Comando para consolidar pedidos aprovados em cargas compartilhadas
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.motoristas.consolidacao import ConsolidacaoService
+
+
+class Command(BaseCommand):
+    help = "Agrupa pedidos aprovados da mesma rota e janela de tempo em cargas consolidadas"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--janela-dias",
+            type=int,
+            default=1,
+            help="Tamanho da janela de agrupamento em dias (padrão: 1)",
+        )
+
+    def handle(self, *args, **options):
+        janela_dias = max(1, options["janela_dias"])
+        resultado = ConsolidacaoService.consolidar(janela_dias=janela_dias)
+
+        for carga in resultado.cargas:
+            self.stdout.write(
+                f"  Carga #{carga.id}: {carga.rota.origem.nome_completo} → {carga.rota.destino.nome_completo} "
+                f"| {carga.veiculo.placa} | {carga.peso_total} kg ({carga.ocupacao_percentual}%)"
+            )
+
+        for mensagem in resultado.mensagens:
+            self.stdout.write(self.style.WARNING(f"⚠️  {mensagem}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\n✅ {resultado.pedidos_consolidados} pedido(s) consolidado(s) em {len(resultado.cargas)} carga(s)."
+            )
+        )
@@ -0,0 +1,39 @@
+"""
+Comando para iniciar, concluir ou cancelar várias entregas de uma vez
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.motoristas.models import AtribuicaoPedido, StatusAtribuicao
+from apps.motoristas.transicoes import AcaoTransicao, TransicaoEmMassaService
+
+
+class Command(BaseCommand):
+    help = "Aplica uma transição de status (iniciar, concluir, cancelar) a várias atribuições"
+
+    def add_arguments(self, parser):
+        parser.add_argument("acao", choices=[valor for valor, _ in AcaoTransicao.CHOICES])
+        parser.add_argument("ids", nargs="*", type=int, help="Ids das atribuições")
+        parser.add_argument(
+            "--todas-em-andamento",
+            action="store_true",
+            help="Aplica a todas as atribuições em andamento (ex: fechamento do dia)",
+        )
+        parser.add_argument("--motivo", default=None, help="Motivo do cancelamento")
+
+    def handle(self, *args, **options):
+        atribuicao_ids = list(options["ids"])
+        if options["todas_em_andamento"]:
+            atribuicao_ids += list(
+                AtribuicaoPedido.objects.filter(status=StatusAtribuicao.EM_ANDAMENTO).values_list("id", flat=True)
+            )
+
+        if not atribuicao_ids:
+            raise CommandError("Informe ids de atribuições ou use --todas-em-andamento.")
+
+        resultado = TransicaoEmMassaService.executar(options["acao"], atribuicao_ids, motivo=options["motivo"])
+
+        for atribuicao_id, motivo in resultado.ignoradas.items():
+            self.stdout.write(self.style.WARNING(f"⚠️  Atribuição #{atribuicao_id} ignorada: {motivo}"))
+
+        self.stdout.write(self.style.SUCCESS(f"\n✅ {len(resultado.processadas)} atribuição(ões) atualizada(s)."))
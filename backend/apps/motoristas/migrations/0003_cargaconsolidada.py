@@ -0,0 +1,46 @@
+# Generated by Django 5.0.7 on 2026-10-19 01:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('motoristas', '0002_problemaentrega'),
+        ('rotas', '0001_initial'),
+        ('veiculos', '0002_veiculo_categoria_minima_cnh_veiculo_sede_atual'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='atribuicaopedido',
+            name='custo_rateado',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Parcela do custo da viagem proporcional ao peso do pedido', max_digits=10, null=True, verbose_name='Custo Rateado'),
+        ),
+        migrations.CreateModel(
+            name='CargaConsolidada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('janela_inicio', models.DateField(help_text='Data inicial da janela de pedidos agrupados nesta carga', verbose_name='Início da Janela')),
+                ('peso_total', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Peso Total (kg)')),
+                ('custo_viagem', models.DecimalField(decimal_places=2, help_text='Custo de combustível e pedágio da viagem, rateado entre os pedidos', max_digits=10, verbose_name='Custo da Viagem')),
+                ('status', models.CharField(choices=[('planejada', 'Planejada'), ('em_andamento', 'Em Andamento'), ('concluida', 'Concluída'), ('cancelada', 'Cancelada')], default='planejada', max_length=20, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('motorista', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='cargas_consolidadas', to='motoristas.motorista', verbose_name='Motorista')),
+                ('rota', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='cargas_consolidadas', to='rotas.rota', verbose_name='Rota')),
+                ('veiculo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='cargas_consolidadas', to='veiculos.veiculo', verbose_name='Veículo')),
+            ],
+            options={
+                'verbose_name': 'Carga Consolidada',
+                'verbose_name_plural': 'Cargas Consolidadas',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='atribuicaopedido',
+            name='carga',
+            field=models.ForeignKey(blank=True, help_text='Carga compartilhada com outros pedidos no mesmo veículo', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='atribuicoes', to='motoristas.cargaconsolidada', verbose_name='Carga Consolidada'),
+        ),
+    ]
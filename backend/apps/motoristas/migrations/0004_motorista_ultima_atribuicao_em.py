@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-19 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('motoristas', '0003_cargaconsolidada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motorista',
+            name='ultima_atribuicao_em',
+            field=models.DateTimeField(blank=True, help_text='Usada como desempate para revezar motoristas com o mesmo número de entregas', null=True, verbose_name='Última Atribuição'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-19 02:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('motoristas', '0004_motorista_ultima_atribuicao_em'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodoAgenda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('folga', 'Folga'), ('ferias', 'Férias'), ('descanso', 'Descanso Obrigatório'), ('afastamento', 'Afastamento')], max_length=20, verbose_name='Tipo')),
+                ('inicio', models.DateTimeField(verbose_name='Início')),
+                ('fim', models.DateTimeField(verbose_name='Fim')),
+                ('observacoes', models.TextField(blank=True, null=True, verbose_name='Observações')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('motorista', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='agenda', to='motoristas.motorista', verbose_name='Motorista')),
+            ],
+            options={
+                'verbose_name': 'Período de Agenda',
+                'verbose_name_plural': 'Agenda dos Motoristas',
+                'ordering': ['motorista', 'inicio'],
+                'indexes': [models.Index(fields=['fim'], name='motoristas__fim_c1c60e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.7 on 2026-10-19 03:06
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def preencher_intervalos(apps, schema_editor):
+    """
+    Melhor aproximação para atribuições antigas: em andamento desde updated_at;
+    concluídas/canceladas entre created_at e updated_at
+    """
+    AtribuicaoPedido = apps.get_model("motoristas", "AtribuicaoPedido")
+    AtribuicaoPedido.objects.filter(status="em_andamento", iniciado_em__isnull=True).update(iniciado_em=F("updated_at"))
+    AtribuicaoPedido.objects.filter(status="concluido", iniciado_em__isnull=True).update(iniciado_em=F("created_at"))
+    AtribuicaoPedido.objects.filter(status__in=["concluido", "cancelado"], finalizado_em__isnull=True).update(
+        finalizado_em=F("updated_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('motoristas', '0005_periodoagenda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='atribuicaopedido',
+            name='finalizado_em',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Conclusão ou cancelamento da entrega (veículo liberado)', null=True, verbose_name='Finalizado em'),
+        ),
+        migrations.AddField(
+            model_name='atribuicaopedido',
+            name='iniciado_em',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Início da entrega (veículo em uso)', null=True, verbose_name='Iniciado em'),
+        ),
+        migrations.RunPython(preencher_intervalos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-19 03:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('motoristas', '0006_atribuicao_intervalos_uso'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='problemaentrega',
+            index=models.Index(fields=['status', 'criado_em', 'id'], name='problema_status_criacao_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from apps.contas.models import Profile
-from apps.rotas.models import Cidade
+from apps.rotas.models import Cidade, Rota
 from apps.veiculos.models import Veiculo
 from apps.pedidos.models import Pedido
 
@@ -39,6 +41,12 @@ class Motorista(models.Model):
     entregas_concluidas = models.IntegerField(
         default=0, verbose_name="Entregas Concluídas", help_text="Contador de entregas realizadas com sucesso"
     )
+    ultima_atribuicao_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Última Atribuição",
+        help_text="Usada como desempate para revezar motoristas com o mesmo número de entregas",
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
 
@@ -52,6 +60,42 @@ class Motorista(models.Model):
         return f"{nome} - CNH {self.cnh_categoria} - {self.sede_atual.nome_completo}"
 
 
+class TipoPeriodoAgenda(models.TextChoices):
+    """Motivos de indisponibilidade na agenda do motorista"""
+
+    FOLGA = "folga", "Folga"
+    FERIAS = "ferias", "Férias"
+    DESCANSO = "descanso", "Descanso Obrigatório"
+    AFASTAMENTO = "afastamento", "Afastamento"
+
+
+class PeriodoAgenda(models.Model):
+    """Período em que o motorista não pode ser escalado para viagens"""
+
+    motorista = models.ForeignKey(Motorista, on_delete=models.CASCADE, related_name="agenda", verbose_name="Motorista")
+    tipo = models.CharField(max_length=20, choices=TipoPeriodoAgenda.choices, verbose_name="Tipo")
+    inicio = models.DateTimeField(verbose_name="Início")
+    fim = models.DateTimeField(verbose_name="Fim")
+    observacoes = models.TextField(blank=True, null=True, verbose_name="Observações")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Período de Agenda"
+        verbose_name_plural = "Agenda dos Motoristas"
+        ordering = ["motorista", "inicio"]
+        indexes = [
+            models.Index(fields=["fim"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.inicio:%d/%m/%Y %H:%M} a {self.fim:%d/%m/%Y %H:%M}"
+
+    def clean(self):
+        if self.inicio and self.fim and self.fim <= self.inicio:
+            raise ValidationError("O fim do período deve ser posterior ao início.")
+
+
 class StatusAtribuicao(models.TextChoices):
     """Status da atribuição de pedido"""
 
@@ -61,6 +105,56 @@ class StatusAtribuicao(models.TextChoices):
     CANCELADO = "cancelado", "Cancelado"
 
 
+class StatusCarga(models.TextChoices):
+    """Status de uma carga consolidada"""
+
+    PLANEJADA = "planejada", "Planejada"
+    EM_ANDAMENTO = "em_andamento", "Em Andamento"
+    CONCLUIDA = "concluida", "Concluída"
+    CANCELADA = "cancelada", "Cancelada"
+
+
+class CargaConsolidada(models.Model):
+    """Viagem de um veículo transportando vários pedidos da mesma rota"""
+
+    rota = models.ForeignKey(Rota, on_delete=models.PROTECT, related_name="cargas_consolidadas", verbose_name="Rota")
+    veiculo = models.ForeignKey(
+        Veiculo, on_delete=models.PROTECT, related_name="cargas_consolidadas", verbose_name="Veículo"
+    )
+    motorista = models.ForeignKey(
+        Motorista, on_delete=models.PROTECT, related_name="cargas_consolidadas", verbose_name="Motorista"
+    )
+    janela_inicio = models.DateField(
+        verbose_name="Início da Janela", help_text="Data inicial da janela de pedidos agrupados nesta carga"
+    )
+    peso_total = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Peso Total (kg)")
+    custo_viagem = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name="Custo da Viagem",
+        help_text="Custo de combustível e pedágio da viagem, rateado entre os pedidos",
+    )
+    status = models.CharField(
+        max_length=20, choices=StatusCarga.choices, default=StatusCarga.PLANEJADA, verbose_name="Status"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Carga Consolidada"
+        verbose_name_plural = "Cargas Consolidadas"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Carga #{self.id} - {self.veiculo.placa} ({self.peso_total} kg)"
+
+    @property
+    def ocupacao_percentual(self):
+        """Percentual da carga máxima do veículo ocupado pelos pedidos"""
+        carga_maxima = self.veiculo.especificacao.carga_maxima
+        return round(float(self.peso_total) / carga_maxima * 100, 1) if carga_maxima else 0
+
+
 class AtribuicaoPedido(models.Model):
     """Modelo para atribuição de motorista e veículo a pedidos"""
 
@@ -73,6 +167,37 @@ class AtribuicaoPedido(models.Model):
         max_length=20, choices=StatusAtribuicao.choices, default=StatusAtribuicao.PENDENTE, verbose_name="Status"
     )
     observacoes = models.TextField(blank=True, null=True, verbose_name="Observações")
+    carga = models.ForeignKey(
+        CargaConsolidada,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="atribuicoes",
+        verbose_name="Carga Consolidada",
+        help_text="Carga compartilhada com outros pedidos no mesmo veículo",
+    )
+    custo_rateado = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Custo Rateado",
+        help_text="Parcela do custo da viagem proporcional ao peso do pedido",
+    )
+    iniciado_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Iniciado em",
+        help_text="Início da entrega (veículo em uso)",
+    )
+    finalizado_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Finalizado em",
+        help_text="Conclusão ou cancelamento da entrega (veículo liberado)",
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
 
@@ -84,6 +209,24 @@ class AtribuicaoPedido(models.Model):
     def __str__(self):
         return f"Pedido #{self.pedido.id} - {self.motorista.profile.user.username} - {self.veiculo.placa}"
 
+    def save(self, *args, **kwargs):
+        # Registra os instantes reais de uso do veículo (ver apps.gestao.utilizacao)
+        campos = set()
+        if self.status == StatusAtribuicao.EM_ANDAMENTO and self.iniciado_em is None:
+            self.iniciado_em = timezone.now()
+            campos.add("iniciado_em")
+        if self.status in (StatusAtribuicao.CONCLUIDO, StatusAtribuicao.CANCELADO) and self.finalizado_em is None:
+            self.finalizado_em = timezone.now()
+            campos.add("finalizado_em")
+        if self.status == StatusAtribuicao.CONCLUIDO and self.iniciado_em is None:
+            # Concluída sem ter sido iniciada (PENDENTE -> CONCLUIDO): início = conclusão
+            self.iniciado_em = self.finalizado_em
+            campos.add("iniciado_em")
+        update_fields = kwargs.get("update_fields")
+        if campos and update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *campos}
+        super().save(*args, **kwargs)
+
     @property
     def is_pendente(self):
         return self.status == StatusAtribuicao.PENDENTE
@@ -154,6 +297,8 @@ class ProblemaEntrega(models.Model):
         verbose_name = "Problema de Entrega"
         verbose_name_plural = "Problemas de Entrega"
         ordering = ["-criado_em"]
+        # Paginação por cursor da listagem da gestão (ordem status, -criado_em, -id)
+        indexes = [models.Index(fields=["status", "criado_em", "id"], name="problema_status_criacao_idx")]
 
     def __str__(self):
         return f"{self.get_tipo_display()} - Pedido #{self.atribuicao.pedido.id} - {self.get_status_display()}"
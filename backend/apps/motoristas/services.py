@@ -2,12 +2,24 @@
 Services para lógica de atribuição automática de motoristas e veículos
 """
 
+from decimal import Decimal
+
 from django.db import transaction
+from django.db.models import Count, Q
 from django.core.exceptions import ValidationError
-from apps.motoristas.models import Motorista, AtribuicaoPedido, StatusAtribuicao, CategoriaCNH
+from django.utils import timezone
+from apps.motoristas.agenda import agenda
+from apps.motoristas.filas import filas
+from apps.motoristas.models import (
+    AtribuicaoPedido,
+    CargaConsolidada,
+    CategoriaCNH,
+    StatusAtribuicao,
+    StatusCarga,
+)
 from apps.pedidos.models import StatusPedido
 from apps.veiculos.models import Veiculo
-from apps.rotas.models import Cidade
+from apps.rotas.models import Cidade, Rota
 
 
 class AtribuicaoService:
@@ -39,31 +51,104 @@ class AtribuicaoService:
         categorias_permitidas = cls.HIERARQUIA_CNH.get(motorista_cnh, [])
         return veiculo_cnh_minima in categorias_permitidas
 
+    @staticmethod
+    def extrair_nome_cidade(texto):
+        """
+        Extrai o nome da cidade de um texto no formato "Cidade - Estado" ou "Cidade/Estado"
+
+        Args:
+            texto: Cidade como gravada no pedido
+
+        Returns:
+            str: Nome da cidade sem o estado
+        """
+        if " - " in texto:
+            return texto.split(" - ")[0].strip()
+        if "/" in texto:
+            return texto.split("/")[0].strip()
+        return texto.strip()
+
     @classmethod
-    def buscar_motorista_disponivel(cls, cidade_origem, cnh_minima=None):
+    def buscar_motorista_disponivel(cls, cidade_origem, cnh_minima=None, horas_viagem=None, excluir=()):
         """
         Busca um motorista disponível na cidade de origem
 
         Args:
             cidade_origem: Cidade onde deve estar o motorista
             cnh_minima: Categoria CNH mínima (opcional)
+            horas_viagem: Tempo de direção da viagem; quando informado, só retorna motoristas
+                cuja agenda está livre durante a viagem com as pausas e descansos obrigatórios
+            excluir: Ids de motoristas já escolhidos e ainda não gravados (ex.: outras cargas do lote)
 
         Returns:
             Motorista ou None
         """
-        query = Motorista.objects.filter(disponivel=True, sede_atual=cidade_origem)
+        # Se tem restrição de CNH, considera apenas as categorias que podem dirigir
+        categorias_validas = [
+            cat for cat, permitidas in cls.HIERARQUIA_CNH.items() if not cnh_minima or cnh_minima in permitidas
+        ]
+
+        # Fila da cidade: menor CNH compatível, menos entregas e atribuição mais antiga primeiro
+        # O índice da agenda pode estar desatualizado neste processo: o escolhido é
+        # confirmado no banco e, se estiver ocupado, a busca é refeita sem ele
+        inicio = timezone.now()
+        recusados = set(excluir)
+        while True:
+            livre_na_agenda = agenda.verificador(horas_viagem, inicio) if horas_viagem is not None else None
+
+            def aceitar(motorista_id, livre_na_agenda=livre_na_agenda):
+                return motorista_id not in recusados and (livre_na_agenda is None or livre_na_agenda(motorista_id))
+
+            motorista = filas.proximo(cidade_origem, categorias_validas, aceitar=aceitar)
+            if motorista is None or horas_viagem is None or agenda.confirmar(motorista.id, horas_viagem, inicio):
+                return motorista
+            recusados.add(motorista.id)
+
+    @classmethod
+    def estimar_horas_viagem(cls, cidade_origem, cidade_destino, veiculo):
+        """
+        Estima o tempo de direção entre duas cidades com um veículo
+
+        Args:
+            cidade_origem: Cidade de origem
+            cidade_destino: Cidade de destino (ou None)
+            veiculo: Veículo que fará a viagem
+
+        Returns:
+            Decimal com as horas de viagem, ou None se não houver rota cadastrada
+        """
+        if not cidade_destino:
+            return None
 
-        # Se tem restrição de CNH, filtra por motoristas que podem dirigir
-        if cnh_minima:
-            categorias_validas = []
-            for cat, permitidas in cls.HIERARQUIA_CNH.items():
-                if cnh_minima in permitidas:
-                    categorias_validas.append(cat)
+        rota = Rota.objects.filter(origem=cidade_origem, destino=cidade_destino, ativa=True).first()
+        if not rota:
+            return None
 
-            query = query.filter(cnh_categoria__in=categorias_validas)
+        velocidade = veiculo.especificacao.velocidade_media
+        if velocidade:
+            return rota.distancia_km / Decimal(str(velocidade))
+        return rota.tempo_estimado_horas
 
-        # Ordena por número de entregas (prioriza quem tem menos entregas)
-        return query.order_by("entregas_concluidas").first()
+    @classmethod
+    def veiculos_livres(cls, cidade_origem, excluir_reservados=False):
+        """
+        Retorna os veículos ativos na cidade que não estão em atribuições ativas
+
+        Args:
+            cidade_origem: Cidade onde deve estar o veículo
+            excluir_reservados: Também exclui veículos com atribuições pendentes
+
+        Returns:
+            QuerySet de Veiculo
+        """
+        status_ocupados = [StatusAtribuicao.EM_ANDAMENTO]
+        if excluir_reservados:
+            status_ocupados.append(StatusAtribuicao.PENDENTE)
+
+        veiculos_ocupados = AtribuicaoPedido.objects.filter(status__in=status_ocupados).values_list(
+            "veiculo_id", flat=True
+        )
+        return Veiculo.objects.filter(ativo=True, sede_atual=cidade_origem).exclude(id__in=veiculos_ocupados)
 
     @classmethod
     def buscar_veiculo_disponivel(cls, cidade_origem, motorista=None):
@@ -77,13 +162,7 @@ class AtribuicaoService:
         Returns:
             Veiculo ou None
         """
-        query = Veiculo.objects.filter(ativo=True, sede_atual=cidade_origem)
-
-        # Exclui veículos que estão em atribuições ativas
-        veiculos_ocupados = AtribuicaoPedido.objects.filter(status=StatusAtribuicao.EM_ANDAMENTO).values_list(
-            "veiculo_id", flat=True
-        )
-        query = query.exclude(id__in=veiculos_ocupados)
+        query = cls.veiculos_livres(cidade_origem)
 
         # Se tem motorista, filtra por veículos que ele pode dirigir
         if motorista:
@@ -122,12 +201,7 @@ class AtribuicaoService:
         # Busca cidade de origem
         try:
             # Parsear cidade_origem (formato: "Cidade - Estado" ou "Cidade/Estado")
-            if " - " in pedido.cidade_origem:
-                cidade_nome = pedido.cidade_origem.split(" - ")[0].strip()
-            elif "/" in pedido.cidade_origem:
-                cidade_nome = pedido.cidade_origem.split("/")[0].strip()
-            else:
-                cidade_nome = pedido.cidade_origem.strip()
+            cidade_nome = cls.extrair_nome_cidade(pedido.cidade_origem)
 
             cidade_origem = Cidade.objects.filter(nome__iexact=cidade_nome, ativa=True).first()
 
@@ -147,12 +221,19 @@ class AtribuicaoService:
                 f"Não há veículos disponíveis na cidade {cidade_origem.nome_completo} para este pedido."
             )
 
-        # 2. Busca motorista compatível com o veículo
-        motorista = cls.buscar_motorista_disponivel(cidade_origem, veiculo.categoria_minima_cnh)
+        # 2. Busca motorista compatível com o veículo e com agenda livre durante a viagem
+        cidade_destino = Cidade.objects.filter(
+            nome__iexact=cls.extrair_nome_cidade(pedido.cidade_destino), ativa=True
+        ).first()
+        horas_viagem = cls.estimar_horas_viagem(cidade_origem, cidade_destino, veiculo) or Decimal("0")
+        motorista = cls.buscar_motorista_disponivel(cidade_origem, veiculo.categoria_minima_cnh, horas_viagem)
 
         if not motorista:
             cnh_info = f" com CNH {veiculo.categoria_minima_cnh}" if veiculo.categoria_minima_cnh else ""
-            raise ValidationError(f"Não há motoristas disponíveis{cnh_info} na cidade {cidade_origem.nome_completo}.")
+            agenda_info = " com agenda livre para a viagem" if horas_viagem else ""
+            raise ValidationError(
+                f"Não há motoristas disponíveis{cnh_info}{agenda_info} na cidade {cidade_origem.nome_completo}."
+            )
 
         # 3. Cria atribuição
         atribuicao = AtribuicaoPedido.objects.create(
@@ -161,6 +242,7 @@ class AtribuicaoService:
 
         # 4. Marca motorista e veículo como indisponíveis
         motorista.disponivel = False
+        motorista.ultima_atribuicao_em = timezone.now()
         motorista.save()
 
         # 5. Atualiza status do pedido
@@ -169,6 +251,59 @@ class AtribuicaoService:
 
         return atribuicao
 
+    @staticmethod
+    def iniciar_cargas(carga_ids, agora=None):
+        """Passa para "em andamento" as cargas planejadas que tiveram uma entrega iniciada"""
+        carga_ids = set(carga_ids) - {None}
+        if carga_ids:
+            CargaConsolidada.objects.filter(id__in=carga_ids, status=StatusCarga.PLANEJADA).update(
+                status=StatusCarga.EM_ANDAMENTO, updated_at=agora or timezone.now()
+            )
+
+    @staticmethod
+    def encerrar_cargas(carga_ids, agora=None):
+        """
+        Encerra as cargas cujas atribuições terminaram todas
+
+        A carga fica concluída se ao menos um pedido foi entregue e cancelada se todos
+        foram cancelados. Enquanto houver pedidos pendentes ou em andamento, o motorista
+        e o veículo continuam ocupados com a carga.
+
+        Args:
+            carga_ids: Ids das cargas das atribuições que acabaram de terminar
+            agora: Instante da transição (padrão: agora)
+
+        Returns:
+            Ids das cargas que continuam em aberto
+        """
+        carga_ids = set(carga_ids) - {None}
+        if not carga_ids:
+            return set()
+
+        linhas = (
+            AtribuicaoPedido.objects.filter(carga_id__in=carga_ids)
+            .order_by()
+            .values("carga_id")
+            .annotate(
+                ativas=Count("id", filter=Q(status__in=[StatusAtribuicao.PENDENTE, StatusAtribuicao.EM_ANDAMENTO])),
+                concluidas=Count("id", filter=Q(status=StatusAtribuicao.CONCLUIDO)),
+            )
+        )
+        abertas, concluidas, canceladas = set(), set(), set()
+        for linha in linhas:
+            if linha["ativas"]:
+                abertas.add(linha["carga_id"])
+            elif linha["concluidas"]:
+                concluidas.add(linha["carga_id"])
+            else:
+                canceladas.add(linha["carga_id"])
+
+        agora = agora or timezone.now()
+        for status, ids in ((StatusCarga.CONCLUIDA, concluidas), (StatusCarga.CANCELADA, canceladas)):
+            if ids:
+                CargaConsolidada.objects.filter(id__in=ids).update(status=status, updated_at=agora)
+        return abertas
+
     @classmethod
     @transaction.atomic
     def concluir_entrega(cls, atribuicao):
@@ -187,12 +322,7 @@ class AtribuicaoService:
         # Busca cidade de destino
         try:
             # Parsear cidade_destino (formato: "Cidade - Estado" ou "Cidade/Estado")
-            if " - " in atribuicao.pedido.cidade_destino:
-                cidade_nome = atribuicao.pedido.cidade_destino.split(" - ")[0].strip()
-            elif "/" in atribuicao.pedido.cidade_destino:
-                cidade_nome = atribuicao.pedido.cidade_destino.split("/")[0].strip()
-            else:
-                cidade_nome = atribuicao.pedido.cidade_destino.strip()
+            cidade_nome = cls.extrair_nome_cidade(atribuicao.pedido.cidade_destino)
 
             cidade_destino = Cidade.objects.filter(nome__iexact=cidade_nome, ativa=True).first()
 
@@ -206,22 +336,23 @@ class AtribuicaoService:
         except Exception as e:
             raise ValidationError(f"Erro ao buscar cidade de destino: {str(e)}")
 
-        # Atualiza status da atribuição
+        # Atualiza status da atribuição (grava só as colunas alteradas)
         atribuicao.status = StatusAtribuicao.CONCLUIDO
-        atribuicao.save()
+        atribuicao.save(update_fields=["status", "updated_at"])
 
-        # Atualiza sede do motorista e veículo para cidade de destino
+        # Atualiza sede do motorista e veículo para cidade de destino; numa carga
+        # consolidada o motorista só fica livre quando o último pedido terminar
         atribuicao.motorista.sede_atual = cidade_destino
-        atribuicao.motorista.disponivel = True  # Volta a ficar disponível
+        atribuicao.motorista.disponivel = not cls.encerrar_cargas([atribuicao.carga_id])
         atribuicao.motorista.entregas_concluidas += 1
-        atribuicao.motorista.save()
+        atribuicao.motorista.save(update_fields=["sede_atual", "disponivel", "entregas_concluidas", "updated_at"])
 
         atribuicao.veiculo.sede_atual = cidade_destino
-        atribuicao.veiculo.save()
+        atribuicao.veiculo.save(update_fields=["sede_atual", "updated_at"])
 
         # Atualiza status do pedido
         atribuicao.pedido.status = StatusPedido.CONCLUIDO
-        atribuicao.pedido.save()
+        atribuicao.pedido.save(update_fields=["status", "updated_at"])
 
         return atribuicao
 
@@ -241,16 +372,17 @@ class AtribuicaoService:
         if atribuicao.status == StatusAtribuicao.CONCLUIDO:
             raise ValidationError("Não é possível cancelar uma entrega já concluída.")
 
-        # Libera motorista e veículo
-        atribuicao.motorista.disponivel = True
-        atribuicao.motorista.save()
-
         # Atualiza status
         atribuicao.status = StatusAtribuicao.CANCELADO
         if motivo:
             atribuicao.observacoes = motivo
         atribuicao.save()
 
+        # Libera motorista e veículo (numa carga consolidada, só sem outros pedidos ativos)
+        if not cls.encerrar_cargas([atribuicao.carga_id]):
+            atribuicao.motorista.disponivel = True
+            atribuicao.motorista.save()
+
         # Volta pedido para status aprovado
         atribuicao.pedido.status = StatusPedido.APROVADO
         atribuicao.pedido.save()
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .agenda import agenda
+from .filas import filas
+from .models import Motorista, PeriodoAgenda
+
+
+@receiver(post_save, sender=Motorista)
+def atualizar_fila_motorista(sender, instance, **kwargs):
+    """
+    Mantém a fila de prioridade da cidade em dia a cada atribuição, conclusão ou cancelamento.
+
+    A fila só muda depois do commit, para que um rollback não deixe na memória um
+    estado que nunca chegou ao banco.
+    """
+    transaction.on_commit(lambda: filas.atualizar(instance))
+
+
+@receiver(post_delete, sender=Motorista)
+def remover_motorista_da_fila(sender, instance, **kwargs):
+    """
+    Retira o motorista excluído da fila da sua cidade (após o commit).
+    """
+    motorista_id, cidade_id = instance.id, instance.sede_atual_id
+    transaction.on_commit(lambda: filas.remover(motorista_id, cidade_id))
+
+
+@receiver(post_save, sender=PeriodoAgenda)
+@receiver(post_delete, sender=PeriodoAgenda)
+def invalidar_agenda(sender, instance, **kwargs):
+    """
+    Faz o índice de agenda ser recarregado após qualquer alteração de período.
+    """
+    agenda.invalidar()
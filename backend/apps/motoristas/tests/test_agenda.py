@@ -0,0 +1,201 @@
+"""Testes para a agenda dos motoristas e as regras de jornada."""
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from apps.contas.models import Profile, Role
+from apps.motoristas.agenda import IDADE_MAXIMA_SEGUNDOS, IndiceIntervalos, agenda, duracao_com_descansos
+from apps.motoristas.models import CategoriaCNH, Motorista, PeriodoAgenda, TipoPeriodoAgenda
+from apps.motoristas.services import AtribuicaoService
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.models import Cidade, Rota
+from apps.veiculos.models import EspecificacaoVeiculo, TipoCombustivel, TipoVeiculo, Veiculo
+
+
+class TestRegrasJornada:
+    """Testes do cálculo de duração com pausas e descansos."""
+
+    def test_viagem_curta_sem_pausa(self):
+        assert duracao_com_descansos(Decimal("4")) == timedelta(hours=4)
+
+    def test_pausa_a_cada_cinco_horas_e_meia(self):
+        assert duracao_com_descansos(Decimal("6")) == timedelta(hours=6.5)
+
+    def test_descanso_entre_jornadas(self):
+        """Testa que 20h de direção viram duas jornadas com descanso de 11h entre elas."""
+        assert duracao_com_descansos(Decimal("20")) == timedelta(hours=20 + 2 * 0.5 + 11)
+
+
+class TestIndiceIntervalos:
+    """Testes do índice de intervalos ocupados."""
+
+    def test_funde_intervalos_sobrepostos(self):
+        indice = IndiceIntervalos([(5, 8), (1, 3), (2, 4)])
+        assert indice.inicios == [1, 5]
+        assert indice.fins == [4, 8]
+
+    def test_livre(self):
+        indice = IndiceIntervalos([(10, 20), (30, 40)])
+        assert indice.livre(0, 10)
+        assert indice.livre(20, 30)
+        assert not indice.livre(15, 16)
+        assert not indice.livre(25, 35)
+        assert not indice.livre(0, 50)
+        assert indice.livre(40, 100)
+
+    def test_consulta_rapida_com_meses_de_agenda(self):
+        """Testa que a verificação fica abaixo de 1 ms mesmo com milhares de períodos."""
+        indice = IndiceIntervalos([(hora, hora + 8) for hora in range(0, 24 * 180, 24)])
+        inicio = time.perf_counter()
+        for hora in range(1000):
+            indice.livre(hora * 4, hora * 4 + 40)
+        assert (time.perf_counter() - inicio) / 1000 < 0.001
+
+
+@pytest.mark.django_db
+class TestAtribuicaoComAgenda:
+    """Testes da atribuição respeitando a agenda."""
+
+    @pytest.fixture
+    def cenario(self, django_user_model):
+        origem = Cidade.objects.create(nome="Manaus", estado="AM")
+        destino = Cidade.objects.create(nome="Porto Velho", estado="RO")
+        Rota.objects.create(origem=origem, destino=destino, distancia_km=Decimal("1600"))
+
+        espec = EspecificacaoVeiculo.objects.create(
+            tipo=TipoVeiculo.CARRETA,
+            combustivel_principal=TipoCombustivel.DIESEL,
+            rendimento_principal=3.5,
+            carga_maxima=25000,
+            velocidade_media=40,
+            reducao_rendimento_principal=0.0001,
+        )
+        Veiculo.objects.create(
+            especificacao=espec,
+            marca="Scania",
+            modelo="R450",
+            placa="AGD1234",
+            ano=2020,
+            cor="Branco",
+            sede_atual=origem,
+            categoria_minima_cnh=CategoriaCNH.E,
+        )
+
+        motoristas = []
+        for i, entregas in enumerate([0, 10]):
+            user = django_user_model.objects.create_user(
+                username=f"motorista_agenda_{i}", email=f"agenda{i}@test.com", password="senha123"
+            )
+            profile = Profile.objects.get(user=user)
+            profile.role = Role.MOTORISTA
+            profile.save()
+            motoristas.append(
+                Motorista.objects.create(
+                    profile=profile, sede_atual=origem, cnh_categoria=CategoriaCNH.E, entregas_concluidas=entregas
+                )
+            )
+
+        pedido = Pedido.objects.create(
+            cliente=django_user_model.objects.create_user(username="cliente_agenda", password="senha123"),
+            cidade_origem="Manaus - Amazonas",
+            cidade_destino="Porto Velho - Rondônia",
+            peso_carga=Decimal("10000"),
+            prazo_desejado=5,
+            status=StatusPedido.APROVADO,
+        )
+        return {"motoristas": motoristas, "pedido": pedido}
+
+    def test_pula_motorista_de_folga_durante_a_viagem(self, cenario):
+        """Testa que uma viagem de 40h não vai para quem tem folga amanhã."""
+        preferido, outro = cenario["motoristas"]
+        amanha = timezone.now() + timedelta(days=1)
+        PeriodoAgenda.objects.create(
+            motorista=preferido, tipo=TipoPeriodoAgenda.FOLGA, inicio=amanha, fim=amanha + timedelta(days=1)
+        )
+
+        atribuicao = AtribuicaoService.atribuir_pedido(cenario["pedido"])
+
+        assert atribuicao.motorista == outro
+
+    def test_folga_depois_da_viagem_nao_impede(self, cenario):
+        """Testa que períodos após o fim da viagem (com descansos) não bloqueiam o motorista."""
+        preferido, _ = cenario["motoristas"]
+        depois = timezone.now() + timedelta(days=10)
+        PeriodoAgenda.objects.create(
+            motorista=preferido, tipo=TipoPeriodoAgenda.FERIAS, inicio=depois, fim=depois + timedelta(days=30)
+        )
+
+        atribuicao = AtribuicaoService.atribuir_pedido(cenario["pedido"])
+
+        assert atribuicao.motorista == preferido
+
+    def test_sem_motorista_com_agenda_livre(self, cenario):
+        """Testa o erro quando nenhum motorista tem a janela livre."""
+        agora = timezone.now()
+        for motorista in cenario["motoristas"]:
+            PeriodoAgenda.objects.create(
+                motorista=motorista,
+                tipo=TipoPeriodoAgenda.DESCANSO,
+                inicio=agora - timedelta(hours=1),
+                fim=agora + timedelta(hours=10),
+            )
+
+        with pytest.raises(ValidationError, match="agenda livre"):
+            AtribuicaoService.atribuir_pedido(cenario["pedido"])
+
+    def test_indice_recarregado_apos_alteracao(self, cenario):
+        """Testa que remover a folga libera o motorista sem reiniciar o processo."""
+        preferido, _ = cenario["motoristas"]
+        agora = timezone.now()
+        periodo = PeriodoAgenda.objects.create(
+            motorista=preferido, tipo=TipoPeriodoAgenda.FOLGA, inicio=agora, fim=agora + timedelta(days=2)
+        )
+        assert not agenda.livre(preferido.id, Decimal("1"))
+
+        periodo.delete()
+
+        assert agenda.livre(preferido.id, Decimal("1"))
+
+    def test_folga_gravada_em_outro_processo_e_confirmada_no_banco(self, cenario):
+        """Testa que um índice desatualizado não atribui a viagem a quem está de folga."""
+        preferido, outro = cenario["motoristas"]
+        assert agenda.livre(preferido.id, Decimal("40"))
+        amanha = timezone.now() + timedelta(days=1)
+        # bulk_create não dispara signals: a versão no cache deste processo não muda
+        PeriodoAgenda.objects.bulk_create(
+            [
+                PeriodoAgenda(
+                    motorista=preferido, tipo=TipoPeriodoAgenda.FERIAS, inicio=amanha, fim=amanha + timedelta(days=9)
+                )
+            ]
+        )
+        assert agenda.livre(preferido.id, Decimal("40"))
+
+        atribuicao = AtribuicaoService.atribuir_pedido(cenario["pedido"])
+
+        assert atribuicao.motorista == outro
+        assert not agenda.livre(preferido.id, Decimal("40"))
+
+    def test_indice_expira_por_idade(self, cenario, monkeypatch):
+        """Testa que o índice é remontado depois de IDADE_MAXIMA_SEGUNDOS mesmo sem mudança de versão."""
+        preferido, _ = cenario["motoristas"]
+        assert agenda.livre(preferido.id, Decimal("1"))
+        agora = timezone.now()
+        PeriodoAgenda.objects.bulk_create(
+            [
+                PeriodoAgenda(
+                    motorista=preferido, tipo=TipoPeriodoAgenda.FOLGA, inicio=agora, fim=agora + timedelta(days=1)
+                )
+            ]
+        )
+        assert agenda.livre(preferido.id, Decimal("1"))
+
+        relogio = time.monotonic() + IDADE_MAXIMA_SEGUNDOS + 1
+        monkeypatch.setattr("apps.motoristas.agenda.time.monotonic", lambda: relogio)
+
+        assert not agenda.livre(preferido.id, Decimal("1"))
@@ -0,0 +1,205 @@
+"""Testes para a consolidação de cargas."""
+
+from decimal import Decimal
+
+import pytest
+
+from apps.contas.models import Profile, Role
+from apps.motoristas.consolidacao import ConsolidacaoService, empacotar_cargas
+from apps.motoristas.models import AtribuicaoPedido, CategoriaCNH, Motorista, StatusCarga
+from apps.motoristas.services import AtribuicaoService
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.models import Cidade, Rota
+from apps.veiculos.models import EspecificacaoVeiculo, TipoCombustivel, TipoVeiculo, Veiculo
+
+
+class TestEmpacotarCargas:
+    """Testes do algoritmo de bin packing."""
+
+    def test_agrupa_pedidos_no_mesmo_veiculo(self):
+        """Testa que pedidos pequenos vão para um único veículo."""
+        compartimentos, nao_alocados = empacotar_cargas(
+            [(1, Decimal("300")), (2, Decimal("400")), (3, Decimal("200"))],
+            [(10, Decimal("1000")), (11, Decimal("1000"))],
+        )
+
+        assert nao_alocados == []
+        assert len(compartimentos) == 1
+        assert compartimentos[0].carga == Decimal("900")
+
+    def test_respeita_carga_maxima(self):
+        """Testa que nenhum veículo recebe mais que sua carga máxima."""
+        compartimentos, nao_alocados = empacotar_cargas(
+            [(1, Decimal("700")), (2, Decimal("600")), (3, Decimal("400")), (4, Decimal("300"))],
+            [(10, Decimal("1000")), (11, Decimal("1000")), (12, Decimal("1000"))],
+        )
+
+        assert nao_alocados == []
+        assert len(compartimentos) == 2
+        for compartimento in compartimentos:
+            assert compartimento.carga <= compartimento.capacidade
+
+    def test_pedido_maior_que_todos_os_veiculos(self):
+        """Testa que pedidos que não cabem em nenhum veículo ficam de fora."""
+        compartimentos, nao_alocados = empacotar_cargas(
+            [(1, Decimal("5000")), (2, Decimal("100"))],
+            [(10, Decimal("1000"))],
+        )
+
+        assert nao_alocados == [1]
+        assert len(compartimentos) == 1
+
+    def test_troca_por_veiculo_menor(self):
+        """Testa que a busca local troca o veículo por um menor que comporte a carga."""
+        compartimentos, _ = empacotar_cargas(
+            [(1, Decimal("300")), (2, Decimal("200"))],
+            [(10, Decimal("400")), (11, Decimal("25000")), (12, Decimal("600"))],
+        )
+
+        assert len(compartimentos) == 1
+        assert compartimentos[0].veiculo_id == 12
+
+
+@pytest.mark.django_db
+class TestConsolidacaoService:
+    """Testes do service de consolidação."""
+
+    @pytest.fixture
+    def cenario(self, django_user_model):
+        """Cria rota, veículos, motoristas e pedidos aprovados na mesma rota."""
+        origem = Cidade.objects.create(nome="Campinas", estado="SP")
+        destino = Cidade.objects.create(nome="Santos", estado="SP")
+        rota = Rota.objects.create(
+            origem=origem, destino=destino, distancia_km=Decimal("200"), pedagio_valor=Decimal("40")
+        )
+
+        espec = EspecificacaoVeiculo.objects.create(
+            tipo=TipoVeiculo.VAN,
+            combustivel_principal=TipoCombustivel.DIESEL,
+            rendimento_principal=10.0,
+            carga_maxima=1500,
+            velocidade_media=80,
+            reducao_rendimento_principal=0.001,
+        )
+        for i in range(2):
+            Veiculo.objects.create(
+                especificacao=espec,
+                marca="Fiat",
+                modelo="Ducato",
+                placa=f"VAN{i}000",
+                ano=2020,
+                cor="Branco",
+                sede_atual=origem,
+                categoria_minima_cnh=CategoriaCNH.B,
+            )
+
+        for i in range(2):
+            user = django_user_model.objects.create_user(
+                username=f"motorista_{i}", email=f"motorista{i}@test.com", password="senha123"
+            )
+            profile = Profile.objects.get(user=user)
+            profile.role = Role.MOTORISTA
+            profile.save()
+            Motorista.objects.create(profile=profile, sede_atual=origem, cnh_categoria=CategoriaCNH.C)
+
+        cliente = django_user_model.objects.create_user(
+            username="cliente", email="cliente@test.com", password="senha123"
+        )
+        pedidos = [
+            Pedido.objects.create(
+                cliente=cliente,
+                cidade_origem="Campinas - São Paulo",
+                cidade_destino="Santos - São Paulo",
+                peso_carga=Decimal(peso),
+                prazo_desejado=3,
+                status=StatusPedido.APROVADO,
+            )
+            for peso in ["500", "400", "300"]
+        ]
+
+        return {"rota": rota, "pedidos": pedidos}
+
+    def test_consolida_pedidos_da_mesma_rota(self, cenario):
+        """Testa que pedidos da mesma rota dividem um único veículo."""
+        resultado = ConsolidacaoService.consolidar()
+
+        assert len(resultado.cargas) == 1
+        assert resultado.pedidos_consolidados == 3
+
+        carga = resultado.cargas[0]
+        assert carga.peso_total == Decimal("1200")
+        assert carga.atribuicoes.count() == 3
+        assert not carga.motorista.disponivel
+
+        for pedido in cenario["pedidos"]:
+            pedido.refresh_from_db()
+            assert pedido.status == StatusPedido.EM_TRANSPORTE
+            assert pedido.atribuicao.veiculo == carga.veiculo
+
+    def test_rateio_proporcional_ao_peso(self, cenario):
+        """Testa que o custo da viagem é rateado por peso e soma o custo total."""
+        carga = ConsolidacaoService.consolidar().cargas[0]
+
+        atribuicoes = {a.pedido.peso_carga: a.custo_rateado for a in AtribuicaoPedido.objects.filter(carga=carga)}
+        assert sum(atribuicoes.values()) == carga.custo_viagem
+        assert atribuicoes[Decimal("500")] > atribuicoes[Decimal("400")] > atribuicoes[Decimal("300")]
+
+    def test_pedido_unico_nao_e_consolidado(self, cenario):
+        """Testa que grupos com um único pedido ficam para a atribuição individual."""
+        for pedido in cenario["pedidos"][1:]:
+            pedido.status = StatusPedido.PENDENTE
+            pedido.save()
+
+        resultado = ConsolidacaoService.consolidar()
+
+        assert resultado.cargas == []
+        assert not AtribuicaoPedido.objects.exists()
+
+    def test_custo_rateado_vira_custo_do_pedido(self, cenario):
+        """Testa que combustível e pedágio do pedido passam a ser a parcela rateada da viagem."""
+        carga = ConsolidacaoService.consolidar().cargas[0]
+
+        for atribuicao in AtribuicaoPedido.objects.filter(carga=carga).select_related("pedido"):
+            pedido = atribuicao.pedido
+            assert pedido.custo_combustivel + pedido.custo_pedagio == atribuicao.custo_rateado
+        assert sum(p.custo_pedagio for p in Pedido.objects.all()) == pytest.approx(Decimal("40"), abs=Decimal("0.02"))
+
+    def test_cargas_do_mesmo_grupo_usam_motoristas_diferentes(self, cenario):
+        """Testa que cada veículo do grupo recebe um motorista diferente."""
+        Pedido.objects.filter(pk=cenario["pedidos"][0].pk).update(peso_carga=Decimal("1100"))
+
+        cargas = ConsolidacaoService.consolidar().cargas
+
+        assert len(cargas) == 2
+        assert cargas[0].motorista_id != cargas[1].motorista_id
+        assert not Motorista.objects.filter(disponivel=True).exists()
+
+    def test_motorista_so_fica_livre_no_ultimo_pedido(self, cenario):
+        """Testa que a carga segue ocupando motorista até o último pedido terminar."""
+        carga = ConsolidacaoService.consolidar().cargas[0]
+        primeira, segunda, terceira = AtribuicaoPedido.objects.filter(carga=carga).order_by("id")
+
+        AtribuicaoService.concluir_entrega(primeira)
+        AtribuicaoService.cancelar_atribuicao(segunda)
+        carga.refresh_from_db()
+        carga.motorista.refresh_from_db()
+        assert carga.status == StatusCarga.PLANEJADA
+        assert not carga.motorista.disponivel
+
+        AtribuicaoService.concluir_entrega(terceira)
+        carga.refresh_from_db()
+        carga.motorista.refresh_from_db()
+        assert carga.status == StatusCarga.CONCLUIDA
+        assert carga.motorista.disponivel
+
+    def test_carga_toda_cancelada(self, cenario):
+        """Testa que cancelar todos os pedidos cancela a carga e libera o motorista."""
+        carga = ConsolidacaoService.consolidar().cargas[0]
+
+        for atribuicao in AtribuicaoPedido.objects.filter(carga=carga):
+            AtribuicaoService.cancelar_atribuicao(atribuicao)
+
+        carga.refresh_from_db()
+        carga.motorista.refresh_from_db()
+        assert carga.status == StatusCarga.CANCELADA
+        assert carga.motorista.disponivel
@@ -0,0 +1,111 @@
+"""Testes para as filas de prioridade de motoristas por cidade."""
+
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.contas.models import Profile, Role
+from apps.motoristas.filas import filas
+from apps.motoristas.models import CategoriaCNH, Motorista
+from apps.motoristas.services import AtribuicaoService
+from apps.rotas.models import Cidade
+
+
+@pytest.mark.django_db
+class TestFilasMotoristas:
+    """Testes da seleção de motoristas pela fila da cidade."""
+
+    @pytest.fixture
+    def cidade(self):
+        return Cidade.objects.create(nome="Curitiba", estado="PR")
+
+    @pytest.fixture
+    def criar_motorista(self, django_user_model, cidade):
+        contador = iter(range(100))
+
+        def criar(cnh=CategoriaCNH.D, entregas=0, **kwargs):
+            i = next(contador)
+            user = django_user_model.objects.create_user(
+                username=f"motorista_fila_{i}", email=f"fila{i}@test.com", password="senha123"
+            )
+            profile = Profile.objects.get(user=user)
+            profile.role = Role.MOTORISTA
+            profile.save()
+            return Motorista.objects.create(
+                profile=profile, sede_atual=cidade, cnh_categoria=cnh, entregas_concluidas=entregas, **kwargs
+            )
+
+        return criar
+
+    def test_desempate_pela_atribuicao_mais_antiga(self, cidade, criar_motorista):
+        """Testa que, com as mesmas entregas, vence quem foi atribuído há mais tempo."""
+        agora = timezone.now()
+        recente = criar_motorista(ultima_atribuicao_em=agora)
+        antigo = criar_motorista(ultima_atribuicao_em=agora - timedelta(days=2))
+
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == antigo
+        assert recente != antigo
+
+    def test_prefere_menor_cnh_compativel(self, cidade, criar_motorista):
+        """Testa que a CNH mais baixa que atende o veículo é escolhida primeiro."""
+        criar_motorista(cnh=CategoriaCNH.E, entregas=0)
+        motorista_c = criar_motorista(cnh=CategoriaCNH.C, entregas=5)
+
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade, CategoriaCNH.C) == motorista_c
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade, CategoriaCNH.D).cnh_categoria == CategoriaCNH.E
+
+    def test_fila_acompanha_indisponibilidade(self, cidade, criar_motorista):
+        """Testa que o motorista que ficou indisponível sai da fila pelo signal de save."""
+        primeiro = criar_motorista(entregas=0)
+        segundo = criar_motorista(entregas=1)
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == primeiro
+
+        primeiro.disponivel = False
+        primeiro.save()
+
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == segundo
+
+    def test_fila_so_muda_apos_o_commit(self, cidade, criar_motorista, django_capture_on_commit_callbacks):
+        """Testa que o signal de save só altera a fila quando a transação é confirmada."""
+        primeiro = criar_motorista(entregas=0)
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == primeiro
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            primeiro.disponivel = False
+            primeiro.save()
+            assert primeiro.id in filas._cidade_do_motorista
+
+        for callback in callbacks:
+            callback()
+        assert primeiro.id not in filas._cidade_do_motorista
+
+    def test_alteracao_sem_signal_corrigida_pelo_banco(self, cidade, criar_motorista):
+        """Testa que a fila é recarregada quando o banco discorda do topo."""
+        primeiro = criar_motorista(entregas=0)
+        segundo = criar_motorista(entregas=1)
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == primeiro
+
+        Motorista.objects.filter(pk=primeiro.pk).update(disponivel=False)
+
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == segundo
+
+    def test_versao_compartilhada_forca_recarga(self, cidade, criar_motorista):
+        """Testa que outra versão no cache (outro processo) faz a cidade ser recarregada."""
+        primeiro = criar_motorista(entregas=0)
+        segundo = criar_motorista(entregas=1)
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == primeiro
+
+        Motorista.objects.filter(pk=primeiro.pk).update(entregas_concluidas=5)
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == primeiro
+
+        cache.incr(f"motoristas:fila:{cidade.id}:versao")
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == segundo
+
+    def test_limpar_recarrega_do_banco(self, cidade, criar_motorista):
+        """Testa que após descartar as filas a seleção continua correta."""
+        motorista = criar_motorista()
+        filas.limpar()
+
+        assert AtribuicaoService.buscar_motorista_disponivel(cidade) == motorista
@@ -0,0 +1,216 @@
+"""Testes para as transições de estado em massa."""
+
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.contas.models import Profile, Role
+from apps.motoristas.models import (
+    AtribuicaoPedido,
+    CargaConsolidada,
+    CategoriaCNH,
+    Motorista,
+    StatusAtribuicao,
+    StatusCarga,
+)
+from apps.motoristas.services import AtribuicaoService
+from apps.motoristas.transicoes import TransicaoEmMassaService
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.models import Cidade, Rota
+from apps.veiculos.models import EspecificacaoVeiculo, TipoCombustivel, TipoVeiculo, Veiculo
+
+
+@pytest.mark.django_db
+class TestTransicaoEmMassaService:
+    """Testes do service de transições em massa."""
+
+    @pytest.fixture
+    def cenario(self, django_user_model):
+        """Cria cinco atribuições em andamento de São Paulo para duas cidades."""
+        sp = Cidade.objects.create(nome="São Paulo", estado="SP")
+        rj = Cidade.objects.create(nome="Rio de Janeiro", estado="RJ")
+        bh = Cidade.objects.create(nome="Belo Horizonte", estado="MG")
+        espec = EspecificacaoVeiculo.objects.create(
+            tipo=TipoVeiculo.VAN,
+            combustivel_principal=TipoCombustivel.DIESEL,
+            rendimento_principal=10.0,
+            carga_maxima=1500,
+            velocidade_media=80,
+            reducao_rendimento_principal=0.001,
+        )
+        cliente = django_user_model.objects.create_user(username="cliente_massa", password="senha123")
+
+        atribuicoes = []
+        for i in range(5):
+            user = django_user_model.objects.create_user(username=f"motorista_massa_{i}", password="senha123")
+            profile = Profile.objects.get(user=user)
+            profile.role = Role.MOTORISTA
+            profile.save()
+            motorista = Motorista.objects.create(
+                profile=profile, sede_atual=sp, cnh_categoria=CategoriaCNH.D, disponivel=False, entregas_concluidas=i
+            )
+            veiculo = Veiculo.objects.create(
+                especificacao=espec,
+                marca="Fiat",
+                modelo="Ducato",
+                placa=f"MAS{i}000",
+                ano=2020,
+                cor="Branco",
+                sede_atual=sp,
+            )
+            pedido = Pedido.objects.create(
+                cliente=cliente,
+                cidade_origem="São Paulo - São Paulo",
+                cidade_destino="Rio de Janeiro - Rio de Janeiro" if i % 2 else "Belo Horizonte - Minas Gerais",
+                peso_carga=Decimal("100"),
+                prazo_desejado=3,
+                status=StatusPedido.EM_TRANSPORTE,
+            )
+            atribuicoes.append(
+                AtribuicaoPedido.objects.create(
+                    pedido=pedido, motorista=motorista, veiculo=veiculo, status=StatusAtribuicao.EM_ANDAMENTO
+                )
+            )
+        return {"sp": sp, "rj": rj, "bh": bh, "atribuicoes": atribuicoes}
+
+    def test_concluir_em_massa(self, cenario):
+        """Testa que concluir em massa tem o mesmo efeito que concluir uma a uma."""
+        ids = [a.id for a in cenario["atribuicoes"]]
+
+        resultado = TransicaoEmMassaService.concluir(ids)
+
+        assert sorted(resultado.processadas) == sorted(ids)
+        for i, atribuicao in enumerate(cenario["atribuicoes"]):
+            atribuicao.refresh_from_db()
+            atribuicao.motorista.refresh_from_db()
+            atribuicao.veiculo.refresh_from_db()
+            atribuicao.pedido.refresh_from_db()
+            destino = cenario["rj"] if i % 2 else cenario["bh"]
+            assert atribuicao.status == StatusAtribuicao.CONCLUIDO
+            assert atribuicao.pedido.status == StatusPedido.CONCLUIDO
+            assert atribuicao.motorista.sede_atual == destino
+            assert atribuicao.motorista.disponivel is True
+            assert atribuicao.motorista.entregas_concluidas == i + 1
+            assert atribuicao.veiculo.sede_atual == destino
+
+    def test_concluir_em_massa_com_poucas_consultas(self, cenario, django_assert_max_num_queries):
+        """Testa que o número de consultas não cresce com o número de entregas."""
+        ids = [a.id for a in cenario["atribuicoes"]]
+
+        with django_assert_max_num_queries(11):
+            TransicaoEmMassaService.concluir(ids)
+
+    def test_motorista_concluido_volta_para_a_fila(self, cenario):
+        """Testa que a fila da cidade de destino enxerga o motorista liberado em massa."""
+        atribuicao = cenario["atribuicoes"][1]
+        assert AtribuicaoService.buscar_motorista_disponivel(cenario["rj"]) is None
+
+        TransicaoEmMassaService.concluir([atribuicao.id])
+
+        assert AtribuicaoService.buscar_motorista_disponivel(cenario["rj"]) == atribuicao.motorista
+
+    def test_ignora_status_invalido_e_inexistente(self, cenario):
+        """Testa que atribuições concluídas ou inexistentes são reportadas e não alteradas."""
+        primeira = cenario["atribuicoes"][0]
+        TransicaoEmMassaService.concluir([primeira.id])
+
+        resultado = TransicaoEmMassaService.concluir([primeira.id, 999999])
+
+        assert resultado.processadas == []
+        assert set(resultado.ignoradas) == {primeira.id, 999999}
+        primeira.motorista.refresh_from_db()
+        assert primeira.motorista.entregas_concluidas == 1
+
+    def test_cancelar_em_massa(self, cenario):
+        """Testa que cancelar libera motoristas e devolve pedidos para aprovados."""
+        ids = [a.id for a in cenario["atribuicoes"][:2]]
+
+        resultado = TransicaoEmMassaService.cancelar(ids, motivo="Fechamento do dia")
+
+        assert sorted(resultado.processadas) == sorted(ids)
+        for atribuicao in cenario["atribuicoes"][:2]:
+            atribuicao.refresh_from_db()
+            assert atribuicao.status == StatusAtribuicao.CANCELADO
+            assert atribuicao.observacoes == "Fechamento do dia"
+            assert Motorista.objects.get(pk=atribuicao.motorista_id).disponivel is True
+            assert Pedido.objects.get(pk=atribuicao.pedido_id).status == StatusPedido.APROVADO
+
+    def test_iniciar_apenas_pendentes(self, cenario):
+        """Testa que iniciar só afeta atribuições pendentes."""
+        pendente = cenario["atribuicoes"][0]
+        pendente.status = StatusAtribuicao.PENDENTE
+        pendente.save()
+
+        resultado = TransicaoEmMassaService.iniciar([pendente.id, cenario["atribuicoes"][1].id])
+
+        assert resultado.processadas == [pendente.id]
+        pendente.refresh_from_db()
+        assert pendente.status == StatusAtribuicao.EM_ANDAMENTO
+
+    def test_concluir_pendente_preenche_inicio(self, cenario):
+        """Testa que concluir direto de PENDENTE não deixa `iniciado_em` vazio."""
+        pendente, em_andamento = cenario["atribuicoes"][:2]
+        AtribuicaoPedido.objects.filter(pk=pendente.pk).update(status=StatusAtribuicao.PENDENTE, iniciado_em=None)
+        inicio = em_andamento.iniciado_em
+
+        TransicaoEmMassaService.concluir([pendente.id, em_andamento.id])
+
+        pendente.refresh_from_db()
+        em_andamento.refresh_from_db()
+        assert pendente.iniciado_em == pendente.finalizado_em
+        assert em_andamento.iniciado_em == inicio
+
+    @pytest.fixture
+    def carga(self, cenario):
+        """Coloca as duas primeiras atribuições em uma carga consolidada do mesmo motorista."""
+        primeira, segunda = cenario["atribuicoes"][:2]
+        rota = Rota.objects.create(origem=cenario["sp"], destino=cenario["bh"], distancia_km=Decimal("580"))
+        carga = CargaConsolidada.objects.create(
+            rota=rota,
+            veiculo=primeira.veiculo,
+            motorista=primeira.motorista,
+            janela_inicio=timezone.localdate(),
+            peso_total=Decimal("200"),
+            custo_viagem=Decimal("900"),
+            status=StatusCarga.EM_ANDAMENTO,
+        )
+        AtribuicaoPedido.objects.filter(pk__in=[primeira.pk, segunda.pk]).update(
+            carga=carga, motorista=primeira.motorista, veiculo=primeira.veiculo
+        )
+        return carga
+
+    def test_concluir_parte_da_carga_mantem_motorista_ocupado(self, cenario, carga):
+        """Testa que o motorista da carga só é liberado quando o último pedido termina."""
+        primeira, segunda = cenario["atribuicoes"][:2]
+
+        TransicaoEmMassaService.concluir([primeira.id])
+
+        carga.refresh_from_db()
+        assert carga.status == StatusCarga.EM_ANDAMENTO
+        assert Motorista.objects.get(pk=carga.motorista_id).disponivel is False
+
+        TransicaoEmMassaService.cancelar([segunda.id])
+
+        carga.refresh_from_db()
+        assert carga.status == StatusCarga.CONCLUIDA
+        assert Motorista.objects.get(pk=carga.motorista_id).disponivel is True
+
+    def test_cancelar_carga_inteira(self, cenario, carga):
+        """Testa que cancelar todos os pedidos da carga cancela a carga."""
+        TransicaoEmMassaService.cancelar([a.id for a in cenario["atribuicoes"][:2]])
+
+        carga.refresh_from_db()
+        assert carga.status == StatusCarga.CANCELADA
+        assert Motorista.objects.get(pk=carga.motorista_id).disponivel is True
+
+    def test_comando_conclui_todas_em_andamento(self, cenario):
+        """Testa o comando de fechamento do dia."""
+        saida = StringIO()
+
+        call_command("transicionar_entregas", "concluir", "--todas-em-andamento", stdout=saida)
+
+        assert "5 atribuição(ões) atualizada(s)" in saida.getvalue()
+        assert not AtribuicaoPedido.objects.filter(status=StatusAtribuicao.EM_ANDAMENTO).exists()
@@ -0,0 +1,280 @@
+"""
+Transições de estado em massa para atribuições (iniciar, concluir e cancelar várias entregas)
+"""
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import reduce
+from operator import or_
+from typing import Dict, List
+
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.gestao import contadores
+from apps.gestao.cache_relatorios import invalidar_relatorios
+from apps.motoristas.filas import filas
+from apps.motoristas.models import AtribuicaoPedido, Motorista, StatusAtribuicao
+from apps.motoristas.services import AtribuicaoService
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.models import Cidade
+from apps.veiculos.models import Veiculo
+
+
+class AcaoTransicao:
+    INICIAR = "iniciar"
+    CONCLUIR = "concluir"
+    CANCELAR = "cancelar"
+
+    CHOICES = [(INICIAR, "Iniciar"), (CONCLUIR, "Concluir"), (CANCELAR, "Cancelar")]
+
+
+@dataclass
+class ResultadoTransicao:
+    """Resumo de uma transição em massa."""
+
+    processadas: List[int] = field(default_factory=list)
+    ignoradas: Dict[int, str] = field(default_factory=dict)
+
+
+class TransicaoEmMassaService:
+    """
+    Service para mudar o status de muitas atribuições com poucas consultas
+
+    Em vez de um `save()` completo por objeto, cada método carrega as atribuições em
+    uma consulta e grava com `update()`/`bulk_update()` por conjunto, usando `F()` para
+    incrementos. Como essas gravações não disparam signals, as filas de motoristas das
+    cidades afetadas são invalidadas ao final e as mudanças de status dos pedidos são
+    registradas nos contadores dos dashboards e invalidam o cache de relatórios.
+    """
+
+    @classmethod
+    def _carregar(cls, atribuicao_ids, status_validos, resultado):
+        """Carrega as atribuições e separa as que não estão em um status válido"""
+        atribuicoes = list(
+            AtribuicaoPedido.objects.filter(id__in=atribuicao_ids).select_related("pedido").order_by("id")
+        )
+        encontradas = {atribuicao.id for atribuicao in atribuicoes}
+        for atribuicao_id in atribuicao_ids:
+            if atribuicao_id not in encontradas:
+                resultado.ignoradas[atribuicao_id] = "Atribuição não encontrada."
+
+        validas = []
+        for atribuicao in atribuicoes:
+            if atribuicao.status in status_validos:
+                validas.append(atribuicao)
+            else:
+                resultado.ignoradas[atribuicao.id] = f"Status atual: {atribuicao.get_status_display()}."
+        return validas
+
+    @staticmethod
+    def _invalidar_filas(cidade_ids):
+        """Invalida as filas agora e de novo após o commit (outro processo pode ter lido o estado anterior)"""
+        cidade_ids = set(cidade_ids)
+        for cidade_id in cidade_ids:
+            filas.invalidar_cidade(cidade_id)
+        transaction.on_commit(lambda: [filas.invalidar_cidade(cidade_id) for cidade_id in cidade_ids])
+
+    @staticmethod
+    def _motoristas_em_cargas_abertas(atribuicoes, agora):
+        """
+        Encerra as cargas das atribuições que terminaram todas as entregas
+
+        Returns:
+            Ids dos motoristas cujas cargas ainda têm pedidos em aberto
+        """
+        abertas = AtribuicaoService.encerrar_cargas([atribuicao.carga_id for atribuicao in atribuicoes], agora)
+        return {atribuicao.motorista_id for atribuicao in atribuicoes if atribuicao.carga_id in abertas}
+
+    @classmethod
+    def resolver_cidades(cls, textos):
+        """
+        Resolve textos de cidade ("Cidade - Estado") com uma única consulta
+
+        Args:
+            textos: Iterável com as cidades como gravadas nos pedidos
+
+        Returns:
+            Dicionário {texto: Cidade ou None}
+        """
+        nomes = {texto: AtribuicaoService.extrair_nome_cidade(texto).lower() for texto in set(textos)}
+        if not nomes:
+            return {}
+
+        filtro = reduce(or_, (Q(nome__iexact=nome) for nome in set(nomes.values())))
+        por_nome = {}
+        for cidade in Cidade.objects.filter(filtro, ativa=True).order_by("id"):
+            por_nome.setdefault(cidade.nome.lower(), cidade)
+
+        return {texto: por_nome.get(nome) for texto, nome in nomes.items()}
+
+    @classmethod
+    @transaction.atomic
+    def iniciar(cls, atribuicao_ids) -> ResultadoTransicao:
+        """
+        Inicia várias entregas pendentes (PENDENTE -> EM_ANDAMENTO)
+
+        Args:
+            atribuicao_ids: Ids das atribuições
+
+        Returns:
+            ResultadoTransicao
+        """
+        resultado = ResultadoTransicao()
+        atribuicoes = cls._carregar(atribuicao_ids, [StatusAtribuicao.PENDENTE], resultado)
+
+        resultado.processadas = [atribuicao.id for atribuicao in atribuicoes]
+        agora = timezone.now()
+        AtribuicaoPedido.objects.filter(id__in=resultado.processadas).update(
+            status=StatusAtribuicao.EM_ANDAMENTO, iniciado_em=agora, updated_at=agora
+        )
+        AtribuicaoService.iniciar_cargas([atribuicao.carga_id for atribuicao in atribuicoes], agora)
+        return resultado
+
+    @classmethod
+    @transaction.atomic
+    def concluir(cls, atribuicao_ids) -> ResultadoTransicao:
+        """
+        Conclui várias entregas de uma vez
+
+        Motoristas e veículos passam para a cidade de destino e os motoristas recebem o
+        incremento de entregas concluídas. Os motoristas voltam a ficar disponíveis, exceto
+        os de cargas consolidadas que ainda têm pedidos em aberto. Entregas concluídas
+        direto de PENDENTE recebem `iniciado_em` igual ao instante da conclusão.
+
+        Args:
+            atribuicao_ids: Ids das atribuições
+
+        Returns:
+            ResultadoTransicao
+        """
+        resultado = ResultadoTransicao()
+        atribuicoes = cls._carregar(
+            atribuicao_ids, [StatusAtribuicao.PENDENTE, StatusAtribuicao.EM_ANDAMENTO], resultado
+        )
+
+        destinos = cls.resolver_cidades(atribuicao.pedido.cidade_destino for atribuicao in atribuicoes)
+        concluidas = []
+        for atribuicao in atribuicoes:
+            if destinos.get(atribuicao.pedido.cidade_destino) is None:
+                resultado.ignoradas[
+                    atribuicao.id
+                ] = f"Cidade de destino '{atribuicao.pedido.cidade_destino}' não encontrada no sistema."
+            else:
+                concluidas.append(atribuicao)
+
+        if not concluidas:
+            return resultado
+
+        agora = timezone.now()
+        destino_motorista = {}
+        destino_veiculo = {}
+        for atribuicao in concluidas:
+            cidade = destinos[atribuicao.pedido.cidade_destino]
+            destino_motorista[atribuicao.motorista_id] = cidade
+            destino_veiculo[atribuicao.veiculo_id] = cidade
+
+        cidades_afetadas = set(
+            Motorista.objects.filter(id__in=destino_motorista).values_list("sede_atual_id", flat=True)
+        ) | {cidade.id for cidade in destino_motorista.values()}
+
+        resultado.processadas = [atribuicao.id for atribuicao in concluidas]
+        AtribuicaoPedido.objects.filter(id__in=resultado.processadas).update(
+            status=StatusAtribuicao.CONCLUIDO,
+            iniciado_em=Coalesce(F("iniciado_em"), Value(agora)),
+            finalizado_em=agora,
+            updated_at=agora,
+        )
+        retidos = cls._motoristas_em_cargas_abertas(concluidas, agora)
+
+        Motorista.objects.bulk_update(
+            [
+                Motorista(id=motorista_id, sede_atual=cidade, disponivel=motorista_id not in retidos, updated_at=agora)
+                for motorista_id, cidade in destino_motorista.items()
+            ],
+            ["sede_atual", "disponivel", "updated_at"],
+        )
+        entregas_por_motorista = Counter(atribuicao.motorista_id for atribuicao in concluidas)
+        motoristas_por_incremento = defaultdict(list)
+        for motorista_id, quantidade in entregas_por_motorista.items():
+            motoristas_por_incremento[quantidade].append(motorista_id)
+        for quantidade, motorista_ids in motoristas_por_incremento.items():
+            Motorista.objects.filter(id__in=motorista_ids).update(
+                entregas_concluidas=F("entregas_concluidas") + quantidade
+            )
+
+        Veiculo.objects.bulk_update(
+            [
+                Veiculo(id=veiculo_id, sede_atual=cidade, updated_at=agora)
+                for veiculo_id, cidade in destino_veiculo.items()
+            ],
+            ["sede_atual", "updated_at"],
+        )
+
+        Pedido.objects.filter(id__in=[atribuicao.pedido_id for atribuicao in concluidas]).update(
+            status=StatusPedido.CONCLUIDO, concluido_em=agora, updated_at=agora
+        )
+        contadores.registrar_transicoes(
+            "pedido", [(atribuicao.pedido.status, StatusPedido.CONCLUIDO) for atribuicao in concluidas]
+        )
+        invalidar_relatorios()
+
+        cls._invalidar_filas(cidades_afetadas)
+        return resultado
+
+    @classmethod
+    @transaction.atomic
+    def cancelar(cls, atribuicao_ids, motivo=None) -> ResultadoTransicao:
+        """
+        Cancela várias atribuições, libera os motoristas e devolve os pedidos para aprovados
+
+        Motoristas de cargas consolidadas que ainda têm pedidos em aberto continuam indisponíveis.
+
+        Args:
+            atribuicao_ids: Ids das atribuições
+            motivo: Motivo do cancelamento (opcional)
+
+        Returns:
+            ResultadoTransicao
+        """
+        resultado = ResultadoTransicao()
+        atribuicoes = cls._carregar(
+            atribuicao_ids, [StatusAtribuicao.PENDENTE, StatusAtribuicao.EM_ANDAMENTO], resultado
+        )
+        if not atribuicoes:
+            return resultado
+
+        agora = timezone.now()
+        resultado.processadas = [atribuicao.id for atribuicao in atribuicoes]
+        campos = {"status": StatusAtribuicao.CANCELADO, "finalizado_em": agora, "updated_at": agora}
+        if motivo:
+            campos["observacoes"] = motivo
+        AtribuicaoPedido.objects.filter(id__in=resultado.processadas).update(**campos)
+
+        motorista_ids = {atribuicao.motorista_id for atribuicao in atribuicoes}
+        motorista_ids -= cls._motoristas_em_cargas_abertas(atribuicoes, agora)
+        Motorista.objects.filter(id__in=motorista_ids).update(disponivel=True, updated_at=agora)
+
+        Pedido.objects.filter(id__in=[atribuicao.pedido_id for atribuicao in atribuicoes]).update(
+            status=StatusPedido.APROVADO, updated_at=agora
+        )
+        contadores.registrar_transicoes(
+            "pedido", [(atribuicao.pedido.status, StatusPedido.APROVADO) for atribuicao in atribuicoes]
+        )
+        invalidar_relatorios()
+
+        cls._invalidar_filas(Motorista.objects.filter(id__in=motorista_ids).values_list("sede_atual_id", flat=True))
+        return resultado
+
+    @classmethod
+    def executar(cls, acao, atribuicao_ids, motivo=None) -> ResultadoTransicao:
+        """Executa a transição indicada por `acao` (ver AcaoTransicao)"""
+        if acao == AcaoTransicao.INICIAR:
+            return cls.iniciar(atribuicao_ids)
+        if acao == AcaoTransicao.CONCLUIR:
+            return cls.concluir(atribuicao_ids)
+        if acao == AcaoTransicao.CANCELAR:
+            return cls.cancelar(atribuicao_ids, motivo=motivo)
+        raise ValueError(f"Ação inválida: {acao}")
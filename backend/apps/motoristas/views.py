@@ -6,8 +6,10 @@ from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
 
+from apps.contas.acesso import papel_de
 from apps.contas.models import Role
 from .models import Motorista, AtribuicaoPedido, ProblemaEntrega, StatusAtribuicao, StatusProblema
+from .services import AtribuicaoService
 
 
 def require_motorista(view_func):
@@ -18,13 +20,13 @@ def require_motorista(view_func):
             messages.error(request, "Você precisa estar logado.")
             return redirect("contas:login")
 
-        try:
-            if request.user.profile.role != Role.MOTORISTA:
-                messages.error(request, "Acesso restrito a motoristas.")
-                return redirect("home")
-        except Exception:
+        papel = papel_de(request.user)
+        if papel is None:
             messages.error(request, "Perfil não encontrado.")
             return redirect("home")
+        if papel != Role.MOTORISTA:
+            messages.error(request, "Acesso restrito a motoristas.")
+            return redirect("home")
 
         return view_func(request, *args, **kwargs)
 
@@ -251,8 +253,11 @@ def iniciar_entrega(request, atribuicao_id):
         messages.error(request, "Esta entrega não está pendente.")
         return redirect("motoristas:dashboard")
 
-    # Verificar se já tem outra entrega em andamento
-    em_andamento = AtribuicaoPedido.objects.filter(motorista=motorista, status=StatusAtribuicao.EM_ANDAMENTO).exists()
+    # Verificar se já tem outra entrega em andamento (pedidos da mesma carga seguem juntos)
+    em_andamento = AtribuicaoPedido.objects.filter(motorista=motorista, status=StatusAtribuicao.EM_ANDAMENTO)
+    if atribuicao.carga_id:
+        em_andamento = em_andamento.exclude(carga_id=atribuicao.carga_id)
+    em_andamento = em_andamento.exists()
 
     if em_andamento:
         messages.error(
@@ -265,6 +270,7 @@ def iniciar_entrega(request, atribuicao_id):
         # Mudar status para EM_ANDAMENTO
         atribuicao.status = StatusAtribuicao.EM_ANDAMENTO
         atribuicao.save()
+        AtribuicaoService.iniciar_cargas([atribuicao.carga_id])
         messages.success(request, f"Entrega do Pedido #{atribuicao.pedido.id} iniciada com sucesso!")
     except Exception as e:
         messages.error(request, f"Erro ao iniciar entrega: {str(e)}")
@@ -296,8 +302,6 @@ def concluir_entrega(request, atribuicao_id):
 
     try:
         # Usar o service para concluir entrega
-        from .services import AtribuicaoService
-
         AtribuicaoService.concluir_entrega(atribuicao)
         messages.success(request, "Entrega concluída com sucesso!")
     except Exception as e:
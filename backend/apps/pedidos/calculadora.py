@@ -3,7 +3,7 @@ Calculadora de custos de transporte baseada nas regras do Zé do Caminhão.
 """
 
 from decimal import Decimal
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from dataclasses import dataclass
 from apps.veiculos.models import Veiculo, TipoCombustivel
 from apps.rotas.models import ConfiguracaoPreco, Rota
@@ -159,6 +159,45 @@ class CalculadoraCustos:
             motivo_recusa=motivo_recusa,
         )
 
+    def calcular_rateio_consolidado(
+        self,
+        veiculo: Veiculo,
+        pesos_kg: Dict[int, Decimal],
+        distancia_km: Decimal,
+        pedagio_valor: Decimal,
+    ) -> Tuple[ResultadoCalculo, Dict[int, Decimal]]:
+        """
+        Calcula o custo de uma viagem com vários pedidos e o rateio por pedido.
+
+        O custo da viagem é calculado com o peso total da carga e dividido
+        proporcionalmente ao peso de cada pedido. A diferença de arredondamento
+        fica com o pedido mais pesado.
+
+        Args:
+            veiculo: Veículo que fará a viagem
+            pesos_kg: Dicionário {id do pedido: peso em kg}
+            distancia_km: Distância da rota em km
+            pedagio_valor: Valor do pedágio na rota
+
+        Returns:
+            Tupla (resultado da viagem completa, {id do pedido: custo rateado})
+        """
+        peso_total = sum(pesos_kg.values(), Decimal("0"))
+        resultado = self.calcular_custo_veiculo(veiculo, peso_total, distancia_km, None, pedagio_valor)
+
+        custo_viagem = resultado.custo_total.quantize(Decimal("0.01"))
+        rateio = {}
+        if peso_total > 0:
+            for pedido_id, peso in pesos_kg.items():
+                rateio[pedido_id] = (custo_viagem * peso / peso_total).quantize(Decimal("0.01"))
+
+            diferenca = custo_viagem - sum(rateio.values(), Decimal("0"))
+            if diferenca:
+                mais_pesado = max(pesos_kg, key=pesos_kg.get)
+                rateio[mais_pesado] += diferenca
+
+        return resultado, rateio
+
     def calcular_melhor_opcao(
         self,
         peso_carga_kg: Decimal,
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-19 02:25
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def preencher_concluido_em(apps, schema_editor):
+    """Pedidos já concluídos usam updated_at como melhor aproximação da data de conclusão"""
+    Pedido = apps.get_model("pedidos", "Pedido")
+    Pedido.objects.filter(status="concluido", concluido_em__isnull=True).update(concluido_em=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0004_pedido_cotacao_custo_beneficio_tempo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='concluido_em',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Data de conclusão da entrega', null=True, verbose_name='Concluído em'),
+        ),
+        migrations.AlterField(
+            model_name='pedido',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+        migrations.RunPython(preencher_concluido_em, migrations.RunPython.noop),
+    ]
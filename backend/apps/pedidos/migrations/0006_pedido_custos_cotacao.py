@@ -0,0 +1,58 @@
+# Generated by Django 5.0.7 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0005_pedido_concluido_em'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='cotacao_custo_beneficio_combustivel',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Combustível (R$) - Melhor Custo-Benefício'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='cotacao_custo_beneficio_litros',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Litros - Melhor Custo-Benefício'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='cotacao_economico_combustivel',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Combustível (R$) - Mais Econômico'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='cotacao_economico_litros',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Litros - Mais Econômico'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='cotacao_rapido_combustivel',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Combustível (R$) - Mais Rápido'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='cotacao_rapido_litros',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Litros - Mais Rápido'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='custo_combustivel',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Custo de Combustível'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='custo_pedagio',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Custo de Pedágio'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='litros_combustivel',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Litros de Combustível'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-19 02:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0006_pedido_custos_cotacao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['cidade_origem', 'cidade_destino'], name='pedido_rota_idx'),
+        ),
+    ]
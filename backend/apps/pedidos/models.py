@@ -1,6 +1,7 @@
 from django.contrib.auth.models import User
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 
 
@@ -65,6 +66,12 @@ class Pedido(models.Model):
     cotacao_economico_veiculo = models.CharField(
         max_length=100, blank=True, null=True, verbose_name="Veículo - Mais Econômico"
     )
+    cotacao_economico_litros = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Litros - Mais Econômico"
+    )
+    cotacao_economico_combustivel = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Combustível (R$) - Mais Econômico"
+    )
 
     cotacao_rapido_valor = models.DecimalField(
         max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Valor - Mais Rápido"
@@ -75,6 +82,12 @@ class Pedido(models.Model):
     cotacao_rapido_veiculo = models.CharField(
         max_length=100, blank=True, null=True, verbose_name="Veículo - Mais Rápido"
     )
+    cotacao_rapido_litros = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Litros - Mais Rápido"
+    )
+    cotacao_rapido_combustivel = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Combustível (R$) - Mais Rápido"
+    )
 
     cotacao_custo_beneficio_valor = models.DecimalField(
         max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Valor - Melhor Custo-Benefício"
@@ -85,6 +98,12 @@ class Pedido(models.Model):
     cotacao_custo_beneficio_veiculo = models.CharField(
         max_length=100, blank=True, null=True, verbose_name="Veículo - Melhor Custo-Benefício"
     )
+    cotacao_custo_beneficio_litros = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Litros - Melhor Custo-Benefício"
+    )
+    cotacao_custo_beneficio_combustivel = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Combustível (R$) - Melhor Custo-Benefício"
+    )
 
     # Campos que serão preenchidos pelo gerente posteriormente
     preco_final = models.DecimalField(
@@ -102,6 +121,17 @@ class Pedido(models.Model):
         max_length=100, blank=True, null=True, verbose_name="Veículo Final", help_text="Veículo definido pelo gerente"
     )
 
+    # Custos da cotação registrados no momento da confirmação (usados nos relatórios)
+    litros_combustivel = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Litros de Combustível"
+    )
+    custo_combustivel = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Custo de Combustível"
+    )
+    custo_pedagio = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Custo de Pedágio"
+    )
+
     status = models.CharField(
         max_length=20, choices=StatusPedido.choices, default=StatusPedido.COTACAO, verbose_name="Status"
     )
@@ -111,12 +141,22 @@ class Pedido(models.Model):
         verbose_name="Número do Pedido (Cliente)",
         help_text="Número sequencial do pedido por cliente",
     )
-    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Atualizado em")
+    concluido_em = models.DateTimeField(
+        blank=True, null=True, db_index=True, verbose_name="Concluído em", help_text="Data de conclusão da entrega"
+    )
 
     class Meta:
         verbose_name = "Pedido"
         verbose_name_plural = "Pedidos"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["cidade_origem", "cidade_destino"], name="pedido_rota_idx"),
+            # Paginação por cursor das listagens (ordem -created_at, -id)
+            models.Index(fields=["created_at", "id"], name="pedido_criacao_idx"),
+            models.Index(fields=["status", "created_at", "id"], name="pedido_status_criacao_idx"),
+            models.Index(fields=["cliente", "created_at", "id"], name="pedido_cliente_criacao_idx"),
+        ]
 
     def __str__(self):
         nome = self.cliente.get_full_name() or self.cliente.username
@@ -154,4 +194,11 @@ class Pedido(models.Model):
                 self.numero_pedido_cliente = ultimo_pedido.numero_pedido_cliente + 1
             else:
                 self.numero_pedido_cliente = 1
+
+        # Registra a data real de conclusão na primeira vez que o pedido é concluído
+        if self.status == StatusPedido.CONCLUIDO and self.concluido_em is None:
+            self.concluido_em = timezone.now()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "concluido_em"}
         super().save(*args, **kwargs)
@@ -4,6 +4,7 @@ from django.urls import reverse
 from decimal import Decimal
 from apps.pedidos.models import Pedido, StatusPedido
 from apps.rotas.models import Cidade, Rota, Estado
+from apps.veiculos.models import EspecificacaoVeiculo, TipoCombustivel, TipoVeiculo, Veiculo
 
 
 class PedidoViewTest(TestCase):
@@ -54,6 +55,37 @@ class PedidoViewTest(TestCase):
         response_cotacao = self.client.get(reverse("pedidos:gerar_cotacao", args=[pedido.id]))
         self.assertEqual(response_cotacao.status_code, 302)  # Redireciona pois não tem rota
 
+    def test_confirmar_pedido_registra_custos_da_cotacao(self):
+        """Testa que a confirmação grava os custos calculados da opção escolhida"""
+        espec = EspecificacaoVeiculo.objects.create(
+            tipo=TipoVeiculo.VAN,
+            combustivel_principal=TipoCombustivel.DIESEL,
+            rendimento_principal=10.0,
+            carga_maxima=3500.0,
+            velocidade_media=80,
+            reducao_rendimento_principal=0.001,
+        )
+        Veiculo.objects.create(
+            especificacao=espec, marca="Ford", modelo="Transit", placa="CUS1234", ano=2022, cor="Branco", ativo=True
+        )
+        pedido = Pedido.objects.create(
+            cliente=self.user,
+            cidade_origem="São Paulo - São Paulo",
+            cidade_destino="Rio de Janeiro - Rio de Janeiro",
+            peso_carga=Decimal("100"),
+            prazo_desejado=7,
+        )
+
+        self.client.get(reverse("pedidos:gerar_cotacao", args=[pedido.id]))
+        self.client.post(reverse("pedidos:confirmar", args=[pedido.id]), {"opcao": "rapido"})
+
+        pedido.refresh_from_db()
+        self.assertEqual(pedido.status, StatusPedido.PENDENTE)
+        self.assertEqual(pedido.custo_pedagio, Decimal("15.50"))
+        self.assertEqual(pedido.litros_combustivel, pedido.cotacao_rapido_litros)
+        self.assertEqual(pedido.custo_combustivel, pedido.cotacao_rapido_combustivel)
+        self.assertGreater(pedido.custo_combustivel, Decimal("0"))
+
     def test_criar_pedido_post_invalido(self):
         """Testa criação com dados inválidos"""
         data = {
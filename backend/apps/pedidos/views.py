@@ -1,10 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 from decimal import Decimal
-from apps.contas.models import Profile, Role
+from apps.contas.acesso import papel_de, tem_papel
+from apps.contas.models import Role
+from apps.gestao.exportacao import exportar_pedidos, formato_solicitado
+from apps.gestao.paginacao import paginar_por_cursor
 from apps.rotas.models import Rota, Cidade
+from core.limite_taxa import limitar_taxa
 from .models import Pedido, StatusPedido, OpcaoCotacao
 from .forms import PedidoForm
 from .calculadora import CalculadoraCustos
@@ -14,12 +17,9 @@ from .calculadora import CalculadoraCustos
 def pedido_criar(request):
     """Criar novo pedido - bloqueado para owners"""
     # Verificar se é owner
-    try:
-        if request.user.profile.role == Role.OWNER:
-            messages.warning(request, "Owners não podem criar pedidos. Use a área de gestão para gerenciar o sistema.")
-            return redirect("gestao:dashboard_dono")
-    except Profile.DoesNotExist:
-        pass
+    if papel_de(request.user) == Role.OWNER:
+        messages.warning(request, "Owners não podem criar pedidos. Use a área de gestão para gerenciar o sistema.")
+        return redirect("gestao:dashboard_dono")
 
     if request.method == "POST":
         form = PedidoForm(request.POST)
@@ -37,19 +37,17 @@ def pedido_criar(request):
 
 
 @login_required
+@limitar_taxa(capacidade=20, por_minuto=10)
 def gerar_cotacao(request, pedido_id):
     """Exibir opções de cotação para o pedido"""
     # Verificar se é owner
-    try:
-        if request.user.profile.role == Role.OWNER:
-            messages.error(
-                request,
-                "Owners não podem escolher opções de pedidos. "
-                "Use a área de gestão para gerenciar os pedidos dos clientes.",
-            )
-            return redirect("pedidos:listar")
-    except Profile.DoesNotExist:
-        pass
+    if papel_de(request.user) == Role.OWNER:
+        messages.error(
+            request,
+            "Owners não podem escolher opções de pedidos. "
+            "Use a área de gestão para gerenciar os pedidos dos clientes.",
+        )
+        return redirect("pedidos:listar")
 
     pedido = get_object_or_404(Pedido, id=pedido_id, cliente=request.user)
 
@@ -123,6 +121,16 @@ def gerar_cotacao(request, pedido_id):
     pedido.cotacao_custo_beneficio_tempo = melhor_cb.tempo_viagem_horas
     pedido.cotacao_custo_beneficio_veiculo = str(melhor_cb.veiculo)
 
+    # Custos calculados de cada opção (copiados para o pedido na confirmação)
+    centavos = Decimal("0.01")
+    pedido.cotacao_economico_litros = menor_custo.litros_necessarios.quantize(centavos)
+    pedido.cotacao_economico_combustivel = menor_custo.custo_combustivel.quantize(centavos)
+    pedido.cotacao_rapido_litros = mais_rapido.litros_necessarios.quantize(centavos)
+    pedido.cotacao_rapido_combustivel = mais_rapido.custo_combustivel.quantize(centavos)
+    pedido.cotacao_custo_beneficio_litros = melhor_cb.litros_necessarios.quantize(centavos)
+    pedido.cotacao_custo_beneficio_combustivel = melhor_cb.custo_combustivel.quantize(centavos)
+    pedido.custo_pedagio = rota.pedagio_valor
+
     pedido.save()
 
     # Preparar dados para o template
@@ -196,15 +204,12 @@ def gerar_cotacao(request, pedido_id):
 def confirmar_pedido(request, pedido_id):
     """Confirmar pedido com a opção escolhida"""
     # Verificar se é owner
-    try:
-        if request.user.profile.role == Role.OWNER:
-            messages.error(
-                request,
-                "Owners não podem confirmar pedidos de clientes. " "Use a área de gestão para gerenciar os pedidos.",
-            )
-            return redirect("pedidos:listar")
-    except Profile.DoesNotExist:
-        pass
+    if papel_de(request.user) == Role.OWNER:
+        messages.error(
+            request,
+            "Owners não podem confirmar pedidos de clientes. " "Use a área de gestão para gerenciar os pedidos.",
+        )
+        return redirect("pedidos:listar")
 
     pedido = get_object_or_404(Pedido, id=pedido_id, cliente=request.user)
 
@@ -243,16 +248,22 @@ def confirmar_pedido(request, pedido_id):
             pedido.preco_final = pedido.cotacao_economico_valor
             pedido.prazo_final = calcular_prazo_com_logistica(pedido.cotacao_economico_tempo, DIAS_LOGISTICA_ECONOMICO)
             pedido.veiculo_final = pedido.cotacao_economico_veiculo
+            pedido.litros_combustivel = pedido.cotacao_economico_litros
+            pedido.custo_combustivel = pedido.cotacao_economico_combustivel
         elif opcao == "rapido":
             pedido.preco_final = pedido.cotacao_rapido_valor
             pedido.prazo_final = calcular_prazo_com_logistica(pedido.cotacao_rapido_tempo, DIAS_LOGISTICA_RAPIDO)
             pedido.veiculo_final = pedido.cotacao_rapido_veiculo
+            pedido.litros_combustivel = pedido.cotacao_rapido_litros
+            pedido.custo_combustivel = pedido.cotacao_rapido_combustivel
         else:  # custo_beneficio
             pedido.preco_final = pedido.cotacao_custo_beneficio_valor
             pedido.prazo_final = calcular_prazo_com_logistica(
                 pedido.cotacao_custo_beneficio_tempo, DIAS_LOGISTICA_CUSTO_BENEFICIO
             )
             pedido.veiculo_final = pedido.cotacao_custo_beneficio_veiculo
+            pedido.litros_combustivel = pedido.cotacao_custo_beneficio_litros
+            pedido.custo_combustivel = pedido.cotacao_custo_beneficio_combustivel
 
         pedido.status = StatusPedido.PENDENTE
         pedido.save()
@@ -284,40 +295,33 @@ def cancelar_pedido(request, pedido_id):
 @login_required
 def pedido_listar(request):
     """Listar pedidos - todos para owner, apenas do cliente para outros"""
-    try:
-        profile = request.user.profile
-        # Owner vê todos os pedidos
-        if profile.role == Role.OWNER or profile.role == Role.GERENTE:
-            pedidos_list = (
-                Pedido.objects.all()
-                .select_related("cliente")
-                .select_related("atribuicao__motorista__profile__user", "atribuicao__veiculo")
-                .order_by("-created_at")
-            )
-        else:
-            # Outros usuários veem apenas seus pedidos
-            pedidos_list = (
-                Pedido.objects.filter(cliente=request.user)
-                .select_related("atribuicao__motorista__profile__user", "atribuicao__veiculo")
-                .order_by("-created_at")
-            )
-    except Profile.DoesNotExist:
-        # Se não tem perfil, vê apenas seus pedidos
+    # Owner e gerente veem todos os pedidos; os demais usuários, apenas os seus
+    if tem_papel(request.user, Role.OWNER, Role.GERENTE):
+        pedidos_list = (
+            Pedido.objects.all()
+            .select_related("cliente")
+            .select_related("atribuicao__motorista__profile__user", "atribuicao__veiculo")
+            .order_by("-created_at")
+        )
+    else:
         pedidos_list = (
             Pedido.objects.filter(cliente=request.user)
             .select_related("atribuicao__motorista__profile__user", "atribuicao__veiculo")
             .order_by("-created_at")
         )
 
+    formato = formato_solicitado(request)
+    if formato:
+        return exportar_pedidos(formato, pedidos_list)
+
     # Paginação
-    paginator = Paginator(pedidos_list, 10)  # 10 pedidos por página
-    page_number = request.GET.get("page")
-    pedidos = paginator.get_page(page_number)
+    pedidos = paginar_por_cursor(request, pedidos_list, 10)  # 10 pedidos por página
 
     return render(request, "pedidos/listar.html", {"pedidos": pedidos})
 
 
 @login_required
+@limitar_taxa(capacidade=30, por_minuto=60)
 def api_destinos_disponiveis(request):
     """API para retornar destinos disponíveis baseado na origem selecionada"""
     from django.http import JsonResponse
@@ -0,0 +1,284 @@
+"""
+Otimização de itinerários com várias paradas sobre o grafo de cidades e rotas.
+"""
+
+import heapq
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+
+from django.db.models import Count, Max
+
+from .models import Cidade, Rota
+
+# Fator aplicado à distância em linha reta quando não existe caminho cadastrado entre duas cidades
+FATOR_RODOVIARIO = 1.3
+
+# Distância usada quando não há caminho nem coordenadas (desencoraja a parada sem torná-la inviável)
+DISTANCIA_DESCONHECIDA = 1_000_000.0
+
+
+class TipoParada:
+    COLETA = "coleta"
+    ENTREGA = "entrega"
+
+
+@dataclass(frozen=True)
+class Parada:
+    """Parada do itinerário: coleta ou entrega de um pedido em uma cidade."""
+
+    cidade_id: int
+    tipo: str
+    pedido_id: Optional[int] = None
+
+
+@dataclass
+class Itinerario:
+    """Sequência de paradas otimizada."""
+
+    partida_id: int
+    paradas: List[Parada]
+    distancia_km: Decimal
+    distancia_inicial_km: Decimal
+    iteracoes: int = 0
+    tempo_ms: float = 0.0
+    trechos: List[Decimal] = field(default_factory=list)
+
+
+class GrafoRotas:
+    """
+    Grafo dirigido das rotas ativas com menores caminhos memorizados por origem.
+
+    Cada chamada a `distancia` para uma nova origem roda um Dijkstra e guarda
+    todas as distâncias a partir dela, de modo que a matriz de distâncias de um
+    itinerário com n cidades custa no máximo n execuções.
+    """
+
+    def __init__(self, arestas, coordenadas):
+        self.adjacencia: Dict[int, List[tuple]] = {}
+        for origem_id, destino_id, distancia in arestas:
+            self.adjacencia.setdefault(origem_id, []).append((destino_id, float(distancia)))
+        self.coordenadas = coordenadas
+        self._menores_caminhos: Dict[int, Dict[int, float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def carregar(cls):
+        arestas = Rota.objects.filter(ativa=True).values_list("origem_id", "destino_id", "distancia_km")
+        coordenadas = {
+            cidade_id: (float(latitude), float(longitude))
+            for cidade_id, latitude, longitude in Cidade.objects.filter(
+                latitude__isnull=False, longitude__isnull=False
+            ).values_list("id", "latitude", "longitude")
+        }
+        return cls(list(arestas), coordenadas)
+
+    def _dijkstra(self, origem_id):
+        distancias = {origem_id: 0.0}
+        fila = [(0.0, origem_id)]
+        while fila:
+            distancia, cidade_id = heapq.heappop(fila)
+            if distancia > distancias.get(cidade_id, math.inf):
+                continue
+            for vizinho_id, peso in self.adjacencia.get(cidade_id, ()):
+                nova = distancia + peso
+                if nova < distancias.get(vizinho_id, math.inf):
+                    distancias[vizinho_id] = nova
+                    heapq.heappush(fila, (nova, vizinho_id))
+        return distancias
+
+    def _linha_reta(self, origem_id, destino_id):
+        if origem_id not in self.coordenadas or destino_id not in self.coordenadas:
+            return DISTANCIA_DESCONHECIDA
+        lat1, lon1 = map(math.radians, self.coordenadas[origem_id])
+        lat2, lon2 = map(math.radians, self.coordenadas[destino_id])
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 6371.0 * 2 * math.asin(math.sqrt(a)) * FATOR_RODOVIARIO
+
+    def distancia(self, origem_id, destino_id):
+        """Menor distância rodoviária em km (ou estimativa em linha reta se não houver caminho)."""
+        if origem_id == destino_id:
+            return 0.0
+        caminhos = self._menores_caminhos.get(origem_id)
+        if caminhos is None:
+            with self._lock:
+                if origem_id not in self._menores_caminhos:
+                    self._menores_caminhos[origem_id] = self._dijkstra(origem_id)
+                caminhos = self._menores_caminhos[origem_id]
+        if destino_id in caminhos:
+            return caminhos[destino_id]
+        return self._linha_reta(origem_id, destino_id)
+
+
+_cache = {"versao": None, "grafo": None}
+_cache_lock = threading.Lock()
+
+
+def obter_grafo():
+    """Retorna o grafo de rotas em cache, recarregando quando rotas ou cidades mudam."""
+    rotas = Rota.objects.aggregate(total=Count("id"), alterado=Max("updated_at"))
+    cidades = Cidade.objects.aggregate(total=Count("id"), alterado=Max("updated_at"))
+    versao = (rotas["total"], rotas["alterado"], cidades["total"], cidades["alterado"])
+
+    with _cache_lock:
+        if _cache["versao"] != versao:
+            _cache["grafo"] = GrafoRotas.carregar()
+            _cache["versao"] = versao
+        return _cache["grafo"]
+
+
+class OtimizadorItinerario:
+    """
+    Ordena paradas de coleta e entrega minimizando a distância percorrida.
+
+    Constrói uma solução inicial por vizinho mais próximo e a melhora com 2-opt e
+    Or-opt até não haver melhoria ou o orçamento de tempo acabar. A coleta de um
+    pedido sempre precede a sua entrega.
+    """
+
+    def __init__(self, grafo: Optional[GrafoRotas] = None, tempo_limite_ms: float = 50.0):
+        self.grafo = grafo
+        self.tempo_limite_ms = tempo_limite_ms
+
+    def otimizar(self, partida_id: int, paradas: Sequence[Parada]) -> Itinerario:
+        """
+        Calcula a sequência de paradas.
+
+        Args:
+            partida_id: Cidade onde o veículo está
+            paradas: Paradas a visitar
+
+        Returns:
+            Itinerario com a melhor sequência encontrada
+        """
+        inicio = time.perf_counter()
+        prazo = inicio + self.tempo_limite_ms / 1000
+        grafo = self.grafo or obter_grafo()
+
+        nos = [Parada(partida_id, TipoParada.COLETA)] + list(paradas)
+        cidades = sorted({parada.cidade_id for parada in nos})
+        indice = {cidade_id: i for i, cidade_id in enumerate(cidades)}
+        matriz = [[grafo.distancia(a, b) for b in cidades] for a in cidades]
+        dist = [[matriz[indice[a.cidade_id]][indice[b.cidade_id]] for b in nos] for a in nos]
+
+        coletas = {parada.pedido_id: i for i, parada in enumerate(nos) if i and parada.tipo == TipoParada.COLETA}
+        antecessor = {}
+        for i, parada in enumerate(nos):
+            if parada.tipo == TipoParada.ENTREGA and parada.pedido_id in coletas:
+                antecessor[i] = coletas[parada.pedido_id]
+
+        sequencia = self._vizinho_mais_proximo(dist, antecessor)
+        distancia_inicial = self._custo(sequencia, dist)
+
+        iteracoes = 0
+        melhorou = True
+        while melhorou and time.perf_counter() < prazo:
+            melhorou = self._dois_opt(sequencia, dist, antecessor, prazo)
+            melhorou = self._or_opt(sequencia, dist, antecessor, prazo) or melhorou
+            iteracoes += 1
+
+        trechos = [Decimal(str(round(dist[a][b], 2))) for a, b in zip(sequencia, sequencia[1:])]
+        return Itinerario(
+            partida_id=partida_id,
+            paradas=[nos[i] for i in sequencia[1:]],
+            distancia_km=Decimal(str(round(self._custo(sequencia, dist), 2))),
+            distancia_inicial_km=Decimal(str(round(distancia_inicial, 2))),
+            iteracoes=iteracoes,
+            tempo_ms=(time.perf_counter() - inicio) * 1000,
+            trechos=trechos,
+        )
+
+    @staticmethod
+    def _custo(sequencia, dist):
+        return sum(dist[a][b] for a, b in zip(sequencia, sequencia[1:]))
+
+    @staticmethod
+    def _viavel(sequencia, antecessor):
+        posicao = {no: i for i, no in enumerate(sequencia)}
+        return all(posicao[coleta] < posicao[entrega] for entrega, coleta in antecessor.items())
+
+    @staticmethod
+    def _vizinho_mais_proximo(dist, antecessor):
+        pendentes = set(range(1, len(dist)))
+        sequencia = [0]
+        while pendentes:
+            atual = sequencia[-1]
+            liberados = [no for no in pendentes if antecessor.get(no) not in pendentes]
+            proximo = min(liberados, key=lambda no: (dist[atual][no], no))
+            sequencia.append(proximo)
+            pendentes.remove(proximo)
+        return sequencia
+
+    def _dois_opt(self, sequencia, dist, antecessor, prazo):
+        """Inverte trechos da sequência quando isso encurta o percurso."""
+        melhorou = False
+        n = len(sequencia)
+        custo_atual = self._custo(sequencia, dist)
+        for i in range(1, n - 1):
+            if time.perf_counter() >= prazo:
+                break
+            for j in range(i + 1, n):
+                a, b = sequencia[i - 1], sequencia[i]
+                c = sequencia[j]
+                d = sequencia[j + 1] if j + 1 < n else None
+                ganho = dist[a][b] + (dist[c][d] if d is not None else 0)
+                perda = dist[a][c] + (dist[b][d] if d is not None else 0)
+                if perda >= ganho - 1e-9:
+                    continue
+                candidata = sequencia[:i] + sequencia[i : j + 1][::-1] + sequencia[j + 1 :]
+                custo = self._custo(candidata, dist)
+                if custo < custo_atual - 1e-9 and self._viavel(candidata, antecessor):
+                    sequencia[:] = candidata
+                    custo_atual = custo
+                    melhorou = True
+        return melhorou
+
+    def _or_opt(self, sequencia, dist, antecessor, prazo):
+        """Move blocos de 1 a 3 paradas consecutivas para a melhor posição."""
+        melhorou = False
+        custo_atual = self._custo(sequencia, dist)
+        for tamanho in (1, 2, 3):
+            i = 1
+            while i + tamanho <= len(sequencia):
+                if time.perf_counter() >= prazo:
+                    return melhorou
+                bloco = sequencia[i : i + tamanho]
+                restante = sequencia[:i] + sequencia[i + tamanho :]
+                melhor = None
+                for j in range(1, len(restante) + 1):
+                    if j == i:
+                        continue
+                    candidata = restante[:j] + bloco + restante[j:]
+                    custo = self._custo(candidata, dist)
+                    if custo < custo_atual - 1e-9 and self._viavel(candidata, antecessor):
+                        melhor, custo_atual = candidata, custo
+                if melhor is not None:
+                    sequencia[:] = melhor
+                    melhorou = True
+                i += 1
+        return melhorou
+
+
+def paradas_dos_pedidos(pedidos, resolver_cidade):
+    """
+    Monta as paradas de coleta e entrega de uma lista de pedidos.
+
+    Args:
+        pedidos: Pedidos a transportar
+        resolver_cidade: Função que recebe o texto da cidade do pedido e retorna a Cidade (ou None)
+
+    Returns:
+        Lista de Parada (pedidos com cidade desconhecida são ignorados)
+    """
+    paradas = []
+    for pedido in pedidos:
+        origem = resolver_cidade(pedido.cidade_origem)
+        destino = resolver_cidade(pedido.cidade_destino)
+        if not origem or not destino:
+            continue
+        paradas.append(Parada(origem.id, TipoParada.COLETA, pedido.id))
+        paradas.append(Parada(destino.id, TipoParada.ENTREGA, pedido.id))
+    return paradas
@@ -0,0 +1,145 @@
+"""
+Testes para o otimizador de itinerários.
+"""
+
+import itertools
+import random
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.contas.models import Role
+from apps.pedidos.models import Pedido, StatusPedido
+from apps.rotas.itinerario import GrafoRotas, OtimizadorItinerario, Parada, TipoParada, obter_grafo
+from apps.rotas.models import Cidade, Estado, Rota
+
+
+def grafo_completo(pontos):
+    """Monta um grafo com arestas entre todos os pontos pela distância euclidiana."""
+    arestas = [
+        (a, b, ((xa - xb) ** 2 + (ya - yb) ** 2) ** 0.5)
+        for a, (xa, ya) in pontos.items()
+        for b, (xb, yb) in pontos.items()
+        if a != b
+    ]
+    return GrafoRotas(arestas, {})
+
+
+class GrafoRotasTest(TestCase):
+    """Testes para o grafo de rotas."""
+
+    def test_menor_caminho_passa_por_cidade_intermediaria(self):
+        """Testa que a distância usa o menor caminho e não só a aresta direta."""
+        grafo = GrafoRotas([(1, 2, 100), (2, 3, 100), (1, 3, 500)], {})
+        self.assertEqual(grafo.distancia(1, 3), 200)
+
+    def test_sem_caminho_usa_linha_reta(self):
+        """Testa a estimativa em linha reta quando não há rota cadastrada."""
+        grafo = GrafoRotas([], {1: (-23.55, -46.63), 2: (-22.91, -43.17)})
+        self.assertGreater(grafo.distancia(1, 2), 350)
+        self.assertLess(grafo.distancia(1, 2), 500)
+
+    def test_cache_recarrega_quando_rotas_mudam(self):
+        """Testa que o grafo em cache é recarregado ao cadastrar uma rota."""
+        sp = Cidade.objects.create(nome="São Paulo", estado=Estado.SP)
+        rj = Cidade.objects.create(nome="Rio de Janeiro", estado=Estado.RJ)
+        grafo = obter_grafo()
+        self.assertIs(obter_grafo(), grafo)
+
+        Rota.objects.create(origem=sp, destino=rj, distancia_km=Decimal("430"))
+        self.assertIsNot(obter_grafo(), grafo)
+        self.assertEqual(obter_grafo().distancia(sp.id, rj.id), 430)
+
+
+class OtimizadorItinerarioTest(TestCase):
+    """Testes para o otimizador de itinerários."""
+
+    def test_encontra_sequencia_otima_em_instancia_pequena(self):
+        """Testa que o resultado coincide com a força bruta em poucas paradas."""
+        pontos = {0: (0, 0), 1: (10, 0), 2: (0, 10), 3: (10, 10), 4: (5, 3), 5: (2, 8)}
+        grafo = grafo_completo(pontos)
+        paradas = [Parada(cidade_id, TipoParada.ENTREGA, cidade_id) for cidade_id in range(1, 6)]
+
+        itinerario = OtimizadorItinerario(grafo, tempo_limite_ms=500).otimizar(0, paradas)
+
+        melhor = min(
+            sum(grafo.distancia(a, b) for a, b in zip((0,) + ordem, ordem))
+            for ordem in itertools.permutations(range(1, 6))
+        )
+        self.assertAlmostEqual(float(itinerario.distancia_km), melhor, places=1)
+        self.assertLessEqual(itinerario.distancia_km, itinerario.distancia_inicial_km)
+
+    def test_coleta_precede_entrega(self):
+        """Testa que a entrega de um pedido nunca vem antes da sua coleta."""
+        pontos = {0: (0, 0), 1: (1, 0), 2: (50, 0), 3: (2, 0)}
+        grafo = grafo_completo(pontos)
+        paradas = [
+            Parada(2, TipoParada.COLETA, 10),
+            Parada(1, TipoParada.ENTREGA, 10),
+            Parada(3, TipoParada.COLETA, 20),
+            Parada(1, TipoParada.ENTREGA, 20),
+        ]
+
+        itinerario = OtimizadorItinerario(grafo).otimizar(0, paradas)
+
+        for pedido_id in (10, 20):
+            coleta = itinerario.paradas.index(Parada(2 if pedido_id == 10 else 3, TipoParada.COLETA, pedido_id))
+            entrega = itinerario.paradas.index(Parada(1, TipoParada.ENTREGA, pedido_id))
+            self.assertLess(coleta, entrega)
+
+    def test_cinquenta_paradas_respeita_orcamento_de_tempo(self):
+        """Testa que 50 paradas são resolvidas dentro do orçamento de tempo."""
+        aleatorio = random.Random(42)
+        pontos = {i: (aleatorio.uniform(0, 1000), aleatorio.uniform(0, 1000)) for i in range(51)}
+        grafo = grafo_completo(pontos)
+        paradas = [Parada(i, TipoParada.ENTREGA, i) for i in range(1, 51)]
+
+        itinerario = OtimizadorItinerario(grafo, tempo_limite_ms=50).otimizar(0, paradas)
+
+        self.assertEqual(len(itinerario.paradas), 50)
+        self.assertLess(itinerario.tempo_ms, 500)
+        self.assertLessEqual(itinerario.distancia_km, itinerario.distancia_inicial_km)
+
+
+class ApiItinerarioTest(TestCase):
+    """Testes para a API de itinerário."""
+
+    def setUp(self):
+        self.gerente = User.objects.create_user(username="gerente", password="senha123")
+        self.gerente.profile.role = Role.GERENTE
+        self.gerente.profile.save()
+
+        self.campinas = Cidade.objects.create(nome="Campinas", estado=Estado.SP)
+        self.santos = Cidade.objects.create(nome="Santos", estado=Estado.SP)
+        Rota.objects.create(origem=self.campinas, destino=self.santos, distancia_km=Decimal("200"))
+        self.pedido = Pedido.objects.create(
+            cliente=self.gerente,
+            cidade_origem="Campinas - São Paulo",
+            cidade_destino="Santos - São Paulo",
+            peso_carga=Decimal("100"),
+            prazo_desejado=3,
+            status=StatusPedido.APROVADO,
+        )
+
+    def test_retorna_paradas_ordenadas(self):
+        """Testa que a API devolve a coleta seguida da entrega."""
+        self.client.force_login(self.gerente)
+        response = self.client.get(
+            reverse("rotas:api_itinerario"), {"partida": self.campinas.id, "pedidos": str(self.pedido.id)}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        dados = response.json()
+        self.assertEqual([p["tipo"] for p in dados["paradas"]], [TipoParada.COLETA, TipoParada.ENTREGA])
+        self.assertEqual(dados["paradas"][1]["cidade"], "Santos")
+        self.assertEqual(dados["distancia_km"], 200.0)
+
+    def test_cliente_sem_permissao(self):
+        """Testa que clientes não acessam a API."""
+        cliente = User.objects.create_user(username="cliente", password="senha123")
+        self.client.force_login(cliente)
+        response = self.client.get(reverse("rotas:api_itinerario"), {"partida": self.campinas.id})
+
+        self.assertEqual(response.status_code, 403)
@@ -21,4 +21,5 @@ urlpatterns = [
     path("gerenciar/rotas/nova/", views.criar_rota, name="criar_rota"),
     path("gerenciar/rotas/<int:rota_id>/editar/", views.editar_rota, name="editar_rota"),
     path("gerenciar/precos/", views.configurar_precos, name="configurar_precos"),
+    path("gerenciar/api/itinerario/", views.api_itinerario, name="api_itinerario"),
 ]
@@ -5,20 +5,21 @@ Views para gerenciamento de rotas e cidades.
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.db.models import Q
-from apps.contas.models import Profile, Role
+from django.http import JsonResponse
+from apps.contas.acesso import tem_papel
+from apps.contas.models import Role
+from apps.gestao.paginacao import paginar_por_cursor
+from apps.motoristas.consolidacao import ConsolidacaoService
+from apps.motoristas.models import CargaConsolidada
+from apps.pedidos.models import Pedido
 from .models import Cidade, Rota, ConfiguracaoPreco
 from .forms import CidadeForm, RotaForm, ConfiguracaoPrecoForm
 
 
 def verificar_permissao_gestao(user):
     """Verifica se usuário tem permissão para gerenciar rotas (owner ou gerente)."""
-    try:
-        profile = user.profile
-        return profile.role in [Role.OWNER, Role.GERENTE]
-    except Profile.DoesNotExist:
-        return False
+    return tem_papel(user, Role.OWNER, Role.GERENTE)
 
 
 # ============================================================
@@ -178,9 +179,7 @@ def listar_cidades(request):
         cidades = cidades.filter(ativa=False)
 
     # Paginação
-    paginator = Paginator(cidades, 20)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar_por_cursor(request, cidades, 20)
 
     context = {
         "titulo": "Gerenciar Cidades",
@@ -257,9 +256,7 @@ def listar_rotas(request):
         rotas = rotas.filter(ativa=False)
 
     # Paginação
-    paginator = Paginator(rotas, 20)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginar_por_cursor(request, rotas, 20)
 
     context = {
         "titulo": "Gerenciar Rotas",
@@ -354,3 +351,51 @@ def configurar_precos(request):
 
     context = {"titulo": "Configurar Preços", "form": form, "config": config}
     return render(request, "rotas/configurar_precos.html", context)
+
+
+@login_required
+def api_itinerario(request):
+    """
+    API que retorna a ordem otimizada de coletas e entregas (apenas owner/gerente).
+
+    Parâmetros GET: `carga` (id de uma carga consolidada) ou `partida` (id da cidade)
+    e `pedidos` (ids separados por vírgula).
+    """
+    if not verificar_permissao_gestao(request.user):
+        return JsonResponse({"error": "Você não tem permissão para acessar esta área."}, status=403)
+
+    try:
+        carga_id = request.GET.get("carga")
+        if carga_id:
+            cargas = CargaConsolidada.objects.select_related("veiculo__sede_atual", "rota__origem")
+            carga = get_object_or_404(cargas, id=int(carga_id))
+            itinerario = ConsolidacaoService.itinerario_da_carga(carga)
+        else:
+            partida = get_object_or_404(Cidade, id=int(request.GET.get("partida", "")))
+            ids = [int(pedido_id) for pedido_id in request.GET.get("pedidos", "").split(",") if pedido_id.strip()]
+            itinerario = ConsolidacaoService.planejar_itinerario(partida, Pedido.objects.filter(id__in=ids))
+    except ValueError:
+        return JsonResponse({"error": "Parâmetros inválidos."}, status=400)
+
+    nomes = dict(Cidade.objects.filter(id__in={p.cidade_id for p in itinerario.paradas}).values_list("id", "nome"))
+    paradas = [
+        {
+            "ordem": ordem,
+            "cidade_id": parada.cidade_id,
+            "cidade": nomes.get(parada.cidade_id, ""),
+            "tipo": parada.tipo,
+            "pedido_id": parada.pedido_id,
+            "distancia_trecho_km": float(trecho),
+        }
+        for ordem, (parada, trecho) in enumerate(zip(itinerario.paradas, itinerario.trechos), start=1)
+    ]
+
+    return JsonResponse(
+        {
+            "partida_id": itinerario.partida_id,
+            "paradas": paradas,
+            "distancia_km": float(itinerario.distancia_km),
+            "distancia_inicial_km": float(itinerario.distancia_inicial_km),
+            "tempo_ms": round(itinerario.tempo_ms, 2),
+        }
+    )
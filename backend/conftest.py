@@ -5,6 +5,8 @@ Este arquivo configura marcadores personalizados e opções específicas
 para testes de frontend.
 """
 
+import pytest
+
 
 def pytest_configure(config):
     """
@@ -24,5 +26,24 @@ def pytest_configure(config):
     )
 
 
+@pytest.fixture(autouse=True)
+def limpar_caches_em_memoria():
+    """
+    Descarta caches e índices em memória entre testes.
+
+    O banco de testes é revertido a cada teste, então o que foi montado a partir
+    dele (filas de motoristas, agenda) não pode sobreviver ao teste seguinte.
+    """
+    from django.core.cache import cache
+
+    from apps.motoristas.agenda import agenda
+    from apps.motoristas.filas import filas
+
+    cache.clear()
+    filas.limpar()
+    agenda.limpar()
+    yield
+
+
 # Configuração para rodar o live server do Django nos testes do Selenium
 pytest_plugins = ["django"]
@@ -0,0 +1,220 @@
+"""
+Limite de taxa (token bucket) por usuário/IP e rota
+
+Cada combinação rota + cliente (usuário autenticado ou, na falta dele, IP) tem um
+balde com `capacidade` fichas que se recarrega a `por_minuto` fichas por minuto; cada
+requisição consome uma ficha e, com o balde vazio, a resposta é 429 com `Retry-After`
+sem executar a view.
+
+O balde é guardado como um único inteiro no cache (algoritmo GCRA, equivalente ao
+token bucket): o instante teórico, em milissegundos, em que o balde estará cheio de
+novo. Consumir uma ficha é um `incr` atômico desse valor, então requisições
+simultâneas em processos diferentes não se perdem quando o cache é compartilhado
+(Redis/Memcached). O cache usado é LIMITE_TAXA_CACHE (padrão: "default"); com o cache
+local em memória cada processo tem seus próprios baldes.
+
+Uso:
+- `@limitar_taxa(capacidade=..., por_minuto=...)` em views específicas
+- `LimiteTaxaMiddleware` + `LIMITES_TAXA = {"app:nome_da_url": {...}}` nas settings
+  para limitar rotas sem alterar o código delas
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+PREFIXO = "limite_taxa"
+
+# O estado de um balde ocioso só é descartado bem depois de ele voltar a ficar cheio
+MULTIPLICADOR_EXPIRACAO = 10
+
+
+@dataclass(frozen=True)
+class RegraLimite:
+    """Capacidade do balde e taxa de recarga"""
+
+    capacidade: int
+    por_minuto: float
+    metodos: tuple = ()
+
+    @property
+    def emissao_ms(self):
+        """Milissegundos para recarregar uma ficha"""
+        return max(math.ceil(60000 / self.por_minuto), 1)
+
+    def aplica_a(self, metodo):
+        return not self.metodos or metodo in self.metodos
+
+
+@dataclass(frozen=True)
+class Decisao:
+    """Resultado do consumo de uma ficha"""
+
+    permitido: bool
+    restantes: int
+    espera: int = 0
+
+
+def _cache():
+    return caches[getattr(settings, "LIMITE_TAXA_CACHE", "default")]
+
+
+def consumir(chave, regra: RegraLimite, agora_ms=None) -> Decisao:
+    """
+    Consome uma ficha do balde da chave
+
+    Args:
+        chave: Identificador do balde (rota + cliente)
+        regra: RegraLimite
+        agora_ms: Instante atual em milissegundos (testes)
+
+    Returns:
+        Decisao; `espera` em segundos quando negado
+    """
+    cache = _cache()
+    agora = int(time.time() * 1000) if agora_ms is None else agora_ms
+    emissao = regra.emissao_ms
+    limite = regra.capacidade * emissao
+    expiracao = math.ceil(limite * MULTIPLICADOR_EXPIRACAO / 1000)
+    chave = f"{PREFIXO}:{chave}"
+
+    if cache.add(chave, agora + emissao, expiracao):
+        return Decisao(True, regra.capacidade - 1)
+
+    try:
+        cheio_em = cache.incr(chave, emissao)
+    except ValueError:
+        # Expirou entre o add e o incr
+        cache.set(chave, agora + emissao, expiracao)
+        return Decisao(True, regra.capacidade - 1)
+
+    if cheio_em - emissao < agora:
+        # Balde ocioso (já cheio): recomeça a partir de agora
+        cheio_em = agora + emissao
+        cache.set(chave, cheio_em, expiracao)
+
+    excesso = cheio_em - agora - limite
+    if excesso > 0:
+        # Devolve a ficha: requisições negadas não aumentam a espera
+        cache.decr(chave, emissao)
+        cache.touch(chave, expiracao)
+        return Decisao(False, 0, espera=max(math.ceil(excesso / 1000), 1))
+
+    return Decisao(True, (limite - (cheio_em - agora)) // emissao)
+
+
+def ip_do_cliente(request):
+    """
+    IP do cliente
+
+    Atrás de um proxy reverso (ex.: Render), configure LIMITE_TAXA_CABECALHO_IP =
+    "HTTP_X_FORWARDED_FOR": o último endereço da lista é o que o proxy viu.
+    """
+    cabecalho = getattr(settings, "LIMITE_TAXA_CABECALHO_IP", None)
+    if cabecalho and request.META.get(cabecalho):
+        return request.META[cabecalho].split(",")[-1].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def chave_cliente(request):
+    """Usuário autenticado ou, na falta dele, o IP"""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"u{user.pk}"
+    return f"ip{ip_do_cliente(request)}"
+
+
+def resposta_limite_excedido(request, decisao: Decisao):
+    """429 com Retry-After; JSON para chamadas de API/AJAX"""
+    mensagem = f"Muitas requisições. Tente novamente em {decisao.espera} segundo(s)."
+    quer_json = (
+        "/api/" in request.path
+        or "application/json" in request.headers.get("Accept", "")
+        or request.headers.get("X-Requested-With") == "XMLHttpRequest"
+    )
+    if quer_json:
+        resposta = JsonResponse({"erro": mensagem}, status=429)
+    else:
+        resposta = HttpResponse(mensagem, status=429, content_type="text/plain; charset=utf-8")
+    resposta["Retry-After"] = str(decisao.espera)
+    return resposta
+
+
+def verificar(request, escopo, regra: RegraLimite):
+    """
+    Aplica a regra à requisição
+
+    Returns:
+        HttpResponse 429 se o limite foi excedido, None caso contrário
+    """
+    if not getattr(settings, "LIMITE_TAXA_ATIVO", True) or not regra.aplica_a(request.method):
+        return None
+    decisao = consumir(f"{escopo}:{chave_cliente(request)}", regra)
+    if decisao.permitido:
+        return None
+    return resposta_limite_excedido(request, decisao)
+
+
+def limitar_taxa(capacidade, por_minuto, escopo=None, metodos=()):
+    """
+    Decorator de view com limite de taxa por usuário/IP
+
+    Args:
+        capacidade: Requisições permitidas em rajada
+        por_minuto: Fichas recarregadas por minuto
+        escopo: Nome do balde (padrão: módulo.nome da view)
+        metodos: Métodos HTTP limitados (padrão: todos)
+    """
+    regra = RegraLimite(capacidade=capacidade, por_minuto=por_minuto, metodos=tuple(metodos))
+
+    def decorator(view):
+        nome = escopo or f"{view.__module__}.{view.__name__}"
+
+        @wraps(view)
+        def _view(request, *args, **kwargs):
+            resposta = verificar(request, nome, regra)
+            if resposta is not None:
+                return resposta
+            return view(request, *args, **kwargs)
+
+        _view.limite_taxa = regra
+        return _view
+
+    return decorator
+
+
+class LimiteTaxaMiddleware:
+    """
+    Aplica LIMITES_TAXA ({"app:nome_da_url": {"capacidade": ..., "por_minuto": ..., "metodos": [...]}})
+    às rotas pelo nome da URL. Views já decoradas com `limitar_taxa` são ignoradas.
+
+    Deve vir depois de AuthenticationMiddleware (a chave usa o usuário).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.regras = {
+            nome: RegraLimite(
+                capacidade=regra["capacidade"],
+                por_minuto=regra["por_minuto"],
+                metodos=tuple(regra.get("metodos", ())),
+            )
+            for nome, regra in getattr(settings, "LIMITES_TAXA", {}).items()
+        }
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.regras or hasattr(view_func, "limite_taxa"):
+            return None
+        nome = request.resolver_match.view_name if request.resolver_match else None
+        regra = self.regras.get(nome)
+        if regra is None:
+            return None
+        return verificar(request, nome, regra)
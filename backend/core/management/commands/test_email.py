@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from django.test import RequestFactory
 from django.contrib.sites.models import Site
+from apps.contas.emails import FilaEmails
 from apps.contas.views import send_email_change_confirmation
 from apps.contas.models import EmailChangeRequest
 
@@ -49,6 +50,10 @@ class Command(BaseCommand):
         # Testar o envio
         result = send_email_change_confirmation(email_change_request=email_request, request=request)
 
+        # O email vai para a fila de saída; envia agora em vez de esperar o worker
+        if result:
+            result = FilaEmails.processar().enviados > 0
+
         if result:
             self.stdout.write(self.style.SUCCESS("✅ Email enviado com sucesso!"))
             self.stdout.write("🔗 Verifique o MailHog em: http://localhost:8025")
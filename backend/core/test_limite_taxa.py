@@ -0,0 +1,108 @@
+"""
+Testes do limite de taxa (token bucket) por usuário/IP e rota
+"""
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from core.limite_taxa import LimiteTaxaMiddleware, RegraLimite, consumir, ip_do_cliente
+
+REGRA = RegraLimite(capacidade=3, por_minuto=60)  # uma ficha por segundo
+
+
+class TestConsumir:
+    """Testes do balde"""
+
+    def test_rajada_ate_a_capacidade(self):
+        decisoes = [consumir("teste", REGRA, agora_ms=0) for _ in range(4)]
+
+        assert [d.permitido for d in decisoes] == [True, True, True, False]
+        assert [d.restantes for d in decisoes[:3]] == [2, 1, 0]
+        assert decisoes[3].espera == 1
+
+    def test_recarga_proporcional_ao_tempo(self):
+        for _ in range(3):
+            consumir("teste", REGRA, agora_ms=0)
+
+        assert not consumir("teste", REGRA, agora_ms=500).permitido
+        assert consumir("teste", REGRA, agora_ms=1000).permitido
+        assert not consumir("teste", REGRA, agora_ms=1000).permitido
+
+    def test_negadas_nao_aumentam_a_espera(self):
+        for _ in range(3):
+            consumir("teste", REGRA, agora_ms=0)
+        for _ in range(20):
+            consumir("teste", REGRA, agora_ms=100)
+
+        assert consumir("teste", REGRA, agora_ms=1000).permitido
+
+    def test_balde_ocioso_volta_cheio(self):
+        for _ in range(3):
+            consumir("teste", REGRA, agora_ms=0)
+
+        decisao = consumir("teste", REGRA, agora_ms=60000)
+
+        assert decisao.permitido
+        assert decisao.restantes == 2
+
+    def test_baldes_independentes_por_chave(self):
+        for _ in range(3):
+            consumir("a", REGRA, agora_ms=0)
+
+        assert consumir("b", REGRA, agora_ms=0).permitido
+
+    @override_settings(LIMITE_TAXA_CABECALHO_IP="HTTP_X_FORWARDED_FOR")
+    def test_ip_pelo_proxy(self):
+        request = RequestFactory().get("/", HTTP_X_FORWARDED_FOR="1.1.1.1, 10.0.0.5", REMOTE_ADDR="10.0.0.1")
+
+        assert ip_do_cliente(request) == "10.0.0.5"
+
+
+@pytest.mark.django_db
+class TestLimiteNasViews:
+    """Testes do decorator e do middleware"""
+
+    @pytest.fixture
+    def cliente_logado(self, client):
+        user = User.objects.create_user(username="rajada@example.com", email="rajada@example.com", password="x")
+        client.force_login(user)
+        return client
+
+    def test_api_de_destinos_responde_429_com_retry_after(self, cliente_logado):
+        url = reverse("pedidos:api_destinos_disponiveis")
+        respostas = [cliente_logado.get(url, {"origem": "Campinas - SP"}) for _ in range(31)]
+
+        assert all(r.status_code == 200 for r in respostas[:30])
+        assert respostas[30].status_code == 429
+        assert int(respostas[30]["Retry-After"]) >= 1
+        assert "erro" in respostas[30].json()
+
+    def test_limite_por_usuario(self, cliente_logado, client):
+        url = reverse("pedidos:api_destinos_disponiveis")
+        for _ in range(31):
+            cliente_logado.get(url)
+
+        outro = User.objects.create_user(username="outro@example.com", email="outro@example.com", password="x")
+        client.force_login(outro)
+        assert client.get(url).status_code == 200
+
+    @override_settings(LIMITE_TAXA_ATIVO=False)
+    def test_desativado(self, cliente_logado):
+        url = reverse("pedidos:api_destinos_disponiveis")
+
+        assert all(cliente_logado.get(url).status_code == 200 for _ in range(40))
+
+    @override_settings(LIMITES_TAXA={"home": {"capacidade": 2, "por_minuto": 1}})
+    def test_middleware_limita_rota_por_nome(self):
+        middleware = LimiteTaxaMiddleware(lambda request: None)
+        request = RequestFactory().get("/", REMOTE_ADDR="203.0.113.9")
+        request.resolver_match = type("Match", (), {"view_name": "home"})()
+        request.user = type("Anonimo", (), {"is_authenticated": False})()
+
+        respostas = [middleware.process_view(request, lambda r: None, (), {}) for _ in range(3)]
+
+        assert respostas[:2] == [None, None]
+        assert respostas[2].status_code == 429
+        assert respostas[2]["Content-Type"].startswith("text/plain")
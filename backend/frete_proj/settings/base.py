@@ -59,6 +59,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.contas.middleware.PerfilUsuarioMiddleware",
+    "core.limite_taxa.LimiteTaxaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -89,6 +91,35 @@ AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",  # Fallback para admin e superuser
 ]
 
+# Cache: local em memória por padrão. Com vários processos (gunicorn workers), aponte
+# para um cache compartilhado para que as invalidações valham para todos, ex.:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://redis:6379/1
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "neocargo"),
+    }
+}
+
+# Sessões lidas do cache e gravadas também no banco (sobrevivem a um cache vazio)
+SESSION_ENGINE = os.getenv("SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
+
+# Segundos que usuário + perfil ficam no cache do login (apps.contas.cache_usuarios).
+# O cache local em memória é por processo e a invalidação não chega aos outros workers,
+# então nele o padrão é 0 (cache de usuários desligado)
+_CACHE_LOCAL = CACHES["default"]["BACKEND"].endswith("LocMemCache")
+CACHE_USUARIOS_TIMEOUT = int(os.getenv("CACHE_USUARIOS_TIMEOUT", "0" if _CACHE_LOCAL else "60"))
+
+# Limite de taxa por usuário/IP (core.limite_taxa). Os baldes ficam no cache
+# LIMITE_TAXA_CACHE; com vários processos ele precisa ser compartilhado para que o
+# limite valha para o conjunto. Atrás de proxy reverso informe o cabeçalho do IP real.
+LIMITE_TAXA_ATIVO = os.getenv("LIMITE_TAXA_ATIVO", "True").lower() == "true"
+LIMITE_TAXA_CACHE = os.getenv("LIMITE_TAXA_CACHE", "default")
+LIMITE_TAXA_CABECALHO_IP = os.getenv("LIMITE_TAXA_CABECALHO_IP") or None
+# Rotas limitadas pelo LimiteTaxaMiddleware, pelo nome da URL, ex.:
+# {"contas:login": {"capacidade": 10, "por_minuto": 5, "metodos": ["POST"]}}
+LIMITES_TAXA = {}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {